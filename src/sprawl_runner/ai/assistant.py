@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from typing import TYPE_CHECKING
 
 from openai import OpenAI
@@ -9,13 +11,7 @@ if TYPE_CHECKING:
     from openai.types.shared_params import FunctionDefinition
 
 
-def create_assistant(
-    name: str,
-    openai_api_key: str,
-    openai_model: str,
-    instructions: str,
-    tool_functions: list[FunctionDefinition],
-) -> str:
+def _get_tools(tool_functions: list[FunctionDefinition]) -> list[AssistantToolParam]:
     tools: list[AssistantToolParam] = []
 
     for function_definition in tool_functions:
@@ -25,8 +21,57 @@ def create_assistant(
         }
         tools.append(tool_param)
 
-    openai_client = OpenAI(api_key=openai_api_key)
+    return tools
+
+
+def assistant_fingerprint(
+    name: str,
+    openai_model: str,
+    instructions: str,
+    tool_functions: list[FunctionDefinition],
+) -> str:
+    """Hash an assistant's definition; tool order doesn't matter, since it depends on the file system."""
+    definition = {
+        "name": name,
+        "model": openai_model,
+        "instructions": instructions,
+        "tools": sorted(tool_functions, key=lambda function_definition: function_definition["name"]),
+    }
+    encoded = json.dumps(definition, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def create_assistant(
+    name: str,
+    openai_api_key: str,
+    openai_model: str,
+    instructions: str,
+    tool_functions: list[FunctionDefinition],
+    openai_client: OpenAI | None = None,
+) -> str:
+    # Reuse the session's pooled client when one is given.
+    if openai_client is None:
+        openai_client = OpenAI(api_key=openai_api_key)
+
     assistant = openai_client.beta.assistants.create(
-        name=name, instructions=instructions, model=openai_model, tools=tools
+        name=name, instructions=instructions, model=openai_model, tools=_get_tools(tool_functions)
+    )
+    return assistant.id
+
+
+def update_assistant(
+    assistant_id: str,
+    name: str,
+    openai_api_key: str,
+    openai_model: str,
+    instructions: str,
+    tool_functions: list[FunctionDefinition],
+    openai_client: OpenAI | None = None,
+) -> str:
+    if openai_client is None:
+        openai_client = OpenAI(api_key=openai_api_key)
+
+    assistant = openai_client.beta.assistants.update(
+        assistant_id, name=name, instructions=instructions, model=openai_model, tools=_get_tools(tool_functions)
     )
     return assistant.id
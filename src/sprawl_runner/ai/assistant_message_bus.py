@@ -1,13 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
+import threading
 import time
 from collections import deque
-from typing import TYPE_CHECKING
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Coroutine, Iterator, TypeVar
 
-from openai import OpenAI
+from openai import APIError
+
+from sprawl_runner.ai.client_manager import OpenAIClientManager
+from sprawl_runner.ai.compaction import (
+    CompactionEvent,
+    CompactionOptions,
+    NarrativeTurn,
+    count_chars,
+    get_seed_message,
+    get_summary_prompt,
+)
+from sprawl_runner.ai.deadlines import ReapedRun, RunDeadlineExceededError, RunDeadlines
+from sprawl_runner.ai.polling import PollingStrategy
+from sprawl_runner.ai.scheduler import RunScheduler, current_run_class, scheduled_as
+from sprawl_runner.ai.tool_dispatch import DispatchedCall, ToolDispatcher, ToolHandlerTraits, get_tool_handler_traits
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+from sprawl_runner.telemetry.tracing import Span, Tracer
 
 if TYPE_CHECKING:
+    from openai import AsyncOpenAI
     from openai.types.beta.thread import Thread
     from openai.types.beta.threads.message_content import MessageContent
     from openai.types.beta.threads.required_action_function_tool_call import (
@@ -15,33 +36,324 @@ if TYPE_CHECKING:
     )
     from openai.types.beta.threads.run import Run
     from openai.types.beta.threads.run_submit_tool_outputs_params import ToolOutput
+    from openai.types.chat import ChatCompletionMessageToolCall
+
+    from sprawl_runner.ai.backend import MessageBackend
+    from sprawl_runner.ai.chat_completions import ChatReply
+    from sprawl_runner.ai.types import RunClass, RunKind, ToolHandler, ToolHandlerEntry, ToolName
+
+_T = TypeVar("_T")
+
+# A reply is one or two messages; the cursor keeps older ones out of the page.
+NARRATIVE_MESSAGE_LIMIT = 4
+REAPED_RUN_HISTORY = 100
+
+
+def _seconds_between(start: Any, end: Any) -> float | None:
+    # Run timestamps are whole seconds, and unset until the run gets there.
+    if isinstance(start, (int, float)) and isinstance(end, (int, float)):
+        return float(end - start)
+    return None
+
+
+class RoundTrips:
+    """Counts the API requests made on behalf of a group of tool runs."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+
+class NarrativeReply:
+    """
+    A narrative reply that was started before anyone was ready to show it.
 
-    from sprawl_runner.ai.types import ToolHandler, ToolHandlerEntry, ToolName
+    Text pieces that arrive before a listener attaches are kept, and handed
+    over in order when wait() is called.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._deltas: list[str] = []
+        self._on_delta: Callable[[str], None] | None = None
+        self.message: Future[str] = Future()
+
+    def feed(self, delta: str) -> None:
+        with self._lock:
+            if self._on_delta is None:
+                self._deltas.append(delta)
+                return
+            on_delta = self._on_delta
+
+        on_delta(delta)
+
+    def resolve_from(self, future: Future[str]) -> None:
+        if future.cancelled():
+            self.message.cancel()
+        elif future.exception() is not None:
+            self.message.set_exception(future.exception())
+        else:
+            self.message.set_result(future.result())
+
+    def _listen(self, on_delta: Callable[[str], None] | None) -> None:
+        if on_delta:
+            with self._lock:
+                for delta in self._deltas:
+                    on_delta(delta)
+                self._deltas.clear()
+                self._on_delta = on_delta
+
+    def wait(self, on_delta: Callable[[str], None] | None = None, timeout: float | None = None) -> str:
+        self._listen(on_delta)
+        return self.message.result(timeout)
+
+    async def await_message(self, on_delta: Callable[[str], None] | None = None) -> str:
+        """Like wait(), but from a coroutine, so the event loop carries on meanwhile."""
+        self._listen(on_delta)
+        return await asyncio.wrap_future(self.message)
 
 
 class AssistantMessageBus:
-    def __init__(self, openai_api_key: str, openai_assistant_id: str) -> None:
+    """
+    Routes messages between the game and an OpenAI Assistant.
+
+    OpenAI traffic goes through the `a` prefixed coroutines so independent runs
+    proceed concurrently. The synchronous methods schedule those coroutines on an
+    event loop the bus runs in a background thread. Drive a bus either through
+    the synchronous methods or from one running event loop, not both.
+
+    A bus given a loop is hosted on it instead, next to other buses that share
+    its client manager and tool dispatcher; closing it leaves those, and the
+    loop, to whoever hosts it.
+
+    Narrative and tool runs use Assistants API threads and runs, unless the bus
+    is given another backend to speak to the model with.
+    """
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        openai_assistant_id: str,
+        client_manager: OpenAIClientManager | None = None,
+        *,
+        stream_narrative: bool = False,
+        polling: PollingStrategy | None = None,
+        tool_dispatcher: ToolDispatcher | None = None,
+        trace_sink: Callable[[Any], None] | None = None,
+        compaction: CompactionOptions | None = None,
+        metrics: MetricsRegistry | None = None,
+        tracer: Tracer | None = None,
+        deadlines: RunDeadlines | None = None,
+        scheduler: RunScheduler | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+        backend: MessageBackend | None = None,
+    ) -> None:
         self._openai_api_key = openai_api_key
+        self._client_manager = client_manager or OpenAIClientManager(openai_api_key)
         self._assistant_id = openai_assistant_id
         self._active_runs: deque[Run] = deque()
         self._tool_handlers: dict[ToolName, ToolHandler] = {}
+        self._tool_handler_traits: dict[ToolName, ToolHandlerTraits] = {}
+        self._tool_dispatcher = tool_dispatcher or ToolDispatcher()
         self._narrative_thread: Thread | None = None
+        self._narrative_thread_creation: asyncio.Future[Thread] | None = None
+        self._narrative_replies: set[Future[str]] = set()
+        # The newest message seen on each thread; only messages after it are fetched.
+        self._message_cursors: dict[str, str] = {}
+        # Gets every listed page of messages, for debugging.
+        self._trace_sink = trace_sink
+        self._compaction = compaction or CompactionOptions()
+        self._narrative_turns: list[NarrativeTurn] = []
+        # Characters of the message a compacted thread was seeded with.
+        self._narrative_seed_chars = 0
+        self._story_so_far = ""
+        self._narrative_context: Callable[[], str] | None = None
+        self._thinking_indicator: Callable[[], None] | None = None
+        self._narrative_compaction: asyncio.Task[CompactionEvent | None] | None = None
+        self._compaction_events: list[CompactionEvent] = []
+        self._stream_narrative = stream_narrative
+        self._run_started_at: dict[str, float] = {}
+        self._run_polls: dict[str, int] = {}
+        # Each tool run backs off on its own; the driver wakes up for whichever is due first.
+        self._run_poll_delays: dict[str, Iterator[float]] = {}
+        self._run_polls_due: dict[str, float] = {}
+        self._metrics = metrics or MetricsRegistry()
+        self._polling = polling or PollingStrategy(metrics=self._metrics)
+        self._tracer = tracer or Tracer()
+        # Tool runs are checked by the driver task; each keeps its own span open until it finishes.
+        self._run_spans: dict[str, Span] = {}
+        self._deadlines = deadlines or RunDeadlines()
+        # Every run started and not yet finished, of any kind, so they can all be cancelled.
+        self._outstanding_runs: dict[str, tuple[Run, RunKind]] = {}
+        self._reaped_runs: deque[ReapedRun] = deque(maxlen=REAPED_RUN_HISTORY)
+        self._scheduler = scheduler or RunScheduler(metrics=self._metrics)
+        # Tool runs are checked by the driver task, away from whoever started them.
+        self._run_classes: dict[str, RunClass] = {}
+        self._loop = loop
+        self._hosted = loop is not None
+        self._loop_thread: threading.Thread | None = None
+        self._run_completions: dict[str, asyncio.Future[Run]] = {}
+        self._run_tool_handlers: dict[str, dict[ToolName, ToolHandler]] = {}
+        self._run_round_trips: dict[str, RoundTrips] = {}
+        self._tool_run_driver: asyncio.Task[None] | None = None
+        # When the driver, asleep, next wakes up; None while it is checking runs.
+        self._tool_run_driver_wakes_at: float | None = None
+        self._backend = backend
+        if backend is not None:
+            backend.attach(self)
 
-    def _get_tool_handler(self, function_name) -> ToolHandler | None:
-        return self._tool_handlers.get(function_name)
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever,
+                name="assistant-message-bus",
+                daemon=True,
+            )
+            self._loop_thread.start()
 
-    def _process_tool_calls(self, tool_calls: list[RequiredActionFunctionToolCall]) -> list[ToolOutput]:
-        tool_outputs: list[ToolOutput] = []
+        return self._loop
 
-        for tool_call in tool_calls:
-            handler = self._get_tool_handler(tool_call.function.name)
+    def _submit(self, coroutine: Coroutine[Any, Any, _T]) -> Future[_T]:
+        # The caller's span carries over to the bus's loop.
+        return asyncio.run_coroutine_threadsafe(self._tracer.bind(coroutine), self._get_loop())
 
-            if handler:
-                arguments = json.loads(tool_call.function.arguments)
-                status = handler(arguments)
-            else:
-                status = "ERROR"
+    def _run(self, coroutine: Coroutine[Any, Any, _T]) -> _T:
+        return self._submit(coroutine).result()
+
+    @property
+    def client_manager(self) -> OpenAIClientManager:
+        return self._client_manager
+
+    @property
+    def polling(self) -> PollingStrategy:
+        return self._polling
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self._metrics
+
+    @property
+    def tracer(self) -> Tracer:
+        return self._tracer
+
+    @property
+    def scheduler(self) -> RunScheduler:
+        return self._scheduler
+
+    @property
+    def backend(self) -> MessageBackend | None:
+        return self._backend
+
+    @property
+    def compaction_events(self) -> list[CompactionEvent]:
+        return list(self._compaction_events)
 
+    @property
+    def reaped_runs(self) -> list[ReapedRun]:
+        """The latest runs that failed, expired, were cancelled or ran past their deadline."""
+        return list(self._reaped_runs)
+
+    def set_narrative_context(self, provider: Callable[[], str]) -> None:
+        """Set what describes the game world to a compacted narrative thread."""
+        self._narrative_context = provider
+
+    def set_thinking_indicator(self, indicator: Callable[[], None]) -> None:
+        """Set what is called each time a polled narrative run is checked on."""
+        self._thinking_indicator = indicator
+
+    async def aclose(self) -> None:
+        if self._backend is not None:
+            await self._backend.aclose()
+
+        if self._tool_run_driver and not self._tool_run_driver.done():
+            self._tool_run_driver.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._tool_run_driver
+
+        # Runs left going would keep costing tokens after the game is over.
+        if self._outstanding_runs:
+            await self.acancel_runs()
+
+        for completion in self._run_completions.values():
+            completion.cancel()
+        self._run_completions.clear()
+        self._end_run_spans()
+
+        if self._narrative_thread_creation and not self._narrative_thread_creation.done():
+            self._narrative_thread_creation.cancel()
+
+        if self._narrative_compaction and not self._narrative_compaction.done():
+            self._narrative_compaction.cancel()
+
+        if self._hosted:
+            return
+        self._tool_dispatcher.shutdown()
+        await self._client_manager.aclose()
+
+    def close(self) -> None:
+        if self._loop is None:
+            self._tool_dispatcher.shutdown()
+            self._client_manager.close()
+            return
+
+        for narrative_reply in list(self._narrative_replies):
+            narrative_reply.cancel()
+
+        self._run(self.aclose())
+        if self._hosted:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._loop_thread:
+            self._loop_thread.join()
+        self._loop.close()
+        self._loop = None
+        self._loop_thread = None
+
+    @contextlib.asynccontextmanager
+    async def request(self, name: str, **attributes: Any) -> AsyncIterator[Span]:
+        """Trace an API request, made once the scheduler has a slot for the current run class."""
+        with self._tracer.span(name, **attributes) as span:
+            async with self._scheduler.slot() as waited:
+                span.set_attributes(run_class=current_run_class(), scheduler_wait_seconds=waited)
+                yield span
+
+    def _get_tool_handler(
+        self, function_name, run_tool_handlers: dict[ToolName, ToolHandler] | None = None
+    ) -> ToolHandler | None:
+        if run_tool_handlers and function_name in run_tool_handlers:
+            return run_tool_handlers[function_name]
+
+        return self._tool_handlers.get(function_name)
+
+    def _get_tool_handler_traits(self, function_name, handler: ToolHandler) -> ToolHandlerTraits:
+        # Traits given at registration win over those declared with @tool_handler.
+        return self._tool_handler_traits.get(function_name) or get_tool_handler_traits(handler)
+
+    async def dispatch_tool_calls(
+        self,
+        tool_calls: list[RequiredActionFunctionToolCall] | list[ChatCompletionMessageToolCall],
+        run_tool_handlers: dict[ToolName, ToolHandler] | None = None,
+    ) -> list[ToolOutput]:
+        """Answer a batch of tool calls with the run's handlers or the registered ones, in order."""
+        handlers = [self._get_tool_handler(tool_call.function.name, run_tool_handlers) for tool_call in tool_calls]
+        dispatched_calls = [
+            DispatchedCall(
+                handler,
+                self._get_tool_handler_traits(tool_call.function.name, handler),
+                tool_call.function.arguments,
+                tool_call.function.name,
+                tool_call.id,
+            )
+            for tool_call, handler in zip(tool_calls, handlers)
+            if handler
+        ]
+        # All calls in the batch are dispatched together; outputs come back in order.
+        with self._tracer.span("tools.dispatch", tools=[tool_call.function.name for tool_call in tool_calls]):
+            outputs = iter(await self._tool_dispatcher.dispatch(dispatched_calls, self._tracer))
+
+        tool_outputs: list[ToolOutput] = []
+        for tool_call, handler in zip(tool_calls, handlers):
+            status = next(outputs) if handler else "ERROR"
             tool_outputs.append({"tool_call_id": tool_call.id, "output": status})
 
         return tool_outputs
@@ -52,97 +364,661 @@ class AssistantMessageBus:
         if run.status in ("queued", "in_progress", "cancelling"):
             self._active_runs.append(run)
             requeued = True
+        else:
+            self._complete_run(run)
 
         return requeued
 
-    def _send_tool_outputs(self, client: OpenAI, run: Run, tool_outputs: list[ToolOutput]) -> Run:
+    def _record_run(self, run: Run, kind: RunKind, polls: int, seconds: float | None = None) -> None:
+        metrics = self._metrics
+        metrics.increment("openai_runs_total", kind=kind, status=run.status)
+        metrics.observe("openai_run_polls", polls, kind=kind)
+        if seconds is not None:
+            metrics.observe("openai_run_seconds", seconds, kind=kind)
+
+        # Time spent waiting for the API to pick the run up, then working on it.
+        queue_seconds = _seconds_between(run.created_at, run.started_at)
+        if queue_seconds is not None:
+            metrics.observe("openai_run_queue_seconds", queue_seconds, kind=kind)
+        ended_at = run.completed_at or run.failed_at or run.cancelled_at or run.expired_at
+        execution_seconds = _seconds_between(run.started_at, ended_at)
+        if execution_seconds is not None:
+            metrics.observe("openai_run_execution_seconds", execution_seconds, kind=kind)
+
+        span = self._tracer.current_span()
+        if span is not None:
+            span.set_attributes(
+                run_id=run.id,
+                thread_id=run.thread_id,
+                status=run.status,
+                polls=polls,
+                queue_seconds=queue_seconds,
+                execution_seconds=execution_seconds,
+            )
+
+        if run.usage is None:
+            return
+        for token_type in ("prompt", "completion"):
+            tokens = getattr(run.usage, f"{token_type}_tokens", None)
+            if isinstance(tokens, int):
+                metrics.observe("openai_run_tokens", tokens, kind=kind, type=token_type)
+                metrics.increment("openai_tokens_total", tokens, kind=kind, type=token_type)
+
+    def _report_dead_run(self, run: Run, kind: RunKind, reason: str) -> None:
+        self._reaped_runs.append(ReapedRun(run.id, run.thread_id, kind, reason))
+        self._metrics.increment("openai_runs_reaped_total", kind=kind, reason=reason)
+
+    async def _cancel_run(self, client: AsyncOpenAI, run: Run) -> None:
+        # Best effort: a run that finished meanwhile can't be cancelled, and that's fine.
+        async with self.request("runs.cancel", run_id=run.id):
+            with contextlib.suppress(APIError):
+                await client.beta.threads.runs.cancel(thread_id=run.thread_id, run_id=run.id)
+
+    def _drop_run(self, run: Run, reason: str, error: BaseException | None = None) -> None:
+        """Forget a tool run that won't be checked again; its handle fails with error, or is cancelled."""
+        self._run_started_at.pop(run.id, None)
+        self._run_polls.pop(run.id, None)
+        self._run_poll_delays.pop(run.id, None)
+        self._run_polls_due.pop(run.id, None)
+        self._run_tool_handlers.pop(run.id, None)
+        self._run_round_trips.pop(run.id, None)
+        self._run_classes.pop(run.id, None)
+        self._outstanding_runs.pop(run.id, None)
+        run_span = self._run_spans.pop(run.id, None)
+        if run_span is not None:
+            run_span.set_attributes(status=reason)
+            self._tracer.end_span(run_span, error)
+
+        completion = self._run_completions.pop(run.id, None)
+        if completion and not completion.done():
+            if error is None:
+                completion.cancel()
+            else:
+                completion.set_exception(error)
+        self._report_dead_run(run, "tool", reason)
+
+    async def _reap_runs(self, client: AsyncOpenAI, runs: list[Run]) -> list[Run]:
+        """Cancel and drop runs past their deadline or no longer waited on; return the others."""
+        deadline = self._deadlines.for_kind("tool")
+        now = time.monotonic()
+        live_runs: list[Run] = []
+        dead_runs: list[tuple[Run, str, BaseException | None]] = []
+
+        for run in runs:
+            completion = self._run_completions.get(run.id)
+            started_at = self._run_started_at.get(run.id, now)
+            if completion is not None and completion.done():
+                dead_runs.append((run, "abandoned", None))
+            elif deadline is not None and now - started_at > deadline:
+                dead_runs.append((run, "deadline", RunDeadlineExceededError(run.id, "tool", deadline)))
+            else:
+                live_runs.append(run)
+
+        await asyncio.gather(*(self._cancel_run(client, run) for run, _, _ in dead_runs))
+        for run, reason, error in dead_runs:
+            self._drop_run(run, reason, error)
+        return live_runs
+
+    async def acancel_runs(self) -> None:
+        """Cancel every run still going, of any kind; handles to tool runs are cancelled too."""
+        if self._backend is not None:
+            await self._backend.cancel_runs()
+
+        runs = list(self._outstanding_runs.values())
+        client = self._client_manager.client
+        await asyncio.gather(*(self._cancel_run(client, run) for run, _ in runs))
+
+        for run, kind in runs:
+            if kind == "tool":
+                self._drop_run(run, "cancelled")
+            else:
+                self._report_dead_run(run, kind, "cancelled")
+        self._outstanding_runs.clear()
+        self._active_runs.clear()
+
+    def _complete_run(self, run: Run) -> None:
+        self._outstanding_runs.pop(run.id, None)
+        if run.status != "completed":
+            self._report_dead_run(run, "tool", run.status)
+
+        seconds = None
+        if run.id in self._run_started_at:
+            seconds = time.monotonic() - self._run_started_at.pop(run.id)
+            self._polling.record("tool", seconds)
+        self._record_run(run, "tool", self._run_polls.pop(run.id, 0), seconds)
+        self._run_poll_delays.pop(run.id, None)
+        self._run_polls_due.pop(run.id, None)
+        run_span = self._run_spans.pop(run.id, None)
+        if run_span is not None:
+            self._tracer.end_span(run_span)
+
+        self._run_tool_handlers.pop(run.id, None)
+        self._run_round_trips.pop(run.id, None)
+        self._run_classes.pop(run.id, None)
+        completion = self._run_completions.pop(run.id, None)
+        if completion and not completion.done():
+            completion.set_result(run)
+
+    def _schedule_poll(self, run: Run) -> None:
+        delays = self._run_poll_delays.get(run.id)
+        if delays is None:
+            delays = self._run_poll_delays[run.id] = self._polling.delays("tool")
+        self._run_polls_due[run.id] = time.monotonic() + next(delays)
+
+    def _next_poll_at(self) -> float:
+        return min(self._run_polls_due.values(), default=time.monotonic() + self._polling.options.initial_interval)
+
+    def _ensure_tool_run_driver(self) -> None:
+        driver = self._tool_run_driver
+        if driver is not None and not driver.done():
+            wakes_at = self._tool_run_driver_wakes_at
+            if wakes_at is None or self._next_poll_at() >= wakes_at:
+                return
+            # Asleep past a new run's first check; only the sleep is cut short.
+            driver.cancel()
+        self._tool_run_driver = asyncio.get_running_loop().create_task(self._drive_tool_runs())
+
+    async def _drive_tool_runs(self) -> None:
+        # Keeps checking tool runs until every completion handle is resolved.
+        while self._run_completions:
+            wakes_at = self._next_poll_at()
+            self._tool_run_driver_wakes_at = wakes_at
+            await asyncio.sleep(max(0.0, wakes_at - time.monotonic()))
+            self._tool_run_driver_wakes_at = None
+            try:
+                await self._resolve_tool_runs(self._take_active_runs(due_by=wakes_at))
+            except Exception as error:  # noqa: BLE001
+                # Whoever waits on the handles gets the error instead of waiting forever.
+                self._fail_pending_runs(error)
+
+    def _fail_pending_runs(self, error: BaseException) -> None:
+        for completion in self._run_completions.values():
+            if not completion.done():
+                completion.set_exception(error)
+
+        self._run_completions.clear()
+        self._run_tool_handlers.clear()
+        self._run_round_trips.clear()
+        self._run_classes.clear()
+        self._run_polls.clear()
+        self._run_poll_delays.clear()
+        self._run_polls_due.clear()
+        self._active_runs.clear()
+        self._outstanding_runs = {
+            run_id: (run, kind) for run_id, (run, kind) in self._outstanding_runs.items() if kind != "tool"
+        }
+        self._end_run_spans(error)
+
+    def _end_run_spans(self, error: BaseException | None = None) -> None:
+        for run_span in self._run_spans.values():
+            self._tracer.end_span(run_span, error)
+        self._run_spans.clear()
+
+    def _count_round_trip(self, run: Run) -> None:
+        round_trips = self._run_round_trips.get(run.id)
+        if round_trips is not None:
+            round_trips.count += 1
+
+    async def _send_tool_outputs(self, client: AsyncOpenAI, run: Run, tool_outputs: list[ToolOutput]) -> Run:
         if not tool_outputs:
             return run
 
-        return client.beta.threads.runs.submit_tool_outputs(
-            thread_id=run.thread_id,
-            run_id=run.id,
-            tool_outputs=tool_outputs,
-        )
+        self._count_round_trip(run)
+        async with self.request("runs.submit_tool_outputs", run_id=run.id):
+            return await client.beta.threads.runs.submit_tool_outputs(
+                thread_id=run.thread_id,
+                run_id=run.id,
+                tool_outputs=tool_outputs,
+            )
 
-    def process_tool_message_async(self, content: str) -> None:
-        openai_client = OpenAI(api_key=self._openai_api_key)
-        thread = openai_client.beta.threads.create()
-        openai_client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=content,
-        )
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread.id,
-            assistant_id=self._assistant_id,
-        )
+    async def _resolve_run(self, client: AsyncOpenAI, cur_run: Run) -> None:
+        run_class = self._run_classes.get(cur_run.id, "generation")
+        with self._tracer.activate(self._run_spans.get(cur_run.id)), scheduled_as(run_class):
+            # Get the current state of the active run.
+            self._count_round_trip(cur_run)
+            self._run_polls[cur_run.id] = self._run_polls.get(cur_run.id, 0) + 1
+            async with self.request("runs.retrieve", run_id=cur_run.id):
+                run = await client.beta.threads.runs.retrieve(
+                    thread_id=cur_run.thread_id,
+                    run_id=cur_run.id,
+                )
+
+            if run.status == "requires_action" and run.required_action:
+                tool_outputs = await self.dispatch_tool_calls(
+                    run.required_action.submit_tool_outputs.tool_calls, self._run_tool_handlers.get(run.id)
+                )
+                run = await self._send_tool_outputs(client, run, tool_outputs)
+
+            self._requeue_run_if_pending(run)
+
+    async def aprocess_tool_message(
+        self,
+        content: str,
+        tool_handlers: dict[ToolName, ToolHandler] | None = None,
+        round_trips: RoundTrips | None = None,
+        run_class: RunClass = "generation",
+    ) -> asyncio.Future[Run] | asyncio.Future[ChatReply]:
+        """
+        Start a tool run for content and return a handle to it.
+
+        The handle resolves with the final Run once it reaches a terminal status
+        (completed, failed, cancelled, expired or incomplete). The bus keeps
+        checking the run, and answering its tool calls, in the background.
+        Handlers in tool_handlers answer this run's calls instead of the
+        registered ones, every API request made for the run is added to
+        round_trips, and those requests are scheduled as run_class.
+
+        With a backend, the handle resolves with whatever the backend's run
+        ends with instead.
+        """
+        if self._backend is not None:
+            with scheduled_as(run_class):
+                return await self._backend.start_tool_run(content, tool_handlers, round_trips)
+
+        openai_client = self._client_manager.client
+        run_span = self._tracer.start_span("tool.run")
+        with self._tracer.activate(run_span), scheduled_as(run_class):
+            try:
+                # The thread, its message and the run are created in one request.
+                async with self.request("threads.create_and_run"):
+                    run = await openai_client.beta.threads.create_and_run(
+                        assistant_id=self._assistant_id,
+                        thread={"messages": [{"role": "user", "content": content}]},
+                    )
+            except BaseException as error:
+                self._tracer.end_span(run_span, error)
+                raise
+        run_span.set_attributes(run_id=run.id, thread_id=run.thread_id)
+        self._run_spans[run.id] = run_span
+        self._run_classes[run.id] = run_class
+
+        completion: asyncio.Future[Run] = asyncio.get_running_loop().create_future()
+        self._run_completions[run.id] = completion
+        if tool_handlers:
+            self._run_tool_handlers[run.id] = tool_handlers
+        if round_trips is not None:
+            round_trips.count += 1
+            self._run_round_trips[run.id] = round_trips
+        self._run_started_at[run.id] = time.monotonic()
+        self._outstanding_runs[run.id] = (run, "tool")
         self._active_runs.append(run)
+        self._schedule_poll(run)
+        self._ensure_tool_run_driver()
+        return completion
 
-    def resolve_async_tool_messages(self) -> None:
-        if not self._active_runs:
+    def _take_active_runs(self, due_by: float | None = None) -> list[Run]:
+        """Take the active runs due a check by due_by, or all of them, and schedule the check after."""
+        due: list[Run] = []
+
+        for run in [self._active_runs.popleft() for _ in range(len(self._active_runs))]:
+            # Runs started elsewhere than aprocess_tool_message have no schedule and are always due.
+            if due_by is not None and self._run_polls_due.get(run.id, due_by) > due_by:
+                self._active_runs.append(run)
+                continue
+            if run.id in self._run_polls_due:
+                self._schedule_poll(run)
+            due.append(run)
+
+        return due
+
+    async def aresolve_tool_messages(self) -> None:
+        # Every run that is active right now gets exactly one check; runs that
+        # are requeued while this happens wait for the next call.
+        await self._resolve_tool_runs(self._take_active_runs())
+
+    async def _resolve_tool_runs(self, runs: list[Run]) -> None:
+        if not runs:
             return
 
-        openai_client = OpenAI(api_key=self._openai_api_key)
-        initial_active_run_count = len(self._active_runs)
+        openai_client = self._client_manager.client
+        runs = await self._reap_runs(openai_client, runs)
+        await asyncio.gather(*(self._resolve_run(openai_client, run) for run in runs))
 
-        for _ in range(initial_active_run_count):
-            cur_run = self._active_runs.popleft()
+    async def _stream_narrative_run(self, openai_client: AsyncOpenAI, on_delta: Callable[[str], None]) -> str:
+        narrative_thread = self._narrative_thread
+        if not narrative_thread:
+            msg = "Narrative thread has not been created."
+            raise RuntimeError(msg)
 
-            # Get the current state of the active run.
-            run = openai_client.beta.threads.runs.retrieve(
-                thread_id=cur_run.thread_id,
-                run_id=cur_run.id,
+        text_deltas: list[str] = []
+        run_started_at = time.monotonic()
+        deadline = self._deadlines.for_kind("narrative")
+        expired_run: Run | None = None
+
+        async with self.request("runs.stream", thread_id=narrative_thread.id):
+            async with openai_client.beta.threads.runs.stream(
+                thread_id=narrative_thread.id,
+                assistant_id=self._assistant_id,
+            ) as stream:
+
+                async def consume_stream() -> None:
+                    async for text_delta in stream.text_deltas:
+                        if stream.current_run is not None:
+                            self._outstanding_runs[stream.current_run.id] = (stream.current_run, "narrative")
+                        text_deltas.append(text_delta)
+                        on_delta(text_delta)
+
+                try:
+                    # wait_for rather than asyncio.timeout(), which needs Python 3.11.
+                    await asyncio.wait_for(consume_stream(), deadline)
+                except asyncio.TimeoutError:
+                    expired_run = stream.current_run
+                    if expired_run is None:
+                        raise
+                finally:
+                    if stream.current_run is not None:
+                        self._outstanding_runs.pop(stream.current_run.id, None)
+
+            if expired_run is None and stream.current_run is not None:
+                self._record_run(stream.current_run, "narrative", 0, time.monotonic() - run_started_at)
+
+        if expired_run is not None:
+            # Cancelled once the stream's slot is free; streams holding every
+            # slot would otherwise wait on each other for one to cancel with.
+            await self._cancel_run(openai_client, expired_run)
+            self._report_dead_run(expired_run, "narrative", "deadline")
+            raise RunDeadlineExceededError(expired_run.id, "narrative", deadline or 0)
+        return "".join(text_deltas)
+
+    async def aprepare_narrative_thread(self) -> Thread | None:
+        """Create the narrative thread, once; concurrent callers share the one creation."""
+        if self._backend is not None:
+            # The backend keeps the story itself; there is nothing to create.
+            return None
+
+        if self._narrative_thread is None:
+            if self._narrative_thread_creation is None:
+                self._narrative_thread_creation = asyncio.ensure_future(self._create_narrative_thread())
+
+            try:
+                self._narrative_thread = await asyncio.shield(self._narrative_thread_creation)
+            except Exception:
+                # Let the next caller try again.
+                self._narrative_thread_creation = None
+                raise
+
+        return self._narrative_thread
+
+    async def _create_narrative_thread(self) -> Thread:
+        # The player waits on this thread, wherever its creation was started.
+        with scheduled_as("narrative"):
+            async with self.request("threads.create") as span:
+                thread = await self._client_manager.client.beta.threads.create()
+                span.set_attributes(thread_id=thread.id)
+                return thread
+
+    async def aprocess_narrative_message(
+        self, content: str, on_delta: Callable[[str], None] | None = None, run_class: RunClass = "narrative"
+    ) -> str:
+        """
+        Send player content to the narrative thread and return the assistant's reply.
+
+        When the bus streams narrative and on_delta is given, each piece of text is
+        passed to on_delta as it arrives, before the full reply is returned.
+        Its requests are scheduled as run_class.
+        """
+        # The player is waiting on these requests; they go ahead of background generation.
+        with self._tracer.span("narrative.message", run_class=run_class), scheduled_as(run_class):
+            return await self._process_narrative_message(content, on_delta)
+
+    async def _process_narrative_message(self, content: str, on_delta: Callable[[str], None] | None) -> str:
+        openai_client = self._client_manager.client
+        if self._narrative_compaction is not None:
+            # The thread may be about to be replaced; carry on in the new one.
+            await self._narrative_compaction
+
+        if self._backend is not None:
+            output = await self._backend.narrate(content, on_delta if self._stream_narrative else None)
+            self._record_narrative_turn(content, output)
+            return output
+
+        narrative_thread = await self.aprepare_narrative_thread()
+        if narrative_thread is None:
+            msg = "Narrative thread has not been created."
+            raise RuntimeError(msg)
+
+        async with self.request("messages.create", thread_id=narrative_thread.id):
+            message = await openai_client.beta.threads.messages.create(
+                thread_id=narrative_thread.id,
+                role="user",
+                content=content,
             )
+        self._message_cursors[narrative_thread.id] = message.id
 
-            if run.status == "requires_action" and run.required_action:
-                tool_outputs = self._process_tool_calls(run.required_action.submit_tool_outputs.tool_calls)
-                run = self._send_tool_outputs(openai_client, run, tool_outputs)
+        if self._stream_narrative and on_delta:
+            output = await self._stream_narrative_run(openai_client, on_delta)
+            self._record_narrative_turn(content, output)
+            return output
 
-            self._requeue_run_if_pending(run)
+        run_started_at = time.monotonic()
+        with self._tracer.span("narrative.run", thread_id=narrative_thread.id):
+            async with self.request("runs.create", thread_id=narrative_thread.id):
+                run = await openai_client.beta.threads.runs.create(
+                    thread_id=narrative_thread.id,
+                    assistant_id=self._assistant_id,
+                )
+
+            run, polls = await self._wait_for_run(openai_client, run, "narrative", run_started_at)
+            run_seconds = time.monotonic() - run_started_at
+            self._polling.record("narrative", run_seconds)
+            self._record_run(run, "narrative", polls, run_seconds)
+
+        output = await self._fetch_narrative_reply(openai_client, run)
+        self._record_narrative_turn(content, output)
+        return output
+
+    async def _wait_for_run(
+        self, openai_client: AsyncOpenAI, run: Run, kind: RunKind, started_at: float
+    ) -> tuple[Run, int]:
+        """Poll run until it stops running and return it with the number of polls; cancel it at its deadline."""
+        deadline = self._deadlines.for_kind(kind)
+        poll_delays = self._polling.delays(kind)
+        polls = 0
+        self._outstanding_runs[run.id] = (run, kind)
+
+        try:
+            while run.status in ("queued", "in_progress"):
+                delay = next(poll_delays)
+                if deadline is not None:
+                    remaining = started_at + deadline - time.monotonic()
+                    if remaining <= 0:
+                        await self._cancel_run(openai_client, run)
+                        self._report_dead_run(run, kind, "deadline")
+                        raise RunDeadlineExceededError(run.id, kind, deadline)
+                    delay = min(delay, remaining)
+
+                await asyncio.sleep(delay)
+                polls += 1
+                async with self.request("runs.retrieve", run_id=run.id):
+                    run = await openai_client.beta.threads.runs.retrieve(thread_id=run.thread_id, run_id=run.id)
+                if kind == "narrative" and self._thinking_indicator:
+                    self._thinking_indicator()
+        finally:
+            self._outstanding_runs.pop(run.id, None)
+
+        if run.status != "completed":
+            self._report_dead_run(run, kind, run.status)
+        return run, polls
+
+    def _record_narrative_turn(self, content: str, output: str) -> None:
+        self._narrative_turns.append(NarrativeTurn(content, output))
+
+        if (
+            self._compaction.enabled
+            and len(self._narrative_turns) >= self._compaction.max_turns
+            and (self._narrative_compaction is None or self._narrative_compaction.done())
+        ):
+            # Runs between turns; the next narrative message waits for it.
+            self._narrative_compaction = asyncio.ensure_future(self._compact_narrative_in_background())
+
+    async def _compact_narrative_in_background(self) -> CompactionEvent | None:
+        try:
+            # Only later turns need it, so it is scheduled like a prefetch.
+            with self._tracer.span("narrative.compaction"), scheduled_as("prefetch"):
+                return await self.acompact_narrative()
+        except Exception:  # noqa: BLE001
+            # A failed compaction leaves the story where it was; the next turn tries again.
+            return None
+
+    async def _summarize(self, openai_client: AsyncOpenAI, prompt: str) -> str:
+        if self._backend is not None:
+            return await self._backend.summarize(prompt)
+
+        run_started_at = time.monotonic()
+        with self._tracer.span("summary.run"):
+            async with self.request("threads.create_and_run"):
+                run = await openai_client.beta.threads.create_and_run(
+                    assistant_id=self._assistant_id,
+                    thread={"messages": [{"role": "user", "content": prompt}]},
+                    tool_choice="none",
+                )
+
+            run, polls = await self._wait_for_run(openai_client, run, "summary", run_started_at)
+            run_seconds = time.monotonic() - run_started_at
+            self._polling.record("summary", run_seconds)
+            self._record_run(run, "summary", polls, run_seconds)
+        if run.status != "completed":
+            msg = f"Summarizing the story failed, the run ended as: {run.status}"
+            raise RuntimeError(msg)
+
+        summary = await self._fetch_narrative_reply(openai_client, run)
+        self._message_cursors.pop(run.thread_id, None)
+        return summary
+
+    async def _reseed_narrative(self, openai_client: AsyncOpenAI, seed: str) -> str:
+        """Move the narrative to a fresh thread seeded with seed; returns the new thread's id."""
+        if self._backend is not None:
+            return await self._backend.reseed_narrative(seed)
+
+        async with self.request("threads.create") as span:
+            thread = await openai_client.beta.threads.create(messages=[{"role": "user", "content": seed}])
+            span.set_attributes(thread_id=thread.id)
+
+        if self._narrative_thread is not None:
+            self._message_cursors.pop(self._narrative_thread.id, None)
+        self._narrative_thread = thread
+        return thread.id
+
+    async def acompact_narrative(self) -> CompactionEvent | None:
+        """
+        Summarize all but the latest turns into the story so far and move the
+        narrative to a fresh thread seeded with it, the world and the latest turns.
+
+        Returns None when there is nothing to compact.
+        """
+        if self._backend is not None:
+            old_narrative_id = self._backend.narrative_id
+        else:
+            old_narrative_id = self._narrative_thread.id if self._narrative_thread else None
+        turns = list(self._narrative_turns)
+        kept = max(0, min(self._compaction.keep_turns, len(turns)))
+        older, recent = turns[: len(turns) - kept], turns[len(turns) - kept :]
+        if old_narrative_id is None or not older:
+            return None
 
-    def register_tool_handler(self, tool_name: ToolName, handler: ToolHandler):
+        compaction_started_at = time.monotonic()
+        openai_client = self._client_manager.client
+        prompt = get_summary_prompt(older, self._story_so_far, self._compaction.summary_max_words)
+        summary = await self._summarize(openai_client, prompt)
+        world_state = self._narrative_context() if self._narrative_context else ""
+        seed = get_seed_message(summary, world_state, recent)
+        new_narrative_id = await self._reseed_narrative(openai_client, seed)
+
+        event = CompactionEvent(
+            old_thread_id=old_narrative_id,
+            new_thread_id=new_narrative_id,
+            turns_before=len(turns),
+            turns_after=len(recent),
+            chars_before=self._narrative_seed_chars + count_chars(turns),
+            chars_after=len(seed),
+            seconds=time.monotonic() - compaction_started_at,
+        )
+        self._narrative_turns = recent
+        self._narrative_seed_chars = len(seed)
+        self._story_so_far = summary
+        self._compaction_events.append(event)
+        return event
+
+    async def _fetch_narrative_reply(self, openai_client: AsyncOpenAI, run: Run) -> str:
+        # Newest first, and only what was added since the cursor, so the page
+        # stays small however long the thread gets.
+        list_kwargs: dict[str, Any] = {"order": "desc", "limit": NARRATIVE_MESSAGE_LIMIT}
+        cursor = self._message_cursors.get(run.thread_id)
+        if cursor:
+            list_kwargs["before"] = cursor
+
+        async with self.request("messages.list", thread_id=run.thread_id):
+            messages = await openai_client.beta.threads.messages.list(thread_id=run.thread_id, **list_kwargs)
+        if self._trace_sink is not None:
+            self._trace_sink(messages)
+
+        if not messages.data:
+            return ""
+
+        self._message_cursors[run.thread_id] = messages.data[0].id
+        narrative_content: MessageContent = messages.data[0].content[0]
+        if narrative_content.type == "text":
+            return narrative_content.text.value
+        return ""
+
+    async def _process_tool_message_to_completion(
+        self,
+        content: str,
+        tool_handlers: dict[ToolName, ToolHandler] | None = None,
+        round_trips: RoundTrips | None = None,
+        run_class: RunClass = "generation",
+    ) -> Run | ChatReply:
+        return await (await self.aprocess_tool_message(content, tool_handlers, round_trips, run_class))
+
+    def process_tool_message_async(
+        self,
+        content: str,
+        tool_handlers: dict[ToolName, ToolHandler] | None = None,
+        round_trips: RoundTrips | None = None,
+        run_class: RunClass = "generation",
+    ) -> Future[Run | ChatReply]:
+        # Returns straight away; the handle resolves once the run is finished.
+        return self._submit(self._process_tool_message_to_completion(content, tool_handlers, round_trips, run_class))
+
+    def resolve_async_tool_messages(self) -> None:
+        self._run(self.aresolve_tool_messages())
+
+    def register_tool_handler(self, tool_name: ToolName, handler: ToolHandler, traits: ToolHandlerTraits | None = None):
         self._tool_handlers[tool_name] = handler
+        self._tool_handler_traits.pop(tool_name, None)
+        if traits:
+            self._tool_handler_traits[tool_name] = traits
 
     def register_tool_handlers(self, tool_handlers: list[ToolHandlerEntry]):
         for tool_name, handler in tool_handlers:
             self.register_tool_handler(tool_name, handler)
 
-    def process_narrative_message(self, content: str) -> str:
-        openai_client = OpenAI(api_key=self._openai_api_key)
+    def cancel_runs(self) -> None:
+        if self._loop is not None:
+            self._run(self.acancel_runs())
 
-        # TODO: probably should move this so it is only done once
-        if not self._narrative_thread:
-            self._narrative_thread = openai_client.beta.threads.create()
+    def process_narrative_message(self, content: str, on_delta: Callable[[str], None] | None = None) -> str:
+        return self._run(self.aprocess_narrative_message(content, on_delta))
 
-        openai_client.beta.threads.messages.create(
-            thread_id=self._narrative_thread.id,
-            role="user",
-            content=content,
-        )
-        run = openai_client.beta.threads.runs.create(
-            thread_id=self._narrative_thread.id,
-            assistant_id=self._assistant_id,
-        )
+    def compact_narrative(self) -> CompactionEvent | None:
+        return self._run(self.acompact_narrative())
 
-        # wait on run
-        while run.status in ("queued", "in_progress"):
-            run = openai_client.beta.threads.runs.retrieve(
-                thread_id=run.thread_id,
-                run_id=run.id,
-            )
-            print("...[thinking]...")  # noqa T201
-            time.sleep(1)
+    def prepare_narrative_thread(self) -> Future[Thread | None]:
+        # Returns straight away, so the thread is created while other work goes on.
+        return self._submit(self.aprepare_narrative_thread())
 
-        messages = openai_client.beta.threads.messages.list(thread_id=run.thread_id)
-        narrative_content: MessageContent = messages.data[0].content[0]
-        show_json(messages)
-        if narrative_content.type == "text":
-            output = narrative_content.text.value
-        return output
+    def start_narrative_message(self, content: str, run_class: RunClass = "narrative") -> NarrativeReply:
+        """Send content to the narrative thread now and return the reply to wait on later."""
+        narrative_reply = NarrativeReply()
+        future = self._submit(self.aprocess_narrative_message(content, narrative_reply.feed, run_class))
+        self._narrative_replies.add(future)
+        future.add_done_callback(self._narrative_replies.discard)
+        future.add_done_callback(narrative_reply.resolve_from)
+        return narrative_reply
 
 
 def show_json(obj) -> None:
+    """A trace sink that pretty prints a response model."""
     import pprint
 
     print("\n\n>>>")  # noqa T201
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Literal, Protocol
+
+from sprawl_runner.config.constants import OPENAI_BACKEND
+from sprawl_runner.config.values import get_str
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, RoundTrips
+    from sprawl_runner.ai.types import ToolHandler, ToolName
+    from sprawl_runner.config.types import GameSettings
+
+MessageBackendName = Literal["assistants", "chat"]
+MESSAGE_BACKENDS: tuple[MessageBackendName, ...] = ("assistants", "chat")
+
+
+def get_message_backend_name(settings: GameSettings) -> MessageBackendName:
+    name = get_str(settings, OPENAI_BACKEND)
+    if name not in MESSAGE_BACKENDS:
+        msg = f"Setting openai_backend must be one of {', '.join(MESSAGE_BACKENDS)}, got: {name!r}"
+        raise ValueError(msg)
+
+    return name
+
+
+class MessageBackend(Protocol):
+    """
+    Speaks to a model API for an AssistantMessageBus, in place of the
+    Assistants API threads and runs the bus uses when it has no backend.
+
+    The bus keeps the story's turns, decides when to compact them, and answers
+    tool calls; its request() traces and schedules each API request a backend
+    makes, and its dispatch_tool_calls() runs the handlers.
+    """
+
+    def attach(self, message_bus: AssistantMessageBus) -> None:
+        raise NotImplementedError
+
+    @property
+    def narrative_id(self) -> str:
+        """Names the current narrative conversation, which changes when it is reseeded."""
+        raise NotImplementedError
+
+    async def narrate(self, content: str, on_delta: Callable[[str], None] | None) -> str:
+        raise NotImplementedError
+
+    async def start_tool_run(
+        self,
+        content: str,
+        tool_handlers: dict[ToolName, ToolHandler] | None = None,
+        round_trips: RoundTrips | None = None,
+    ) -> asyncio.Future[Any]:
+        raise NotImplementedError
+
+    async def summarize(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def reseed_narrative(self, seed: str) -> str:
+        """Carry the narrative on from seed alone and return its new narrative_id."""
+        raise NotImplementedError
+
+    async def cancel_runs(self) -> None:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        raise NotImplementedError
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterator, Literal
+
+import httpx
+
+from sprawl_runner.config.constants import CASSETTE_MODE, CASSETTE_PATH, CASSETTE_SPEED
+from sprawl_runner.config.values import get_float, get_str
+
+if TYPE_CHECKING:
+    from sprawl_runner.config.types import GameSettings
+
+CassetteMode = Literal["off", "record", "replay"]
+CASSETTE_MODES: tuple[CassetteMode, ...] = ("off", "record", "replay")
+
+# Response headers worth keeping; request headers (and the API key) are never written.
+_KEPT_HEADERS = ("content-type", "openai-processing-ms", "x-request-id")
+
+# Bytes are stored as latin-1 text, which maps every byte to one character and back.
+_BODY_ENCODING = "latin-1"
+
+
+def _request_key(request: httpx.Request) -> tuple[str, str]:
+    return request.method, request.url.raw_path.decode("ascii")
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """
+    Records every request/response pair of the OpenAI clients, with timing, and
+    replays them later.
+
+    A cassette is a JSON lines file (gzipped when the name ends in .gz), one
+    line per request. Replay serves the responses recorded for each method and
+    path in order, repeating the last one once they run out (a run polled more
+    often than when it was recorded stays in its final state). Recorded
+    latencies are divided by speed; a speed of 0 replays without waiting.
+    """
+
+    def __init__(self, path: str | Path, mode: CassetteMode, speed: float = 1.0) -> None:
+        if mode not in ("record", "replay"):
+            msg = f"Cassettes can record or replay, got mode: {mode}"
+            raise ValueError(msg)
+
+        self._path = Path(path).expanduser()
+        self._mode = mode
+        self._speed = speed
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._entries: list[dict[str, Any]] = []
+        self._replay_queues: dict[tuple[str, str], deque[dict[str, Any]]] = defaultdict(deque)
+        self._last_replayed: dict[tuple[str, str], dict[str, Any]] = {}
+
+        if mode == "replay":
+            self._entries = self.load(self._path)
+            for entry in self._entries:
+                self._replay_queues[entry["method"], entry["path"]].append(entry)
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> Cassette | None:
+        mode = get_str(settings, CASSETTE_MODE)
+        if mode not in CASSETTE_MODES:
+            msg = f"Setting cassette_mode must be one of {', '.join(CASSETTE_MODES)}, got: {mode!r}"
+            raise ValueError(msg)
+
+        if mode == "off":
+            return None
+
+        return cls(get_str(settings, CASSETTE_PATH), mode, get_float(settings, CASSETTE_SPEED))
+
+    @staticmethod
+    def load(path: Path) -> list[dict[str, Any]]:
+        with _open(path, "r") as cassette_file:
+            return [json.loads(line) for line in cassette_file if line.strip()]
+
+    @property
+    def mode(self) -> CassetteMode:
+        return self._mode
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def entries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._entries)
+
+    def save(self) -> None:
+        if self._mode != "record":
+            return
+
+        with self._lock, _open(self._path, "w") as cassette_file:
+            for entry in self._entries:
+                cassette_file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def summary(self) -> dict[str, float]:
+        """How many requests the cassette holds and how much of the session was spent waiting on them."""
+        entries = self.entries
+        return {
+            "requests": len(entries),
+            "remote_seconds": sum(entry["chunks"][-1][0] if entry["chunks"] else entry["elapsed"] for entry in entries),
+        }
+
+    def _delay(self, seconds: float) -> float:
+        return seconds / self._speed if self._speed > 0 else 0.0
+
+    # Recording
+
+    def _begin_recording(self, request: httpx.Request) -> dict[str, Any]:
+        # Plain bodies keep the cassette readable and replayable as-is.
+        request.headers["Accept-Encoding"] = "identity"
+        method, path = _request_key(request)
+        return {
+            "method": method,
+            "path": path,
+            "request": request.content.decode(_BODY_ENCODING),
+            "started": time.monotonic() - self._started,
+        }
+
+    def _add_response(self, entry: dict[str, Any], response: httpx.Response, elapsed: float) -> None:
+        entry["status"] = response.status_code
+        entry["headers"] = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        entry["elapsed"] = elapsed
+        entry["chunks"] = []
+
+    def _add_chunk(self, entry: dict[str, Any], chunk: bytes, offset: float) -> None:
+        entry["chunks"].append([offset, chunk.decode(_BODY_ENCODING)])
+
+    def _finish_recording(self, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    # Replay
+
+    def _next_entry(self, request: httpx.Request) -> dict[str, Any] | None:
+        key = _request_key(request)
+
+        with self._lock:
+            if self._replay_queues[key]:
+                self._last_replayed[key] = self._replay_queues[key].popleft()
+
+            return self._last_replayed.get(key)
+
+    def _missing_response(self, request: httpx.Request) -> httpx.Response:
+        method, path = _request_key(request)
+        message = f"The cassette {self._path} has no recorded response for {method} {path}"
+        return httpx.Response(404, json={"error": {"message": message, "type": "cassette_miss"}}, request=request)
+
+    def async_transport(self, **transport_kwargs: Any) -> httpx.AsyncBaseTransport:
+        if self._mode == "replay":
+            return _AsyncReplayTransport(self)
+
+        return _AsyncRecordingTransport(self, httpx.AsyncHTTPTransport(**transport_kwargs))
+
+    def sync_transport(self, **transport_kwargs: Any) -> httpx.BaseTransport:
+        if self._mode == "replay":
+            return _ReplayTransport(self)
+
+        return _RecordingTransport(self, httpx.HTTPTransport(**transport_kwargs))
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    def __init__(self, cassette: Cassette, entry: dict[str, Any], stream: httpx.SyncByteStream, start: float) -> None:
+        self._cassette = cassette
+        self._entry = entry
+        self._stream = stream
+        self._start = start
+        self._finished = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._cassette._add_chunk(self._entry, chunk, time.monotonic() - self._start)  # noqa: SLF001
+            yield chunk
+
+    def close(self) -> None:
+        self._stream.close()
+        if not self._finished:
+            self._finished = True
+            self._cassette._finish_recording(self._entry)  # noqa: SLF001
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(self, cassette: Cassette, entry: dict[str, Any], stream: httpx.AsyncByteStream, start: float) -> None:
+        self._cassette = cassette
+        self._entry = entry
+        self._stream = stream
+        self._start = start
+        self._finished = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._cassette._add_chunk(self._entry, chunk, time.monotonic() - self._start)  # noqa: SLF001
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        if not self._finished:
+            self._finished = True
+            self._cassette._finish_recording(self._entry)  # noqa: SLF001
+
+
+class _RecordingTransport(httpx.BaseTransport):
+    def __init__(self, cassette: Cassette, transport: httpx.BaseTransport) -> None:
+        self._cassette = cassette
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self._cassette._begin_recording(request)  # noqa: SLF001
+        start = time.monotonic()
+        response = self._transport.handle_request(request)
+        self._cassette._add_response(entry, response, time.monotonic() - start)  # noqa: SLF001
+
+        stream = _RecordingStream(self._cassette, entry, response.stream, start)  # type: ignore[arg-type]
+        return httpx.Response(response.status_code, headers=response.headers, stream=stream, request=request)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette: Cassette, transport: httpx.AsyncBaseTransport) -> None:
+        self._cassette = cassette
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self._cassette._begin_recording(request)  # noqa: SLF001
+        start = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        self._cassette._add_response(entry, response, time.monotonic() - start)  # noqa: SLF001
+
+        stream = _AsyncRecordingStream(self._cassette, entry, response.stream, start)  # type: ignore[arg-type]
+        return httpx.Response(response.status_code, headers=response.headers, stream=stream, request=request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    def __init__(self, cassette: Cassette, entry: dict[str, Any]) -> None:
+        self._cassette = cassette
+        self._entry = entry
+
+    def __iter__(self) -> Iterator[bytes]:
+        previous = self._entry["elapsed"]
+
+        for offset, chunk in self._entry["chunks"]:
+            time.sleep(self._cassette._delay(max(0.0, offset - previous)))  # noqa: SLF001
+            previous = offset
+            yield chunk.encode(_BODY_ENCODING)
+
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    def __init__(self, cassette: Cassette, entry: dict[str, Any]) -> None:
+        self._cassette = cassette
+        self._entry = entry
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        previous = self._entry["elapsed"]
+
+        for offset, chunk in self._entry["chunks"]:
+            await asyncio.sleep(self._cassette._delay(max(0.0, offset - previous)))  # noqa: SLF001
+            previous = offset
+            yield chunk.encode(_BODY_ENCODING)
+
+
+class _ReplayTransport(httpx.BaseTransport):
+    def __init__(self, cassette: Cassette) -> None:
+        self._cassette = cassette
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self._cassette._next_entry(request)  # noqa: SLF001
+        if entry is None:
+            return self._cassette._missing_response(request)  # noqa: SLF001
+
+        time.sleep(self._cassette._delay(entry["elapsed"]))  # noqa: SLF001
+        stream = _ReplayStream(self._cassette, entry)
+        return httpx.Response(entry["status"], headers=entry["headers"], stream=stream, request=request)
+
+
+class _AsyncReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette: Cassette) -> None:
+        self._cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self._cassette._next_entry(request)  # noqa: SLF001
+        if entry is None:
+            return self._cassette._missing_response(request)  # noqa: SLF001
+
+        await asyncio.sleep(self._cassette._delay(entry["elapsed"]))  # noqa: SLF001
+        stream = _AsyncReplayStream(self._cassette, entry)
+        return httpx.Response(entry["status"], headers=entry["headers"], stream=stream, request=request)
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from openai.types.chat import ChatCompletionMessageToolCall
+
+from sprawl_runner.ai.deadlines import RunDeadlineExceededError, RunDeadlines
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam, ChatCompletionToolParam
+    from openai.types.completion_usage import CompletionUsage
+    from openai.types.shared_params import FunctionDefinition
+
+    from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, RoundTrips
+    from sprawl_runner.ai.types import RunKind, ToolHandler, ToolName
+
+
+class ChatReply(NamedTuple):
+    """One assistant message, put together from a streamed completion."""
+
+    content: str
+    tool_calls: list[ChatCompletionMessageToolCall]
+    finish_reason: str | None
+    usage: CompletionUsage | None
+
+    def to_message(self) -> ChatCompletionMessageParam:
+        message: dict[str, Any] = {"role": "assistant", "content": self.content}
+        if self.tool_calls:
+            message["tool_calls"] = [tool_call.model_dump() for tool_call in self.tool_calls]
+        return message  # type: ignore[return-value]
+
+
+class ChatCompletionsBackend:
+    """
+    Narrative and tool runs over the Chat Completions API.
+
+    The story lives here, as the messages sent with every request, rather
+    than in an Assistants thread. Replies are streamed and tool calls are
+    answered between requests, so a turn is one request (and one more for
+    each round of tool calls) with nothing to create first and nothing to
+    poll.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        instructions: str,
+        tools: list[FunctionDefinition],
+        deadlines: RunDeadlines | None = None,
+        max_tool_rounds: int = 8,
+    ) -> None:
+        self._model = model
+        self._system_message: ChatCompletionMessageParam = {"role": "system", "content": instructions}
+        self._tools: list[ChatCompletionToolParam] = [{"type": "function", "function": tool} for tool in tools]
+        self._deadlines = deadlines or RunDeadlines()
+        self._max_tool_rounds = max_tool_rounds
+        self._message_bus: AssistantMessageBus | None = None
+        # Everything said in the story since it was last seeded, without the instructions.
+        self._history: list[ChatCompletionMessageParam] = []
+        self._narrative_count = 1
+        self._tool_runs: set[asyncio.Task[ChatReply]] = set()
+
+    @property
+    def history(self) -> list[ChatCompletionMessageParam]:
+        return list(self._history)
+
+    @property
+    def narrative_id(self) -> str:
+        return f"chat-narrative-{self._narrative_count}"
+
+    @property
+    def _bus(self) -> AssistantMessageBus:
+        if self._message_bus is None:
+            msg = "The backend has not been attached to a message bus."
+            raise RuntimeError(msg)
+        return self._message_bus
+
+    def attach(self, message_bus: AssistantMessageBus) -> None:
+        self._message_bus = message_bus
+
+    async def _complete(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        on_delta: Callable[[str], None] | None = None,
+        *,
+        use_tools: bool = True,
+    ) -> ChatReply:
+        bus = self._bus
+        tool_kwargs: dict[str, Any] = {"tools": self._tools} if use_tools and self._tools else {}
+        content: list[str] = []
+        tool_calls: dict[int, dict[str, Any]] = {}
+        finish_reason = None
+        usage = None
+
+        async with bus.request("chat.completions.create", messages=len(messages)) as span:
+            stream = await bus.client_manager.client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                **tool_kwargs,
+            )
+            async for chunk in stream:
+                # The last chunk has the usage and no choices.
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        content.append(choice.delta.content)
+                        if on_delta:
+                            on_delta(choice.delta.content)
+                    # A tool call's name and arguments arrive in pieces, keyed by its index.
+                    for delta in choice.delta.tool_calls or ():
+                        tool_call = tool_calls.setdefault(
+                            delta.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}}
+                        )
+                        tool_call["id"] = delta.id or tool_call["id"]
+                        if delta.function is not None:
+                            tool_call["function"]["name"] += delta.function.name or ""
+                            tool_call["function"]["arguments"] += delta.function.arguments or ""
+                    finish_reason = choice.finish_reason or finish_reason
+            span.set_attributes(finish_reason=finish_reason)
+
+        return ChatReply(
+            "".join(content),
+            [ChatCompletionMessageToolCall.model_validate(tool_calls[index]) for index in sorted(tool_calls)],
+            finish_reason,
+            usage,
+        )
+
+    def _record_usage(self, kind: RunKind, usage: CompletionUsage | None) -> None:
+        if usage is None:
+            return
+        metrics = self._bus.metrics
+        for token_type, tokens in (("prompt", usage.prompt_tokens), ("completion", usage.completion_tokens)):
+            metrics.observe("openai_run_tokens", tokens, kind=kind, type=token_type)
+            metrics.increment("openai_tokens_total", tokens, kind=kind, type=token_type)
+
+    async def _complete_rounds(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        kind: RunKind,
+        on_delta: Callable[[str], None] | None,
+        tool_handlers: dict[ToolName, ToolHandler] | None,
+        round_trips: RoundTrips | None,
+        *,
+        use_tools: bool,
+    ) -> ChatReply | None:
+        """The reply without tool calls, or None if the model still made some after the last round."""
+        for _ in range(self._max_tool_rounds):
+            if round_trips is not None:
+                round_trips.count += 1
+            reply = await self._complete(messages, on_delta, use_tools=use_tools)
+            self._record_usage(kind, reply.usage)
+            messages.append(reply.to_message())
+            if not reply.tool_calls:
+                return reply
+
+            tool_outputs = await self._bus.dispatch_tool_calls(reply.tool_calls, tool_handlers)
+            messages.extend(
+                {"role": "tool", "tool_call_id": output["tool_call_id"], "content": output["output"]}
+                for output in tool_outputs
+            )
+
+        return None
+
+    async def _converse(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        kind: RunKind,
+        on_delta: Callable[[str], None] | None = None,
+        tool_handlers: dict[ToolName, ToolHandler] | None = None,
+        round_trips: RoundTrips | None = None,
+        *,
+        use_tools: bool = True,
+    ) -> ChatReply:
+        """Complete messages, answering tool calls until a reply has none; every message is added to messages."""
+        bus = self._bus
+        deadline = self._deadlines.for_kind(kind)
+        started_at = time.monotonic()
+        status = "failed"
+
+        try:
+            # wait_for rather than asyncio.timeout(), which needs Python 3.11.
+            reply = await asyncio.wait_for(
+                self._complete_rounds(messages, kind, on_delta, tool_handlers, round_trips, use_tools=use_tools),
+                deadline,
+            )
+            if reply is None:
+                status = "incomplete"
+                msg = f"The model was still calling tools after {self._max_tool_rounds} rounds."
+                raise RuntimeError(msg)
+
+            status = "completed"
+            return reply
+        except asyncio.TimeoutError:
+            status = "deadline"
+            run_id = self.narrative_id if kind == "narrative" else f"chat-{kind}"
+            raise RunDeadlineExceededError(run_id, kind, deadline or 0) from None
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            bus.metrics.increment("openai_runs_total", kind=kind, status=status)
+            bus.metrics.observe("openai_run_seconds", time.monotonic() - started_at, kind=kind)
+            if status in ("deadline", "cancelled"):
+                bus.metrics.increment("openai_runs_reaped_total", kind=kind, reason=status)
+
+    async def narrate(self, content: str, on_delta: Callable[[str], None] | None) -> str:
+        messages = [self._system_message, *self._history, {"role": "user", "content": content}]
+        with self._bus.tracer.span("narrative.run", narrative_id=self.narrative_id):
+            reply = await self._converse(messages, "narrative", on_delta)
+
+        # Only a finished turn joins the story, so a failed one can simply be tried again.
+        self._history = messages[1:]
+        return reply.content
+
+    async def start_tool_run(
+        self,
+        content: str,
+        tool_handlers: dict[ToolName, ToolHandler] | None = None,
+        round_trips: RoundTrips | None = None,
+    ) -> asyncio.Future[ChatReply]:
+        """Start answering content's tool calls; the handle resolves with the final reply."""
+        messages: list[ChatCompletionMessageParam] = [self._system_message, {"role": "user", "content": content}]
+
+        async def run() -> ChatReply:
+            with self._bus.tracer.span("tool.run"):
+                return await self._converse(messages, "tool", None, tool_handlers, round_trips)
+
+        # The task carries the caller's span and run class along with it.
+        tool_run = asyncio.ensure_future(run())
+        self._tool_runs.add(tool_run)
+        tool_run.add_done_callback(self._tool_runs.discard)
+        return tool_run
+
+    async def summarize(self, prompt: str) -> str:
+        messages = [self._system_message, {"role": "user", "content": prompt}]
+        with self._bus.tracer.span("summary.run"):
+            reply = await self._converse(messages, "summary", use_tools=False)
+        return reply.content
+
+    async def reseed_narrative(self, seed: str) -> str:
+        self._history = [{"role": "user", "content": seed}]
+        self._narrative_count += 1
+        return self.narrative_id
+
+    async def cancel_runs(self) -> None:
+        tool_runs = list(self._tool_runs)
+        for tool_run in tool_runs:
+            tool_run.cancel()
+        await asyncio.gather(*tool_runs, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await self.cancel_runs()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import importlib.util
+import warnings
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from sprawl_runner.ai.rate_limit import RateLimitedTransport
+from sprawl_runner.config.constants import (
+    HTTP2,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT,
+    OPENAI_BASE_URL,
+)
+from sprawl_runner.config.values import get_bool, get_float, get_int, get_str
+from sprawl_runner.telemetry.http_hooks import http_event_hooks
+
+if TYPE_CHECKING:
+    from sprawl_runner.ai.cassette import Cassette
+    from sprawl_runner.ai.rate_limit import RateLimiter
+    from sprawl_runner.config.types import GameSettings
+    from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+@dataclass(frozen=True)
+class ClientOptions:
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    timeout: float = 60.0
+    http2: bool = False
+    # None talks to the OpenAI API; set it to use a stand-in such as sprawl_runner.standin.
+    base_url: str | None = None
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> ClientOptions:
+        return cls(
+            max_connections=get_int(settings, HTTP_MAX_CONNECTIONS),
+            max_keepalive_connections=get_int(settings, HTTP_MAX_KEEPALIVE_CONNECTIONS),
+            keepalive_expiry=get_float(settings, HTTP_KEEPALIVE_EXPIRY),
+            connect_timeout=get_float(settings, HTTP_CONNECT_TIMEOUT),
+            timeout=get_float(settings, HTTP_TIMEOUT),
+            http2=get_bool(settings, HTTP2),
+            base_url=get_str(settings, OPENAI_BASE_URL) or None,
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeouts(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class OpenAIClientManager:
+    """
+    Owns the OpenAI clients, and with them the keep-alive connection pools, used
+    for a whole session.
+
+    Clients are created on first use. The async client is bound to the event
+    loop it is first used from, so it must be closed from that loop (aclose).
+    With a cassette, every request is recorded to it or replayed from it. With
+    metrics, every request is timed and counted into them. With a rate limiter,
+    every request of the async client is paced and retried by it.
+    """
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        options: ClientOptions | None = None,
+        cassette: Cassette | None = None,
+        metrics: MetricsRegistry | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
+        self._openai_api_key = openai_api_key
+        self._options = options or ClientOptions()
+        self._cassette = cassette
+        self._metrics = metrics
+        self._rate_limiter = rate_limiter
+        self._client: AsyncOpenAI | None = None
+        self._sync_client: OpenAI | None = None
+
+    @property
+    def options(self) -> ClientOptions:
+        return self._options
+
+    @property
+    def cassette(self) -> Cassette | None:
+        return self._cassette
+
+    @property
+    def metrics(self) -> MetricsRegistry | None:
+        return self._metrics
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        return self._rate_limiter
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            client_kwargs = {}
+            if self._rate_limiter is not None:
+                # The rate limited transport retries, within the limits.
+                client_kwargs["max_retries"] = 0
+            self._client = AsyncOpenAI(
+                api_key=self._openai_api_key,
+                base_url=self._options.base_url,
+                http_client=DefaultAsyncHttpxClient(**self._http_client_kwargs(is_async=True)),
+                **client_kwargs,
+            )
+
+        return self._client
+
+    @property
+    def sync_client(self) -> OpenAI:
+        if self._sync_client is None:
+            self._sync_client = OpenAI(
+                api_key=self._openai_api_key,
+                base_url=self._options.base_url,
+                http_client=DefaultHttpxClient(**self._http_client_kwargs(is_async=False)),
+            )
+
+        return self._sync_client
+
+    def _http_client_kwargs(self, *, is_async: bool) -> dict:
+        http2 = self._options.http2
+
+        if http2 and not _http2_available():
+            warnings.warn("HTTP/2 was requested but the h2 package is not installed; using HTTP/1.1.", stacklevel=3)
+            http2 = False
+
+        kwargs = {
+            "limits": self._options.limits,
+            "timeout": self._options.timeouts,
+            "http2": http2,
+        }
+
+        if self._cassette is not None:
+            transport_kwargs = {"limits": self._options.limits, "http2": http2}
+            kwargs["transport"] = (
+                self._cassette.async_transport(**transport_kwargs)
+                if is_async
+                else self._cassette.sync_transport(**transport_kwargs)
+            )
+
+        if is_async and self._rate_limiter is not None:
+            transport = kwargs.get("transport") or httpx.AsyncHTTPTransport(limits=self._options.limits, http2=http2)
+            kwargs["transport"] = RateLimitedTransport(transport, self._rate_limiter, self._metrics)
+
+        if self._metrics is not None:
+            kwargs["event_hooks"] = http_event_hooks(self._metrics, is_async=is_async)
+
+        return kwargs
+
+    def close(self) -> None:
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+        if self._cassette is not None:
+            self._cassette.save()
+
+    async def aclose(self) -> None:
+        self.close()
+
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+        if self._cassette is not None:
+            self._cassette.save()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, NamedTuple
+
+from sprawl_runner import data
+from sprawl_runner.config.constants import NARRATIVE_COMPACT_TURNS, NARRATIVE_KEEP_TURNS
+from sprawl_runner.config.values import get_int
+
+if TYPE_CHECKING:
+    from sprawl_runner.config.types import GameSettings
+
+
+class NarrativeTurn(NamedTuple):
+    player: str
+    narrator: str
+
+
+@dataclass(frozen=True)
+class CompactionOptions:
+    # Compact once the narrative thread holds this many turns; 0 never compacts.
+    max_turns: int = 30
+    # The latest turns are carried over word for word rather than summarized.
+    keep_turns: int = 2
+    summary_max_words: int = 400
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> CompactionOptions:
+        return cls(
+            max_turns=get_int(settings, NARRATIVE_COMPACT_TURNS),
+            keep_turns=get_int(settings, NARRATIVE_KEEP_TURNS),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_turns > 0
+
+
+@dataclass(frozen=True)
+class CompactionEvent:
+    old_thread_id: str
+    new_thread_id: str
+    turns_before: int
+    turns_after: int
+    # Characters of conversation on the thread before, and of the seed that replaced it.
+    chars_before: int
+    chars_after: int
+    seconds: float
+
+
+def count_chars(turns: list[NarrativeTurn]) -> int:
+    return sum(len(turn.player) + len(turn.narrator) for turn in turns)
+
+
+def format_transcript(turns: list[NarrativeTurn]) -> str:
+    return "\n\n".join(f"Player: {turn.player}\n\nNarrator: {turn.narrator}" for turn in turns)
+
+
+def get_summary_prompt(turns: list[NarrativeTurn], previous_summary: str, max_words: int) -> str:
+    instructions = data.load_data("narrative-summary-instructions.txt")
+    if previous_summary:
+        # Summaries roll: the last one is folded into the next.
+        previous_summary = f"The story before these turns, already summarized:\n\n{previous_summary}\n\n"
+
+    return instructions.format(
+        max_words=max_words,
+        previous_summary=previous_summary,
+        transcript=format_transcript(turns),
+    )
+
+
+def get_seed_message(summary: str, world_state: str, recent_turns: list[NarrativeTurn]) -> str:
+    seed = data.load_data("narrative-compaction-seed.txt")
+    return seed.format(
+        summary=summary,
+        world_state=world_state or "(unchanged)",
+        recent_turns=format_transcript(recent_turns) or "(none)",
+    )
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, NamedTuple
+
+from sprawl_runner.config.constants import RUN_DEADLINE_NARRATIVE, RUN_DEADLINE_SUMMARY, RUN_DEADLINE_TOOL
+from sprawl_runner.config.values import get_float
+
+if TYPE_CHECKING:
+    from sprawl_runner.ai.types import RunKind
+    from sprawl_runner.config.types import GameSettings
+
+
+@dataclass(frozen=True)
+class RunDeadlines:
+    # Seconds a run of each kind may take before it is cancelled; 0 waits forever.
+    narrative: float = 120.0
+    tool: float = 300.0
+    summary: float = 180.0
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> RunDeadlines:
+        return cls(
+            narrative=get_float(settings, RUN_DEADLINE_NARRATIVE),
+            tool=get_float(settings, RUN_DEADLINE_TOOL),
+            summary=get_float(settings, RUN_DEADLINE_SUMMARY),
+        )
+
+    def for_kind(self, kind: RunKind) -> float | None:
+        return getattr(self, kind) or None
+
+
+class RunDeadlineExceededError(TimeoutError):
+    def __init__(self, run_id: str, kind: RunKind, seconds: float) -> None:
+        super().__init__(f"The {kind} run {run_id} was cancelled after {seconds:g} seconds.")
+        self.run_id = run_id
+        self.kind = kind
+        self.seconds = seconds
+
+
+class ReapedRun(NamedTuple):
+    """A run that ended without completing, and why: its status, deadline or abandoned."""
+
+    run_id: str
+    thread_id: str
+    kind: RunKind
+    reason: str
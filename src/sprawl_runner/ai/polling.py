@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import random
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator
+
+from sprawl_runner.config.constants import (
+    POLL_HISTORY_SIZE,
+    POLL_INITIAL_INTERVAL,
+    POLL_JITTER,
+    POLL_MAX_INTERVAL,
+    POLL_MULTIPLIER,
+)
+from sprawl_runner.config.values import get_float, get_int
+
+if TYPE_CHECKING:
+    from sprawl_runner.ai.types import RunKind
+    from sprawl_runner.config.types import GameSettings
+    from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+@dataclass(frozen=True)
+class PollingOptions:
+    initial_interval: float = 0.25
+    max_interval: float = 4.0
+    multiplier: float = 2.0
+    jitter: float = 0.2
+    history_size: int = 20
+    # How much of the typical run duration to wait before the first poll.
+    seed_fraction: float = 0.8
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> PollingOptions:
+        return cls(
+            initial_interval=get_float(settings, POLL_INITIAL_INTERVAL),
+            max_interval=get_float(settings, POLL_MAX_INTERVAL),
+            multiplier=get_float(settings, POLL_MULTIPLIER),
+            jitter=get_float(settings, POLL_JITTER),
+            history_size=get_int(settings, POLL_HISTORY_SIZE),
+        )
+
+
+class _KindStats:
+    def __init__(self, history_size: int) -> None:
+        self.durations: deque[float] = deque(maxlen=history_size)
+        self.polls = 0
+        self.runs = 0
+        self.total_wait = 0.0
+        self.last_first_delay = 0.0
+
+
+class PollingStrategy:
+    """
+    Decides how long to wait between checks on an assistant run.
+
+    The first wait for a run is seeded from the recent durations of runs of the
+    same kind, so a typical run is checked about when it should be done. Later
+    waits start short and back off exponentially, with jitter, up to a cap.
+    Given metrics, every wait and each kind's expected duration are recorded
+    there too.
+    """
+
+    def __init__(
+        self,
+        options: PollingOptions | None = None,
+        rng: random.Random | None = None,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        self._options = options or PollingOptions()
+        self._rng = rng or random.Random()  # noqa: S311
+        self._stats: dict[RunKind, _KindStats] = {}
+        self._metrics = metrics
+
+    @property
+    def options(self) -> PollingOptions:
+        return self._options
+
+    def _get_stats(self, kind: RunKind) -> _KindStats:
+        if kind not in self._stats:
+            self._stats[kind] = _KindStats(self._options.history_size)
+
+        return self._stats[kind]
+
+    def _jittered(self, interval: float) -> float:
+        jitter = self._options.jitter
+        return interval * self._rng.uniform(1 - jitter, 1 + jitter)
+
+    def expected_duration(self, kind: RunKind) -> float | None:
+        durations = self._get_stats(kind).durations
+        return statistics.median(durations) if durations else None
+
+    def first_delay(self, kind: RunKind) -> float:
+        expected_duration = self.expected_duration(kind)
+
+        if expected_duration is None:
+            return self._options.initial_interval
+
+        seeded = expected_duration * self._options.seed_fraction
+        return max(self._options.initial_interval, seeded)
+
+    def delays(self, kind: RunKind) -> Iterator[float]:
+        """Yield the wait before each poll of one run; every value yielded is a poll."""
+        stats = self._get_stats(kind)
+        delay = self._jittered(self.first_delay(kind))
+        stats.last_first_delay = delay
+        if self._metrics is not None:
+            self._metrics.observe("openai_poll_first_delay_seconds", delay, kind=kind)
+        interval = self._options.initial_interval
+
+        while True:
+            stats.polls += 1
+            stats.total_wait += delay
+            if self._metrics is not None:
+                self._metrics.observe("openai_poll_wait_seconds", delay, kind=kind)
+            yield delay
+            delay = self._jittered(interval)
+            interval = min(interval * self._options.multiplier, self._options.max_interval)
+
+    def record(self, kind: RunKind, duration: float) -> None:
+        stats = self._get_stats(kind)
+        stats.durations.append(duration)
+        stats.runs += 1
+        if self._metrics is not None:
+            self._metrics.set_gauge("openai_run_expected_seconds", self.expected_duration(kind) or 0.0, kind=kind)
+
+    def metrics(self) -> dict[str, dict[str, float]]:
+        metrics: dict[str, dict[str, float]] = {}
+
+        for kind, stats in self._stats.items():
+            metrics[kind] = {
+                "runs": stats.runs,
+                "polls": stats.polls,
+                "polls_per_run": stats.polls / stats.runs if stats.runs else 0.0,
+                "total_wait": stats.total_wait,
+                "last_first_delay": stats.last_first_delay,
+                "expected_duration": self.expected_duration(kind) or 0.0,
+            }
+
+        return metrics
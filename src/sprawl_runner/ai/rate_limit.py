@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, Literal
+
+import httpx
+
+from sprawl_runner.config.constants import (
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_REQUESTS_PER_MINUTE,
+    RATE_LIMIT_RUN_TOKENS,
+    RATE_LIMIT_TOKENS_PER_MINUTE,
+)
+from sprawl_runner.config.values import get_int
+from sprawl_runner.telemetry.http_hooks import get_endpoint
+
+if TYPE_CHECKING:
+    from sprawl_runner.config.types import GameSettings
+    from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+RequestPriority = Literal["interactive", "background"]
+
+# Statuses the OpenAI API asks clients to retry, as the OpenAI client itself does.
+RETRY_STATUSES = frozenset((408, 409, 429, 500, 502, 503, 504))
+# Methods that can be sent twice without doing anything twice.
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+_request_priority: contextvars.ContextVar[RequestPriority] = contextvars.ContextVar(
+    "sprawl_runner_request_priority", default="background"
+)
+
+
+@contextlib.contextmanager
+def request_priority(priority: RequestPriority) -> Iterator[None]:
+    """Send the requests made in this block (and in tasks started from it) with priority."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+@dataclass(frozen=True)
+class RateLimitOptions:
+    # 0 leaves requests or tokens unlimited.
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    # Tokens charged up front for a request that starts a run; its real use isn't known yet.
+    run_tokens: int = 1000
+    max_retries: int = 4
+    backoff_initial: float = 0.5
+    backoff_max: float = 30.0
+    # Share of each bucket that background requests leave for interactive ones.
+    interactive_reserve: float = 0.2
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> RateLimitOptions:
+        return cls(
+            requests_per_minute=get_int(settings, RATE_LIMIT_REQUESTS_PER_MINUTE),
+            tokens_per_minute=get_int(settings, RATE_LIMIT_TOKENS_PER_MINUTE),
+            run_tokens=get_int(settings, RATE_LIMIT_RUN_TOKENS),
+            max_retries=get_int(settings, RATE_LIMIT_MAX_RETRIES),
+        )
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int) -> None:
+        self.rate = per_minute / 60
+        # A minute's worth can be spent at once, like the API's own limits.
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount: float, reserve: float) -> float:
+        # Requests larger than the bucket go through once it is full.
+        needed = min(amount, self.capacity) + reserve * self.capacity
+        return max(0.0, (needed - self.level) / self.rate)
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and estimated tokens, shared by every client it
+    is given to, whichever thread or event loop they run on.
+
+    Background requests leave a reserve in each bucket and wait while any
+    interactive request waits, so narrative keeps a steady pace under load.
+    A rate limited response pauses every request until its Retry-After.
+    """
+
+    def __init__(self, options: RateLimitOptions | None = None) -> None:
+        self._options = options or RateLimitOptions()
+        self._lock = threading.Lock()
+        self._requests = _TokenBucket(self._options.requests_per_minute) if self._options.requests_per_minute else None
+        self._tokens = _TokenBucket(self._options.tokens_per_minute) if self._options.tokens_per_minute else None
+        self._paused_until = 0.0
+        self._interactive_waiting = 0
+
+    @property
+    def options(self) -> RateLimitOptions:
+        return self._options
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _try_acquire(self, tokens: int, priority: RequestPriority) -> float:
+        """Take what a request needs and return 0, or return how long to wait before trying again."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if priority == "background" and self._interactive_waiting:
+            return 0.05
+
+        reserve = self._options.interactive_reserve if priority == "background" else 0.0
+        wait = 0.0
+        for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_for(amount, reserve))
+        if wait > 0:
+            return wait
+
+        if self._requests is not None:
+            self._requests.level -= 1
+        if self._tokens is not None:
+            self._tokens.level -= min(tokens, self._tokens.capacity)
+        return 0.0
+
+    async def acquire(self, tokens: int = 0, priority: RequestPriority | None = None) -> float:
+        """Wait until a request estimated at tokens may be sent; returns the seconds waited."""
+        priority = priority or _request_priority.get()
+        started_at = time.monotonic()
+        waiting = False
+
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_acquire(tokens, priority)
+                    if wait <= 0:
+                        return time.monotonic() - started_at
+                    if priority == "interactive" and not waiting:
+                        waiting = True
+                        self._interactive_waiting += 1
+
+                await asyncio.sleep(wait)
+        finally:
+            if waiting:
+                with self._lock:
+                    self._interactive_waiting -= 1
+
+
+def estimate_tokens(request: httpx.Request, run_tokens: int) -> int:
+    try:
+        body_size = len(request.content)
+    except httpx.RequestNotRead:
+        body_size = 0
+
+    # About four characters a token; starting a run, or a completion, costs the run's tokens too.
+    tokens = body_size // 4
+    if request.method == "POST" and request.url.path.rstrip("/").endswith(("/runs", "/chat/completions")):
+        tokens += run_tokens
+    return tokens
+
+
+def get_retry_after(response: httpx.Response) -> float | None:
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        with contextlib.suppress(ValueError):
+            return float(retry_after_ms) / 1000
+
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+
+    with contextlib.suppress(TypeError, ValueError):
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    return None
+
+
+def _should_retry(request: httpx.Request, response: httpx.Response) -> bool:
+    should_retry = response.headers.get("x-should-retry")
+    if should_retry == "false":
+        return False
+
+    if request.method not in IDEMPOTENT_METHODS:
+        # A POST that failed may still have started a run or submitted tool
+        # outputs; only a rate limited one is known not to have been acted on.
+        return response.status_code == httpx.codes.TOO_MANY_REQUESTS
+
+    return should_retry == "true" or response.status_code in RETRY_STATUSES
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Sends every request through a RateLimiter, and retries it, with backoff
+    and within the limits, when the connection can't be made, when the API
+    rate limits it, or, for idempotent requests, when the API answers with
+    another retryable status.
+
+    Clients using it should not retry themselves (max_retries=0).
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter, metrics: MetricsRegistry | None = None
+    ) -> None:
+        self._transport = transport
+        self._limiter = limiter
+        self._metrics = metrics
+
+    def _record_retry(self, request: httpx.Request, reason: str) -> None:
+        if self._metrics is not None:
+            endpoint = get_endpoint(request.url)
+            self._metrics.increment("openai_retries_total", method=request.method, endpoint=endpoint, reason=reason)
+
+    def _backoff(self, attempt: int) -> float:
+        options = self._limiter.options
+        delay = min(options.backoff_max, options.backoff_initial * 2**attempt)
+        return delay * random.uniform(0.75, 1.0)  # noqa: S311
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        options = self._limiter.options
+        tokens = estimate_tokens(request, options.run_tokens)
+        attempt = 0
+
+        while True:
+            waited = await self._limiter.acquire(tokens)
+            if self._metrics is not None:
+                self._metrics.observe("openai_rate_limit_wait_seconds", waited, priority=_request_priority.get())
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # Nothing reached the API, so sending again can't repeat anything.
+                if attempt >= options.max_retries:
+                    raise
+                self._record_retry(request, "connect")
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if attempt >= options.max_retries or not _should_retry(request, response):
+                return response
+
+            retry_after = get_retry_after(response)
+            await response.aclose()
+            self._record_retry(request, str(response.status_code))
+            if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+                # Everyone sharing the limiter holds back, not just this request.
+                self._limiter.pause(retry_after if retry_after is not None else self._backoff(attempt))
+            else:
+                await asyncio.sleep(retry_after if retry_after is not None else self._backoff(attempt))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
+
+from sprawl_runner.ai.rate_limit import request_priority
+from sprawl_runner.config.constants import (
+    SCHEDULER_GENERATION_CONCURRENCY,
+    SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_PREFETCH_CONCURRENCY,
+    SCHEDULER_STARVATION_SECONDS,
+)
+from sprawl_runner.config.values import get_float, get_int
+
+if TYPE_CHECKING:
+    from sprawl_runner.ai.types import RunClass
+    from sprawl_runner.config.types import GameSettings
+    from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+# Lower goes first.
+RUN_CLASS_RANKS: dict[RunClass, int] = {"narrative": 0, "opening": 1, "generation": 2, "prefetch": 3}
+INTERACTIVE_RUN_CLASSES: frozenset[RunClass] = frozenset(("narrative", "opening"))
+
+_run_class: contextvars.ContextVar[RunClass] = contextvars.ContextVar("sprawl_runner_run_class", default="generation")
+
+
+def current_run_class() -> RunClass:
+    return _run_class.get()
+
+
+@contextlib.contextmanager
+def scheduled_as(run_class: RunClass) -> Iterator[None]:
+    """Schedule the requests made in this block (and in tasks started from it) as run_class."""
+    token = _run_class.set(run_class)
+    try:
+        with request_priority("interactive" if run_class in INTERACTIVE_RUN_CLASSES else "background"):
+            yield
+    finally:
+        _run_class.reset(token)
+
+
+@dataclass(frozen=True)
+class SchedulerOptions:
+    # 0 leaves requests, or a class, unlimited.
+    max_concurrency: int = 8
+    generation_concurrency: int = 4
+    prefetch_concurrency: int = 2
+    # Background requests waiting this long move up a class; 0 never moves them.
+    starvation_seconds: float = 10.0
+    # Slots background requests leave free for narrative and the opening scene.
+    interactive_reserve: int = 1
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> SchedulerOptions:
+        return cls(
+            max_concurrency=get_int(settings, SCHEDULER_MAX_CONCURRENCY),
+            generation_concurrency=get_int(settings, SCHEDULER_GENERATION_CONCURRENCY),
+            prefetch_concurrency=get_int(settings, SCHEDULER_PREFETCH_CONCURRENCY),
+            starvation_seconds=get_float(settings, SCHEDULER_STARVATION_SECONDS),
+        )
+
+    def limit(self, run_class: RunClass) -> int:
+        if run_class == "generation":
+            return self.generation_concurrency
+        if run_class == "prefetch":
+            return self.prefetch_concurrency
+        return 0
+
+
+class _Waiter:
+    def __init__(self, run_class: RunClass) -> None:
+        self.run_class = run_class
+        self.enqueued_at = time.monotonic()
+        self.granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+
+class RunScheduler:
+    """
+    Hands out slots for API requests by run class, on the bus's event loop.
+
+    Waiting requests start in class order (narrative, opening, generation,
+    prefetch), each class up to its own cap and all of them up to
+    max_concurrency. Background classes leave interactive_reserve slots free,
+    so a player's turn never queues behind generation polls or tool output
+    submissions. A background request that waits starvation_seconds moves up
+    a class, and keeps moving up while it waits, so it is never starved.
+    """
+
+    def __init__(self, options: SchedulerOptions | None = None, metrics: MetricsRegistry | None = None) -> None:
+        self._options = options or SchedulerOptions()
+        self._metrics = metrics
+        self._active: Counter[RunClass] = Counter()
+        self._waiters: list[_Waiter] = []
+
+    @property
+    def options(self) -> SchedulerOptions:
+        return self._options
+
+    @property
+    def active(self) -> dict[RunClass, int]:
+        return {run_class: count for run_class, count in self._active.items() if count}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _rank(self, waiter: _Waiter, now: float) -> int:
+        rank = RUN_CLASS_RANKS[waiter.run_class]
+        if self._options.starvation_seconds > 0:
+            rank -= int((now - waiter.enqueued_at) // self._options.starvation_seconds)
+        return max(rank, 0)
+
+    def _can_start(self, run_class: RunClass, rank: int) -> bool:
+        options = self._options
+        total = sum(self._active.values())
+        if options.max_concurrency and total >= options.max_concurrency:
+            return False
+
+        limit = options.limit(run_class)
+        if limit and self._active[run_class] >= limit:
+            return False
+
+        # Background requests that have waited their way up may use the reserve too.
+        if options.max_concurrency and rank > RUN_CLASS_RANKS["opening"]:
+            return total < options.max_concurrency - options.interactive_reserve
+        return True
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        ranked = sorted(self._waiters, key=lambda waiter: (self._rank(waiter, now), waiter.enqueued_at))
+
+        for waiter in ranked:
+            if waiter.granted.done():
+                # Cancelled; it takes itself off the list once it wakes up.
+                continue
+            # A waiter held back by its class cap doesn't hold back other classes.
+            if self._can_start(waiter.run_class, self._rank(waiter, now)):
+                self._waiters.remove(waiter)
+                self._active[waiter.run_class] += 1
+                waiter.granted.set_result(None)
+
+    def _release(self, run_class: RunClass) -> None:
+        self._active[run_class] -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, run_class: RunClass | None = None) -> AsyncIterator[float]:
+        """Wait for a slot for one request of run_class (the current one by default); yields the seconds waited."""
+        run_class = run_class or current_run_class()
+        waiter = _Waiter(run_class)
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.granted
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif not waiter.granted.cancelled():
+                # Granted as we were cancelled; pass the slot on.
+                self._release(run_class)
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        if self._metrics is not None:
+            self._metrics.observe("scheduler_wait_seconds", waited, run_class=run_class)
+        try:
+            yield waited
+        finally:
+            self._release(run_class)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Literal, NamedTuple, TypeVar
+
+from sprawl_runner.config.constants import TOOL_DISPATCH, TOOL_WORKERS
+from sprawl_runner.config.values import get_int, get_str
+from sprawl_runner.telemetry.tracing import Span, Tracer
+
+if TYPE_CHECKING:
+    from sprawl_runner.ai.types import ToolHandler
+    from sprawl_runner.config.types import GameSettings
+
+ToolDispatchMode = Literal["serial", "thread", "process"]
+TOOL_DISPATCH_MODES: tuple[ToolDispatchMode, ...] = ("serial", "thread", "process")
+
+_TRAITS_ATTRIBUTE = "__tool_handler_traits__"
+
+_F = TypeVar("_F", bound=Callable)
+
+
+@dataclass(frozen=True)
+class ToolHandlerTraits:
+    # Safe to run on a worker thread, alongside other handlers.
+    thread_safe: bool = False
+    # Worth running in a worker process; the handler must be picklable (a
+    # module level function) and can only report back through its output.
+    cpu_bound: bool = False
+
+
+class DispatchedCall(NamedTuple):
+    handler: ToolHandler
+    traits: ToolHandlerTraits
+    # JSON, as the model sent it.
+    arguments: str
+    # The tool's name and the model's id for the call, to trace it by.
+    name: str = ""
+    call_id: str = ""
+
+
+def tool_handler(*, thread_safe: bool = False, cpu_bound: bool = False) -> Callable[[_F], _F]:
+    """Declare how a tool handler may be dispatched."""
+
+    def decorate(handler: _F) -> _F:
+        setattr(handler, _TRAITS_ATTRIBUTE, ToolHandlerTraits(thread_safe=thread_safe, cpu_bound=cpu_bound))
+        return handler
+
+    return decorate
+
+
+def get_tool_handler_traits(handler: ToolHandler) -> ToolHandlerTraits:
+    return getattr(handler, _TRAITS_ATTRIBUTE, ToolHandlerTraits())
+
+
+def _end_handler_span(tracer: Tracer, span: Span, future: asyncio.Future[str]) -> None:
+    tracer.end_span(span, asyncio.CancelledError() if future.cancelled() else future.exception())
+
+
+def run_tool_handler(handler: ToolHandler, arguments: str) -> str:
+    return handler(json.loads(arguments))
+
+
+class ToolDispatcher:
+    """
+    Runs the tool calls of one requires_action batch.
+
+    In "serial" mode every handler runs in turn on the event loop. In "thread"
+    mode thread-safe handlers run concurrently on a thread pool, and in
+    "process" mode cpu-bound handlers also go to a process pool. Handlers that
+    declare neither always run in turn on the event loop.
+    """
+
+    def __init__(self, mode: ToolDispatchMode = "serial", max_workers: int = 4) -> None:
+        if mode not in TOOL_DISPATCH_MODES:
+            msg = f"Unknown tool dispatch mode: {mode}"
+            raise ValueError(msg)
+
+        self._mode = mode
+        self._max_workers = max_workers
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> ToolDispatcher:
+        mode = get_str(settings, TOOL_DISPATCH)
+        if mode not in TOOL_DISPATCH_MODES:
+            msg = f"Setting tool_dispatch must be one of {', '.join(TOOL_DISPATCH_MODES)}, got: {mode!r}"
+            raise ValueError(msg)
+
+        return cls(mode, get_int(settings, TOOL_WORKERS))
+
+    @property
+    def mode(self) -> ToolDispatchMode:
+        return self._mode
+
+    def _get_executor(self, traits: ToolHandlerTraits) -> Executor | None:
+        if self._mode == "process" and traits.cpu_bound:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self._max_workers)
+            return self._process_pool
+
+        if self._mode != "serial" and (traits.thread_safe or traits.cpu_bound):
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="sprawl-runner-tool"
+                )
+            return self._thread_pool
+
+        return None
+
+    async def dispatch(self, calls: list[DispatchedCall], tracer: Tracer | None = None) -> list[str]:
+        """Run each call, in a tool.handler span of its own, and return outputs in the same order."""
+        tracer = tracer or Tracer()
+        loop = asyncio.get_running_loop()
+        outputs = [""] * len(calls)
+        offloaded: dict[int, asyncio.Future[str]] = {}
+
+        # Executor work is started first so it overlaps the handlers that have
+        # to run on the loop.
+        for index, call in enumerate(calls):
+            executor = self._get_executor(call.traits)
+            if executor is not None:
+                # Workers don't share the loop's context, so the span is kept
+                # here, under the current span, and ended once the work is done.
+                span = tracer.start_span("tool.handler", tool=call.name, tool_call_id=call.call_id)
+                offloaded[index] = loop.run_in_executor(executor, run_tool_handler, call.handler, call.arguments)
+                offloaded[index].add_done_callback(functools.partial(_end_handler_span, tracer, span))
+
+        for index, call in enumerate(calls):
+            if index not in offloaded:
+                with tracer.span("tool.handler", tool=call.name, tool_call_id=call.call_id):
+                    outputs[index] = run_tool_handler(call.handler, call.arguments)
+
+        for index, output in zip(offloaded, await asyncio.gather(*offloaded.values())):
+            outputs[index] = output
+
+        return outputs
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True)
+            self._thread_pool = None
+
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
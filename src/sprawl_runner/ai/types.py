@@ -3,3 +3,5 @@ from typing import Callable, Literal
 ToolName = Literal["register_factions", "register_locations"]
 ToolHandler = Callable[[dict[str, list]], str]
 ToolHandlerEntry = tuple[ToolName, ToolHandler]
+RunKind = Literal["narrative", "tool", "summary"]
+RunClass = Literal["narrative", "opening", "generation", "prefetch"]
@@ -11,17 +11,188 @@ DEFAULT_AI_MODEL = "gpt-3.5-turbo-0125"
 
 
 OPENAI: SettingsSection = "OpenAI"
+HTTP: SettingsSection = "HTTP"
+NARRATIVE: SettingsSection = "Narrative"
+POLLING: SettingsSection = "Polling"
+TOOLS: SettingsSection = "Tools"
+CASSETTE: SettingsSection = "Cassette"
+WORLD_CACHE_SECTION: SettingsSection = "WorldCache"
+WORLD: SettingsSection = "World"
+METRICS: SettingsSection = "Metrics"
+RATE_LIMIT: SettingsSection = "RateLimit"
+SCHEDULER: SettingsSection = "Scheduler"
+SERVER: SettingsSection = "Server"
 
 # Setting Name Constants
 OPENAI_API_KEY: SettingsKey = "openai_api_key"
 OPENAI_MODEL: SettingsKey = "openai_model"
 OPENAI_ASSISTANT_ID: SettingsKey = "openai_assistant_id"
+OPENAI_ASSISTANT_FINGERPRINT: SettingsKey = "openai_assistant_fingerprint"
+OPENAI_BASE_URL: SettingsKey = "openai_base_url"
+OPENAI_BACKEND: SettingsKey = "openai_backend"
+HTTP_MAX_CONNECTIONS: SettingsKey = "http_max_connections"
+HTTP_MAX_KEEPALIVE_CONNECTIONS: SettingsKey = "http_max_keepalive_connections"
+HTTP_KEEPALIVE_EXPIRY: SettingsKey = "http_keepalive_expiry"
+HTTP_CONNECT_TIMEOUT: SettingsKey = "http_connect_timeout"
+HTTP_TIMEOUT: SettingsKey = "http_timeout"
+HTTP2: SettingsKey = "http2"
+NARRATIVE_STREAM: SettingsKey = "narrative_stream"
+NARRATIVE_TRACE: SettingsKey = "narrative_trace"
+NARRATIVE_COMPACT_TURNS: SettingsKey = "narrative_compact_turns"
+NARRATIVE_KEEP_TURNS: SettingsKey = "narrative_keep_turns"
+POLL_INITIAL_INTERVAL: SettingsKey = "poll_initial_interval"
+POLL_MAX_INTERVAL: SettingsKey = "poll_max_interval"
+POLL_MULTIPLIER: SettingsKey = "poll_multiplier"
+POLL_JITTER: SettingsKey = "poll_jitter"
+POLL_HISTORY_SIZE: SettingsKey = "poll_history_size"
+RUN_DEADLINE_NARRATIVE: SettingsKey = "run_deadline_narrative"
+RUN_DEADLINE_TOOL: SettingsKey = "run_deadline_tool"
+RUN_DEADLINE_SUMMARY: SettingsKey = "run_deadline_summary"
+TOOL_DISPATCH: SettingsKey = "tool_dispatch"
+TOOL_WORKERS: SettingsKey = "tool_workers"
+CASSETTE_MODE: SettingsKey = "cassette_mode"
+CASSETTE_PATH: SettingsKey = "cassette_path"
+CASSETTE_SPEED: SettingsKey = "cassette_speed"
+WORLD_CACHE: SettingsKey = "world_cache"
+WORLD_CACHE_DIR: SettingsKey = "world_cache_dir"
+WORLD_CACHE_SAMPLE_SIZE: SettingsKey = "world_cache_sample_size"
+WORLD_CACHE_MAX_WORLDS: SettingsKey = "world_cache_max_worlds"
+WORLD_CACHE_MAX_AGE_DAYS: SettingsKey = "world_cache_max_age_days"
+WORLD_POOL_SIZE: SettingsKey = "world_pool_size"
+WORLD_GENERATION: SettingsKey = "world_generation"
+WORLD_SPEC: SettingsKey = "world_spec"
+WORLD_SOURCE: SettingsKey = "world_source"
+WORLD_FALLBACK_SECONDS: SettingsKey = "world_fallback_seconds"
+WORLD_SEED: SettingsKey = "world_seed"
+METRICS_EXPORT: SettingsKey = "metrics_export"
+TRACE_EXPORT: SettingsKey = "trace_export"
+RATE_LIMIT_REQUESTS_PER_MINUTE: SettingsKey = "rate_limit_requests_per_minute"
+RATE_LIMIT_TOKENS_PER_MINUTE: SettingsKey = "rate_limit_tokens_per_minute"
+RATE_LIMIT_RUN_TOKENS: SettingsKey = "rate_limit_run_tokens"
+RATE_LIMIT_MAX_RETRIES: SettingsKey = "rate_limit_max_retries"
+SCHEDULER_MAX_CONCURRENCY: SettingsKey = "scheduler_max_concurrency"
+SCHEDULER_GENERATION_CONCURRENCY: SettingsKey = "scheduler_generation_concurrency"
+SCHEDULER_PREFETCH_CONCURRENCY: SettingsKey = "scheduler_prefetch_concurrency"
+SCHEDULER_STARVATION_SECONDS: SettingsKey = "scheduler_starvation_seconds"
+SERVER_HOST: SettingsKey = "server_host"
+SERVER_TCP_PORT: SettingsKey = "server_tcp_port"
+SERVER_WEBSOCKET_PORT: SettingsKey = "server_websocket_port"
+SERVER_MAX_SESSIONS: SettingsKey = "server_max_sessions"
+SERVER_WRITE_BUFFER_LIMIT: SettingsKey = "server_write_buffer_limit"
 
 
-EMPTY_SETTINGS = GameSettings(openai_api_key="", openai_assistant_id="", openai_model="")
+EMPTY_SETTINGS = GameSettings(
+    openai_api_key="",
+    openai_assistant_id="",
+    openai_assistant_fingerprint="",
+    openai_model="",
+    openai_base_url="",
+    openai_backend="",
+    http_max_connections="",
+    http_max_keepalive_connections="",
+    http_keepalive_expiry="",
+    http_connect_timeout="",
+    http_timeout="",
+    http2="",
+    narrative_stream="",
+    narrative_trace="",
+    narrative_compact_turns="",
+    narrative_keep_turns="",
+    poll_initial_interval="",
+    poll_max_interval="",
+    poll_multiplier="",
+    poll_jitter="",
+    poll_history_size="",
+    run_deadline_narrative="",
+    run_deadline_tool="",
+    run_deadline_summary="",
+    tool_dispatch="",
+    tool_workers="",
+    cassette_mode="",
+    cassette_path="",
+    cassette_speed="",
+    world_cache="",
+    world_cache_dir="",
+    world_cache_sample_size="",
+    world_cache_max_worlds="",
+    world_cache_max_age_days="",
+    world_pool_size="",
+    world_generation="",
+    world_spec="",
+    world_source="",
+    world_fallback_seconds="",
+    world_seed="",
+    metrics_export="",
+    trace_export="",
+    rate_limit_requests_per_minute="",
+    rate_limit_tokens_per_minute="",
+    rate_limit_run_tokens="",
+    rate_limit_max_retries="",
+    scheduler_max_concurrency="",
+    scheduler_generation_concurrency="",
+    scheduler_prefetch_concurrency="",
+    scheduler_starvation_seconds="",
+    server_host="",
+    server_tcp_port="",
+    server_websocket_port="",
+    server_max_sessions="",
+    server_write_buffer_limit="",
+)
 
 EXPECTED_SETTINGS: ExpectedSettings = [
     (OPENAI, OPENAI_API_KEY, ""),
     (OPENAI, OPENAI_MODEL, ""),
     (OPENAI, OPENAI_ASSISTANT_ID, ""),
+    (OPENAI, OPENAI_ASSISTANT_FINGERPRINT, ""),
+    (OPENAI, OPENAI_BASE_URL, ""),
+    (OPENAI, OPENAI_BACKEND, "assistants"),
+    (HTTP, HTTP_MAX_CONNECTIONS, "20"),
+    (HTTP, HTTP_MAX_KEEPALIVE_CONNECTIONS, "10"),
+    (HTTP, HTTP_KEEPALIVE_EXPIRY, "60"),
+    (HTTP, HTTP_CONNECT_TIMEOUT, "5"),
+    (HTTP, HTTP_TIMEOUT, "60"),
+    (HTTP, HTTP2, "no"),
+    (NARRATIVE, NARRATIVE_STREAM, "yes"),
+    (NARRATIVE, NARRATIVE_TRACE, "no"),
+    (NARRATIVE, NARRATIVE_COMPACT_TURNS, "30"),
+    (NARRATIVE, NARRATIVE_KEEP_TURNS, "2"),
+    (POLLING, POLL_INITIAL_INTERVAL, "0.25"),
+    (POLLING, POLL_MAX_INTERVAL, "4"),
+    (POLLING, POLL_MULTIPLIER, "2"),
+    (POLLING, POLL_JITTER, "0.2"),
+    (POLLING, POLL_HISTORY_SIZE, "20"),
+    (POLLING, RUN_DEADLINE_NARRATIVE, "120"),
+    (POLLING, RUN_DEADLINE_TOOL, "300"),
+    (POLLING, RUN_DEADLINE_SUMMARY, "180"),
+    (TOOLS, TOOL_DISPATCH, "thread"),
+    (TOOLS, TOOL_WORKERS, "4"),
+    (CASSETTE, CASSETTE_MODE, "off"),
+    (CASSETTE, CASSETTE_PATH, "sprawl-runner.cassette.jsonl.gz"),
+    (CASSETTE, CASSETTE_SPEED, "1"),
+    (WORLD_CACHE_SECTION, WORLD_CACHE, "yes"),
+    (WORLD_CACHE_SECTION, WORLD_CACHE_DIR, "~/.sprawl-runner-worlds"),
+    (WORLD_CACHE_SECTION, WORLD_CACHE_SAMPLE_SIZE, "3"),
+    (WORLD_CACHE_SECTION, WORLD_CACHE_MAX_WORLDS, "100"),
+    (WORLD_CACHE_SECTION, WORLD_CACHE_MAX_AGE_DAYS, "30"),
+    (WORLD_CACHE_SECTION, WORLD_POOL_SIZE, "0"),
+    (WORLD, WORLD_GENERATION, "batched"),
+    (WORLD, WORLD_SPEC, ""),
+    (WORLD, WORLD_SOURCE, "assistant"),
+    (WORLD, WORLD_FALLBACK_SECONDS, "0"),
+    (WORLD, WORLD_SEED, ""),
+    (METRICS, METRICS_EXPORT, ""),
+    (METRICS, TRACE_EXPORT, ""),
+    (RATE_LIMIT, RATE_LIMIT_REQUESTS_PER_MINUTE, "0"),
+    (RATE_LIMIT, RATE_LIMIT_TOKENS_PER_MINUTE, "0"),
+    (RATE_LIMIT, RATE_LIMIT_RUN_TOKENS, "1000"),
+    (RATE_LIMIT, RATE_LIMIT_MAX_RETRIES, "4"),
+    (SCHEDULER, SCHEDULER_MAX_CONCURRENCY, "8"),
+    (SCHEDULER, SCHEDULER_GENERATION_CONCURRENCY, "4"),
+    (SCHEDULER, SCHEDULER_PREFETCH_CONCURRENCY, "2"),
+    (SCHEDULER, SCHEDULER_STARVATION_SECONDS, "10"),
+    (SERVER, SERVER_HOST, "127.0.0.1"),
+    (SERVER, SERVER_TCP_PORT, "4000"),
+    (SERVER, SERVER_WEBSOCKET_PORT, "4001"),
+    (SERVER, SERVER_MAX_SESSIONS, "500"),
+    (SERVER, SERVER_WRITE_BUFFER_LIMIT, "1048576"),
 ]
@@ -3,6 +3,7 @@ from sprawl_runner.config.constants import (
     DEFAULT_AI_MODEL,
     EMPTY_SETTINGS,
     EXPECTED_SETTINGS,
+    OPENAI_BACKEND,
 )
 from sprawl_runner.config.types import GameSettings
 
@@ -12,9 +13,20 @@ class GameConfiguration:
     def _unimplemented_handler(openai_api_key: str, openai_model: str) -> str:
         raise NotImplementedError
 
+    @staticmethod
+    def _unimplemented_update_handler(openai_api_key: str, openai_model: str, openai_assistant_id: str) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def _no_fingerprint_handler(openai_model: str) -> str:
+        return ""
+
     def __init__(self, config_file: ConfigFile):
         self.default_ai_model: str = DEFAULT_AI_MODEL
         self.assistant_creation_handler = self._unimplemented_handler
+        self.assistant_update_handler = self._unimplemented_update_handler
+        # Without a fingerprint handler an existing assistant is always kept as is.
+        self.assistant_fingerprint_handler = self._no_fingerprint_handler
         self._config_file = config_file
         self._settings: GameSettings = EMPTY_SETTINGS
         self._has_dirty_settings = False
@@ -36,12 +48,30 @@ class GameConfiguration:
             self._has_dirty_settings = True
 
     def _check_assistant_id_setting(self) -> None:
+        if self.settings.get(OPENAI_BACKEND) == "chat":
+            # Only the Assistants API needs an assistant to talk to.
+            return
+
+        # Computed locally, so the usual startup makes no assistant API calls.
+        fingerprint = self.assistant_fingerprint_handler(self.settings["openai_model"])
+        stored_fingerprint = self.settings.get("openai_assistant_fingerprint") or ""
+
         if not self.settings.get("openai_assistant_id"):
             self.settings["openai_assistant_id"] = self.assistant_creation_handler(
                 self.settings["openai_api_key"],
                 self.settings["openai_model"],
             )
-            self._has_dirty_settings = True
+        elif fingerprint != stored_fingerprint:
+            self.settings["openai_assistant_id"] = self.assistant_update_handler(
+                self.settings["openai_api_key"],
+                self.settings["openai_model"],
+                self.settings["openai_assistant_id"],
+            )
+        else:
+            return
+
+        self.settings["openai_assistant_fingerprint"] = fingerprint
+        self._has_dirty_settings = True
 
     def load_settings(self) -> GameSettings:
         config_parser = self._config_file.load()
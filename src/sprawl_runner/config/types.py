@@ -1,7 +1,76 @@
 from typing import Callable, Literal, TypedDict
 
-SettingsSection = Literal["OpenAI"]
-SettingsKey = Literal["openai_api_key", "openai_model", "openai_assistant_id"]
+SettingsSection = Literal[
+    "OpenAI",
+    "HTTP",
+    "Narrative",
+    "Polling",
+    "Tools",
+    "Cassette",
+    "WorldCache",
+    "World",
+    "Metrics",
+    "RateLimit",
+    "Scheduler",
+    "Server",
+]
+SettingsKey = Literal[
+    "openai_api_key",
+    "openai_model",
+    "openai_assistant_id",
+    "openai_assistant_fingerprint",
+    "openai_base_url",
+    "openai_backend",
+    "http_max_connections",
+    "http_max_keepalive_connections",
+    "http_keepalive_expiry",
+    "http_connect_timeout",
+    "http_timeout",
+    "http2",
+    "narrative_stream",
+    "narrative_trace",
+    "narrative_compact_turns",
+    "narrative_keep_turns",
+    "poll_initial_interval",
+    "poll_max_interval",
+    "poll_multiplier",
+    "poll_jitter",
+    "poll_history_size",
+    "run_deadline_narrative",
+    "run_deadline_tool",
+    "run_deadline_summary",
+    "tool_dispatch",
+    "tool_workers",
+    "cassette_mode",
+    "cassette_path",
+    "cassette_speed",
+    "world_cache",
+    "world_cache_dir",
+    "world_cache_sample_size",
+    "world_cache_max_worlds",
+    "world_cache_max_age_days",
+    "world_pool_size",
+    "world_generation",
+    "world_spec",
+    "world_source",
+    "world_fallback_seconds",
+    "world_seed",
+    "metrics_export",
+    "trace_export",
+    "rate_limit_requests_per_minute",
+    "rate_limit_tokens_per_minute",
+    "rate_limit_run_tokens",
+    "rate_limit_max_retries",
+    "scheduler_max_concurrency",
+    "scheduler_generation_concurrency",
+    "scheduler_prefetch_concurrency",
+    "scheduler_starvation_seconds",
+    "server_host",
+    "server_tcp_port",
+    "server_websocket_port",
+    "server_max_sessions",
+    "server_write_buffer_limit",
+]
 SettingDefault = str
 SettingsEntry = tuple[SettingsSection, SettingsKey, SettingDefault]
 ExpectedSettings = list[SettingsEntry]
@@ -13,3 +82,55 @@ class GameSettings(TypedDict):
     openai_api_key: str
     openai_model: str
     openai_assistant_id: str
+    openai_assistant_fingerprint: str
+    openai_base_url: str
+    openai_backend: str
+    http_max_connections: str
+    http_max_keepalive_connections: str
+    http_keepalive_expiry: str
+    http_connect_timeout: str
+    http_timeout: str
+    http2: str
+    narrative_stream: str
+    narrative_trace: str
+    narrative_compact_turns: str
+    narrative_keep_turns: str
+    poll_initial_interval: str
+    poll_max_interval: str
+    poll_multiplier: str
+    poll_jitter: str
+    poll_history_size: str
+    run_deadline_narrative: str
+    run_deadline_tool: str
+    run_deadline_summary: str
+    tool_dispatch: str
+    tool_workers: str
+    cassette_mode: str
+    cassette_path: str
+    cassette_speed: str
+    world_cache: str
+    world_cache_dir: str
+    world_cache_sample_size: str
+    world_cache_max_worlds: str
+    world_cache_max_age_days: str
+    world_pool_size: str
+    world_generation: str
+    world_spec: str
+    world_source: str
+    world_fallback_seconds: str
+    world_seed: str
+    metrics_export: str
+    trace_export: str
+    rate_limit_requests_per_minute: str
+    rate_limit_tokens_per_minute: str
+    rate_limit_run_tokens: str
+    rate_limit_max_retries: str
+    scheduler_max_concurrency: str
+    scheduler_generation_concurrency: str
+    scheduler_prefetch_concurrency: str
+    scheduler_starvation_seconds: str
+    server_host: str
+    server_tcp_port: str
+    server_websocket_port: str
+    server_max_sessions: str
+    server_write_buffer_limit: str
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from configparser import ConfigParser
+from typing import TYPE_CHECKING
+
+from sprawl_runner.config.constants import EXPECTED_SETTINGS
+
+if TYPE_CHECKING:
+    from sprawl_runner.config.types import GameSettings, SettingsKey
+
+_DEFAULTS: dict[SettingsKey, str] = {key: default for _, key, default in EXPECTED_SETTINGS}
+
+
+def get_str(settings: GameSettings, key: SettingsKey) -> str:
+    # Settings written before a key existed (or left blank) use its default.
+    return settings.get(key) or _DEFAULTS.get(key, "")
+
+
+def get_int(settings: GameSettings, key: SettingsKey) -> int:
+    value = get_str(settings, key)
+
+    try:
+        return int(value)
+    except ValueError:
+        msg = f"Setting {key} must be a whole number, got: {value!r}"
+        raise ValueError(msg) from None
+
+
+def get_float(settings: GameSettings, key: SettingsKey) -> float:
+    value = get_str(settings, key)
+
+    try:
+        return float(value)
+    except ValueError:
+        msg = f"Setting {key} must be a number, got: {value!r}"
+        raise ValueError(msg) from None
+
+
+def get_bool(settings: GameSettings, key: SettingsKey) -> bool:
+    value = get_str(settings, key)
+
+    try:
+        return ConfigParser.BOOLEAN_STATES[value.lower()]
+    except KeyError:
+        msg = f"Setting {key} must be yes/no, true/false, on/off or 1/0, got: {value!r}"
+        raise ValueError(msg) from None
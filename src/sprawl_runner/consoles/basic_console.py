@@ -1,3 +1,5 @@
+import asyncio
+
 from sprawl_runner.consoles.console import Console
 
 
@@ -5,5 +7,13 @@ class BasicConsole(Console):
     def emit(self, data: str) -> None:
         print(data)  # noqa: T201
 
-    def get_player_input(self) -> str:
-        return input()
+    def emit_partial(self, data: str) -> None:
+        # No newline and an immediate flush so streamed text shows up as it arrives.
+        print(data, end="", flush=True)  # noqa: T201
+
+    def get_player_input(self, prompt: str = "") -> str:
+        return input(prompt)
+
+    async def aget_player_input(self, prompt: str = "") -> str:
+        # stdin can't be awaited; a worker thread waits on it instead.
+        return await asyncio.to_thread(input, prompt)
@@ -5,5 +5,11 @@ class Console(Protocol):
     def emit(self, data: str) -> None:
         raise NotImplementedError
 
-    def get_player_input(self) -> str:
+    def emit_partial(self, data: str) -> None:
+        raise NotImplementedError
+
+    def get_player_input(self, prompt: str = "") -> str:
+        raise NotImplementedError
+
+    async def aget_player_input(self, prompt: str = "") -> str:
         raise NotImplementedError
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import struct
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from sprawl_runner.config.constants import SERVER_WRITE_BUFFER_LIMIT
+from sprawl_runner.config.values import get_int
+from sprawl_runner.consoles.console import Console
+
+if TYPE_CHECKING:
+    from sprawl_runner.config.types import GameSettings
+
+ConsoleHandler = Callable[["NetworkConsole"], Awaitable[None]]
+
+# What a connection that breaks off, or sends garbage, raises while being read.
+_READ_ERRORS = (ConnectionError, EOFError, ValueError, asyncio.LimitOverrunError)
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OP_TEXT = 0x1
+_OP_CLOSE = 0x8
+_OP_PING = 0x9
+_OP_PONG = 0xA
+_CLOSE_NORMAL = 1000
+# Enough for the headers of a browser's upgrade request.
+_HANDSHAKE_LIMIT = 16 * 1024
+
+
+@dataclass(frozen=True)
+class NetworkConsoleOptions:
+    # Bytes of output a connection may leave unsent before it is dropped as too slow.
+    write_buffer_limit: int = 1024 * 1024
+    # Longest line or WebSocket message a player may send.
+    max_input: int = 4096
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> NetworkConsoleOptions:
+        return cls(write_buffer_limit=get_int(settings, SERVER_WRITE_BUFFER_LIMIT))
+
+    @property
+    def high_water(self) -> int:
+        # Above this the game waits for the player to catch up before reading their next line.
+        return max(1, self.write_buffer_limit // 16)
+
+
+class NetworkConsole(Console):
+    """
+    A console for a player connected over the network, on the server's event loop.
+
+    Writes are buffered and sent together once the game yields to the loop,
+    so streamed narrative costs one write per turn of the loop rather than
+    one per delta. A player who reads slowly holds up only their own game:
+    it waits for their output to drain before reading their next line, and
+    their connection is dropped once too much output has piled up.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        options: NetworkConsoleOptions | None = None,
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._options = options or NetworkConsoleOptions()
+        self._loop = asyncio.get_running_loop()
+        self._buffer = bytearray()
+        self._flush_scheduled = False
+        # None once the connection is gone, after any lines that came before it.
+        self._input: asyncio.Queue[str | None] = asyncio.Queue()
+        self._closed = asyncio.Event()
+        self._reading: asyncio.Task[None] | None = None
+        self.peer = writer.get_extra_info("peername")
+        writer.transport.set_write_buffer_limits(high=self._options.high_water)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    @property
+    def buffered(self) -> int:
+        """Bytes the game has written that the player's connection hasn't taken yet."""
+        return len(self._buffer) + self._writer.transport.get_write_buffer_size()
+
+    def start(self) -> None:
+        self._reading = self._loop.create_task(self._read_input())
+
+    async def _read_input(self) -> None:
+        try:
+            while (line := await self._read_line()) is not None:
+                self._input.put_nowait(line)
+        except _READ_ERRORS:
+            pass
+        finally:
+            self.close()
+
+    async def _read_line(self) -> str | None:
+        raise NotImplementedError
+
+    def _frame(self, data: bytes) -> bytes:
+        return data
+
+    def emit(self, data: str) -> None:
+        self._write(f"{data}\n")
+
+    def emit_partial(self, data: str) -> None:
+        self._write(data)
+
+    def _write(self, data: str) -> None:
+        if self.closed:
+            return
+
+        self._buffer += data.encode()
+        if self.buffered > self._options.write_buffer_limit:
+            self.close(abort=True)
+            return
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if self._buffer and not self._writer.is_closing():
+            self._writer.write(self._frame(bytes(self._buffer)))
+        self._buffer.clear()
+
+    async def drain(self) -> None:
+        """Send what is buffered and wait until the connection is below its high-water mark."""
+        self._flush()
+        if not self.closed:
+            try:
+                await self._writer.drain()
+            except ConnectionError:
+                self.close(abort=True)
+
+    def get_player_input(self, prompt: str = "") -> str:
+        msg = "A NetworkConsole can only be read from its event loop, with aget_player_input()."
+        raise RuntimeError(msg)
+
+    async def aget_player_input(self, prompt: str = "") -> str:
+        if prompt:
+            self.emit_partial(prompt)
+        await self.drain()
+
+        line = await self._input.get()
+        if line is None:
+            # Left for whoever reads next, so they don't wait forever either.
+            self._input.put_nowait(None)
+            msg = f"The player at {self.peer} has disconnected."
+            raise ConnectionResetError(msg)
+        return line
+
+    def close(self, *, abort: bool = False) -> None:
+        """Close the connection, sending what is buffered first unless abort is set."""
+        if self.closed:
+            return
+
+        self._closed.set()
+        self._input.put_nowait(None)
+        if abort:
+            self._buffer.clear()
+            self._writer.transport.abort()
+        else:
+            self._flush()
+            self._writer.close()
+
+    async def wait_closed(self) -> None:
+        await self._closed.wait()
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._reading is not None and self._reading is not asyncio.current_task():
+            self._reading.cancel()
+            await asyncio.gather(self._reading, return_exceptions=True)
+        await asyncio.gather(self._writer.wait_closed(), return_exceptions=True)
+
+
+class TcpConsole(NetworkConsole):
+    """A NetworkConsole speaking plain lines of UTF-8, as telnet or nc do."""
+
+    async def _read_line(self) -> str | None:
+        line = await self._reader.readline()
+        if not line:
+            return None
+        return line.decode(errors="replace").rstrip("\r\n")
+
+
+def websocket_accept(key: str) -> str:
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()  # noqa: S324
+    return base64.b64encode(digest).decode()
+
+
+def encode_frame(opcode: int, payload: bytes) -> bytes:
+    """A single, final, unmasked frame, as a server sends them."""
+    length = len(payload)
+    if length < 126:  # noqa: PLR2004
+        head = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return head + payload
+
+
+def unmask(payload: bytes, mask: bytes) -> bytes:
+    # One XOR over the payload as a big integer rather than a loop over its bytes.
+    length = len(payload)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+
+
+class WebSocketConsole(NetworkConsole):
+    """
+    A NetworkConsole speaking WebSocket (RFC 6455) text messages, for browsers.
+
+    Each flush of the game's output is sent as one text message, and each
+    message from the player is a line of input. Pings are answered; other
+    extensions and subprotocols are not offered.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        options: NetworkConsoleOptions | None = None,
+    ) -> None:
+        super().__init__(reader, writer, options)
+        # Nothing to close on the WebSocket level until the handshake is done.
+        self._close_sent = True
+
+    async def handshake(self) -> bool:
+        """Answer the HTTP upgrade request the connection opens with; False if it isn't one."""
+        request = await self._reader.readuntil(b"\r\n\r\n")
+        request_line, *header_lines = request.decode("latin-1").split("\r\n")
+        headers = {}
+        for header_line in header_lines:
+            name, _, value = header_line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get("sec-websocket-key")
+        if not request_line.startswith("GET ") or "websocket" not in headers.get("upgrade", "").lower() or not key:
+            self._writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return False
+
+        self._writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n"
+            ).encode()
+        )
+        self._close_sent = False
+        return True
+
+    async def _read_frame(self) -> tuple[bool, int, bytes]:
+        first, second = await self._reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:  # noqa: PLR2004
+            (length,) = struct.unpack("!H", await self._reader.readexactly(2))
+        elif length == 127:  # noqa: PLR2004
+            (length,) = struct.unpack("!Q", await self._reader.readexactly(8))
+
+        if not second & 0x80:
+            msg = "WebSocket clients must mask their frames."
+            raise ValueError(msg)
+        if length > self._options.max_input:
+            msg = f"A WebSocket frame of {length} bytes is over the limit."
+            raise ValueError(msg)
+
+        mask = await self._reader.readexactly(4)
+        payload = await self._reader.readexactly(length)
+        return bool(first & 0x80), first & 0x0F, unmask(payload, mask)
+
+    async def _read_line(self) -> str | None:
+        message = bytearray()
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode == _OP_CLOSE:
+                return None
+            if opcode == _OP_PING:
+                self._send_control(_OP_PONG, payload)
+                continue
+            if opcode == _OP_PONG:
+                continue
+
+            message += payload
+            if len(message) > self._options.max_input:
+                msg = f"A WebSocket message of over {self._options.max_input} bytes is over the limit."
+                raise ValueError(msg)
+            if fin:
+                return message.decode(errors="replace").rstrip("\r\n")
+
+    def _frame(self, data: bytes) -> bytes:
+        return encode_frame(_OP_TEXT, data)
+
+    def _send_control(self, opcode: int, payload: bytes) -> None:
+        # Whatever the game has written goes out first, in order.
+        self._flush()
+        if not self._writer.is_closing():
+            self._writer.write(encode_frame(opcode, payload))
+
+    def close(self, *, abort: bool = False) -> None:
+        if not self.closed and not abort and not self._close_sent:
+            self._close_sent = True
+            self._send_control(_OP_CLOSE, struct.pack("!H", _CLOSE_NORMAL))
+        super().close(abort=abort)
+
+
+async def _serve_connection(console: NetworkConsole, handler: ConsoleHandler) -> None:
+    console.start()
+    try:
+        await handler(console)
+    finally:
+        await console.aclose()
+
+
+async def start_tcp_server(
+    handler: ConsoleHandler, host: str, port: int, options: NetworkConsoleOptions | None = None
+) -> asyncio.Server:
+    """Listen for line-based connections, and hand each one to handler as a TcpConsole."""
+    options = options or NetworkConsoleOptions()
+
+    async def connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await _serve_connection(TcpConsole(reader, writer, options), handler)
+
+    return await asyncio.start_server(connect, host, port, limit=options.max_input)
+
+
+async def start_websocket_server(
+    handler: ConsoleHandler, host: str, port: int, options: NetworkConsoleOptions | None = None
+) -> asyncio.Server:
+    """Listen for WebSocket connections, and hand each one to handler as a WebSocketConsole."""
+    options = options or NetworkConsoleOptions()
+
+    async def connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        console = WebSocketConsole(reader, writer, options)
+        try:
+            upgraded = await console.handshake()
+        except _READ_ERRORS:
+            upgraded = False
+
+        if upgraded:
+            await _serve_connection(console, handler)
+        else:
+            await console.aclose()
+
+    return await asyncio.start_server(connect, host, port, limit=_HANDSHAKE_LIMIT)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+
+from sprawl_runner.consoles.console import Console
+
+
+class QueueConsole(Console):
+    """
+    A console for a game hosted on an event loop, fed and read by code.
+
+    Lines given to feed() are the player's input, and everything the game
+    writes is put on output. Waiting for input holds no thread, so an idle
+    player costs nothing but the console itself.
+    """
+
+    def __init__(self) -> None:
+        self._input: asyncio.Queue[str] = asyncio.Queue()
+        self.output: asyncio.Queue[str] = asyncio.Queue()
+        self.closed = False
+
+    def emit(self, data: str) -> None:
+        self.output.put_nowait(f"{data}\n")
+
+    def emit_partial(self, data: str) -> None:
+        self.output.put_nowait(data)
+
+    def feed(self, line: str) -> None:
+        self._input.put_nowait(line)
+
+    def get_player_input(self, prompt: str = "") -> str:
+        msg = "A QueueConsole can only be read from its event loop, with aget_player_input()."
+        raise RuntimeError(msg)
+
+    async def aget_player_input(self, prompt: str = "") -> str:
+        if prompt:
+            self.emit_partial(prompt)
+        return await self._input.get()
+
+    def read_output(self) -> str:
+        """Everything written since the last read."""
+        chunks = []
+        while not self.output.empty():
+            chunks.append(self.output.get_nowait())
+        return "".join(chunks)
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import contextlib
 import sys
+import threading
+from concurrent.futures import Future, InvalidStateError
 from typing import TYPE_CHECKING, TypedDict
 
+from sprawl_runner import data
 from sprawl_runner.ai.constants import TOOL_REGISTER_FACTIONS, TOOL_REGISTER_LOCATIONS
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+from sprawl_runner.telemetry.tracing import Tracer
+from sprawl_runner.world.procedural import ProceduralWorldGenerator
 
 if TYPE_CHECKING:
-    from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus
+    from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, NarrativeReply
     from sprawl_runner.ai.types import ToolHandlerEntry
     from sprawl_runner.consoles.console import Console
     from sprawl_runner.game.states.game_state import GameState
+    from sprawl_runner.world.cache import World, WorldCache
+    from sprawl_runner.world.generator import WorldGenerationMode
+    from sprawl_runner.world.pool import WorldPool
+    from sprawl_runner.world.procedural import WorldSource
+    from sprawl_runner.world.sharding import WorldSpec
 
 
 class Faction(TypedDict):
@@ -34,6 +46,28 @@ class Game:
         self.factions: list[Faction] = []
         self.locations: list[Location] = []
         self.iterations_without_state_change = 0
+        # Resolves as soon as both factions and locations have been registered.
+        self.world_ready: Future[None] = Future()
+        self._has_factions = False
+        self._has_locations = False
+        # Previously generated worlds, when caching is on.
+        self.world_cache: WorldCache | None = None
+        # Fresh worlds generated ahead of time.
+        self.world_pool: WorldPool | None = None
+        self.world_generation: WorldGenerationMode = "batched"
+        # A large world to generate in shards instead of the usual small one.
+        self.world_spec: WorldSpec | None = None
+        # "procedural" makes worlds up locally instead of asking the assistant.
+        self.world_source: WorldSource = "assistant"
+        self.procedural_world = ProceduralWorldGenerator()
+        # How long to wait for the assistant's world before making one up; 0 waits it out.
+        self.world_fallback_seconds = 0.0
+        # Started as soon as there are places to go, before the first scene is played.
+        self.opening_scene: NarrativeReply | None = None
+        self._opening_scene_lock = threading.Lock()
+        # Shared with the message bus, so one export covers the whole session.
+        self.metrics = MetricsRegistry()
+        self.tracer = Tracer()
 
     @property
     def message_bus(self):
@@ -64,22 +98,68 @@ class Game:
             self.iterations_without_state_change = 0
 
     def emit(self, data: str) -> None:
-        self._console.emit(data)
+        with self.tracer.span("console.emit"):
+            self._console.emit(data)
+
+    def emit_partial(self, data: str) -> None:
+        self._console.emit_partial(data)
+
+    def emit_thinking(self) -> None:
+        self.emit("...[thinking]...")
+
+    def get_player_input(self, prompt: str = "") -> str:
+        with self.tracer.span("console.input"):
+            return self._console.get_player_input(prompt)
+
+    async def aget_player_input(self, prompt: str = "") -> str:
+        with self.tracer.span("console.input"):
+            return await self._console.aget_player_input(prompt)
 
     def play(self) -> None:
         if not self._state:
             msg = "Invalid game state encountered."
             raise RuntimeError(msg)
 
-        while not self._state.is_terminal_state:
-            self._state.transition()
-            self.iterations_without_state_change += 1
-            if self.iterations_without_state_change > self.MAX_ITERS_WITHOUT_STATE_CHANGE:
-                # Safety check in case there is a "stuck in state" issue.
-                # This shouldn't happen... <cough!>
-                # If the OpenAI Assistant doesn't make the expected tool calls it can happen.
-                self.emit("There was a glitch in the Matrix.")
-                sys.exit(1)
+        try:
+            while not self._state.is_terminal_state:
+                with self.tracer.span("game.iteration", state=type(self._state).__name__):
+                    self._state.transition()
+                self.iterations_without_state_change += 1
+                if self.iterations_without_state_change > self.MAX_ITERS_WITHOUT_STATE_CHANGE:
+                    # Safety check in case there is a "stuck in state" issue.
+                    # This shouldn't happen... <cough!>
+                    # If the OpenAI Assistant doesn't make the expected tool calls it can happen.
+                    self.emit("There was a glitch in the Matrix.")
+                    sys.exit(1)
+        finally:
+            self.close()
+
+    async def aplay(self) -> None:
+        """Play on the running event loop, next to other games; the bus must be hosted on the same loop."""
+        if not self._state:
+            msg = "Invalid game state encountered."
+            raise RuntimeError(msg)
+
+        try:
+            while not self._state.is_terminal_state:
+                with self.tracer.span("game.iteration", state=type(self._state).__name__):
+                    await self._state.atransition()
+                self.iterations_without_state_change += 1
+                if self.iterations_without_state_change > self.MAX_ITERS_WITHOUT_STATE_CHANGE:
+                    # Only this game ends; the others on the loop play on.
+                    self.emit("There was a glitch in the Matrix.")
+                    break
+        finally:
+            await self.aclose()
+
+    def close(self) -> None:
+        # Releases the message bus's pooled connections once the game is over.
+        if self._message_bus:
+            self._message_bus.close()
+
+    async def aclose(self) -> None:
+        if self._message_bus:
+            await self._message_bus.aclose()
 
     def register_factions(self, arguments: dict[str, list]) -> str:
         for entry in arguments["factions"]:
@@ -89,6 +169,8 @@ class Game:
                 motivation=entry.get("motivation"),
             )
             self.factions.append(faction)
+        self._has_factions = True
+        self._check_world_ready()
         return "OK"
 
     def register_locations(self, arguments: dict[str, list]) -> str:
@@ -99,8 +181,54 @@ class Game:
                 description=entry.get("description"),
             )
             self.locations.append(location)
+        self._has_locations = True
+        self._check_world_ready()
+
+        if self._message_bus and self.get_employment_locations():
+            self.start_opening_scene()
         return "OK"
 
+    def get_employment_locations(self) -> list[Location]:
+        # The tool schema says "employment"; older worlds may say "Employment".
+        return [location for location in self.locations if (location["type"] or "").lower() == "employment"]
+
+    def get_opening_scene_prompt(self) -> str:
+        opening_scene_instructions = data.load_data("opening-scene-instructions.txt")
+        locations = ""
+        for location in self.get_employment_locations():
+            locations += f"- {location['name']} - {location['description']}\n"
+
+        return opening_scene_instructions.format(locations=locations)
+
+    def start_opening_scene(self) -> NarrativeReply:
+        with self._opening_scene_lock:
+            if self.opening_scene is None:
+                self.opening_scene = self.message_bus.start_narrative_message(
+                    self.get_opening_scene_prompt(), run_class="opening"
+                )
+
+            return self.opening_scene
+
+    def get_world_state(self) -> str:
+        """Describe the world for a narrative thread that starts part way through the story."""
+        lines = ["Factions:"]
+        lines += [f"- {faction['name']} - {faction['description']}" for faction in self.factions]
+        lines.append("Locations:")
+        lines += [
+            f"- {location['name']} ({location['type']}) - {location['description']}" for location in self.locations
+        ]
+        return "\n".join(lines)
+
+    def load_world(self, world: World) -> None:
+        self.register_factions({"factions": world["factions"]})
+        self.register_locations({"locations": world["locations"]})
+
+    def _check_world_ready(self) -> None:
+        if self._has_factions and self._has_locations:
+            # Tool handlers may race here; only the first one resolves the future.
+            with contextlib.suppress(InvalidStateError):
+                self.world_ready.set_result(None)
+
     def validate(self) -> None:
         if not self._message_bus:
             msg = "Message Bus has not been set."
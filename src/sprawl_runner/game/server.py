@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+import uuid
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple
+
+from sprawl_runner.consoles.queue_console import QueueConsole
+from sprawl_runner.telemetry.memory import get_deep_size
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+if TYPE_CHECKING:
+    from sprawl_runner.consoles.console import Console
+    from sprawl_runner.consoles.network_console import NetworkConsole
+    from sprawl_runner.game.game import Game
+
+GameFactory = Callable[["Console"], "Game"]
+
+
+class SessionStats(NamedTuple):
+    session_id: str
+    state: str
+    memory_bytes: int
+    seconds: float
+
+
+class Session:
+    """One player's game, played as a task on the server's event loop."""
+
+    def __init__(self, session_id: str, game: Game, console: Console) -> None:
+        self.session_id = session_id
+        self.game = game
+        self.console = console
+        self.started_at = time.monotonic()
+        self.task: asyncio.Task[None] | None = None
+
+    @property
+    def state(self) -> str:
+        state = self.game._state  # noqa: SLF001
+        return type(state).__name__ if state is not None else ""
+
+    def __repr__(self) -> str:
+        return f"Session({self.session_id!r}, state={self.state!r})"
+
+
+class GameServer:
+    """
+    Plays many games at once, each as a task on one event loop.
+
+    Every session gets a game of its own, with its own state machine and
+    console, made by game_factory. The games' buses are hosted on the loop
+    and share one client manager, scheduler and tool dispatcher, so a session
+    waiting on its player holds no thread and no connection.
+
+    Pass the objects the sessions share as shared, so stats() counts only
+    what each session holds on its own. The stats are set as gauges on metrics
+    whenever it is exported.
+    """
+
+    def __init__(
+        self,
+        game_factory: GameFactory,
+        max_sessions: int = 500,
+        metrics: MetricsRegistry | None = None,
+        shared: Iterable[object] = (),
+    ) -> None:
+        self._game_factory = game_factory
+        self._max_sessions = max_sessions
+        self._metrics = metrics or MetricsRegistry()
+        self._shared = [self, self._metrics, *shared]
+        self._sessions: dict[str, Session] = {}
+        self._metrics.add_collector(self.collect_metrics)
+
+    @property
+    def sessions(self) -> list[Session]:
+        return list(self._sessions.values())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def open_session(self, console: Console | None = None) -> Session:
+        """Start a game for a new player; must be called on the server's event loop."""
+        if len(self._sessions) >= self._max_sessions:
+            msg = f"The server is full, with {self._max_sessions} sessions."
+            raise RuntimeError(msg)
+
+        console = console or QueueConsole()
+        session = Session(uuid.uuid4().hex[:12], self._game_factory(console), console)
+        self._sessions[session.session_id] = session
+        session.task = asyncio.get_running_loop().create_task(self._play(session), name=session.session_id)
+        self._metrics.increment("sessions_opened_total")
+        return session
+
+    async def _play(self, session: Session) -> None:
+        outcome = "ended"
+        try:
+            await session.game.aplay()
+        except asyncio.CancelledError:
+            outcome = "closed"
+            raise
+        except ConnectionError:
+            outcome = "disconnected"
+        except Exception as error:  # noqa: BLE001
+            # One broken game must not take the others down with it.
+            outcome = "failed"
+            with contextlib.suppress(Exception):
+                session.console.emit(f"The session ended with an error: {error}")
+        finally:
+            self._sessions.pop(session.session_id, None)
+            self._metrics.increment("sessions_closed_total", outcome=outcome)
+            self._metrics.observe("session_seconds", time.monotonic() - session.started_at)
+
+    async def serve(self, console: NetworkConsole) -> None:
+        """Play a session on a player's connection until the game ends or the player goes away."""
+        try:
+            session = self.open_session(console)
+        except RuntimeError as error:
+            console.emit(str(error))
+            return
+
+        if session.task is None:
+            return
+        gone = asyncio.ensure_future(console.wait_closed())
+        try:
+            await asyncio.wait((session.task, gone), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            gone.cancel()
+
+        # Nobody is left to read the game's output, or answer it.
+        if not session.task.done():
+            await self.close_session(session.session_id)
+
+    async def close_session(self, session_id: str) -> None:
+        session = self._sessions.get(session_id)
+        if session is not None and session.task is not None:
+            session.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await session.task
+        # A task cancelled before it ever ran never got to remove its session.
+        self._sessions.pop(session_id, None)
+
+    async def aclose(self) -> None:
+        for session_id in list(self._sessions):
+            await self.close_session(session_id)
+
+    def stats(self) -> list[SessionStats]:
+        """Each session's state, age and approximate memory, leaving out what the sessions share."""
+        now = time.monotonic()
+        return [
+            SessionStats(
+                session.session_id,
+                session.state,
+                get_deep_size(session, exclude=[*self._shared, session.task]),
+                now - session.started_at,
+            )
+            for session in self.sessions
+        ]
+
+    def collect_metrics(self) -> None:
+        """Set the sessions' count, and each one's memory and age, as gauges; the metrics call it before exporting."""
+        stats = self.stats()
+        self._metrics.set_gauge("server_sessions", len(stats))
+        for name, field in (("server_session_memory_bytes", "memory_bytes"), ("server_session_age_seconds", "seconds")):
+            self._metrics.set_gauges(
+                name,
+                [({"session_id": stat.session_id, "state": stat.state}, getattr(stat, field)) for stat in stats],
+            )
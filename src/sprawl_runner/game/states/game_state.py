@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from typing import TYPE_CHECKING, Protocol
 
 if TYPE_CHECKING:
@@ -25,10 +26,31 @@ class GameState(Protocol):
     def action(self) -> GameState | None:
         raise NotImplementedError
 
-    def transition(self) -> None:
-        new_state = self.action()
+    async def aaction(self) -> GameState | None:
+        # States that wait on the player or the assistant wait without blocking the loop instead.
+        return self.action()
+
+    def _end_transition(self, new_state: GameState | None, started_at: float) -> None:
+        self._game.metrics.observe(
+            "game_state_transition_seconds", time.perf_counter() - started_at, state=type(self).__name__
+        )
         if new_state:
             self._game.change_state(new_state)
 
+    def transition(self) -> None:
+        started_at = time.perf_counter()
+        with self._game.tracer.span("state.action", state=type(self).__name__):
+            new_state = self.action()
+        self._end_transition(new_state, started_at)
+
+    async def atransition(self) -> None:
+        started_at = time.perf_counter()
+        with self._game.tracer.span("state.action", state=type(self).__name__):
+            new_state = await self.aaction()
+        self._end_transition(new_state, started_at)
+
     def emit(self, data) -> None:
         self._game.emit(data)
+
+    def emit_partial(self, data) -> None:
+        self._game.emit_partial(data)
@@ -1,44 +1,251 @@
-from sprawl_runner import data
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import TYPE_CHECKING
+
+from sprawl_runner.ai.assistant_message_bus import RoundTrips
+from sprawl_runner.game.states.end_game import EndGame
 from sprawl_runner.game.states.game_state import GameState
 from sprawl_runner.game.states.play_scene import PlayScene
+from sprawl_runner.world.cache import World
+from sprawl_runner.world.generator import WorldGenerator
+from sprawl_runner.world.sharding import ShardedWorldGenerator
+
+if TYPE_CHECKING:
+    from openai.types.beta.threads.run import Run
+
+    from sprawl_runner.ai.chat_completions import ChatReply
+    from sprawl_runner.world.cache import WorldCache
+    from sprawl_runner.world.sharding import ShardProgress, WorldSpec
 
 
 class InitializeGameWorld(GameState):
+    SHARD_TIMEOUT = 120.0
+
+    def _report_shard_progress(self, progress: ShardProgress) -> None:
+        shard = progress.shard
+        if progress.error is not None:
+            self.emit(f"... {shard.kind} for {shard.group} failed: {progress.error}")
+        else:
+            self.emit(f"... {progress.finished}/{progress.total} {shard.kind} for {shard.group} (+{progress.added})")
+
+    def _generate_sharded_world(self, spec: WorldSpec) -> GameState:
+        round_trips = RoundTrips()
+        generated = ShardedWorldGenerator(self.game.message_bus, spec, round_trips).generate(
+            self._report_shard_progress
+        )
+        # Resolves once the world is loaded, so waiting on it can't miss the world.
+        loaded: Future[None] = Future()
+
+        def load_world(generated: Future[World]) -> None:
+            error = generated.exception()
+            if error is None:
+                self.game.load_world(generated.result())
+                loaded.set_result(None)
+            else:
+                loaded.set_exception(error)
+
+        generated.add_done_callback(load_world)
+        waves = -(-len(spec.shards()) // spec.concurrency)
+        return WaitForGameWorldReady([loaded], round_trips=round_trips, timeout=waves * self.SHARD_TIMEOUT)
+
+    def _make_procedural_world(self) -> World:
+        generator = self.game.procedural_world
+        spec = self.game.world_spec
+        return generator.generate_spec(spec) if spec is not None else generator.generate()
+
+    def _pop_pooled_world(self) -> World | None:
+        world_pool = self.game.world_pool
+        if world_pool is None:
+            return None
+
+        world = world_pool.pop()
+        # Top the pool back up for the next game while this one is played.
+        world_pool.refill(WorldGenerator(self.game.message_bus, self.game.world_generation, run_class="prefetch"))
+        return world
+
+    def _sample_cached_world(self) -> World | None:
+        world_cache = self.game.world_cache
+        return world_cache.sample() if world_cache is not None else None
+
+    def _load_pooled_world(self, world: World) -> GameState:
+        self.game.load_world(world)
+        return WaitForGameWorldReady([], self.game.world_cache)
+
+    def _load_cached_world(self, world: World) -> GameState:
+        self.game.load_world(world)
+        return WaitForGameWorldReady([])
+
+    def _generate_world(self) -> GameState:
+        round_trips = RoundTrips()
+        generator = WorldGenerator(self.game.message_bus, self.game.world_generation, round_trips)
+        return WaitForGameWorldReady(
+            generator.start_runs(), self.game.world_cache, round_trips, fallback_after=self.game.world_fallback_seconds
+        )
+
     def action(self) -> GameState:
-        faction_gen_instructions = data.load_data("faction-gen-instructions.txt")
-        self.game.message_bus.process_tool_message_async(faction_gen_instructions)
+        if self.game.world_source == "procedural":
+            self.game.load_world(self._make_procedural_world())
+            return WaitForGameWorldReady([])
+
+        if self.game.world_spec is not None:
+            return self._generate_sharded_world(self.game.world_spec)
+
+        world = self._pop_pooled_world()
+        if world is not None:
+            return self._load_pooled_world(world)
+
+        world = self._sample_cached_world()
+        if world is not None:
+            return self._load_cached_world(world)
+
+        return self._generate_world()
+
+    async def aaction(self) -> GameState:
+        # Reading the pool and cache from disk, and making a world up, are done
+        # on worker threads so that other sessions on the loop play on.
+        if self.game.world_source == "procedural":
+            self.game.load_world(await asyncio.to_thread(self._make_procedural_world))
+            return WaitForGameWorldReady([])
+
+        if self.game.world_spec is not None:
+            return self._generate_sharded_world(self.game.world_spec)
 
-        location_gen_instructions = data.load_data("location-gen-instructions.txt")
-        self.game.message_bus.process_tool_message_async(location_gen_instructions)
-        return WaitForGameWorldReady()
+        world = await asyncio.to_thread(self._pop_pooled_world)
+        if world is not None:
+            return self._load_pooled_world(world)
+
+        world = await asyncio.to_thread(self._sample_cached_world)
+        if world is not None:
+            return self._load_cached_world(world)
+
+        return self._generate_world()
 
 
 class WaitForGameWorldReady(GameState):
-    EXPECTED = 8
+    WORLD_READY_TIMEOUT = 120.0
+
+    def __init__(
+        self,
+        generation_runs: list[Future[Run | ChatReply]] | list[Future[None]],
+        world_cache: WorldCache | None = None,
+        round_trips: RoundTrips | None = None,
+        timeout: float | None = None,
+        fallback_after: float = 0.0,
+    ) -> None:
+        self._generation_runs = generation_runs
+        self._timeout = timeout or self.WORLD_READY_TIMEOUT
+        # When set, a procedural world is played if the runs haven't made one by then.
+        self._fallback_after = fallback_after
+        # Where a newly generated world gets saved for later games.
+        self._world_cache = world_cache
+        self._round_trips = round_trips
+
+    def _fall_back(self) -> None:
+        """Make up the world the runs are too slow to finish, or finished without."""
+        for run in self._generation_runs:
+            run.cancel()
+
+        world = self.game.procedural_world.generate()
+        # Whatever the assistant did register is kept; only the missing kind is made up.
+        self.game.load_world(
+            World(
+                factions=[] if self.game.factions else world["factions"],
+                locations=[] if self.game.locations else world["locations"],
+            )
+        )
+        self.game.metrics.increment("world_fallbacks_total")
+        self.emit("... the Matrix is slow tonight; improvising the sprawl ...")
+        # A made-up world isn't worth caching, and the round trips didn't make it.
+        self._world_cache = None
+        self._round_trips = None
+
+    def _deadline(self) -> float:
+        timeout = min(self._timeout, self._fallback_after) if self._fallback_after else self._timeout
+        return time.monotonic() + timeout
+
+    def _wait_for_world(self) -> bool:
+        world_ready = self.game.world_ready
+        deadline = self._deadline()
+        pending = {world_ready, *self._generation_runs}
+
+        # Wake up when the world is ready, or when a generation run finishes so
+        # that we can give up once every run is done without producing a world.
+        while not world_ready.done() and pending != {world_ready}:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        if not world_ready.done() and self._fallback_after:
+            self._fall_back()
+        return world_ready.done()
+
+    async def _await_world(self) -> bool:
+        world_ready = self.game.world_ready
+        deadline = self._deadline()
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        # The handles resolve on other threads; each one wakes this coroutine up on its loop.
+        for future in (world_ready, *self._generation_runs):
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(changed.set))
+
+        while True:
+            changed.clear()
+            if world_ready.done() or all(run.done() for run in self._generation_runs):
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # asyncio.TimeoutError is only the builtin TimeoutError from Python 3.11.
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(changed.wait(), remaining)
+
+        if not world_ready.done() and self._fallback_after:
+            self._fall_back()
+        return world_ready.done()
 
     def action(self) -> GameState:
-        import time
-
-        total_items = len(self.game.factions) + len(self.game.locations)
-        self.emit(f"... waiting for game world initialization: {total_items} ...")
-        self.game.message_bus.resolve_async_tool_messages()
-
-        if total_items == self.EXPECTED:
-            self.emit("In PlayScene")
-            self.emit("\n\n---Factions---")
-            for faction in self.game.factions:
-                self.emit(f"***{faction['name']}***")
-                self.emit(f" - {faction['description']}")
-                self.emit(f" - {faction['motivation']}")
-
-            self.emit("\n\n---Locations---")
-            for location in self.game.locations:
-                self.emit(f"***{location['name']}***")
-                self.emit(f" - {location['type']}")
-                self.emit(f" - {location['description']}")
-            next_state: GameState = PlayScene()
-        else:
-            next_state = self
-            time.sleep(2)
+        self.emit("... waiting for game world initialization ...")
+
+        if not self._wait_for_world():
+            self.emit("The Matrix failed to render the sprawl. Try again later.")
+            return EndGame()
+
+        return self._enter_world()
+
+    async def aaction(self) -> GameState:
+        self.emit("... waiting for game world initialization ...")
+
+        if not await self._await_world():
+            self.emit("The Matrix failed to render the sprawl. Try again later.")
+            return EndGame()
+
+        return self._enter_world()
+
+    def _enter_world(self) -> GameState:
+        if self._round_trips is not None:
+            self.emit(f"World generated in {self._round_trips.count} API round trips.")
+
+        if self._world_cache is not None:
+            # Failing to cache the world shouldn't stop this game.
+            with contextlib.suppress(OSError):
+                self._world_cache.store(World(factions=self.game.factions, locations=self.game.locations))
+
+        self.emit("In PlayScene")
+        self.emit("\n\n---Factions---")
+        for faction in self.game.factions:
+            self.emit(f"***{faction['name']}***")
+            self.emit(f" - {faction['description']}")
+            self.emit(f" - {faction['motivation']}")
 
-        return next_state
+        self.emit("\n\n---Locations---")
+        for location in self.game.locations:
+            self.emit(f"***{location['name']}***")
+            self.emit(f" - {location['type']}")
+            self.emit(f" - {location['description']}")
+        return PlayScene()
@@ -1,37 +1,89 @@
 from __future__ import annotations
 
-from sprawl_runner import data
 from sprawl_runner.game.states.end_game import EndGame
 from sprawl_runner.game.states.game_state import GameState
 
 
 class PlayScene(GameState):
+    _is_streaming = False
+
+    def _emit_narrative_delta(self, delta: str) -> None:
+        if not self._is_streaming:
+            self._is_streaming = True
+            self.emit_partial("\n\n=> ")
+
+        self.emit_partial(delta)
+
+    def _end_narrative(self, message: str) -> None:
+        # Streamed narrative has already been written out piece by piece.
+        if self._is_streaming:
+            self.emit("\n\n")
+        else:
+            self.emit(f"\n\n=> {message}\n\n")
+
+    def _narrate(self, content: str) -> None:
+        self._is_streaming = False
+        message = self.game.message_bus.process_narrative_message(content, on_delta=self._emit_narrative_delta)
+        self._end_narrative(message)
+
+    def _narrate_opening_scene(self) -> None:
+        # Usually started while the world was still being generated.
+        self._is_streaming = False
+        message = self.game.start_opening_scene().wait(self._emit_narrative_delta)
+        self._end_narrative(message)
+
+    async def _anarrate(self, content: str) -> None:
+        self._is_streaming = False
+        message = await self.game.message_bus.aprocess_narrative_message(content, on_delta=self._emit_narrative_delta)
+        self._end_narrative(message)
+
+    async def _anarrate_opening_scene(self) -> None:
+        self._is_streaming = False
+        message = await self.game.start_opening_scene().await_message(self._emit_narrative_delta)
+        self._end_narrative(message)
+
     def action(self) -> GameState | None:
-        opening_scene_instructions = data.load_data("opening-scene-instructions.txt")
-        locations = ""
-        for location in [job_loc for job_loc in self.game.locations if job_loc["type"] == "Employment"]:
-            locations += f"- {location['name']} - {location['description']}\n"
+        tracer = self.game.tracer
+        with tracer.span("scene.opening"):
+            self._narrate_opening_scene()
 
-        print(f"{self.game.locations=}")  # noqa: T201
-        print(f"{locations=}")  # noqa: T201
+        player_input = ""
+        count = 0
+
+        while player_input != "q":
+            # One span per turn: waiting on the player, then the narration.
+            with tracer.span("scene.turn", turn=count):
+                while player_input == "":
+                    player_input = self.game.get_player_input(f">{count}> ")
+
+                if player_input != "q":
+                    self._narrate(player_input)
+                    player_input = ""
 
-        message = self.game.message_bus.process_narrative_message(
-            opening_scene_instructions.format(locations=locations)
-        )
+            count += 1
+
+        # Nothing will read the replies of runs still going once the player has left.
+        self.game.message_bus.cancel_runs()
+        return EndGame()
 
-        self.emit(f"\n\n=> {message}\n\n")
+    async def aaction(self) -> GameState | None:
+        tracer = self.game.tracer
+        with tracer.span("scene.opening"):
+            await self._anarrate_opening_scene()
 
         player_input = ""
         count = 0
 
         while player_input != "q":
-            while player_input == "":
-                player_input = input(f">{count}> ")
+            with tracer.span("scene.turn", turn=count):
+                while player_input == "":
+                    player_input = await self.game.aget_player_input(f">{count}> ")
 
-            if player_input != "q":
-                message = self.game.message_bus.process_narrative_message(player_input)
-                self.emit(f"\n\n=> {message}\n\n")
-                player_input = ""
+                if player_input != "q":
+                    await self._anarrate(player_input)
+                    player_input = ""
 
             count += 1
+
+        await self.game.message_bus.acancel_runs()
         return EndGame()
@@ -7,5 +7,9 @@ from sprawl_runner.game.states.initialize_game_world import InitializeGameWorld
 
 class StartGame(GameState):
     def action(self) -> GameState:
-        player_input = input("Hit Enter to start or q to exit: ")
+        player_input = self.game.get_player_input("Hit Enter to start or q to exit: ")
+        return EndGame() if player_input == "q" else InitializeGameWorld()
+
+    async def aaction(self) -> GameState:
+        player_input = await self.game.aget_player_input("Hit Enter to start or q to exit: ")
         return EndGame() if player_input == "q" else InitializeGameWorld()
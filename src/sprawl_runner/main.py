@@ -1,56 +1,355 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
+import contextlib
+import signal
 import sys
+from functools import partial
 from typing import TYPE_CHECKING
 
+from openai import NotFoundError
+
 from sprawl_runner import data
-from sprawl_runner.ai.assistant import create_assistant
-from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus
+from sprawl_runner.ai.assistant import assistant_fingerprint, create_assistant, update_assistant
+from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, RoundTrips, show_json
+from sprawl_runner.ai.backend import MessageBackend, get_message_backend_name
+from sprawl_runner.ai.cassette import Cassette
+from sprawl_runner.ai.chat_completions import ChatCompletionsBackend
+from sprawl_runner.ai.client_manager import ClientOptions, OpenAIClientManager
+from sprawl_runner.ai.compaction import CompactionOptions
+from sprawl_runner.ai.deadlines import RunDeadlines
+from sprawl_runner.ai.polling import PollingOptions, PollingStrategy
+from sprawl_runner.ai.rate_limit import RateLimiter, RateLimitOptions
+from sprawl_runner.ai.scheduler import RunScheduler, SchedulerOptions
+from sprawl_runner.ai.tool_dispatch import ToolDispatcher
 from sprawl_runner.config import config
+from sprawl_runner.config.constants import (
+    METRICS_EXPORT,
+    NARRATIVE_STREAM,
+    NARRATIVE_TRACE,
+    SERVER_HOST,
+    SERVER_MAX_SESSIONS,
+    SERVER_TCP_PORT,
+    SERVER_WEBSOCKET_PORT,
+    TRACE_EXPORT,
+    WORLD_FALLBACK_SECONDS,
+)
+from sprawl_runner.config.values import get_bool, get_float, get_int, get_str
 from sprawl_runner.consoles.basic_console import BasicConsole
+from sprawl_runner.consoles.network_console import NetworkConsoleOptions, start_tcp_server, start_websocket_server
 from sprawl_runner.game.game import Game
+from sprawl_runner.game.server import GameServer
 from sprawl_runner.game.states.start_game import StartGame
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+from sprawl_runner.telemetry.tracing import FileSpanExporter, Tracer
+from sprawl_runner.world.cache import WorldCache
+from sprawl_runner.world.generator import WorldGenerator, get_world_generation_mode
+from sprawl_runner.world.pool import WorldPool
+from sprawl_runner.world.procedural import Grammar, ProceduralWorldGenerator, get_world_source
+from sprawl_runner.world.sharding import WorldSpec
 
 if TYPE_CHECKING:
     from openai.types.shared_params import FunctionDefinition
 
+    from sprawl_runner.consoles.console import Console
+
+
+ASSISTANT_NAME = "Sprawl Runner Assist - A Consensual Hallucination Text-Based Adventure Game Assistant"
+
 
-def create_assistant_handler(openai_api_key: str, openai_model: str) -> str:
+def create_assistant_handler(
+    openai_api_key: str, openai_model: str, client_manager: OpenAIClientManager | None = None
+) -> str:
     instructions = data.load_data("assistant-instructions.txt")
     tool_functions: list[FunctionDefinition] = data.load_all_tool_metadata()
 
     return create_assistant(
-        "Sprawl Runner Assist - A Consensual Hallucination Text-Based Adventure Game Assistant",
+        ASSISTANT_NAME,
         openai_api_key,
         openai_model,
         instructions,
         tool_functions,
+        client_manager.sync_client if client_manager else None,
     )
 
 
-def main() -> None:
-    console = BasicConsole()
+def update_assistant_handler(
+    openai_api_key: str,
+    openai_model: str,
+    openai_assistant_id: str,
+    client_manager: OpenAIClientManager | None = None,
+) -> str:
+    instructions = data.load_data("assistant-instructions.txt")
+    tool_functions: list[FunctionDefinition] = data.load_all_tool_metadata()
 
-    config.assistant_creation_handler = create_assistant_handler
     try:
-        config.load_settings()
-    except FileNotFoundError as error:
-        console.emit(str(error))
-        sys.exit(1)
+        return update_assistant(
+            openai_assistant_id,
+            ASSISTANT_NAME,
+            openai_api_key,
+            openai_model,
+            instructions,
+            tool_functions,
+            client_manager.sync_client if client_manager else None,
+        )
+    except NotFoundError:
+        # The assistant was deleted; make a new one rather than failing to start.
+        return create_assistant_handler(openai_api_key, openai_model, client_manager)
+
+
+def assistant_fingerprint_handler(openai_model: str) -> str:
+    return assistant_fingerprint(
+        ASSISTANT_NAME,
+        openai_model,
+        data.load_data("assistant-instructions.txt"),
+        data.load_all_tool_metadata(),
+    )
+
 
-    config.validate()
+def create_message_backend() -> MessageBackend | None:
+    if get_message_backend_name(config.settings) == "assistants":
+        # The bus speaks the Assistants API itself.
+        return None
 
+    return ChatCompletionsBackend(
+        config.settings["openai_model"],
+        data.load_data("assistant-instructions.txt"),
+        data.load_all_tool_metadata(),
+        RunDeadlines.from_settings(config.settings),
+    )
+
+
+def create_message_bus(
+    client_manager: OpenAIClientManager,
+    tracer: Tracer | None = None,
+    *,
+    scheduler: RunScheduler | None = None,
+    tool_dispatcher: ToolDispatcher | None = None,
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> AssistantMessageBus:
+    # A bus hosted on a server's loop shares the scheduler and dispatcher it is given.
+    return AssistantMessageBus(
+        config.settings["openai_api_key"],
+        config.settings["openai_assistant_id"],
+        client_manager,
+        stream_narrative=get_bool(config.settings, NARRATIVE_STREAM),
+        polling=PollingStrategy(PollingOptions.from_settings(config.settings), metrics=client_manager.metrics),
+        tool_dispatcher=tool_dispatcher or ToolDispatcher.from_settings(config.settings),
+        trace_sink=show_json if get_bool(config.settings, NARRATIVE_TRACE) else None,
+        compaction=CompactionOptions.from_settings(config.settings),
+        metrics=client_manager.metrics,
+        tracer=tracer,
+        deadlines=RunDeadlines.from_settings(config.settings),
+        scheduler=scheduler or RunScheduler(SchedulerOptions.from_settings(config.settings), client_manager.metrics),
+        loop=loop,
+        # Each bus has a backend of its own, since it holds the game's story.
+        backend=create_message_backend(),
+    )
+
+
+def create_game(console: Console, message_bus: AssistantMessageBus) -> Game:
     game = Game(console)
+    # One export and one trace cover the game and its bus.
+    game.metrics = message_bus.metrics
+    game.tracer = message_bus.tracer
+    game.world_cache = WorldCache.from_settings(config.settings)
+    game.world_pool = WorldPool.from_settings(config.settings)
+    game.world_generation = get_world_generation_mode(config.settings)
+    game.world_spec = WorldSpec.from_settings(config.settings)
+    game.world_source = get_world_source(config.settings)
+    game.procedural_world = ProceduralWorldGenerator.from_settings(config.settings)
+    game.world_fallback_seconds = get_float(config.settings, WORLD_FALLBACK_SECONDS)
 
     ai_tool_handlers = game.get_tool_handlers()
-    message_bus = AssistantMessageBus(config.settings["openai_api_key"], config.settings["openai_assistant_id"])
     message_bus.register_tool_handlers(ai_tool_handlers)
+    message_bus.set_narrative_context(game.get_world_state)
+    message_bus.set_thinking_indicator(game.emit_thinking)
     game.message_bus = message_bus
+    # Ready before the first scene, while the player is still at the title.
+    message_bus.prepare_narrative_thread()
 
     game.change_state(StartGame())
     game.validate()
+    return game
+
+
+def play(console: BasicConsole, client_manager: OpenAIClientManager, tracer: Tracer | None = None) -> None:
+    game = create_game(console, create_message_bus(client_manager, tracer))
     game.play()
 
 
+def create_game_server(
+    client_manager: OpenAIClientManager,
+    loop: asyncio.AbstractEventLoop,
+    tracer: Tracer | None = None,
+    tool_dispatcher: ToolDispatcher | None = None,
+) -> GameServer:
+    """A server for games on loop, whose buses share client_manager, one scheduler and one tool dispatcher."""
+    scheduler = RunScheduler(SchedulerOptions.from_settings(config.settings), client_manager.metrics)
+    tool_dispatcher = tool_dispatcher or ToolDispatcher.from_settings(config.settings)
+
+    def create_session_game(console: Console) -> Game:
+        message_bus = create_message_bus(
+            client_manager, tracer, scheduler=scheduler, tool_dispatcher=tool_dispatcher, loop=loop
+        )
+        return create_game(console, message_bus)
+
+    return GameServer(
+        create_session_game,
+        get_int(config.settings, SERVER_MAX_SESSIONS),
+        metrics=client_manager.metrics,
+        # Every session's procedural generator expands the one loaded grammar.
+        shared=[client_manager, scheduler, tool_dispatcher, tracer, loop, Grammar.load()],
+    )
+
+
+async def aserve(
+    console: BasicConsole,
+    client_manager: OpenAIClientManager,
+    host: str,
+    tcp_port: int,
+    websocket_port: int,
+    tracer: Tracer | None = None,
+) -> None:
+    # Hosted buses leave the shared dispatcher and client manager to whoever made them.
+    tool_dispatcher = ToolDispatcher.from_settings(config.settings)
+    server = create_game_server(client_manager, asyncio.get_running_loop(), tracer, tool_dispatcher)
+    options = NetworkConsoleOptions.from_settings(config.settings)
+    listeners = []
+
+    try:
+        # A port of 0 leaves that listener off.
+        if tcp_port:
+            listeners.append(await start_tcp_server(server.serve, host, tcp_port, options))
+            console.emit(f"Serving games over TCP on {host}:{tcp_port}")
+        if websocket_port:
+            listeners.append(await start_websocket_server(server.serve, host, websocket_port, options))
+            console.emit(f"Serving games over WebSocket on ws://{host}:{websocket_port}")
+
+        await asyncio.gather(*(listener.serve_forever() for listener in listeners))
+    finally:
+        for listener in listeners:
+            listener.close()
+        await server.aclose()
+        tool_dispatcher.shutdown()
+        await client_manager.aclose()
+
+
+def serve(
+    console: BasicConsole,
+    client_manager: OpenAIClientManager,
+    host: str,
+    tcp_port: int,
+    websocket_port: int,
+    tracer: Tracer | None = None,
+) -> None:
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(aserve(console, client_manager, host, tcp_port, websocket_port, tracer))
+
+
+def pregen(
+    console: BasicConsole,
+    client_manager: OpenAIClientManager,
+    count: int,
+    concurrency: int,
+    tracer: Tracer | None = None,
+) -> None:
+    world_pool = WorldPool.from_settings(config.settings)
+    message_bus = create_message_bus(client_manager, tracer)
+    round_trips = RoundTrips()
+    generator = WorldGenerator(message_bus, get_world_generation_mode(config.settings), round_trips)
+    generated = 0
+
+    try:
+        for world in world_pool.fill(generator, count, concurrency):
+            if world.exception() is None:
+                generated += 1
+            else:
+                console.emit(f"World generation failed: {world.exception()}")
+    finally:
+        message_bus.close()
+
+    console.emit(f"Generated {generated} of {count} worlds in {round_trips.count} API round trips")
+    console.emit(f"{len(world_pool)} worlds ready in {world_pool.directory}")
+
+
+def export_metrics_on_signal(metrics: MetricsRegistry, path: str) -> None:
+    """Write the metrics to path whenever the game gets SIGUSR1, on platforms that have it."""
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: metrics.export(path))
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="sprawl-runner")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("play", help="play the game (the default)")
+    pregen_parser = commands.add_parser("pregen", help="generate worlds ahead of time for later games")
+    pregen_parser.add_argument("--count", type=int, default=4, help="how many worlds to generate")
+    pregen_parser.add_argument("--concurrency", type=int, default=4, help="how many to generate at once")
+    serve_parser = commands.add_parser("serve", help="host games for remote players over TCP and WebSocket")
+    serve_parser.add_argument("--host", help="the address to listen on (server_host)")
+    serve_parser.add_argument(
+        "--tcp-port", type=int, help="the port for line-based clients such as nc (server_tcp_port)"
+    )
+    serve_parser.add_argument(
+        "--websocket-port", type=int, help="the port for WebSocket clients (server_websocket_port)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    console = BasicConsole()
+
+    try:
+        config.load_settings()
+    except FileNotFoundError as error:
+        console.emit(str(error))
+        sys.exit(1)
+
+    # One pooled client manager serves assistant creation and the message bus,
+    # and every request it sends is recorded in the session's metrics.
+    metrics = MetricsRegistry()
+    metrics_path = get_str(config.settings, METRICS_EXPORT)
+    trace_path = get_str(config.settings, TRACE_EXPORT)
+    tracer = Tracer(FileSpanExporter(trace_path) if trace_path else None)
+    client_manager = OpenAIClientManager(
+        config.settings["openai_api_key"],
+        ClientOptions.from_settings(config.settings),
+        Cassette.from_settings(config.settings),
+        metrics,
+        RateLimiter(RateLimitOptions.from_settings(config.settings)),
+    )
+    config.assistant_creation_handler = partial(create_assistant_handler, client_manager=client_manager)
+    config.assistant_update_handler = partial(update_assistant_handler, client_manager=client_manager)
+    config.assistant_fingerprint_handler = assistant_fingerprint_handler
+    if metrics_path:
+        export_metrics_on_signal(metrics, metrics_path)
+
+    try:
+        config.validate()
+
+        if args.command == "pregen":
+            pregen(console, client_manager, args.count, args.concurrency, tracer)
+        elif args.command == "serve":
+            serve(
+                console,
+                client_manager,
+                args.host or get_str(config.settings, SERVER_HOST),
+                args.tcp_port if args.tcp_port is not None else get_int(config.settings, SERVER_TCP_PORT),
+                args.websocket_port
+                if args.websocket_port is not None
+                else get_int(config.settings, SERVER_WEBSOCKET_PORT),
+                tracer,
+            )
+        else:
+            play(console, client_manager, tracer)
+    finally:
+        tracer.close()
+        if metrics_path:
+            metrics.export(metrics_path)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import argparse
+
+from sprawl_runner.standin.script import StandInScript
+from sprawl_runner.standin.server import AssistantsStandIn
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m sprawl_runner.standin", description="Local Assistants API stand-in"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--script", help="JSON file with StandInScript fields")
+    args = parser.parse_args(argv)
+
+    script = StandInScript.from_file(args.script) if args.script else StandInScript()
+    stand_in = AssistantsStandIn(script, args.host, args.port)
+    print(f"Assistants API stand-in listening on {stand_in.base_url}")  # noqa: T201
+
+    try:
+        stand_in.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
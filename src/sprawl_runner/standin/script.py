@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from sprawl_runner import data
+
+
+@dataclass(frozen=True)
+class ToolCallRule:
+    """
+    Makes a run require a tool call when the run's latest user message matches.
+
+    The first group of the pattern, when there is one, is the number of items
+    to put in the tool call's array argument.
+    """
+
+    pattern: str
+    tool_name: str
+    count: int = 4
+
+    def match_count(self, content: str) -> int | None:
+        match = re.search(self.pattern, content, re.IGNORECASE)
+        if not match:
+            return None
+
+        return int(match.group(1)) if match.groups() and match.group(1) else self.count
+
+
+DEFAULT_RULES = (
+    ToolCallRule(r"register (\d+) factions", "register_factions"),
+    ToolCallRule(r"register (\d+) locations", "register_locations"),
+)
+
+
+@dataclass(frozen=True)
+class StandInScript:
+    """How the stand-in server behaves; every latency is in seconds."""
+
+    queued_seconds: float = 0.05
+    in_progress_seconds: float = 0.2
+    after_tool_outputs_seconds: float = 0.05
+    rules: tuple[ToolCallRule, ...] = DEFAULT_RULES
+    narrative: str = "Neon rain hisses on the window. What do you do?"
+    stream_chunk_size: int = 8
+    seed: int = 0
+    tool_schemas: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> StandInScript:
+        values = dict(values)
+
+        if "rules" in values:
+            values["rules"] = tuple(ToolCallRule(**rule) for rule in values["rules"])
+
+        return cls(**values)
+
+    @classmethod
+    def from_file(cls, path: str) -> StandInScript:
+        with open(path) as script_file:
+            return cls.from_dict(json.load(script_file))
+
+    def get_tool_schema(self, tool_name: str) -> dict[str, Any]:
+        if tool_name in self.tool_schemas:
+            return self.tool_schemas[tool_name]
+
+        return json.loads(data.load_tool_metadata(tool_name.replace("_", "-")))
+
+    def tool_calls_for(self, content: str) -> list[tuple[str, dict[str, Any]]]:
+        rng = random.Random(f"{self.seed}:{content}")  # noqa: S311
+        tool_calls = []
+
+        for rule in self.rules:
+            count = rule.match_count(content)
+            if count is not None:
+                schema = self.get_tool_schema(rule.tool_name)
+                tool_calls.append((rule.tool_name, sample_arguments(schema["parameters"], count, rng)))
+
+        return tool_calls
+
+
+def _sample_value(name: str, schema: dict[str, Any], index: int, count: int, rng: random.Random) -> Any:
+    schema_type = schema.get("type")
+
+    if "enum" in schema:
+        return schema["enum"][index % len(schema["enum"])]
+
+    if schema_type == "object":
+        return {key: _sample_value(key, value, index, count, rng) for key, value in schema["properties"].items()}
+
+    if schema_type == "array":
+        return [_sample_value(name, schema["items"], item_index, count, rng) for item_index in range(count)]
+
+    if schema_type in ("integer", "number"):
+        return rng.randint(1, 100)
+
+    if schema_type == "boolean":
+        return rng.random() < 0.5  # noqa: PLR2004
+
+    return f"{name.title()} {index + 1}-{rng.randrange(16**4):04x}"
+
+
+def sample_arguments(parameters_schema: dict[str, Any], count: int, rng: random.Random) -> dict[str, Any]:
+    """Build tool call arguments that follow a function's JSON schema."""
+    return _sample_value("arguments", parameters_schema, 0, count, rng)
@@ -0,0 +1,555 @@
+from __future__ import annotations
+
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from sprawl_runner.standin.script import StandInScript
+
+if TYPE_CHECKING:
+    # Only for annotations; openai already depends on typing_extensions.
+    from typing_extensions import Self
+
+_TERMINAL_STATUSES = ("completed", "cancelled", "failed", "expired", "incomplete")
+
+
+class StandInError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class _RunRecord:
+    data: dict[str, Any]
+    phase: str = "initial"
+    phase_started: float = field(default_factory=time.monotonic)
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _StandInState:
+    """In-memory Assistants API objects; every public method holds the lock."""
+
+    def __init__(self, script: StandInScript) -> None:
+        self.script = script
+        self.assistants: dict[str, dict[str, Any]] = {}
+        self.threads: dict[str, dict[str, Any]] = {}
+        self.messages: dict[str, list[dict[str, Any]]] = {}
+        self.runs: dict[str, _RunRecord] = {}
+        self.request_counts: Counter[str] = Counter()
+        self.lock = threading.RLock()
+        self._ids = itertools.count(1)
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}_standin{next(self._ids):06d}"
+
+    def _get(self, objects: dict[str, Any], object_id: str, kind: str) -> Any:
+        if object_id not in objects:
+            raise StandInError(404, f"No {kind} found with id '{object_id}'.")
+        return objects[object_id]
+
+    # Assistants
+
+    def create_assistant(self, body: dict[str, Any]) -> dict[str, Any]:
+        assistant = {
+            "id": self._new_id("asst"),
+            "object": "assistant",
+            "created_at": int(time.time()),
+            "name": body.get("name"),
+            "description": body.get("description"),
+            "model": body.get("model", "standin"),
+            "instructions": body.get("instructions"),
+            "tools": body.get("tools", []),
+            "metadata": body.get("metadata", {}),
+        }
+        self.assistants[assistant["id"]] = assistant
+        return assistant
+
+    def get_assistant(self, assistant_id: str) -> dict[str, Any]:
+        return self._get(self.assistants, assistant_id, "assistant")
+
+    def update_assistant(self, assistant_id: str, body: dict[str, Any]) -> dict[str, Any]:
+        assistant = self.get_assistant(assistant_id)
+        assistant.update({key: value for key, value in body.items() if key in assistant})
+        return assistant
+
+    # Threads and messages
+
+    def create_thread(self, body: dict[str, Any]) -> dict[str, Any]:
+        thread = {
+            "id": self._new_id("thread"),
+            "object": "thread",
+            "created_at": int(time.time()),
+            "metadata": body.get("metadata", {}),
+            "tool_resources": None,
+        }
+        self.threads[thread["id"]] = thread
+        self.messages[thread["id"]] = []
+
+        for message in body.get("messages", []):
+            self.create_message(thread["id"], message)
+
+        return thread
+
+    def create_message(
+        self, thread_id: str, body: dict[str, Any], run_id: str | None = None, assistant_id: str | None = None
+    ) -> dict[str, Any]:
+        self._get(self.threads, thread_id, "thread")
+        content = body.get("content", "")
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+        message = {
+            "id": self._new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": body.get("role", "user"),
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+            "assistant_id": assistant_id,
+            "run_id": run_id,
+            "attachments": [],
+            "metadata": body.get("metadata", {}),
+            "status": "completed",
+        }
+        self.messages[thread_id].append(message)
+        return message
+
+    def list_messages(self, thread_id: str, query: dict[str, str]) -> dict[str, Any]:
+        self._get(self.threads, thread_id, "thread")
+        messages = list(self.messages[thread_id])
+        if query.get("order", "desc") == "desc":
+            messages.reverse()
+
+        if "run_id" in query:
+            messages = [message for message in messages if message["run_id"] == query["run_id"]]
+
+        ids = [message["id"] for message in messages]
+        if query.get("after") in ids:
+            messages = messages[ids.index(query["after"]) + 1 :]
+        elif query.get("before") in ids:
+            messages = messages[: ids.index(query["before"])]
+
+        limit = int(query.get("limit", 20))
+        page = messages[:limit]
+        return {
+            "object": "list",
+            "data": page,
+            "first_id": page[0]["id"] if page else None,
+            "last_id": page[-1]["id"] if page else None,
+            "has_more": len(messages) > limit,
+        }
+
+    # Runs
+
+    def _latest_user_content(self, thread_id: str) -> str:
+        for message in reversed(self.messages[thread_id]):
+            if message["role"] == "user":
+                return message["content"][0]["text"]["value"]
+        return ""
+
+    def create_run(self, thread_id: str, body: dict[str, Any]) -> _RunRecord:
+        self._get(self.threads, thread_id, "thread")
+        assistant_id = body.get("assistant_id", "")
+
+        for message in body.get("additional_messages") or []:
+            self.create_message(thread_id, message)
+
+        run_id = self._new_id("run")
+        tool_calls = [
+            {
+                "id": self._new_id("call"),
+                "type": "function",
+                "function": {"name": tool_name, "arguments": json.dumps(arguments)},
+            }
+            for tool_name, arguments in self.script.tool_calls_for(self._latest_user_content(thread_id))
+        ]
+        assistant = self.assistants.get(assistant_id, {})
+        record = _RunRecord(
+            data={
+                "id": run_id,
+                "object": "thread.run",
+                "created_at": int(time.time()),
+                "thread_id": thread_id,
+                "assistant_id": assistant_id,
+                "status": "queued",
+                "required_action": None,
+                "last_error": None,
+                "expires_at": int(time.time()) + 600,
+                "started_at": None,
+                "cancelled_at": None,
+                "failed_at": None,
+                "completed_at": None,
+                "incomplete_details": None,
+                "model": assistant.get("model", "standin"),
+                "instructions": assistant.get("instructions") or "",
+                "tools": assistant.get("tools", []),
+                "metadata": body.get("metadata", {}),
+                "usage": None,
+                "parallel_tool_calls": True,
+            },
+            tool_calls=tool_calls,
+        )
+        self.runs[run_id] = record
+        return record
+
+    def _complete_run(self, record: _RunRecord) -> dict[str, Any] | None:
+        data = record.data
+        message = None
+        prompt_tokens = sum(
+            _estimate_tokens(entry["content"][0]["text"]["value"]) for entry in self.messages[data["thread_id"]]
+        )
+
+        if record.tool_calls:
+            completion_tokens = sum(_estimate_tokens(call["function"]["arguments"]) for call in record.tool_calls)
+        else:
+            message = self.create_message(
+                data["thread_id"],
+                {"role": "assistant", "content": self.script.narrative},
+                run_id=data["id"],
+                assistant_id=data["assistant_id"],
+            )
+            completion_tokens = _estimate_tokens(self.script.narrative)
+
+        data["status"] = "completed"
+        data["required_action"] = None
+        data["completed_at"] = int(time.time())
+        data["usage"] = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        record.phase = "done"
+        return message
+
+    def advance_run(self, record: _RunRecord) -> None:
+        data = record.data
+        if data["status"] in _TERMINAL_STATUSES or record.phase == "waiting_for_tool_outputs":
+            return
+
+        script = self.script
+        elapsed = time.monotonic() - record.phase_started
+
+        if record.phase == "initial":
+            if elapsed < script.queued_seconds:
+                return
+            data["status"] = "in_progress"
+            data["started_at"] = data["started_at"] or int(time.time())
+            if elapsed < script.queued_seconds + script.in_progress_seconds:
+                return
+            if record.tool_calls:
+                data["status"] = "requires_action"
+                data["required_action"] = {
+                    "type": "submit_tool_outputs",
+                    "submit_tool_outputs": {"tool_calls": record.tool_calls},
+                }
+                record.phase = "waiting_for_tool_outputs"
+                return
+            self._complete_run(record)
+        elif record.phase == "after_tool_outputs":
+            data["status"] = "in_progress"
+            if elapsed >= script.after_tool_outputs_seconds:
+                self._complete_run(record)
+
+    def get_run(self, thread_id: str, run_id: str) -> _RunRecord:
+        record = self._get(self.runs, run_id, "run")
+        if record.data["thread_id"] != thread_id:
+            raise StandInError(404, f"No run found with id '{run_id}'.")
+
+        self.advance_run(record)
+        return record
+
+    def submit_tool_outputs(self, thread_id: str, run_id: str, body: dict[str, Any]) -> _RunRecord:
+        record = self.get_run(thread_id, run_id)
+        if record.data["status"] != "requires_action":
+            raise StandInError(400, f"Runs in status {record.data['status']} do not accept tool outputs.")
+
+        expected_ids = {call["id"] for call in record.tool_calls}
+        submitted_ids = {output.get("tool_call_id") for output in body.get("tool_outputs", [])}
+        if expected_ids != submitted_ids:
+            raise StandInError(400, "Tool outputs must be submitted for every tool call at once.")
+
+        record.phase = "after_tool_outputs"
+        record.phase_started = time.monotonic()
+        record.data["status"] = "queued"
+        record.data["required_action"] = None
+        return record
+
+    def cancel_run(self, thread_id: str, run_id: str) -> _RunRecord:
+        record = self.get_run(thread_id, run_id)
+        if record.data["status"] not in _TERMINAL_STATUSES:
+            record.data["status"] = "cancelled"
+            record.data["cancelled_at"] = int(time.time())
+            record.data["required_action"] = None
+            record.phase = "done"
+        return record
+
+
+def _sse(event: str, data: Any) -> bytes:
+    payload = data if isinstance(data, str) else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n".encode()
+
+
+class _StandInRequestHandler(BaseHTTPRequestHandler):
+    server: _StandInHTTPServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        # Keep benchmark and test output quiet.
+        pass
+
+    def _read_body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _send_json(self, status: int, body: dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip("/")
+        if path.startswith("/v1"):
+            path = path[len("/v1") :]
+
+        matched = _match_route(method, path)
+        if matched is None:
+            self._send_json(404, {"error": {"message": f"Unknown endpoint {method} {path}", "type": "not_found"}})
+            return
+
+        route_name, route, path_ids = matched
+
+        state = self.server.state
+        try:
+            body = self._read_body() if method == "POST" else {}
+            with state.lock:
+                state.request_counts[route_name] += 1
+            route(self, state, body, query, *path_ids)
+        except StandInError as error:
+            self._send_json(error.status, {"error": {"message": error.message, "type": "invalid_request_error"}})
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._dispatch("POST")
+
+    def stream_run(self, state: _StandInState, record: _RunRecord) -> None:
+        script = state.script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(event: str, data: Any) -> None:
+            self.wfile.write(_sse(event, data))
+            self.wfile.flush()
+
+        with state.lock:
+            send("thread.run.created", record.data)
+            send("thread.run.queued", record.data)
+        time.sleep(script.queued_seconds)
+        time.sleep(script.in_progress_seconds)
+
+        with state.lock:
+            record.phase_started -= script.queued_seconds + script.in_progress_seconds
+            state.advance_run(record)
+            send("thread.run.in_progress", record.data)
+            if record.data["status"] == "requires_action":
+                send("thread.run.requires_action", record.data)
+                send("done", "[DONE]")
+                return
+
+            message = state.messages[record.data["thread_id"]][-1]
+            text = message["content"][0]["text"]["value"]
+            send("thread.message.created", {**message, "content": [], "status": "in_progress"})
+
+        for start in range(0, len(text), script.stream_chunk_size):
+            chunk = text[start : start + script.stream_chunk_size]
+            send(
+                "thread.message.delta",
+                {
+                    "id": message["id"],
+                    "object": "thread.message.delta",
+                    "delta": {"content": [{"index": 0, "type": "text", "text": {"value": chunk, "annotations": []}}]},
+                },
+            )
+
+        with state.lock:
+            send("thread.message.completed", message)
+            send("thread.run.completed", record.data)
+        send("done", "[DONE]")
+
+
+def _create_assistant(handler, state, body, query):
+    with state.lock:
+        handler._send_json(200, state.create_assistant(body))
+
+
+def _get_assistant(handler, state, body, query, assistant_id):
+    with state.lock:
+        handler._send_json(200, state.get_assistant(assistant_id))
+
+
+def _update_assistant(handler, state, body, query, assistant_id):
+    with state.lock:
+        handler._send_json(200, state.update_assistant(assistant_id, body))
+
+
+def _create_thread(handler, state, body, query):
+    with state.lock:
+        handler._send_json(200, state.create_thread(body))
+
+
+def _create_thread_and_run(handler, state, body, query):
+    with state.lock:
+        thread = state.create_thread(body.get("thread") or {})
+        record = state.create_run(thread["id"], body)
+    _send_run(handler, state, body, record)
+
+
+def _create_message(handler, state, body, query, thread_id):
+    with state.lock:
+        handler._send_json(200, state.create_message(thread_id, body))
+
+
+def _list_messages(handler, state, body, query, thread_id):
+    with state.lock:
+        handler._send_json(200, state.list_messages(thread_id, query))
+
+
+def _send_run(handler, state, body, record):
+    if body.get("stream"):
+        handler.stream_run(state, record)
+    else:
+        with state.lock:
+            handler._send_json(200, record.data)
+
+
+def _create_run(handler, state, body, query, thread_id):
+    with state.lock:
+        record = state.create_run(thread_id, body)
+    _send_run(handler, state, body, record)
+
+
+def _get_run(handler, state, body, query, thread_id, run_id):
+    with state.lock:
+        handler._send_json(200, state.get_run(thread_id, run_id).data)
+
+
+def _submit_tool_outputs(handler, state, body, query, thread_id, run_id):
+    with state.lock:
+        handler._send_json(200, state.submit_tool_outputs(thread_id, run_id, body).data)
+
+
+def _cancel_run(handler, state, body, query, thread_id, run_id):
+    with state.lock:
+        handler._send_json(200, state.cancel_run(thread_id, run_id).data)
+
+
+_ID = r"([\w-]+)"
+_ROUTES: list[tuple[str, str, str, Callable[..., None]]] = [
+    ("POST", "/assistants", "assistants.create", _create_assistant),
+    ("GET", f"/assistants/{_ID}", "assistants.retrieve", _get_assistant),
+    ("POST", f"/assistants/{_ID}", "assistants.update", _update_assistant),
+    ("POST", "/threads", "threads.create", _create_thread),
+    ("POST", "/threads/runs", "threads.create_and_run", _create_thread_and_run),
+    ("POST", f"/threads/{_ID}/messages", "threads.messages.create", _create_message),
+    ("GET", f"/threads/{_ID}/messages", "threads.messages.list", _list_messages),
+    ("POST", f"/threads/{_ID}/runs", "threads.runs.create", _create_run),
+    ("GET", f"/threads/{_ID}/runs/{_ID}", "threads.runs.retrieve", _get_run),
+    (
+        "POST",
+        f"/threads/{_ID}/runs/{_ID}/submit_tool_outputs",
+        "threads.runs.submit_tool_outputs",
+        _submit_tool_outputs,
+    ),
+    ("POST", f"/threads/{_ID}/runs/{_ID}/cancel", "threads.runs.cancel", _cancel_run),
+]
+
+
+def _match_route(method: str, path: str) -> tuple[str, Callable[..., None], tuple[str, ...]] | None:
+    for route_method, pattern, route_name, route in _ROUTES:
+        match = re.fullmatch(pattern, path)
+        if route_method == method and match:
+            return route_name, route, match.groups()
+
+    return None
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], state: _StandInState) -> None:
+        super().__init__(address, _StandInRequestHandler)
+        self.state = state
+
+
+class AssistantsStandIn:
+    """
+    A local HTTP stand-in for the parts of the OpenAI Assistants API that Sprawl
+    Runner uses.
+
+    Point a client at base_url to talk to it. Run latency and the tool calls
+    runs require are taken from the StandInScript.
+    """
+
+    def __init__(self, script: StandInScript | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._state = _StandInState(script or StandInScript())
+        self._server = _StandInHTTPServer((host, port), self._state)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def request_counts(self) -> dict[str, int]:
+        with self._state.lock:
+            return dict(self._state.request_counts)
+
+    def start(self) -> str:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="assistants-standin", daemon=True)
+            self._thread.start()
+
+        return self.base_url
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+
+        self._server.server_close()
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self.stop()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import re
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    import httpx
+
+    from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+# Object ids such as thread_abc123 or run_abc123 would make a series per object.
+_OBJECT_ID = re.compile(r"^[a-z]+_[A-Za-z0-9]+$")
+_STARTED_AT = "sprawl_runner.started_at"
+# Sent by the OpenAI client on every attempt; above zero for its own retries.
+RETRY_COUNT_HEADER = "x-stainless-retry-count"
+
+
+def get_endpoint(url: httpx.URL) -> str:
+    segments = [segment for segment in url.path.split("/") if segment]
+    if segments and segments[0] == "v1":
+        segments = segments[1:]
+
+    return "/" + "/".join("{id}" if _OBJECT_ID.match(segment) else segment for segment in segments)
+
+
+def _mark_start(request: httpx.Request) -> None:
+    request.extensions[_STARTED_AT] = time.perf_counter()
+
+
+def _record_response(metrics: MetricsRegistry, response: httpx.Response) -> None:
+    request = response.request
+    endpoint = get_endpoint(request.url)
+    started_at = request.extensions.get(_STARTED_AT)
+
+    # Measured to the response headers, so a streamed reply counts its time to first byte.
+    if started_at is not None:
+        metrics.observe(
+            "openai_request_seconds", time.perf_counter() - started_at, method=request.method, endpoint=endpoint
+        )
+    metrics.increment("openai_requests_total", method=request.method, endpoint=endpoint, status=response.status_code)
+
+    retry_count = request.headers.get(RETRY_COUNT_HEADER, "0")
+    if retry_count.isdigit() and int(retry_count) > 0:
+        metrics.increment("openai_retries_total", method=request.method, endpoint=endpoint)
+
+
+def http_event_hooks(metrics: MetricsRegistry, *, is_async: bool) -> dict[str, list[Callable[..., Any]]]:
+    """httpx event hooks that time every request a client sends and count its responses and retries."""
+    if not is_async:
+        return {
+            "request": [_mark_start],
+            "response": [lambda response: _record_response(metrics, response)],
+        }
+
+    async def mark_start(request: httpx.Request) -> None:
+        _mark_start(request)
+
+    async def record_response(response: httpx.Response) -> None:
+        _record_response(metrics, response)
+
+    return {"request": [mark_start], "response": [record_response]}
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import gc
+import sys
+import types
+from typing import Iterable
+
+# Shared by everything in the process, so never counted against one object.
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.CodeType,
+    types.FrameType,
+)
+
+
+def get_deep_size(root: object, exclude: Iterable[object] = ()) -> int:
+    """
+    Approximate bytes held by root and everything reachable from it.
+
+    Objects in exclude, and whatever is only reachable through them, are left
+    out; pass the objects root shares with others (clients, loops, registries)
+    so they aren't counted against it. Classes, modules and functions are
+    always left out.
+    """
+    seen = {id(obj) for obj in exclude}
+    pending = [root]
+    size = 0
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+
+    return size
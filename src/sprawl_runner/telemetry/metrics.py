@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+# Exponential buckets cover everything from a local stand-in call to a slow run.
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+TOKEN_BUCKETS = tuple(2**power for power in range(4, 18))
+
+_LabelKey = tuple[tuple[str, str], ...]
+
+
+def default_buckets(name: str) -> tuple[float, ...]:
+    """Pick buckets from the unit a histogram's name ends with."""
+    if name.endswith("_seconds"):
+        return SECONDS_BUCKETS
+    if name.endswith("_tokens"):
+        return TOKEN_BUCKETS
+    return COUNT_BUCKETS
+
+
+class Histogram:
+    """Counts observations into fixed buckets; keeps the sum, min and max but not the observations."""
+
+    def __init__(self, buckets: tuple[float, ...] = SECONDS_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket upper bound, plus +Inf.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def cumulative_counts(self) -> list[tuple[str, int]]:
+        bounds = [_format_number(bound) for bound in self.buckets] + ["+Inf"]
+        running = 0
+        cumulative = []
+
+        for bound, count in zip(bounds, self.counts):
+            running += count
+            cumulative.append((bound, running))
+
+        return cumulative
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label_key(labels: dict[str, Any]) -> _LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _prometheus_labels(labels: _LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """
+    The histograms, counters and gauges of a session, one series per name and
+    label set.
+
+    Recording takes one lock and a bisect, so it can stay on the hot path. The
+    whole registry exports as JSON lines or as a Prometheus text file. Gauges
+    read from live state are set by collectors, which run before every snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, _LabelKey], Histogram] = {}
+        self._counters: dict[tuple[str, _LabelKey], float] = {}
+        self._gauges: dict[tuple[str, _LabelKey], float] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def set_buckets(self, name: str, buckets: tuple[float, ...]) -> None:
+        """Use buckets for the named histogram instead of its defaults; call before its first observation."""
+        self._buckets[name] = buckets
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, _label_key(labels))
+
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets.get(name) or default_buckets(name))
+            histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _label_key(labels))
+
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def set_gauges(self, name: str, series: Iterable[tuple[dict[str, Any], float]]) -> None:
+        """Replace every series of the named gauge with series, as (labels, value) pairs."""
+        values = {(name, _label_key(labels)): value for labels, value in series}
+
+        with self._lock:
+            self._gauges = {key: value for key, value in self._gauges.items() if key[0] != name}
+            self._gauges.update(values)
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Call collect before every snapshot, so the gauges it sets are current in every export."""
+        self._collectors.append(collect)
+
+    def histogram(self, name: str, **labels: Any) -> Histogram | None:
+        with self._lock:
+            return self._histograms.get((name, _label_key(labels)))
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def gauge(self, name: str, **labels: Any) -> float | None:
+        with self._lock:
+            return self._gauges.get((name, _label_key(labels)))
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        for collect in self._collectors:
+            collect()
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+            series: list[dict[str, Any]] = [
+                {
+                    "name": name,
+                    "type": "histogram",
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "min": histogram.min if histogram.count else None,
+                    "max": histogram.max if histogram.count else None,
+                    "buckets": dict(histogram.cumulative_counts()),
+                }
+                for (name, labels), histogram in histograms
+            ]
+            series += [
+                {"name": name, "type": "counter", "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ]
+            series += [
+                {"name": name, "type": "gauge", "labels": dict(labels), "value": value}
+                for (name, labels), value in gauges
+            ]
+
+        return series
+
+    def to_json_lines(self) -> str:
+        timestamp = time.time()
+        return "".join(json.dumps({"timestamp": timestamp, **series}) + "\n" for series in self.snapshot())
+
+    def to_prometheus(self) -> str:
+        lines: list[str] = []
+        typed: set[str] = set()
+
+        for series in self.snapshot():
+            name = series["name"]
+            labels = tuple(series["labels"].items())
+
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {series['type']}")
+
+            if series["type"] in ("counter", "gauge"):
+                lines.append(f"{name}{_prometheus_labels(labels)} {_format_number(series['value'])}")
+                continue
+
+            for bound, count in series["buckets"].items():
+                lines.append(f"{name}_bucket{_prometheus_labels(labels, (('le', bound),))} {count}")
+            lines.append(f"{name}_sum{_prometheus_labels(labels)} {_format_number(series['sum'])}")
+            lines.append(f"{name}_count{_prometheus_labels(labels)} {series['count']}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def export(self, path: str | Path) -> Path:
+        """Write every series to path: Prometheus text for a .prom file, JSON lines otherwise."""
+        path = Path(path).expanduser()
+        text = self.to_prometheus() if path.suffix == ".prom" else self.to_json_lines()
+        temp_path = path.with_name(path.name + ".tmp")
+
+        # Write then rename, so a scraper never reads half a file.
+        with open(temp_path, "w") as export_file:
+            export_file.write(text)
+        os.replace(temp_path, path)
+
+        return path
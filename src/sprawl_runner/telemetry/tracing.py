@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Coroutine, Iterator, Protocol, TypeVar
+
+if TYPE_CHECKING:
+    from typing import IO
+
+_T = TypeVar("_T")
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("sprawl_runner_span", default=None)
+
+
+class Span:
+    """One timed piece of work; spans started inside it are its children and share its trace."""
+
+    def __init__(self, name: str, parent: Span | None, attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration: float | None = None
+        self.error: str | None = None
+        self._started_at = time.perf_counter()
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._started_at
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class FileSpanExporter:
+    """Appends each finished span to a file as a line of JSON."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path).expanduser()
+        self._file: IO[str] | None = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a")  # noqa: SIM115
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class MemorySpanExporter:
+    """Keeps finished spans in a list, for tests and for looking at a session from code."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def close(self) -> None:
+        pass
+
+
+class Tracer:
+    """
+    Starts spans and hands finished ones to an exporter.
+
+    The current span follows the code through context variables, so spans
+    started in coroutines and tasks nest under the span they were started from.
+    Work handed to another event loop keeps its parent through bind. Without an
+    exporter spans are still timed but go nowhere.
+    """
+
+    def __init__(self, exporter: SpanExporter | None = None) -> None:
+        self._exporter = exporter
+
+    @property
+    def exporter(self) -> SpanExporter | None:
+        return self._exporter
+
+    @staticmethod
+    def current_span() -> Span | None:
+        return _current_span.get()
+
+    def start_span(self, name: str, parent: Span | None = None, **attributes: Any) -> Span:
+        """Start a span that is ended by end_span; the parent defaults to the current span."""
+        return Span(name, parent or _current_span.get(), attributes)
+
+    def end_span(self, span: Span, error: BaseException | None = None) -> None:
+        if span.duration is not None:
+            return
+
+        span.finish()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        if self._exporter is not None:
+            self._exporter.export(span)
+
+    @contextlib.contextmanager
+    def span(self, name: str, parent: Span | None = None, **attributes: Any) -> Iterator[Span]:
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+
+        try:
+            yield span
+        except BaseException as error:
+            self.end_span(span, error)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    @contextlib.contextmanager
+    def activate(self, span: Span | None) -> Iterator[Span | None]:
+        """Make span the current span for a block, without ending it afterwards."""
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def bind(self, coroutine: Coroutine[Any, Any, _T]) -> Coroutine[Any, Any, _T]:
+        """Carry the current span into a coroutine that runs in another context."""
+        return self._run_in_span(_current_span.get(), coroutine)
+
+    async def _run_in_span(self, span: Span | None, coroutine: Coroutine[Any, Any, _T]) -> _T:
+        with self.activate(span):
+            return await coroutine
+
+    def close(self) -> None:
+        if self._exporter is not None:
+            self._exporter.close()
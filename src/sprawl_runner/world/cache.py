@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, TypedDict
+
+from sprawl_runner import data
+from sprawl_runner.config.constants import (
+    OPENAI_MODEL,
+    WORLD_CACHE,
+    WORLD_CACHE_DIR,
+    WORLD_CACHE_MAX_AGE_DAYS,
+    WORLD_CACHE_MAX_WORLDS,
+    WORLD_CACHE_SAMPLE_SIZE,
+)
+from sprawl_runner.config.values import get_bool, get_float, get_int, get_str
+
+if TYPE_CHECKING:
+    from sprawl_runner.config.types import GameSettings
+    from sprawl_runner.game.game import Faction, Location
+
+WORLD_GENERATION_FILES = ("faction-gen-instructions.txt", "location-gen-instructions.txt")
+WORLD_TOOL_METADATA_FILES = ("register-factions", "register-locations")
+
+_SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class World(TypedDict):
+    factions: list[Faction]
+    locations: list[Location]
+
+
+def world_generation_key(openai_model: str) -> str:
+    """Hash everything that shapes a generated world: the instructions, the model and the tool schemas."""
+    digest = hashlib.sha256()
+
+    for part in (
+        openai_model,
+        *(data.load_data(file_name) for file_name in WORLD_GENERATION_FILES),
+        *(data.load_tool_metadata(file_name) for file_name in WORLD_TOOL_METADATA_FILES),
+    ):
+        digest.update(part.encode())
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+class WorldCache:
+    """
+    Generated worlds on disk, one directory per generation key.
+
+    Until sample_size worlds are cached for the key, sample() misses so a new
+    world gets generated; after that it returns one of them at random. Worlds
+    older than max_age_seconds are dropped, and when the cache holds more than
+    max_worlds (over all keys) the oldest go first.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        key: str,
+        *,
+        sample_size: int = 3,
+        max_worlds: int = 100,
+        max_age_seconds: float = 30 * _SECONDS_PER_DAY,
+        rng: random.Random | None = None,
+    ) -> None:
+        self._directory = Path(directory).expanduser()
+        self._key = key
+        self._sample_size = max(1, sample_size)
+        self._max_worlds = max_worlds
+        self._max_age_seconds = max_age_seconds
+        self._rng = rng or random.Random()  # noqa: S311
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> WorldCache | None:
+        if not get_bool(settings, WORLD_CACHE):
+            return None
+
+        return cls(
+            get_str(settings, WORLD_CACHE_DIR),
+            world_generation_key(get_str(settings, OPENAI_MODEL)),
+            sample_size=get_int(settings, WORLD_CACHE_SAMPLE_SIZE),
+            max_worlds=get_int(settings, WORLD_CACHE_MAX_WORLDS),
+            max_age_seconds=get_float(settings, WORLD_CACHE_MAX_AGE_DAYS) * _SECONDS_PER_DAY,
+        )
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    @property
+    def key_directory(self) -> Path:
+        return self._directory / self._key
+
+    def _evict(self) -> None:
+        now = time.time()
+        files = []
+
+        for path in self._directory.glob("*/*.json"):
+            with contextlib.suppress(FileNotFoundError):
+                modified = path.stat().st_mtime
+                if now - modified > self._max_age_seconds:
+                    path.unlink()
+                else:
+                    files.append((modified, path))
+
+        files.sort()
+        for _, path in files[: max(0, len(files) - self._max_worlds)]:
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+
+    def _read(self, path: Path) -> World | None:
+        try:
+            with open(path) as world_file:
+                world = json.load(world_file)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # A partly written or damaged world is dropped rather than played.
+            path.unlink(missing_ok=True)
+            return None
+
+        return World(factions=world["factions"], locations=world["locations"])
+
+    def worlds(self) -> list[World]:
+        self._evict()
+        worlds = (self._read(path) for path in sorted(self.key_directory.glob("*.json")))
+        return [world for world in worlds if world is not None]
+
+    def sample(self) -> World | None:
+        worlds = self.worlds()
+
+        if len(worlds) < self._sample_size:
+            return None
+
+        return self._rng.choice(worlds)
+
+    def store(self, world: World) -> Path:
+        self.key_directory.mkdir(parents=True, exist_ok=True)
+        path = self.key_directory / f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.json"
+        temp_path = path.with_suffix(".tmp")
+
+        # Write then rename, so readers never see a half-written world.
+        with open(temp_path, "w") as world_file:
+            json.dump(world, world_file)
+        os.replace(temp_path, path)
+
+        self._evict()
+        return path
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import contextlib
+from concurrent.futures import CancelledError, Future, InvalidStateError
+from typing import TYPE_CHECKING, Literal
+
+from sprawl_runner import data
+from sprawl_runner.ai.constants import TOOL_REGISTER_FACTIONS, TOOL_REGISTER_LOCATIONS
+from sprawl_runner.config.constants import WORLD_GENERATION
+from sprawl_runner.config.values import get_str
+from sprawl_runner.world.cache import World
+
+if TYPE_CHECKING:
+    from openai.types.beta.threads.run import Run
+
+    from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, RoundTrips
+    from sprawl_runner.ai.chat_completions import ChatReply
+    from sprawl_runner.ai.types import RunClass, ToolHandler, ToolName
+    from sprawl_runner.config.types import GameSettings
+
+WorldGenerationMode = Literal["batched", "split"]
+WORLD_GENERATION_MODES: tuple[WorldGenerationMode, ...] = ("batched", "split")
+
+
+def get_world_generation_mode(settings: GameSettings) -> WorldGenerationMode:
+    mode = get_str(settings, WORLD_GENERATION)
+    if mode not in WORLD_GENERATION_MODES:
+        msg = f"Setting world_generation must be one of {', '.join(WORLD_GENERATION_MODES)}, got: {mode!r}"
+        raise ValueError(msg)
+
+    return mode
+
+
+class WorldGenerator:
+    """
+    Starts the assistant runs that generate a world.
+
+    In "batched" mode factions and locations are asked for in one run, which
+    answers both register_* calls in one requires_action batch. In "split" mode
+    each gets a run of its own.
+    """
+
+    def __init__(
+        self,
+        message_bus: AssistantMessageBus,
+        mode: WorldGenerationMode = "batched",
+        round_trips: RoundTrips | None = None,
+        run_class: RunClass = "generation",
+    ) -> None:
+        self._message_bus = message_bus
+        self._mode = mode
+        # Counts the HTTP requests of every run this generator starts.
+        self._round_trips = round_trips
+        # "prefetch" for worlds nobody is waiting on yet.
+        self._run_class = run_class
+
+    @property
+    def mode(self) -> WorldGenerationMode:
+        return self._mode
+
+    def start_runs(self, tool_handlers: dict[ToolName, ToolHandler] | None = None) -> list[Future[Run | ChatReply]]:
+        instructions = [
+            data.load_data("faction-gen-instructions.txt"),
+            data.load_data("location-gen-instructions.txt"),
+        ]
+        if self._mode == "batched":
+            instructions = ["\n\n".join(instructions)]
+
+        return [
+            self._message_bus.process_tool_message_async(content, tool_handlers, self._round_trips, self._run_class)
+            for content in instructions
+        ]
+
+    def generate(self) -> Future[World]:
+        """
+        Generate a world without touching a game; the handle resolves with it once the runs are done.
+
+        The runs answer their register_* calls with handlers of their own, so
+        worlds can be generated while a game is being played.
+        """
+        world = World(factions=[], locations=[])
+        registered: set[str] = set()
+
+        def register_factions(arguments: dict[str, list]) -> str:
+            world["factions"].extend(arguments["factions"])
+            registered.add(TOOL_REGISTER_FACTIONS)
+            return "OK"
+
+        def register_locations(arguments: dict[str, list]) -> str:
+            world["locations"].extend(arguments["locations"])
+            registered.add(TOOL_REGISTER_LOCATIONS)
+            return "OK"
+
+        runs = self.start_runs({TOOL_REGISTER_FACTIONS: register_factions, TOOL_REGISTER_LOCATIONS: register_locations})
+        generated: Future[World] = Future()
+
+        def on_run_done(_run: Future[Run | ChatReply]) -> None:
+            if not all(run.done() for run in runs):
+                return
+
+            # Runs can finish at once; only the first callback resolves the handle.
+            with contextlib.suppress(InvalidStateError):
+                # exception() raises for a cancelled run, such as one cancel_runs() reaped.
+                errors = (CancelledError() if run.cancelled() else run.exception() for run in runs)
+                error = next((error for error in errors if error is not None), None)
+                if error is not None:
+                    generated.set_exception(error)
+                elif registered != {TOOL_REGISTER_FACTIONS, TOOL_REGISTER_LOCATIONS}:
+                    msg = "The assistant finished without registering both factions and locations."
+                    generated.set_exception(RuntimeError(msg))
+                else:
+                    generated.set_result(world)
+
+        for run in runs:
+            run.add_done_callback(on_run_done)
+
+        return generated
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from sprawl_runner.config.constants import OPENAI_MODEL, WORLD_CACHE_DIR, WORLD_POOL_SIZE
+from sprawl_runner.config.values import get_int, get_str
+from sprawl_runner.world.cache import World, world_generation_key
+
+if TYPE_CHECKING:
+    from sprawl_runner.config.types import GameSettings
+    from sprawl_runner.world.generator import WorldGenerator
+
+_POOL_DIR = "pool"
+
+
+class WorldPool:
+    """
+    Fresh, never played worlds ready to be handed to a new game.
+
+    Unlike the WorldCache, a world popped from the pool is gone from it. The
+    pool lives on disk, so worlds made by `sprawl-runner pregen` are there for
+    later games, and pop() is safe across processes.
+    """
+
+    def __init__(self, directory: str | Path, key: str, size: int = 2) -> None:
+        self._directory = Path(directory).expanduser() / _POOL_DIR / key
+        self._size = size
+        self._refills = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> WorldPool:
+        return cls(
+            get_str(settings, WORLD_CACHE_DIR),
+            world_generation_key(get_str(settings, OPENAI_MODEL)),
+            get_int(settings, WORLD_POOL_SIZE),
+        )
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(list(self._directory.glob("*.json")))
+
+    def add(self, world: World) -> Path:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._directory / f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.json"
+        temp_path = path.with_suffix(".tmp")
+
+        with open(temp_path, "w") as world_file:
+            json.dump(world, world_file)
+        os.replace(temp_path, path)
+
+        return path
+
+    def pop(self) -> World | None:
+        for path in sorted(self._directory.glob("*.json")):
+            claimed_path = path.with_suffix(".claimed")
+
+            # Renaming claims the world; whoever loses the race tries the next one.
+            try:
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                continue
+
+            try:
+                with open(claimed_path) as world_file:
+                    world = json.load(world_file)
+            except json.JSONDecodeError:
+                continue
+            finally:
+                claimed_path.unlink(missing_ok=True)
+
+            return World(factions=world["factions"], locations=world["locations"])
+
+        return None
+
+    def _on_refill_done(self, generated: Future[World]) -> None:
+        with self._lock:
+            self._refills -= 1
+
+        # A failed refill only leaves the pool short; the next refill tries again.
+        if generated.exception() is None:
+            self.add(generated.result())
+
+    def refill(self, generator: WorldGenerator) -> list[Future[World]]:
+        """Start generating the worlds the pool is short of, in the background."""
+        with self._lock:
+            missing = self._size - len(self) - self._refills
+            self._refills += max(0, missing)
+
+        refills = [generator.generate() for _ in range(missing)]
+        for generated in refills:
+            generated.add_done_callback(self._on_refill_done)
+
+        return refills
+
+    def fill(self, generator: WorldGenerator, count: int, concurrency: int = 4) -> Iterator[Future[World]]:
+        """Generate count worlds, at most concurrency at a time, yielding each handle as it finishes."""
+        pending: set[Future[World]] = set()
+        started = 0
+
+        while started < count or pending:
+            while started < count and len(pending) < concurrency:
+                pending.add(generator.generate())
+                started += 1
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for generated in done:
+                if generated.exception() is None:
+                    self.add(generated.result())
+                yield generated
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future, InvalidStateError
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Literal
+
+from sprawl_runner import data
+from sprawl_runner.ai.constants import TOOL_REGISTER_FACTIONS, TOOL_REGISTER_LOCATIONS
+from sprawl_runner.config.constants import WORLD_SPEC
+from sprawl_runner.config.values import get_str
+from sprawl_runner.world.cache import World
+
+if TYPE_CHECKING:
+    from openai.types.beta.threads.run import Run
+
+    from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, RoundTrips
+    from sprawl_runner.ai.chat_completions import ChatReply
+    from sprawl_runner.config.types import GameSettings
+
+ShardKind = Literal["factions", "locations"]
+
+# Later shards are told which names are taken; past this many the prompt only grows.
+_MAX_TAKEN_NAMES = 200
+
+
+@dataclass(frozen=True)
+class WorldShard:
+    """One part of a world, generated by an assistant run of its own."""
+
+    kind: ShardKind
+    # The district (for locations) or faction tier (for factions) the shard covers.
+    group: str
+    count: int
+    rest_count: int = 0
+    # Which of the group's shards this is, counting from 1.
+    part: int = 1
+    parts: int = 1
+
+    def prompt(self, taken_names: list[str]) -> str:
+        template = data.load_data(f"{self.kind[:-1]}-shard-instructions.txt")
+        return template.format(
+            group=self.group,
+            count=self.count,
+            rest_count=self.rest_count,
+            part=self.part,
+            parts=self.parts,
+            taken_names=", ".join(taken_names[-_MAX_TAKEN_NAMES:]) or "none yet",
+        )
+
+
+def _split(total: int, max_size: int) -> list[tuple[int, int]]:
+    """Split range(total) into (start, stop) pieces of at most max_size, sized as evenly as possible."""
+    pieces = -(-total // max_size)
+    bounds = [total * index // pieces for index in range(pieces + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+@dataclass(frozen=True)
+class WorldSpec:
+    """
+    What a large world is made of: locations per district and factions per tier.
+
+    Each district and tier is split into shards of at most max_per_shard
+    entities, and at most concurrency shards are generated at a time.
+    """
+
+    districts: tuple[str, ...]
+    faction_tiers: tuple[str, ...]
+    locations_per_district: int = 8
+    rest_locations_per_district: int = 2
+    factions_per_tier: int = 4
+    max_per_shard: int = 10
+    concurrency: int = 4
+
+    def __post_init__(self) -> None:
+        # The game can't start without both kinds of entity.
+        if not self.districts or not self.faction_tiers:
+            msg = "A world spec needs at least one district and one faction tier."
+            raise ValueError(msg)
+
+        if min(self.locations_per_district, self.factions_per_tier, self.max_per_shard, self.concurrency) < 1:
+            msg = "World spec counts, max_per_shard and concurrency must be at least 1."
+            raise ValueError(msg)
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> WorldSpec:
+        values = dict(values)
+        values["districts"] = tuple(values.get("districts", ()))
+        values["faction_tiers"] = tuple(values.get("faction_tiers", ()))
+        return cls(**values)
+
+    @classmethod
+    def from_file(cls, path: str) -> WorldSpec:
+        with open(path) as spec_file:
+            return cls.from_dict(json.load(spec_file))
+
+    @classmethod
+    def from_settings(cls, settings: GameSettings) -> WorldSpec | None:
+        path = get_str(settings, WORLD_SPEC)
+        return cls.from_file(path) if path else None
+
+    def shards(self) -> list[WorldShard]:
+        shards = []
+
+        for tier in self.faction_tiers:
+            pieces = _split(self.factions_per_tier, self.max_per_shard)
+            for part, (start, stop) in enumerate(pieces, 1):
+                shards.append(WorldShard("factions", tier, stop - start, part=part, parts=len(pieces)))
+
+        total = self.locations_per_district
+        rest_count = min(self.rest_locations_per_district, total)
+        for district in self.districts:
+            pieces = _split(total, self.max_per_shard)
+            for part, (start, stop) in enumerate(pieces, 1):
+                # Rest locations are spread over the district's shards in proportion to their size.
+                rest = rest_count * stop // total - rest_count * start // total
+                shards.append(WorldShard("locations", district, stop - start, rest, part, len(pieces)))
+
+        return shards
+
+
+@dataclass(frozen=True)
+class ShardProgress:
+    shard: WorldShard
+    finished: int
+    total: int
+    # Entities the shard added after duplicates were dropped.
+    added: int
+    error: BaseException | None = None
+
+
+class ShardedWorldGenerator:
+    """
+    Generates a large world as many small assistant runs, at most spec.concurrency at a time.
+
+    Shards are merged as they finish, dropping entities whose name (ignoring
+    case) is already in the world, and every shard started later is told which
+    names are taken.
+    """
+
+    def __init__(
+        self,
+        message_bus: AssistantMessageBus,
+        spec: WorldSpec,
+        round_trips: RoundTrips | None = None,
+    ) -> None:
+        self._message_bus = message_bus
+        self._spec = spec
+        self._round_trips = round_trips
+
+    def generate(self, on_progress: Callable[[ShardProgress], None] | None = None) -> Future[World]:
+        """Start generating; the handle resolves with the merged world and on_progress is called per shard."""
+        return _ShardedGeneration(self._message_bus, self._spec, self._round_trips, on_progress).start()
+
+
+class _ShardedGeneration:
+    def __init__(
+        self,
+        message_bus: AssistantMessageBus,
+        spec: WorldSpec,
+        round_trips: RoundTrips | None,
+        on_progress: Callable[[ShardProgress], None] | None,
+    ) -> None:
+        self._message_bus = message_bus
+        self._round_trips = round_trips
+        self._on_progress = on_progress
+        self._concurrency = spec.concurrency
+        self._waiting = deque(spec.shards())
+        self._total = len(self._waiting)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._finished = 0
+        self._error: BaseException | None = None
+        self._world = World(factions=[], locations=[])
+        self._names: dict[ShardKind, set[str]] = {"factions": set(), "locations": set()}
+        self.generated: Future[World] = Future()
+
+    def start(self) -> Future[World]:
+        self._start_waiting_shards()
+        return self.generated
+
+    def _start_waiting_shards(self) -> None:
+        starting = []
+
+        with self._lock:
+            while self._waiting and self._error is None and self._running < self._concurrency:
+                shard = self._waiting.popleft()
+                taken_names = [entity["name"] for entity in self._world[shard.kind]]
+                starting.append((shard, shard.prompt(taken_names)))
+                self._running += 1
+
+        # Started outside the lock; a handle that's already done runs its callback straight away.
+        for shard, prompt in starting:
+            self._start_shard(shard, prompt)
+
+    def _start_shard(self, shard: WorldShard, prompt: str) -> None:
+        entities: list[dict[str, Any]] = []
+
+        def register(arguments: dict[str, list]) -> str:
+            entities.extend(arguments[shard.kind])
+            return "OK"
+
+        tool_name = TOOL_REGISTER_FACTIONS if shard.kind == "factions" else TOOL_REGISTER_LOCATIONS
+        handlers = {tool_name: register}
+
+        run = self._message_bus.process_tool_message_async(prompt, handlers, self._round_trips)
+        run.add_done_callback(lambda run: self._on_shard_done(shard, run, entities))
+
+    def _merge(self, kind: ShardKind, entities: list[dict[str, Any]]) -> int:
+        added = 0
+
+        for entity in entities:
+            name = (entity.get("name") or "").strip().casefold()
+            if name and name not in self._names[kind]:
+                self._names[kind].add(name)
+                self._world[kind].append(entity)  # type: ignore[arg-type]
+                added += 1
+
+        return added
+
+    def _on_shard_done(self, shard: WorldShard, run: Future[Run | ChatReply], entities: list[dict[str, Any]]) -> None:
+        error = CancelledError() if run.cancelled() else run.exception()
+        if error is None and not entities:
+            error = RuntimeError(f"The assistant finished without registering {shard.kind} for {shard.group}.")
+
+        with self._lock:
+            self._running -= 1
+            self._finished += 1
+            added = self._merge(shard.kind, entities) if error is None else 0
+            if error is not None and self._error is None:
+                self._error = error
+            progress = ShardProgress(shard, self._finished, self._total, added, error)
+            done = self._running == 0 and (self._error is not None or not self._waiting)
+
+        if self._on_progress is not None:
+            self._on_progress(progress)
+
+        if not done:
+            self._start_waiting_shards()
+            return
+
+        # Only the first shard to see the end resolves the handle.
+        with contextlib.suppress(InvalidStateError):
+            if self._error is not None:
+                self.generated.set_exception(self._error)
+            else:
+                self.generated.set_result(self._world)
@@ -1,6 +1,6 @@
 from openai.types.shared_params import FunctionDefinition
 
-from sprawl_runner.ai.assistant import create_assistant
+from sprawl_runner.ai.assistant import assistant_fingerprint, create_assistant, update_assistant
 
 
 def test_create_assistant_returns_assistant_id(mocker):
@@ -27,3 +27,52 @@ def test_create_assistant_returns_assistant_id(mocker):
         tools=[mock_assitant_tool_param],
     )
     assert assistant_id == mock_openai_client.beta.assistants.create.return_value.id
+
+
+def test_create_assistant_reuses_given_client(mocker):
+    mock_openai = mocker.patch("sprawl_runner.ai.assistant.OpenAI")
+    mock_openai_client = mocker.MagicMock()
+
+    assistant_id = create_assistant(
+        "test-assistant", "test-key", "test-model", "test-instructions", [], mock_openai_client
+    )
+
+    mock_openai.assert_not_called()
+    assert assistant_id == mock_openai_client.beta.assistants.create.return_value.id
+
+
+def test_update_assistant_updates_in_place(mocker):
+    mock_openai_client = mocker.MagicMock()
+    tool_function = {"name": "register_factions"}
+
+    assistant_id = update_assistant(
+        "asst_1", "test-assistant", "test-key", "test-model", "test-instructions", [tool_function], mock_openai_client
+    )
+
+    mock_openai_client.beta.assistants.update.assert_called_once_with(
+        "asst_1",
+        name="test-assistant",
+        instructions="test-instructions",
+        model="test-model",
+        tools=[{"type": "function", "function": tool_function}],
+    )
+    mock_openai_client.beta.assistants.create.assert_not_called()
+    assert assistant_id == mock_openai_client.beta.assistants.update.return_value.id
+
+
+def test_assistant_fingerprint_ignores_tool_order():
+    factions = {"name": "register_factions"}
+    locations = {"name": "register_locations"}
+
+    assert assistant_fingerprint("name", "model", "instructions", [factions, locations]) == assistant_fingerprint(
+        "name", "model", "instructions", [locations, factions]
+    )
+
+
+def test_assistant_fingerprint_changes_with_the_definition():
+    tools = [{"name": "register_factions"}]
+    fingerprint = assistant_fingerprint("name", "model", "instructions", tools)
+
+    assert fingerprint != assistant_fingerprint("name", "model", "new instructions", tools)
+    assert fingerprint != assistant_fingerprint("name", "other-model", "instructions", tools)
+    assert fingerprint != assistant_fingerprint("name", "model", "instructions", [{"name": "register_locations"}])
@@ -1,9 +1,23 @@
+import asyncio
 import json
+import time
 from collections import deque
+from concurrent.futures import Future, wait
 
 import pytest
 
-from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus
+from sprawl_runner.ai.assistant_message_bus import (
+    NARRATIVE_MESSAGE_LIMIT,
+    AssistantMessageBus,
+    NarrativeReply,
+    RoundTrips,
+)
+from sprawl_runner.ai.compaction import CompactionOptions, NarrativeTurn
+from sprawl_runner.ai.deadlines import ReapedRun, RunDeadlineExceededError, RunDeadlines
+from sprawl_runner.ai.polling import PollingOptions, PollingStrategy
+from sprawl_runner.ai.scheduler import RunScheduler, SchedulerOptions
+from sprawl_runner.ai.tool_dispatch import DispatchedCall, ToolHandlerTraits, tool_handler
+from sprawl_runner.telemetry.tracing import MemorySpanExporter, Tracer
 
 
 @pytest.fixture
@@ -13,12 +27,67 @@ def message_bus() -> AssistantMessageBus:
     return AssistantMessageBus(openai_api_key, openai_assistant_id)
 
 
+@pytest.fixture
+def mock_openai_client(mocker, message_bus):
+    mock_client = mocker.MagicMock()
+    mock_client.beta.threads.create = mocker.AsyncMock()
+    mock_client.beta.threads.messages.create = mocker.AsyncMock()
+    mock_client.beta.threads.messages.list = mocker.AsyncMock()
+    mock_client.beta.threads.runs.create = mocker.AsyncMock()
+    mock_client.beta.threads.create_and_run = mocker.AsyncMock()
+    mock_client.beta.threads.runs.retrieve = mocker.AsyncMock()
+    mock_client.beta.threads.runs.submit_tool_outputs = mocker.AsyncMock()
+    mock_client.beta.threads.runs.cancel = mocker.AsyncMock()
+    mock_client_manager = mocker.MagicMock(client=mock_client)
+    mock_client_manager.aclose = mocker.AsyncMock()
+    mocker.patch.object(message_bus, "_client_manager", mock_client_manager)
+    return mock_client
+
+
+class TestNarrativeReply:
+    def test_deltas_before_wait_are_handed_over_in_order(self, mocker):
+        narrative_reply = NarrativeReply()
+        narrative_reply.feed("The ")
+        narrative_reply.feed("sprawl ")
+        narrative_reply.message.set_result("The sprawl hums.")
+        on_delta = mocker.MagicMock()
+
+        message = narrative_reply.wait(on_delta)
+        narrative_reply.feed("hums.")
+
+        assert message == "The sprawl hums."
+        on_delta.assert_has_calls([mocker.call("The "), mocker.call("sprawl "), mocker.call("hums.")])
+
+    def test_resolve_from_passes_on_errors(self):
+        narrative_reply = NarrativeReply()
+        failed = Future()
+        failed.set_exception(RuntimeError("network down"))
+
+        narrative_reply.resolve_from(failed)
+
+        with pytest.raises(RuntimeError, match="network down"):
+            narrative_reply.wait()
+
+    def test_await_message_hands_over_deltas_without_blocking(self, mocker):
+        narrative_reply = NarrativeReply()
+        narrative_reply.feed("The ")
+        on_delta = mocker.MagicMock()
+
+        async def await_message():
+            asyncio.get_running_loop().call_soon(narrative_reply.message.set_result, "The sprawl.")
+            return await narrative_reply.await_message(on_delta)
+
+        assert asyncio.run(await_message()) == "The sprawl."
+        on_delta.assert_called_once_with("The ")
+
+
 class TestAssistantMessageBus:
     def test_can_instantiate(self, mocker):
         openai_api_key = "test-key"
         openai_assistant_id = "test-id"
         mock_deque = mocker.MagicMock()
         mocker.patch("sprawl_runner.ai.assistant_message_bus.deque", return_value=mock_deque)
+        mock_client_manager = mocker.patch("sprawl_runner.ai.assistant_message_bus.OpenAIClientManager")
 
         message_bus = AssistantMessageBus(openai_api_key, openai_assistant_id)
 
@@ -26,6 +95,15 @@ class TestAssistantMessageBus:
         assert message_bus._assistant_id == openai_assistant_id  # noqa: SLF001
         assert message_bus._active_runs == mock_deque  # noqa: SLF001
         assert message_bus._tool_handlers == {}  # noqa: SLF001
+        mock_client_manager.assert_called_once_with(openai_api_key)
+        assert message_bus.client_manager == mock_client_manager.return_value
+
+    def test_can_instantiate_with_shared_client_manager(self, mocker):
+        mock_client_manager = mocker.MagicMock()
+
+        message_bus = AssistantMessageBus("test-key", "test-id", mock_client_manager)
+
+        assert message_bus.client_manager == mock_client_manager
 
     def test__get_tool_handler_returns_handler_when_tool_is_registered(self, mocker, monkeypatch, message_bus):
         tool_name = "test-tool"
@@ -47,7 +125,7 @@ class TestAssistantMessageBus:
 
         assert tool_handler is None
 
-    def test__process_tool_calls_returns_successful_tool_output_when_handler_exists(
+    def test_dispatch_tool_calls_returns_successful_tool_output_when_handler_exists(
         self, mocker, monkeypatch, message_bus
     ):
         mock_tool_call = mocker.MagicMock()
@@ -58,10 +136,10 @@ class TestAssistantMessageBus:
         mock_json_loads = mocker.MagicMock()
         monkeypatch.setattr(json, "loads", mock_json_loads)
 
-        tool_outputs = message_bus._process_tool_calls(mock_tool_calls)  # noqa: SLF001
+        tool_outputs = asyncio.run(message_bus.dispatch_tool_calls(mock_tool_calls))  # noqa: SLF001
 
         message_bus._get_tool_handler.assert_called_once_with(  # noqa: SLF001
-            mock_tool_call.function.name
+            mock_tool_call.function.name, None
         )
         mock_json_loads.assert_called_once_with(mock_tool_call.function.arguments)
         mock_handler.assert_called_once_with(mock_json_loads.return_value)
@@ -72,7 +150,7 @@ class TestAssistantMessageBus:
             }
         ]
 
-    def test__process_tool_calls_returns_successful_tool_output_when_handler_does_not_exists(
+    def test_dispatch_tool_calls_returns_successful_tool_output_when_handler_does_not_exists(
         self, mocker, monkeypatch, message_bus
     ):
         mock_tool_call = mocker.MagicMock()
@@ -82,14 +160,63 @@ class TestAssistantMessageBus:
         mock_json_loads = mocker.MagicMock()
         monkeypatch.setattr(json, "loads", mock_json_loads)
 
-        tool_outputs = message_bus._process_tool_calls(mock_tool_calls)  # noqa: SLF001
+        tool_outputs = asyncio.run(message_bus.dispatch_tool_calls(mock_tool_calls))  # noqa: SLF001
 
         message_bus._get_tool_handler.assert_called_once_with(  # noqa: SLF001
-            mock_tool_call.function.name
+            mock_tool_call.function.name, None
         )
         mock_json_loads.assert_not_called()
         assert tool_outputs == [{"tool_call_id": mock_tool_call.id, "output": "ERROR"}]
 
+    def test_dispatch_tool_calls_dispatches_whole_batch_and_keeps_order(self, mocker, message_bus):
+        first_call = mocker.MagicMock(id="call1")
+        first_call.function.name = "tool1"
+        missing_call = mocker.MagicMock(id="call2")
+        missing_call.function.name = "missing"
+        last_call = mocker.MagicMock(id="call3")
+        last_call.function.name = "tool2"
+        tool1_handler = mocker.MagicMock()
+        tool2_handler = mocker.MagicMock()
+        tool2_traits = ToolHandlerTraits(thread_safe=True)
+        message_bus.register_tool_handler("tool1", tool1_handler)
+        message_bus.register_tool_handler("tool2", tool2_handler, tool2_traits)
+        mock_dispatcher = mocker.patch.object(message_bus, "_tool_dispatcher")
+        mock_dispatcher.dispatch = mocker.AsyncMock(return_value=["OK1", "OK3"])
+
+        tool_outputs = asyncio.run(
+            message_bus.dispatch_tool_calls([first_call, missing_call, last_call])  # noqa: SLF001
+        )
+
+        mock_dispatcher.dispatch.assert_awaited_once_with(
+            [
+                DispatchedCall(tool1_handler, ToolHandlerTraits(), first_call.function.arguments, "tool1", "call1"),
+                DispatchedCall(tool2_handler, tool2_traits, last_call.function.arguments, "tool2", "call3"),
+            ],
+            message_bus.tracer,
+        )
+        assert tool_outputs == [
+            {"tool_call_id": "call1", "output": "OK1"},
+            {"tool_call_id": "call2", "output": "ERROR"},
+            {"tool_call_id": "call3", "output": "OK3"},
+        ]
+
+    def test__get_tool_handler_prefers_run_tool_handlers(self, mocker, message_bus):
+        registered_handler = mocker.MagicMock()
+        run_handler = mocker.MagicMock()
+        message_bus.register_tool_handler("register_factions", registered_handler)
+
+        assert message_bus._get_tool_handler("register_factions", {"register_factions": run_handler}) is run_handler  # noqa: SLF001
+        assert message_bus._get_tool_handler("register_factions", {}) is registered_handler  # noqa: SLF001
+
+    def test_register_tool_handler_uses_declared_traits_by_default(self, message_bus):
+        @tool_handler(cpu_bound=True)
+        def handler(arguments):
+            return "OK"
+
+        message_bus.register_tool_handler("tool", handler)
+
+        assert message_bus._get_tool_handler_traits("tool", handler) == ToolHandlerTraits(cpu_bound=True)  # noqa: SLF001
+
     def test__requeue_run_if_pending_does_requeue_for_queued_status(self, mocker, monkeypatch, message_bus):
         monkeypatch.setattr(message_bus, "_active_runs", mocker.MagicMock())
         mock_run = mocker.MagicMock(status="queued")
@@ -122,118 +249,817 @@ class TestAssistantMessageBus:
 
         assert is_requeued is False
 
+    def test__requeue_run_if_pending_records_tool_run_duration_when_finished(self, mocker, monkeypatch, message_bus):
+        mock_polling = mocker.patch.object(message_bus, "_polling")
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.time.monotonic", return_value=12.0)
+        monkeypatch.setattr(message_bus, "_run_started_at", {"run_id": 10.0})
+        mock_run = mocker.MagicMock(id="run_id", status="completed")
+
+        message_bus._requeue_run_if_pending(mock_run)  # noqa: SLF001
+
+        mock_polling.record.assert_called_once_with("tool", 2.0)
+        assert message_bus._run_started_at == {}  # noqa: SLF001
+
     def test__send_tool_outputs_does_submit_outputs_when_not_empty(self, mocker, message_bus):
         mock_client = mocker.MagicMock()
+        mock_client.beta.threads.runs.submit_tool_outputs = mocker.AsyncMock()
         mock_updated_run = mock_client.beta.threads.runs.submit_tool_outputs.return_value
         mock_updated_run.status = "queued"
         mock_run = mocker.MagicMock(status="queued")
         mock_tool_outputs = [mocker.MagicMock()]
 
-        message_bus._send_tool_outputs(mock_client, mock_run, mock_tool_outputs)  # noqa: SLF001
+        updated_run = asyncio.run(
+            message_bus._send_tool_outputs(mock_client, mock_run, mock_tool_outputs)  # noqa: SLF001
+        )
 
-        mock_client.beta.threads.runs.submit_tool_outputs.assert_called_once_with(
+        mock_client.beta.threads.runs.submit_tool_outputs.assert_awaited_once_with(
             thread_id=mock_run.thread_id,
             run_id=mock_run.id,
             tool_outputs=mock_tool_outputs,
         )
+        assert updated_run == mock_updated_run
 
     def test__send_tool_outputs_does_not_submit_outputs_when_empty(self, mocker, message_bus):
         mock_client = mocker.MagicMock()
-        mock_updated_run = mock_client.beta.threads.runs.submit_tool_outputs.return_value
-        mock_updated_run.status = "queued"
+        mock_client.beta.threads.runs.submit_tool_outputs = mocker.AsyncMock()
         mock_run = mocker.MagicMock(status="queued")
         mock_tool_outputs = []
 
-        message_bus._send_tool_outputs(mock_client, mock_run, mock_tool_outputs)  # noqa: SLF001
+        updated_run = asyncio.run(
+            message_bus._send_tool_outputs(mock_client, mock_run, mock_tool_outputs)  # noqa: SLF001
+        )
 
         mock_client.beta.threads.runs.submit_tool_outputs.assert_not_called()
+        assert updated_run == mock_run
 
-    def test_process_tool_message_async_successfully_queues_new_run(self, mocker, message_bus):
+    def test_aprocess_tool_message_successfully_queues_new_run(self, mocker, message_bus, mock_openai_client):
         content = "test message content"
-        mock_thread = mocker.MagicMock(id="mock_thread_id")
         mock_run = mocker.MagicMock(id="mock_run_id", thread_id="mock_thread_id")
-        mock_openai_client = mocker.MagicMock()
-        mock_openai_client.beta.threads.create.return_value = mock_thread
-        mock_openai_client.beta.threads.messages.create.return_value = None
-        mock_openai_client.beta.threads.runs.create.return_value = mock_run
-        mock_openai = mocker.patch("sprawl_runner.ai.assistant_message_bus.OpenAI")
-        mock_openai.return_value = mock_openai_client
+        mock_openai_client.beta.threads.create_and_run.return_value = mock_run
+        mock_ensure_driver = mocker.patch.object(message_bus, "_ensure_tool_run_driver")
 
-        message_bus.process_tool_message_async(content)
+        async def process_tool_message():
+            completion = await message_bus.aprocess_tool_message(content)
+            return completion, completion.done()
 
-        mock_openai_client.beta.threads.create.assert_called_once_with()
-        mock_openai_client.beta.threads.messages.create.assert_called_once_with(
-            thread_id=mock_thread.id,
-            role="user",
-            content=content,
-        )
-        mock_openai_client.beta.threads.runs.create.assert_called_once_with(
-            thread_id=mock_thread.id,
+        completion, is_done = asyncio.run(process_tool_message())
+
+        mock_openai_client.beta.threads.create_and_run.assert_awaited_once_with(
             assistant_id=message_bus._assistant_id,  # noqa: SLF001
+            thread={"messages": [{"role": "user", "content": content}]},
         )
+        mock_openai_client.beta.threads.create.assert_not_called()
+        mock_openai_client.beta.threads.runs.create.assert_not_called()
+        assert is_done is False
+        assert message_bus._run_completions[mock_run.id] is completion  # noqa: SLF001
         assert message_bus._active_runs[-1] == mock_run  # noqa: SLF001
+        mock_ensure_driver.assert_called_once_with()
 
-    def test_resolve_async_tool_messages_does_nothing_when_no_active_runs(self, mocker, message_bus):
-        mock_openai = mocker.patch("sprawl_runner.ai.assistant_message_bus.OpenAI")
+    def test_aprocess_tool_message_handle_resolves_when_run_finishes(self, mocker, message_bus, mock_openai_client):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        mock_run = mocker.MagicMock(id="mock_run_id", status="queued")
+        mock_in_progress_run = mocker.MagicMock(id="mock_run_id", status="in_progress")
+        mock_completed_run = mocker.MagicMock(id="mock_run_id", status="completed")
+        mock_openai_client.beta.threads.create_and_run.return_value = mock_run
+        mock_openai_client.beta.threads.runs.retrieve.side_effect = [mock_in_progress_run, mock_completed_run]
 
-        message_bus.resolve_async_tool_messages()
+        async def process_tool_message():
+            return await (await message_bus.aprocess_tool_message("content"))
+
+        run = asyncio.run(process_tool_message())
+
+        assert run == mock_completed_run
+        assert mock_openai_client.beta.threads.runs.retrieve.await_count == 2
+        assert message_bus._run_completions == {}  # noqa: SLF001
+
+    def test_tool_runs_back_off_on_their_own_schedules(self, mocker):
+        mock_time = mocker.patch("sprawl_runner.ai.assistant_message_bus.time")
+        mock_time.monotonic.return_value = 100.0
+        polling = PollingStrategy(PollingOptions(initial_interval=0.25, max_interval=4.0, jitter=0.0))
+        message_bus = AssistantMessageBus("test-key", "test-id", polling=polling)
+        first, second = mocker.MagicMock(id="first"), mocker.MagicMock(id="second")
+        message_bus._active_runs.append(first)  # noqa: SLF001
+        message_bus._schedule_poll(first)  # noqa: SLF001
+
+        # The first run is checked until it has backed off to a 4s wait.
+        for _ in range(5):
+            due_by = message_bus._next_poll_at()  # noqa: SLF001
+            mock_time.monotonic.return_value = due_by
+            assert message_bus._take_active_runs(due_by) == [first]  # noqa: SLF001
+            message_bus._active_runs.append(first)  # noqa: SLF001
+        assert message_bus._run_polls_due["first"] == due_by + 4.0  # noqa: SLF001
+
+        message_bus._active_runs.append(second)  # noqa: SLF001
+        message_bus._schedule_poll(second)  # noqa: SLF001
+
+        assert message_bus._next_poll_at() == due_by + 0.25  # noqa: SLF001
+        assert message_bus._take_active_runs(due_by + 0.25) == [second]  # noqa: SLF001
+        assert list(message_bus._active_runs) == [first]  # noqa: SLF001
+        assert polling.metrics()["tool"]["polls"] == 8  # noqa: PLR2004
+
+    def test_a_new_tool_run_wakes_a_driver_sleeping_past_its_first_check(self, mocker, message_bus):
+        async def start_runs():
+            message_bus._run_completions["first"] = asyncio.get_running_loop().create_future()  # noqa: SLF001
+            message_bus._run_polls_due["first"] = time.monotonic() + 60  # noqa: SLF001
+            message_bus._ensure_tool_run_driver()  # noqa: SLF001
+            sleeping = message_bus._tool_run_driver  # noqa: SLF001
+            await asyncio.sleep(0)
+
+            message_bus._run_polls_due["second"] = time.monotonic() + 0.25  # noqa: SLF001
+            message_bus._ensure_tool_run_driver()  # noqa: SLF001
+            await asyncio.sleep(0)
+            woken = sleeping.cancelled()
+            await message_bus.aclose()
+            return woken, sleeping is not message_bus._tool_run_driver  # noqa: SLF001
+
+        assert asyncio.run(start_runs()) == (True, True)
 
-        mock_openai.assert_not_called()
+    def test_aprocess_tool_message_traces_the_run_and_its_polls(self, mocker, message_bus, mock_openai_client):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        exporter = MemorySpanExporter()
+        mocker.patch.object(message_bus, "_tracer", Tracer(exporter))
+        mock_run = mocker.MagicMock(id="mock_run_id", thread_id="mock_thread_id", status="queued")
+        mock_completed_run = mocker.MagicMock(id="mock_run_id", thread_id="mock_thread_id", status="completed")
+        mock_openai_client.beta.threads.create_and_run.return_value = mock_run
+        mock_openai_client.beta.threads.runs.retrieve.return_value = mock_completed_run
 
-    def test_resolve_async_tool_messages_does_process_tool_calls_when_run_requires_action(self, mocker, message_bus):
-        # Mock run that requires action
+        async def process_tool_message():
+            return await (await message_bus.aprocess_tool_message("content"))
+
+        asyncio.run(process_tool_message())
+
+        spans = {span.name: span for span in exporter.spans}
+        run_span = spans["tool.run"]
+        assert run_span.attributes["run_id"] == "mock_run_id"
+        assert run_span.attributes["thread_id"] == "mock_thread_id"
+        assert run_span.attributes["status"] == "completed"
+        assert spans["threads.create_and_run"].parent_id == run_span.span_id
+        assert spans["runs.retrieve"].parent_id == run_span.span_id
+        assert message_bus._run_spans == {}  # noqa: SLF001
+
+    def test_aprocess_tool_message_schedules_every_request_of_the_run_as_its_class(
+        self, mocker, message_bus, mock_openai_client
+    ):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        mock_slot = mocker.spy(message_bus.scheduler, "slot")
+        exporter = MemorySpanExporter()
+        mocker.patch.object(message_bus, "_tracer", Tracer(exporter))
+        mock_openai_client.beta.threads.create_and_run.return_value = mocker.MagicMock(
+            id="mock_run_id", status="queued"
+        )
+        mock_openai_client.beta.threads.runs.retrieve.return_value = mocker.MagicMock(
+            id="mock_run_id", status="completed"
+        )
+
+        async def process_tool_message():
+            return await (await message_bus.aprocess_tool_message("content", run_class="prefetch"))
+
+        asyncio.run(process_tool_message())
+
+        spans = {span.name: span for span in exporter.spans}
+        assert spans["threads.create_and_run"].attributes["run_class"] == "prefetch"
+        assert spans["runs.retrieve"].attributes["run_class"] == "prefetch"
+        assert mock_slot.call_count == 2  # noqa: PLR2004
+        assert message_bus._run_classes == {}  # noqa: SLF001
+
+    def test_aprocess_tool_message_answers_calls_with_run_tool_handlers(self, mocker, message_bus, mock_openai_client):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        tool_call = mocker.MagicMock(id="call1")
+        tool_call.function.name = "register_factions"
+        tool_call.function.arguments = '{"factions": []}'
+        requires_action_run = mocker.MagicMock(id="mock_run_id", status="requires_action")
+        requires_action_run.required_action.submit_tool_outputs.tool_calls = [tool_call]
+        mock_openai_client.beta.threads.create_and_run.return_value = mocker.MagicMock(
+            id="mock_run_id", status="queued"
+        )
+        mock_openai_client.beta.threads.runs.retrieve.return_value = requires_action_run
+        mock_openai_client.beta.threads.runs.submit_tool_outputs.return_value = mocker.MagicMock(
+            id="mock_run_id", status="completed"
+        )
+        registered_handler = mocker.MagicMock()
+        run_handler = mocker.MagicMock(return_value="RUN OK")
+        message_bus.register_tool_handler("register_factions", registered_handler)
+
+        async def process_tool_message():
+            return await (await message_bus.aprocess_tool_message("content", {"register_factions": run_handler}))
+
+        asyncio.run(process_tool_message())
+
+        run_handler.assert_called_once_with({"factions": []})
+        registered_handler.assert_not_called()
+        mock_openai_client.beta.threads.runs.submit_tool_outputs.assert_awaited_once_with(
+            thread_id=requires_action_run.thread_id,
+            run_id="mock_run_id",
+            tool_outputs=[{"tool_call_id": "call1", "output": "RUN OK"}],
+        )
+        assert message_bus._run_tool_handlers == {}  # noqa: SLF001
+
+    def test_aprocess_tool_message_counts_round_trips(self, mocker, message_bus, mock_openai_client):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        tool_call = mocker.MagicMock(id="call1")
+        tool_call.function.name = "register_factions"
+        tool_call.function.arguments = '{"factions": []}'
+        requires_action_run = mocker.MagicMock(id="mock_run_id", status="requires_action")
+        requires_action_run.required_action.submit_tool_outputs.tool_calls = [tool_call]
+        mock_openai_client.beta.threads.create_and_run.return_value = mocker.MagicMock(
+            id="mock_run_id", status="queued"
+        )
+        mock_openai_client.beta.threads.runs.retrieve.side_effect = [
+            mocker.MagicMock(id="mock_run_id", status="in_progress"),
+            requires_action_run,
+        ]
+        mock_openai_client.beta.threads.runs.submit_tool_outputs.return_value = mocker.MagicMock(
+            id="mock_run_id", status="completed"
+        )
+        round_trips = RoundTrips()
+
+        async def process_tool_message():
+            handlers = {"register_factions": mocker.MagicMock(return_value="OK")}
+            return await (await message_bus.aprocess_tool_message("content", handlers, round_trips))
+
+        asyncio.run(process_tool_message())
+
+        # create_and_run, two retrieves and one submit_tool_outputs.
+        assert round_trips.count == 4
+        assert message_bus._run_round_trips == {}  # noqa: SLF001
+
+    def test_aprocess_tool_message_handle_fails_when_checking_runs_fails(self, mocker, message_bus, mock_openai_client):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        mock_openai_client.beta.threads.create_and_run.return_value = mocker.MagicMock(
+            id="mock_run_id", status="queued"
+        )
+        error = RuntimeError("network down")
+        mock_openai_client.beta.threads.runs.retrieve.side_effect = error
+
+        async def process_tool_message():
+            return await (await message_bus.aprocess_tool_message("content"))
+
+        with pytest.raises(RuntimeError, match="network down"):
+            asyncio.run(process_tool_message())
+
+        assert message_bus._run_completions == {}  # noqa: SLF001
+        assert not message_bus._active_runs  # noqa: SLF001
+
+    def test_aresolve_tool_messages_cancels_runs_past_their_deadline(self, mocker, mock_openai_client):
+        message_bus = AssistantMessageBus("test-key", "test-id", deadlines=RunDeadlines(tool=10.0))
+        message_bus._client_manager = mocker.MagicMock(client=mock_openai_client)  # noqa: SLF001
+        mock_run = mocker.MagicMock(id="mock_run_id", thread_id="mock_thread_id", status="in_progress")
+
+        async def resolve_overdue_run():
+            completion = asyncio.get_running_loop().create_future()
+            message_bus._run_completions[mock_run.id] = completion  # noqa: SLF001
+            message_bus._run_started_at[mock_run.id] = time.monotonic() - 11  # noqa: SLF001
+            message_bus._active_runs.append(mock_run)  # noqa: SLF001
+            await message_bus.aresolve_tool_messages()
+            return completion
+
+        completion = asyncio.run(resolve_overdue_run())
+
+        assert isinstance(completion.exception(), RunDeadlineExceededError)
+        mock_openai_client.beta.threads.runs.cancel.assert_awaited_once_with(
+            thread_id="mock_thread_id", run_id="mock_run_id"
+        )
+        mock_openai_client.beta.threads.runs.retrieve.assert_not_called()
+        assert not message_bus._active_runs  # noqa: SLF001
+        assert message_bus.reaped_runs == [ReapedRun("mock_run_id", "mock_thread_id", "tool", "deadline")]
+        assert message_bus.metrics.counter("openai_runs_reaped_total", kind="tool", reason="deadline") == 1
+
+    def test_aresolve_tool_messages_drops_runs_nobody_waits_on(self, mocker, message_bus, mock_openai_client):
+        mock_run = mocker.MagicMock(id="mock_run_id", thread_id="mock_thread_id", status="in_progress")
+
+        async def resolve_abandoned_run():
+            completion = asyncio.get_running_loop().create_future()
+            completion.cancel()
+            message_bus._run_completions[mock_run.id] = completion  # noqa: SLF001
+            message_bus._active_runs.append(mock_run)  # noqa: SLF001
+            await message_bus.aresolve_tool_messages()
+
+        asyncio.run(resolve_abandoned_run())
+
+        mock_openai_client.beta.threads.runs.cancel.assert_awaited_once()
+        assert message_bus._run_completions == {}  # noqa: SLF001
+        assert message_bus.reaped_runs[0].reason == "abandoned"
+
+    def test_complete_run_reports_runs_that_did_not_complete(self, mocker, message_bus):
+        run = mocker.MagicMock(id="run_id", thread_id="thread_id", status="expired", usage=None)
+
+        message_bus._complete_run(run)  # noqa: SLF001
+
+        assert message_bus.reaped_runs == [ReapedRun("run_id", "thread_id", "tool", "expired")]
+
+    def test_acancel_runs_cancels_every_outstanding_run(self, mocker, message_bus, mock_openai_client):
+        tool_run = mocker.MagicMock(id="tool_run_id", thread_id="tool_thread_id")
+        narrative_run = mocker.MagicMock(id="narrative_run_id", thread_id="narrative_thread_id")
+
+        async def cancel_runs():
+            completion = asyncio.get_running_loop().create_future()
+            message_bus._run_completions[tool_run.id] = completion  # noqa: SLF001
+            message_bus._outstanding_runs[tool_run.id] = (tool_run, "tool")  # noqa: SLF001
+            message_bus._outstanding_runs[narrative_run.id] = (narrative_run, "narrative")  # noqa: SLF001
+            message_bus._active_runs.append(tool_run)  # noqa: SLF001
+            await message_bus.acancel_runs()
+            return completion
+
+        completion = asyncio.run(cancel_runs())
+
+        assert completion.cancelled()
+        assert mock_openai_client.beta.threads.runs.cancel.await_count == 2  # noqa: PLR2004
+        assert not message_bus._active_runs  # noqa: SLF001
+        assert {run.reason for run in message_bus.reaped_runs} == {"cancelled"}
+
+    def test_aresolve_tool_messages_does_nothing_when_no_active_runs(self, message_bus, mock_openai_client):
+        asyncio.run(message_bus.aresolve_tool_messages())
+
+        mock_openai_client.beta.threads.runs.retrieve.assert_not_called()
+
+    def test_aresolve_tool_messages_does_process_tool_calls_when_run_requires_action(
+        self, mocker, message_bus, mock_openai_client
+    ):
         mock_run = mocker.MagicMock()
         mock_run.status = "requires_action"
         mock_run.required_action.submit_tool_outputs.tool_calls = [mocker.MagicMock()]
         message_bus._active_runs = deque([mock_run])  # noqa: SLF001
-        mock_openai = mocker.patch("sprawl_runner.ai.assistant_message_bus.OpenAI")
-        mock_openai_client = mocker.MagicMock()
-        mock_openai.return_value = mock_openai_client
         mock_updated_run = mocker.MagicMock(status="requires_action")
         mock_openai_client.beta.threads.runs.retrieve.return_value = mock_updated_run
 
-        mock_process_tool_calls = mocker.patch.object(message_bus, "_process_tool_calls")
+        mock_process_tool_calls = mocker.patch.object(message_bus, "dispatch_tool_calls")
         mock_send_tool_outputs = mocker.patch.object(message_bus, "_send_tool_outputs")
         mock_requeue_run_if_pending = mocker.patch.object(message_bus, "_requeue_run_if_pending")
 
-        message_bus.resolve_async_tool_messages()
+        asyncio.run(message_bus.aresolve_tool_messages())
 
-        mock_openai_client.beta.threads.runs.retrieve.assert_called_once_with(
+        mock_openai_client.beta.threads.runs.retrieve.assert_awaited_once_with(
             thread_id=mock_run.thread_id, run_id=mock_run.id
         )
-        mock_process_tool_calls.assert_called_once_with(mock_updated_run.required_action.submit_tool_outputs.tool_calls)
-        mock_send_tool_outputs.assert_called_once_with(
+        mock_process_tool_calls.assert_called_once_with(
+            mock_updated_run.required_action.submit_tool_outputs.tool_calls, None
+        )
+        mock_send_tool_outputs.assert_awaited_once_with(
             mock_openai_client, mock_updated_run, mock_process_tool_calls.return_value
         )
         mock_requeue_run_if_pending.assert_called_once_with(mock_send_tool_outputs.return_value)
 
-    def test_resolve_async_tool_messages_does_not_process_tool_calls_when_run_does_not_require_action(
-        self, mocker, message_bus
+    def test_aresolve_tool_messages_does_not_process_tool_calls_when_run_does_not_require_action(
+        self, mocker, message_bus, mock_openai_client
     ):
-        # Mock run that requires action
         mock_run = mocker.MagicMock()
         mock_run.status = "in_progress"
         mock_run.required_action = None
         message_bus._active_runs = deque([mock_run])  # noqa: SLF001
-        mock_openai = mocker.patch("sprawl_runner.ai.assistant_message_bus.OpenAI")
-        mock_openai_client = mocker.MagicMock()
-        mock_openai.return_value = mock_openai_client
         mock_updated_run = mocker.MagicMock(status="completed")
         mock_openai_client.beta.threads.runs.retrieve.return_value = mock_updated_run
 
-        mock_process_tool_calls = mocker.patch.object(message_bus, "_process_tool_calls")
+        mock_process_tool_calls = mocker.patch.object(message_bus, "dispatch_tool_calls")
         mock_send_tool_outputs = mocker.patch.object(message_bus, "_send_tool_outputs")
         mock_requeue_run_if_pending = mocker.patch.object(message_bus, "_requeue_run_if_pending")
 
-        message_bus.resolve_async_tool_messages()
+        asyncio.run(message_bus.aresolve_tool_messages())
 
-        mock_openai_client.beta.threads.runs.retrieve.assert_called_once_with(
+        mock_openai_client.beta.threads.runs.retrieve.assert_awaited_once_with(
             thread_id=mock_run.thread_id, run_id=mock_run.id
         )
         mock_process_tool_calls.assert_not_called()
         mock_send_tool_outputs.assert_not_called()
         mock_requeue_run_if_pending.assert_called_once_with(mock_updated_run)
 
+    def test_aresolve_tool_messages_checks_all_active_runs_concurrently(self, mocker, message_bus, mock_openai_client):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def retrieve(thread_id, run_id):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return mocker.MagicMock(status="completed", id=run_id)
+
+        mock_openai_client.beta.threads.runs.retrieve.side_effect = retrieve
+        message_bus._active_runs = deque(  # noqa: SLF001
+            [mocker.MagicMock(id="run1"), mocker.MagicMock(id="run2"), mocker.MagicMock(id="run3")]
+        )
+
+        asyncio.run(message_bus.aresolve_tool_messages())
+
+        assert mock_openai_client.beta.threads.runs.retrieve.await_count == 3
+        assert max_in_flight == 3
+        assert not message_bus._active_runs  # noqa: SLF001
+
+    def test_aprocess_narrative_message_returns_latest_message_text(self, mocker, message_bus, mock_openai_client):
+        mock_sleep = mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        mock_polling = mocker.patch.object(message_bus, "_polling")
+        mock_polling.delays.return_value = iter([0.5, 1.0])
+        mock_thread = mocker.MagicMock(id="narrative_thread_id")
+        mock_openai_client.beta.threads.create.return_value = mock_thread
+        mock_openai_client.beta.threads.runs.create.return_value = mocker.MagicMock(status="queued")
+        mock_openai_client.beta.threads.runs.retrieve.return_value = mocker.MagicMock(status="completed")
+        mock_content = mocker.MagicMock(type="text")
+        mock_content.text.value = "narrative"
+        mock_message = mocker.MagicMock(content=[mock_content])
+        mock_openai_client.beta.threads.messages.list.return_value = mocker.MagicMock(data=[mock_message])
+
+        output = asyncio.run(message_bus.aprocess_narrative_message("player input"))
+
+        assert output == "narrative"
+        assert message_bus._narrative_thread == mock_thread  # noqa: SLF001
+        mock_openai_client.beta.threads.messages.create.assert_awaited_once_with(
+            thread_id=mock_thread.id,
+            role="user",
+            content="player input",
+        )
+        mock_openai_client.beta.threads.runs.retrieve.assert_awaited_once()
+        mock_polling.delays.assert_called_once_with("narrative")
+        mock_sleep.assert_awaited_once_with(0.5)
+        mock_polling.record.assert_called_once()
+        assert mock_polling.record.call_args.args[0] == "narrative"
+
+    def test_aprocess_narrative_message_records_run_metrics(self, mocker, message_bus, mock_openai_client):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        mock_openai_client.beta.threads.create.return_value = mocker.MagicMock(id="narrative_thread_id")
+        mock_openai_client.beta.threads.runs.create.return_value = mocker.MagicMock(status="queued")
+        mock_openai_client.beta.threads.runs.retrieve.return_value = mocker.MagicMock(
+            status="completed",
+            created_at=100,
+            started_at=102,
+            completed_at=105,
+            usage=mocker.MagicMock(prompt_tokens=900, completion_tokens=120),
+        )
+        mock_openai_client.beta.threads.messages.list.return_value = mocker.MagicMock(data=[])
+
+        asyncio.run(message_bus.aprocess_narrative_message("player input"))
+
+        metrics = message_bus.metrics
+        assert metrics.counter("openai_runs_total", kind="narrative", status="completed") == 1
+        assert metrics.histogram("openai_run_polls", kind="narrative").sum == 1
+        assert metrics.histogram("openai_run_queue_seconds", kind="narrative").sum == 2  # noqa: PLR2004
+        assert metrics.histogram("openai_run_execution_seconds", kind="narrative").sum == 3  # noqa: PLR2004
+        assert metrics.counter("openai_tokens_total", kind="narrative", type="prompt") == 900  # noqa: PLR2004
+        assert metrics.counter("openai_tokens_total", kind="narrative", type="completion") == 120  # noqa: PLR2004
+
+    def test_aprocess_narrative_message_shows_the_thinking_indicator_each_poll(
+        self, mocker, message_bus, mock_openai_client
+    ):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        mock_openai_client.beta.threads.create.return_value = mocker.MagicMock(id="narrative_thread_id")
+        mock_openai_client.beta.threads.runs.create.return_value = mocker.MagicMock(status="queued")
+        mock_openai_client.beta.threads.runs.retrieve.side_effect = [
+            mocker.MagicMock(status="in_progress"),
+            mocker.MagicMock(status="completed"),
+        ]
+        mock_openai_client.beta.threads.messages.list.return_value = mocker.MagicMock(data=[])
+        indicator = mocker.MagicMock()
+        message_bus.set_thinking_indicator(indicator)
+
+        asyncio.run(message_bus.aprocess_narrative_message("player input"))
+
+        assert indicator.call_count == 2  # noqa: PLR2004
+
+    def test_aprocess_narrative_message_cancels_the_run_at_its_deadline(self, mocker, mock_openai_client):
+        mocker.patch("sprawl_runner.ai.assistant_message_bus.asyncio.sleep", mocker.AsyncMock())
+        message_bus = AssistantMessageBus("test-key", "test-id", deadlines=RunDeadlines(narrative=0.01))
+        message_bus._client_manager = mocker.MagicMock(client=mock_openai_client)  # noqa: SLF001
+        mock_openai_client.beta.threads.create.return_value = mocker.MagicMock(id="narrative_thread_id")
+        mock_run = mocker.MagicMock(id="run_id", thread_id="narrative_thread_id", status="queued")
+        mock_openai_client.beta.threads.runs.create.return_value = mock_run
+        mock_openai_client.beta.threads.runs.retrieve.return_value = mock_run
+
+        with pytest.raises(RunDeadlineExceededError):
+            asyncio.run(message_bus.aprocess_narrative_message("player input"))
+
+        mock_openai_client.beta.threads.runs.cancel.assert_awaited_once_with(
+            thread_id="narrative_thread_id", run_id="run_id"
+        )
+        assert message_bus.reaped_runs == [ReapedRun("run_id", "narrative_thread_id", "narrative", "deadline")]
+        assert message_bus._outstanding_runs == {}  # noqa: SLF001
+
+    def test_complete_run_records_tool_run_polls(self, mocker, message_bus):
+        run = mocker.MagicMock(id="run_id", status="completed", usage=None)
+        message_bus._run_polls["run_id"] = 3  # noqa: SLF001
+
+        message_bus._complete_run(run)  # noqa: SLF001
+
+        assert message_bus.metrics.histogram("openai_run_polls", kind="tool").sum == 3  # noqa: PLR2004
+        assert "run_id" not in message_bus._run_polls  # noqa: SLF001
+
+    def test_aprocess_narrative_message_fetches_only_messages_after_the_cursor(
+        self, mocker, message_bus, mock_openai_client
+    ):
+        mock_thread = mocker.MagicMock(id="narrative_thread_id")
+        mock_openai_client.beta.threads.create.return_value = mock_thread
+        mock_openai_client.beta.threads.messages.create.return_value = mocker.MagicMock(id="msg_user")
+        mock_openai_client.beta.threads.runs.create.return_value = mocker.MagicMock(
+            status="completed", thread_id="narrative_thread_id"
+        )
+        mock_content = mocker.MagicMock(type="text")
+        mock_content.text.value = "narrative"
+        mock_message = mocker.MagicMock(id="msg_reply", content=[mock_content])
+        mock_openai_client.beta.threads.messages.list.return_value = mocker.MagicMock(data=[mock_message])
+
+        asyncio.run(message_bus.aprocess_narrative_message("player input"))
+
+        mock_openai_client.beta.threads.messages.list.assert_awaited_once_with(
+            thread_id="narrative_thread_id", order="desc", limit=NARRATIVE_MESSAGE_LIMIT, before="msg_user"
+        )
+        assert message_bus._message_cursors == {"narrative_thread_id": "msg_reply"}  # noqa: SLF001
+
+    def test_aprocess_narrative_message_passes_pages_to_the_trace_sink(self, mocker, mock_openai_client):
+        trace_sink = mocker.MagicMock()
+        message_bus = AssistantMessageBus(
+            "test-key", "test-id", mocker.MagicMock(client=mock_openai_client), trace_sink=trace_sink
+        )
+        mock_openai_client.beta.threads.runs.create.return_value = mocker.MagicMock(status="completed")
+        messages = mocker.MagicMock(data=[])
+        mock_openai_client.beta.threads.messages.list.return_value = messages
+
+        output = asyncio.run(message_bus.aprocess_narrative_message("player input"))
+
+        assert output == ""
+        trace_sink.assert_called_once_with(messages)
+
+    def test_aprocess_narrative_message_starts_compaction_once_the_thread_is_full(self, mocker, mock_openai_client):
+        message_bus = AssistantMessageBus(
+            "test-key",
+            "test-id",
+            mocker.MagicMock(client=mock_openai_client),
+            compaction=CompactionOptions(max_turns=2),
+        )
+        mock_compact = mocker.patch.object(message_bus, "acompact_narrative", mocker.AsyncMock())
+        mock_openai_client.beta.threads.runs.create.return_value = mocker.MagicMock(status="completed")
+        mock_openai_client.beta.threads.messages.list.return_value = mocker.MagicMock(data=[])
+
+        async def play_turns():
+            await message_bus.aprocess_narrative_message("first")
+            assert message_bus._narrative_compaction is None  # noqa: SLF001
+            await message_bus.aprocess_narrative_message("second")
+            await message_bus._narrative_compaction  # noqa: SLF001
+
+        asyncio.run(play_turns())
+
+        mock_compact.assert_awaited_once_with()
+        assert [turn.player for turn in message_bus._narrative_turns] == ["first", "second"]  # noqa: SLF001
+
+    def test_acompact_narrative_moves_the_story_to_a_seeded_thread(self, mocker, message_bus, mock_openai_client):
+        old_thread = mocker.MagicMock(id="old_thread")
+        new_thread = mocker.MagicMock(id="new_thread")
+        message_bus._narrative_thread = old_thread  # noqa: SLF001
+        message_bus._narrative_turns = [NarrativeTurn("a", "A"), NarrativeTurn("b", "B"), NarrativeTurn("c", "C")]  # noqa: SLF001
+        message_bus.set_narrative_context(lambda: "the world")
+        mock_openai_client.beta.threads.create_and_run.return_value = mocker.MagicMock(
+            status="completed", thread_id="summary_thread"
+        )
+        mock_content = mocker.MagicMock(type="text")
+        mock_content.text.value = "the story so far"
+        mock_openai_client.beta.threads.messages.list.return_value = mocker.MagicMock(
+            data=[mocker.MagicMock(content=[mock_content])]
+        )
+        mock_openai_client.beta.threads.create.return_value = new_thread
+
+        event = asyncio.run(message_bus.acompact_narrative())
+
+        assert mock_openai_client.beta.threads.create_and_run.call_args.kwargs["tool_choice"] == "none"
+        summary_prompt = mock_openai_client.beta.threads.create_and_run.call_args.kwargs["thread"]["messages"][0]
+        assert "Narrator: A" in summary_prompt["content"]
+        assert "Narrator: B" not in summary_prompt["content"]
+        seed = mock_openai_client.beta.threads.create.call_args.kwargs["messages"][0]["content"]
+        assert "the story so far" in seed
+        assert "the world" in seed
+        assert message_bus._narrative_thread is new_thread  # noqa: SLF001
+        assert message_bus._narrative_turns == [NarrativeTurn("b", "B"), NarrativeTurn("c", "C")]  # noqa: SLF001
+        assert message_bus.compaction_events == [event]
+        assert (event.old_thread_id, event.new_thread_id) == ("old_thread", "new_thread")
+        assert (event.turns_before, event.turns_after) == (3, 2)
+        assert (event.chars_before, event.chars_after) == (6, len(seed))
+
+    def test_failed_compaction_keeps_the_story_on_its_thread(self, mocker, message_bus, mock_openai_client):
+        old_thread = mocker.MagicMock(id="old_thread")
+        message_bus._narrative_thread = old_thread  # noqa: SLF001
+        message_bus._narrative_turns = [NarrativeTurn("a", "A"), NarrativeTurn("b", "B"), NarrativeTurn("c", "C")]  # noqa: SLF001
+        mock_openai_client.beta.threads.create_and_run.return_value = mocker.MagicMock(status="failed")
+
+        event = asyncio.run(message_bus._compact_narrative_in_background())  # noqa: SLF001
+
+        assert event is None
+        assert message_bus._narrative_thread is old_thread  # noqa: SLF001
+        assert len(message_bus._narrative_turns) == 3  # noqa: SLF001, PLR2004
+        assert message_bus.compaction_events == []
+
+    def test_aprocess_narrative_message_streams_text_deltas_when_enabled(self, mocker, mock_openai_client):
+        message_bus = AssistantMessageBus(
+            "test-key", "test-id", mocker.MagicMock(client=mock_openai_client), stream_narrative=True
+        )
+        mock_thread = mocker.MagicMock(id="narrative_thread_id")
+        mock_openai_client.beta.threads.create.return_value = mock_thread
+
+        async def text_deltas():
+            for text_delta in ("The ", "sprawl ", "hums."):
+                yield text_delta
+
+        mock_stream = mocker.MagicMock(text_deltas=text_deltas())
+        mock_openai_client.beta.threads.runs.stream.return_value.__aenter__.return_value = mock_stream
+        on_delta = mocker.MagicMock()
+
+        output = asyncio.run(message_bus.aprocess_narrative_message("player input", on_delta))
+
+        assert output == "The sprawl hums."
+        on_delta.assert_has_calls([mocker.call("The "), mocker.call("sprawl "), mocker.call("hums.")])
+        mock_openai_client.beta.threads.runs.stream.assert_called_once_with(
+            thread_id=mock_thread.id,
+            assistant_id="test-id",
+        )
+        mock_openai_client.beta.threads.runs.create.assert_not_called()
+
+    def test_aprocess_narrative_message_cancels_a_stream_past_its_deadline(self, mocker, mock_openai_client):
+        message_bus = AssistantMessageBus(
+            "test-key",
+            "test-id",
+            mocker.MagicMock(client=mock_openai_client),
+            stream_narrative=True,
+            deadlines=RunDeadlines(narrative=0.01),
+        )
+        mock_openai_client.beta.threads.create.return_value = mocker.MagicMock(id="narrative_thread_id")
+        mock_run = mocker.MagicMock(id="run_id", thread_id="narrative_thread_id")
+
+        async def text_deltas():
+            yield "The "
+            await asyncio.sleep(5)
+            yield "too late"
+
+        mock_stream = mocker.MagicMock(text_deltas=text_deltas(), current_run=mock_run)
+        mock_openai_client.beta.threads.runs.stream.return_value.__aenter__.return_value = mock_stream
+
+        with pytest.raises(RunDeadlineExceededError):
+            asyncio.run(asyncio.wait_for(message_bus.aprocess_narrative_message("player input", mocker.MagicMock()), 2))
+
+        mock_openai_client.beta.threads.runs.cancel.assert_awaited_once_with(
+            thread_id="narrative_thread_id", run_id="run_id"
+        )
+        assert message_bus.reaped_runs == [ReapedRun("run_id", "narrative_thread_id", "narrative", "deadline")]
+        assert message_bus._outstanding_runs == {}  # noqa: SLF001
+
+    def test_a_stream_past_its_deadline_is_cancelled_outside_its_slot(self, mocker, mock_openai_client):
+        # With one slot, a cancel made while the stream held it would never be sent.
+        message_bus = AssistantMessageBus(
+            "test-key",
+            "test-id",
+            mocker.MagicMock(client=mock_openai_client),
+            stream_narrative=True,
+            deadlines=RunDeadlines(narrative=0.01),
+            scheduler=RunScheduler(SchedulerOptions(max_concurrency=1)),
+        )
+        mock_openai_client.beta.threads.create.return_value = mocker.MagicMock(id="narrative_thread_id")
+        mock_run = mocker.MagicMock(id="run_id", thread_id="narrative_thread_id")
+
+        async def text_deltas():
+            await asyncio.sleep(5)
+            yield "too late"
+
+        mock_stream = mocker.MagicMock(text_deltas=text_deltas(), current_run=mock_run)
+        mock_openai_client.beta.threads.runs.stream.return_value.__aenter__.return_value = mock_stream
+
+        with pytest.raises(RunDeadlineExceededError):
+            asyncio.run(asyncio.wait_for(message_bus.aprocess_narrative_message("player input", mocker.MagicMock()), 2))
+
+        mock_openai_client.beta.threads.runs.cancel.assert_awaited_once_with(
+            thread_id="narrative_thread_id", run_id="run_id"
+        )
+        assert message_bus.scheduler.active == {}
+
+    def test_aprocess_narrative_message_polls_when_streaming_disabled(self, mocker, message_bus, mock_openai_client):
+        mock_openai_client.beta.threads.runs.create.return_value = mocker.MagicMock(status="completed")
+        mock_content = mocker.MagicMock(type="text")
+        mock_content.text.value = "narrative"
+        mock_message = mocker.MagicMock(content=[mock_content])
+        mock_openai_client.beta.threads.messages.list.return_value = mocker.MagicMock(data=[mock_message])
+        on_delta = mocker.MagicMock()
+
+        output = asyncio.run(message_bus.aprocess_narrative_message("player input", on_delta))
+
+        assert output == "narrative"
+        on_delta.assert_not_called()
+        mock_openai_client.beta.threads.runs.stream.assert_not_called()
+
+    def test_process_tool_message_async_returns_handle_without_waiting(self, mocker, message_bus):
+        mock_submit = mocker.patch.object(message_bus, "_submit")
+        mocker.patch.object(message_bus, "_process_tool_message_to_completion", mocker.MagicMock())
+
+        handle = message_bus.process_tool_message_async("content")
+
+        mock_submit.assert_called_once_with(message_bus._process_tool_message_to_completion.return_value)  # noqa: SLF001
+        mock_submit.return_value.result.assert_not_called()
+        assert handle == mock_submit.return_value
+
+    def test_resolve_async_tool_messages_runs_one_pass_on_background_loop(self, mocker, message_bus):
+        mock_run = mocker.patch.object(message_bus, "_run")
+        mocker.patch.object(message_bus, "aresolve_tool_messages", mocker.MagicMock())
+
+        message_bus.resolve_async_tool_messages()
+
+        mock_run.assert_called_once_with(message_bus.aresolve_tool_messages.return_value)
+
+    def test_sync_methods_run_on_background_loop(self, mocker, message_bus, mock_openai_client):
+        mocker.patch.object(message_bus.polling, "delays", return_value=iter([0.0] * 10))
+        mock_run = mocker.MagicMock(id="mock_run_id", status="queued")
+        mock_completed_run = mocker.MagicMock(id="mock_run_id", status="completed")
+        mock_openai_client.beta.threads.create_and_run.return_value = mock_run
+        mock_openai_client.beta.threads.runs.retrieve.return_value = mock_completed_run
+
+        try:
+            handles = [message_bus.process_tool_message_async("content")]
+            wait(handles, timeout=5)
+        finally:
+            message_bus.close()
+
+        assert handles[0].result() == mock_completed_run
+        mock_openai_client.beta.threads.runs.retrieve.assert_awaited_once()
+        assert not message_bus._active_runs  # noqa: SLF001
+        assert message_bus._loop is None  # noqa: SLF001
+        message_bus.client_manager.aclose.assert_awaited_once_with()
+
+    def test_close_cancels_unresolved_handles(self, mocker, message_bus, mock_openai_client):
+        mocker.patch.object(message_bus.polling, "delays", return_value=iter([60.0]))
+        mock_openai_client.beta.threads.create_and_run.return_value = mocker.MagicMock(
+            id="mock_run_id", status="queued"
+        )
+
+        handle = message_bus.process_tool_message_async("content")
+        while not message_bus._run_completions:  # noqa: SLF001
+            time.sleep(0.01)
+        message_bus.close()
+
+        assert handle.cancelled()
+
+    def test_aprepare_narrative_thread_creates_one_thread_for_concurrent_callers(self, message_bus, mock_openai_client):
+        async def prepare_twice():
+            return await asyncio.gather(
+                message_bus.aprepare_narrative_thread(), message_bus.aprepare_narrative_thread()
+            )
+
+        first, second = asyncio.run(prepare_twice())
+
+        assert first is second is mock_openai_client.beta.threads.create.return_value
+        mock_openai_client.beta.threads.create.assert_awaited_once_with()
+
+    def test_aprepare_narrative_thread_retries_after_a_failure(self, mocker, message_bus, mock_openai_client):
+        mock_thread = mocker.MagicMock()
+        mock_openai_client.beta.threads.create.side_effect = [RuntimeError("network down"), mock_thread]
+
+        with pytest.raises(RuntimeError, match="network down"):
+            asyncio.run(message_bus.aprepare_narrative_thread())
+
+        assert asyncio.run(message_bus.aprepare_narrative_thread()) is mock_thread
+
+    def test_start_narrative_message_returns_before_the_reply_arrives(self, mocker, message_bus):
+        release = asyncio.Event()
+
+        async def aprocess_narrative_message(content, on_delta, run_class):
+            on_delta("The ")
+            await release.wait()
+            on_delta("sprawl.")
+            return "The sprawl."
+
+        mocker.patch.object(message_bus, "aprocess_narrative_message", side_effect=aprocess_narrative_message)
+
+        try:
+            narrative_reply = message_bus.start_narrative_message("opening scene", run_class="opening")
+            assert not narrative_reply.message.done()
+            deltas = []
+            message_bus._loop.call_soon_threadsafe(release.set)  # noqa: SLF001
+            message = narrative_reply.wait(deltas.append, timeout=5)
+        finally:
+            message_bus.close()
+
+        assert message == "The sprawl."
+        assert "".join(deltas) == "The sprawl."
+        message_bus.aprocess_narrative_message.assert_called_once_with("opening scene", narrative_reply.feed, "opening")
+
+    def test_close_without_loop_closes_client_manager(self, mocker, message_bus):
+        mock_client_manager = mocker.MagicMock()
+        mocker.patch.object(message_bus, "_client_manager", mock_client_manager)
+
+        message_bus.close()
+
+        mock_client_manager.close.assert_called_once_with()
+
+    def test_aclose_of_a_hosted_bus_leaves_what_it_shares_open(self, mocker):
+        mock_client_manager = mocker.MagicMock()
+        mock_client_manager.aclose = mocker.AsyncMock()
+        mock_tool_dispatcher = mocker.MagicMock()
+
+        async def close_hosted_bus():
+            message_bus = AssistantMessageBus(
+                "test-key",
+                "test-id",
+                mock_client_manager,
+                tool_dispatcher=mock_tool_dispatcher,
+                loop=asyncio.get_running_loop(),
+            )
+            await message_bus.aclose()
+
+        asyncio.run(close_hosted_bus())
+
+        mock_client_manager.aclose.assert_not_awaited()
+        mock_tool_dispatcher.shutdown.assert_not_called()
+
     def test_register_tool_handler_success(self, mocker, message_bus):
         tool_name = "test_tool"
         handler = mocker.MagicMock()
@@ -0,0 +1,16 @@
+import pytest
+
+from sprawl_runner.ai.backend import get_message_backend_name
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+
+
+class TestGetMessageBackendName:
+    def test_defaults_to_the_assistants_api(self):
+        assert get_message_backend_name(EMPTY_SETTINGS) == "assistants"
+
+    def test_reads_the_setting(self):
+        assert get_message_backend_name({**EMPTY_SETTINGS, "openai_backend": "chat"}) == "chat"
+
+    def test_raises_for_unknown_backends(self):
+        with pytest.raises(ValueError, match="openai_backend"):
+            get_message_backend_name({**EMPTY_SETTINGS, "openai_backend": "completions"})
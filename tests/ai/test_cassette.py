@@ -0,0 +1,134 @@
+import openai
+import pytest
+
+from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus
+from sprawl_runner.ai.cassette import Cassette
+from sprawl_runner.ai.client_manager import ClientOptions, OpenAIClientManager
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.standin.script import StandInScript
+from sprawl_runner.standin.server import AssistantsStandIn
+
+FAST_SCRIPT = StandInScript(queued_seconds=0.01, in_progress_seconds=0.02)
+
+
+def record_session(path, stand_in):
+    cassette = Cassette(path, "record")
+    client_manager = OpenAIClientManager("test-key", ClientOptions(base_url=stand_in.base_url), cassette)
+    client = client_manager.sync_client
+
+    thread = client.beta.threads.create(messages=[{"role": "user", "content": "Hello"}])
+    run = client.beta.threads.runs.create_and_poll(thread_id=thread.id, assistant_id="asst", poll_interval_ms=10)
+    client_manager.close()
+    return thread, run
+
+
+class TestCassette:
+    @pytest.fixture
+    def stand_in(self):
+        with AssistantsStandIn(FAST_SCRIPT) as stand_in:
+            yield stand_in
+
+    @pytest.mark.parametrize("file_name", ["session.jsonl", "session.jsonl.gz"])
+    def test_recorded_session_is_replayed_without_the_server(self, tmp_path, stand_in, file_name):
+        path = tmp_path / file_name
+        thread, run = record_session(path, stand_in)
+        stand_in.stop()
+
+        client_manager = OpenAIClientManager(
+            "test-key", ClientOptions(base_url=stand_in.base_url), Cassette(path, "replay", speed=0)
+        )
+        client = client_manager.sync_client
+        replayed_thread = client.beta.threads.create(messages=[{"role": "user", "content": "Hello"}])
+        replayed_run = client.beta.threads.runs.create_and_poll(
+            thread_id=replayed_thread.id, assistant_id="asst", poll_interval_ms=10
+        )
+
+        assert replayed_thread.id == thread.id
+        assert replayed_run.id == run.id
+        assert replayed_run.status == "completed"
+
+    def test_streamed_narrative_is_replayed_through_the_message_bus(self, tmp_path, stand_in):
+        path = tmp_path / "session.jsonl.gz"
+
+        def narrate(cassette):
+            client_manager = OpenAIClientManager("test-key", ClientOptions(base_url=stand_in.base_url), cassette)
+            message_bus = AssistantMessageBus("test-key", "asst", client_manager, stream_narrative=True)
+            deltas = []
+            message = message_bus.process_narrative_message("I walk into the bar.", on_delta=deltas.append)
+            message_bus.close()
+            return message, deltas
+
+        recorded = narrate(Cassette(path, "record"))
+        stand_in.stop()
+        replayed = narrate(Cassette(path, "replay", speed=0))
+
+        assert replayed == recorded
+        assert recorded[0] == FAST_SCRIPT.narrative
+
+    def test_recording_keeps_timing_and_leaves_out_request_headers(self, tmp_path, stand_in):
+        path = tmp_path / "session.jsonl"
+        record_session(path, stand_in)
+
+        entries = Cassette.load(path)
+
+        assert entries[0]["method"] == "POST"
+        assert entries[0]["path"] == "/v1/threads"
+        assert all(entry["elapsed"] >= 0 and entry["chunks"] for entry in entries)
+        assert "test-key" not in path.read_text()
+        assert Cassette(path, "replay").summary()["requests"] == len(entries)
+
+    def test_last_response_is_repeated_when_polled_more_often(self, tmp_path, stand_in):
+        path = tmp_path / "session.jsonl"
+        thread, run = record_session(path, stand_in)
+        client_manager = OpenAIClientManager("test-key", ClientOptions(), Cassette(path, "replay", speed=0))
+        client = client_manager.sync_client
+
+        for _ in range(10):
+            last = client.beta.threads.runs.retrieve(run.id, thread_id=thread.id)
+
+        assert last.status == "completed"
+
+    def test_unrecorded_request_is_not_found(self, tmp_path, stand_in):
+        path = tmp_path / "session.jsonl"
+        record_session(path, stand_in)
+        client_manager = OpenAIClientManager("test-key", ClientOptions(), Cassette(path, "replay", speed=0))
+
+        with pytest.raises(openai.NotFoundError, match="no recorded response"):
+            client_manager.sync_client.beta.assistants.retrieve("asst_missing")
+
+    def test_replay_waits_for_recorded_latency_divided_by_speed(self, mocker, tmp_path, stand_in):
+        path = tmp_path / "session.jsonl"
+        record_session(path, stand_in)
+        mock_sleep = mocker.patch("sprawl_runner.ai.cassette.time.sleep")
+        client_manager = OpenAIClientManager("test-key", ClientOptions(), Cassette(path, "replay", speed=2))
+
+        client_manager.sync_client.beta.threads.create(messages=[{"role": "user", "content": "Hello"}])
+
+        recorded = Cassette.load(path)[0]["elapsed"]
+        assert mock_sleep.call_args_list[0].args[0] == pytest.approx(recorded / 2)
+
+    def test_mode_must_record_or_replay(self, tmp_path):
+        with pytest.raises(ValueError, match="record or replay"):
+            Cassette(tmp_path / "session.jsonl", "off")
+
+
+class TestCassetteFromSettings:
+    def test_off_by_default(self):
+        assert Cassette.from_settings(EMPTY_SETTINGS.copy()) is None
+
+    def test_record_mode(self):
+        settings = EMPTY_SETTINGS.copy()
+        settings["cassette_mode"] = "record"
+        settings["cassette_path"] = "session.jsonl"
+
+        cassette = Cassette.from_settings(settings)
+
+        assert cassette.mode == "record"
+        assert cassette.path.name == "session.jsonl"
+
+    def test_unknown_mode_is_rejected(self):
+        settings = EMPTY_SETTINGS.copy()
+        settings["cassette_mode"] = "rewind"
+
+        with pytest.raises(ValueError, match="cassette_mode"):
+            Cassette.from_settings(settings)
@@ -0,0 +1,248 @@
+import asyncio
+import json
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, RoundTrips
+from sprawl_runner.ai.chat_completions import ChatCompletionsBackend
+from sprawl_runner.ai.compaction import CompactionOptions, NarrativeTurn
+from sprawl_runner.ai.deadlines import RunDeadlineExceededError, RunDeadlines
+
+TOOLS = [{"name": "register_factions", "parameters": {"type": "object"}}]
+
+
+def chunk(content=None, tool_calls=None, finish_reason=None):
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chatcmpl_abc",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {"index": 0, "delta": {"content": content, "tool_calls": tool_calls}, "finish_reason": finish_reason}
+            ],
+        }
+    )
+
+
+def usage_chunk(prompt_tokens, completion_tokens):
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chatcmpl_abc",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+    )
+
+
+def tool_call_chunks(call_id, name, arguments):
+    # Names come whole and arguments in pieces, as the API streams them.
+    half = len(arguments) // 2
+    return [
+        chunk(
+            tool_calls=[{"index": 0, "id": call_id, "type": "function", "function": {"name": name, "arguments": ""}}]
+        ),
+        chunk(tool_calls=[{"index": 0, "function": {"arguments": arguments[:half]}}]),
+        chunk(tool_calls=[{"index": 0, "function": {"arguments": arguments[half:]}}], finish_reason="tool_calls"),
+    ]
+
+
+async def stream(chunks):
+    for item in chunks:
+        yield item
+
+
+@pytest.fixture
+def backend() -> ChatCompletionsBackend:
+    return ChatCompletionsBackend("gpt-4o-mini", "You narrate the Sprawl.", TOOLS)
+
+
+@pytest.fixture
+def mock_create(mocker):
+    return mocker.AsyncMock()
+
+
+@pytest.fixture
+def message_bus(mocker, backend, mock_create) -> AssistantMessageBus:
+    mock_client = mocker.MagicMock()
+    mock_client.chat.completions.create = mock_create
+    mock_client_manager = mocker.MagicMock(client=mock_client)
+    mock_client_manager.aclose = mocker.AsyncMock()
+    return AssistantMessageBus(
+        "test-key", "", mock_client_manager, stream_narrative=True, backend=backend, compaction=CompactionOptions()
+    )
+
+
+class TestChatCompletionsBackend:
+    def test_narration_streams_the_reply_and_keeps_the_story(self, message_bus, backend, mock_create):
+        mock_create.side_effect = [
+            stream([chunk("The sky "), chunk("was grey.", finish_reason="stop"), usage_chunk(120, 6)]),
+            stream([chunk("Case lit up.", finish_reason="stop")]),
+        ]
+        deltas = []
+
+        async def play():
+            first = await message_bus.aprocess_narrative_message("look up", on_delta=deltas.append)
+            second = await message_bus.aprocess_narrative_message("smoke")
+            return first, second
+
+        first, second = asyncio.run(play())
+
+        assert (first, second) == ("The sky was grey.", "Case lit up.")
+        assert deltas == ["The sky ", "was grey."]
+        assert mock_create.await_count == 2  # noqa: PLR2004
+        second_request = mock_create.await_args.kwargs
+        assert second_request["stream"] is True
+        assert second_request["tools"] == [{"type": "function", "function": TOOLS[0]}]
+        assert [message["role"] for message in second_request["messages"]] == [
+            "system",
+            "user",
+            "assistant",
+            "user",
+            "assistant",
+        ]
+        assert backend.history[-1] == {"role": "assistant", "content": "Case lit up."}
+        assert message_bus.metrics.counter("openai_tokens_total", kind="narrative", type="prompt") == 120  # noqa: PLR2004
+        assert message_bus.metrics.counter("openai_runs_total", kind="narrative", status="completed") == 2  # noqa: PLR2004
+
+    def test_narration_shows_nothing_as_it_arrives_unless_the_bus_streams(
+        self, mocker, backend, mock_create, message_bus
+    ):
+        message_bus._stream_narrative = False  # noqa: SLF001
+        mock_create.return_value = stream([chunk("Rain.", finish_reason="stop")])
+        on_delta = mocker.MagicMock()
+
+        assert asyncio.run(message_bus.aprocess_narrative_message("wait", on_delta=on_delta)) == "Rain."
+        on_delta.assert_not_called()
+
+    def test_a_failed_turn_leaves_the_story_as_it_was(self, backend, mock_create, message_bus):
+        mock_create.side_effect = RuntimeError("connection reset")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(message_bus.aprocess_narrative_message("look up"))
+
+        assert backend.history == []
+        assert message_bus.metrics.counter("openai_runs_total", kind="narrative", status="failed") == 1
+
+    def test_tool_runs_answer_tool_calls_until_the_model_stops(self, mocker, message_bus, mock_create):
+        arguments = json.dumps({"factions": [{"name": "Tessier-Ashpool"}]})
+        mock_create.side_effect = [
+            stream(tool_call_chunks("call_1", "register_factions", arguments)),
+            stream([chunk("Registered.", finish_reason="stop")]),
+        ]
+        handler = mocker.MagicMock(return_value="OK")
+        round_trips = RoundTrips()
+
+        async def generate():
+            run = await message_bus.aprocess_tool_message(
+                "make factions", {"register_factions": handler}, round_trips, "prefetch"
+            )
+            return await run
+
+        reply = asyncio.run(generate())
+
+        handler.assert_called_once_with({"factions": [{"name": "Tessier-Ashpool"}]})
+        assert reply.content == "Registered."
+        assert round_trips.count == 2  # noqa: PLR2004
+        answered = mock_create.await_args.kwargs["messages"]
+        assert answered[2]["tool_calls"][0]["function"] == {"name": "register_factions", "arguments": arguments}
+        assert answered[3] == {"role": "tool", "tool_call_id": "call_1", "content": "OK"}
+
+    def test_tool_runs_give_up_after_too_many_rounds(self, mocker, backend, message_bus, mock_create):
+        backend._max_tool_rounds = 2  # noqa: SLF001
+        mock_create.side_effect = lambda **_: stream(tool_call_chunks("call_1", "register_factions", "{}"))
+        message_bus.register_tool_handler("register_factions", mocker.MagicMock(return_value="OK"))
+
+        with pytest.raises(RuntimeError, match="2 rounds"):
+            asyncio.run(message_bus._process_tool_message_to_completion("make factions"))  # noqa: SLF001
+
+        assert message_bus.metrics.counter("openai_runs_total", kind="tool", status="incomplete") == 1
+
+    def test_narration_past_its_deadline_is_abandoned(self, mocker, backend, message_bus, mock_create):
+        backend._deadlines = RunDeadlines(narrative=0.01)  # noqa: SLF001
+
+        async def slow_stream():
+            await asyncio.sleep(1)
+            yield chunk("too late")
+
+        mock_create.return_value = slow_stream()
+
+        with pytest.raises(RunDeadlineExceededError):
+            asyncio.run(message_bus.aprocess_narrative_message("look up"))
+
+        assert message_bus.metrics.counter("openai_runs_reaped_total", kind="narrative", reason="deadline") == 1
+
+    def test_tool_runs_past_their_deadline_are_abandoned_between_rounds(
+        self, mocker, backend, message_bus, mock_create
+    ):
+        backend._deadlines = RunDeadlines(tool=0.05)  # noqa: SLF001
+        stalled = asyncio.Event()
+
+        async def stalled_stream():
+            stalled.set()
+            await asyncio.sleep(5)
+            yield chunk("too late")
+
+        mock_create.side_effect = [stream(tool_call_chunks("call_1", "register_factions", "{}")), stalled_stream()]
+        handler = mocker.MagicMock(return_value="OK")
+
+        async def generate():
+            run = await message_bus.aprocess_tool_message("make factions", {"register_factions": handler})
+            with pytest.raises(RunDeadlineExceededError):
+                await run
+            return stalled.is_set()
+
+        assert asyncio.run(asyncio.wait_for(generate(), 2))
+        handler.assert_called_once()
+        assert message_bus.metrics.counter("openai_runs_total", kind="tool", status="deadline") == 1
+        assert message_bus.metrics.counter("openai_runs_reaped_total", kind="tool", reason="deadline") == 1
+
+    def test_cancel_runs_cancels_tool_runs(self, message_bus, mock_create):
+        async def endless_stream():
+            await asyncio.sleep(60)
+            yield chunk("never")
+
+        mock_create.return_value = endless_stream()
+
+        async def cancel():
+            run = await message_bus.aprocess_tool_message("make factions")
+            await asyncio.sleep(0)
+            await message_bus.acancel_runs()
+            return run
+
+        run = asyncio.run(cancel())
+
+        assert run.cancelled()
+        assert message_bus.metrics.counter("openai_runs_reaped_total", kind="tool", reason="cancelled") == 1
+
+    def test_compaction_reseeds_the_story_without_an_api_thread(self, backend, message_bus, mock_create):
+        message_bus._narrative_turns = [NarrativeTurn("a", "A"), NarrativeTurn("b", "B"), NarrativeTurn("c", "C")]  # noqa: SLF001
+        message_bus.set_narrative_context(lambda: "the world")
+        mock_create.return_value = stream([chunk("the story so far", finish_reason="stop")])
+
+        event = asyncio.run(message_bus.acompact_narrative())
+
+        summary_request = mock_create.await_args.kwargs
+        assert "tools" not in summary_request
+        assert "Narrator: A" in summary_request["messages"][1]["content"]
+        (seed,) = backend.history
+        assert "the story so far" in seed["content"]
+        assert "the world" in seed["content"]
+        assert (event.old_thread_id, event.new_thread_id) == ("chat-narrative-1", "chat-narrative-2")
+        assert message_bus.compaction_events == [event]
+
+    def test_prepare_narrative_thread_makes_no_requests(self, message_bus, mock_create):
+        assert asyncio.run(message_bus.aprepare_narrative_thread()) is None
+        mock_create.assert_not_awaited()
+
+    def test_requires_a_bus(self, backend):
+        with pytest.raises(RuntimeError, match="attached"):
+            asyncio.run(backend.narrate("look up", None))
@@ -0,0 +1,139 @@
+import asyncio
+
+import httpx
+import pytest
+
+from sprawl_runner.ai.client_manager import ClientOptions, OpenAIClientManager
+from sprawl_runner.ai.rate_limit import RateLimitedTransport, RateLimiter
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+class TestClientOptions:
+    def test_from_settings_uses_defaults_for_blank_settings(self):
+        options = ClientOptions.from_settings(EMPTY_SETTINGS.copy())
+
+        assert options == ClientOptions()
+
+    def test_from_settings_parses_values(self):
+        settings = EMPTY_SETTINGS.copy()
+        settings["http_max_connections"] = "4"
+        settings["http_max_keepalive_connections"] = "2"
+        settings["http_keepalive_expiry"] = "12.5"
+        settings["http_connect_timeout"] = "1"
+        settings["http_timeout"] = "30"
+        settings["http2"] = "yes"
+        settings["openai_base_url"] = "http://127.0.0.1:8089/v1"
+
+        options = ClientOptions.from_settings(settings)
+
+        assert options == ClientOptions(
+            max_connections=4,
+            max_keepalive_connections=2,
+            keepalive_expiry=12.5,
+            connect_timeout=1.0,
+            timeout=30.0,
+            http2=True,
+            base_url="http://127.0.0.1:8089/v1",
+        )
+
+    def test_limits_and_timeouts(self):
+        options = ClientOptions(max_connections=4, max_keepalive_connections=2, keepalive_expiry=3, timeout=9)
+
+        assert options.limits == httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=3)
+        assert options.timeouts == httpx.Timeout(9, connect=options.connect_timeout)
+
+
+class TestOpenAIClientManager:
+    @pytest.fixture
+    def client_manager(self):
+        return OpenAIClientManager("test-key", ClientOptions(max_connections=3))
+
+    def test_client_is_created_once_and_reused(self, mocker, client_manager):
+        mock_async_openai = mocker.patch("sprawl_runner.ai.client_manager.AsyncOpenAI")
+        mock_http_client = mocker.patch("sprawl_runner.ai.client_manager.DefaultAsyncHttpxClient")
+
+        first = client_manager.client
+        second = client_manager.client
+
+        assert first is second
+        mock_async_openai.assert_called_once_with(
+            api_key="test-key", base_url=None, http_client=mock_http_client.return_value
+        )
+        mock_http_client.assert_called_once_with(
+            limits=client_manager.options.limits,
+            timeout=client_manager.options.timeouts,
+            http2=False,
+        )
+
+    def test_sync_client_is_created_once_and_reused(self, mocker, client_manager):
+        mock_openai = mocker.patch("sprawl_runner.ai.client_manager.OpenAI")
+        mocker.patch("sprawl_runner.ai.client_manager.DefaultHttpxClient")
+
+        assert client_manager.sync_client is client_manager.sync_client
+        mock_openai.assert_called_once()
+
+    def test_clients_use_the_configured_base_url(self, mocker):
+        mock_async_openai = mocker.patch("sprawl_runner.ai.client_manager.AsyncOpenAI")
+        mock_openai = mocker.patch("sprawl_runner.ai.client_manager.OpenAI")
+        mocker.patch("sprawl_runner.ai.client_manager.DefaultAsyncHttpxClient")
+        mocker.patch("sprawl_runner.ai.client_manager.DefaultHttpxClient")
+        client_manager = OpenAIClientManager("test-key", ClientOptions(base_url="http://127.0.0.1:8089/v1"))
+
+        client_manager.client  # noqa: B018
+        client_manager.sync_client  # noqa: B018
+
+        assert mock_async_openai.call_args.kwargs["base_url"] == "http://127.0.0.1:8089/v1"
+        assert mock_openai.call_args.kwargs["base_url"] == "http://127.0.0.1:8089/v1"
+
+    def test_http2_falls_back_when_h2_is_missing(self, mocker):
+        mocker.patch("sprawl_runner.ai.client_manager._http2_available", return_value=False)
+        mock_http_client = mocker.patch("sprawl_runner.ai.client_manager.DefaultAsyncHttpxClient")
+        mocker.patch("sprawl_runner.ai.client_manager.AsyncOpenAI")
+        client_manager = OpenAIClientManager("test-key", ClientOptions(http2=True))
+
+        with pytest.warns(UserWarning, match="HTTP/2"):
+            client_manager.client  # noqa: B018
+
+        assert mock_http_client.call_args.kwargs["http2"] is False
+
+    def test_clients_record_requests_into_metrics(self, mocker):
+        mock_http_client = mocker.patch("sprawl_runner.ai.client_manager.DefaultHttpxClient")
+        mocker.patch("sprawl_runner.ai.client_manager.OpenAI")
+        client_manager = OpenAIClientManager("test-key", metrics=MetricsRegistry())
+
+        client_manager.sync_client  # noqa: B018
+
+        event_hooks = mock_http_client.call_args.kwargs["event_hooks"]
+        assert len(event_hooks["request"]) == len(event_hooks["response"]) == 1
+
+    def test_async_client_retries_through_the_rate_limiter(self, mocker):
+        mock_http_client = mocker.patch("sprawl_runner.ai.client_manager.DefaultAsyncHttpxClient")
+        mock_async_openai = mocker.patch("sprawl_runner.ai.client_manager.AsyncOpenAI")
+        client_manager = OpenAIClientManager("test-key", rate_limiter=RateLimiter())
+
+        client_manager.client  # noqa: B018
+
+        assert isinstance(mock_http_client.call_args.kwargs["transport"], RateLimitedTransport)
+        assert mock_async_openai.call_args.kwargs["max_retries"] == 0
+
+    def test_aclose_closes_and_forgets_clients(self, mocker, client_manager):
+        mock_async_openai = mocker.patch("sprawl_runner.ai.client_manager.AsyncOpenAI")
+        mock_async_openai.return_value.close = mocker.AsyncMock()
+        mock_openai = mocker.patch("sprawl_runner.ai.client_manager.OpenAI")
+        mocker.patch("sprawl_runner.ai.client_manager.DefaultAsyncHttpxClient")
+        mocker.patch("sprawl_runner.ai.client_manager.DefaultHttpxClient")
+        client_manager.client  # noqa: B018
+        client_manager.sync_client  # noqa: B018
+
+        asyncio.run(client_manager.aclose())
+
+        mock_async_openai.return_value.close.assert_awaited_once_with()
+        mock_openai.return_value.close.assert_called_once_with()
+        assert client_manager._client is None  # noqa: SLF001
+        assert client_manager._sync_client is None  # noqa: SLF001
+
+    def test_close_does_nothing_when_no_clients_were_created(self, client_manager):
+        client_manager.close()
+
+        assert client_manager._sync_client is None  # noqa: SLF001
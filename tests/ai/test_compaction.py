@@ -0,0 +1,50 @@
+from sprawl_runner.ai.compaction import (
+    CompactionOptions,
+    NarrativeTurn,
+    count_chars,
+    format_transcript,
+    get_seed_message,
+    get_summary_prompt,
+)
+
+TURNS = [NarrativeTurn("I wake up.", "Neon rain."), NarrativeTurn("I take the deck.", "It hums.")]
+
+
+def test_options_from_settings():
+    options = CompactionOptions.from_settings({"narrative_compact_turns": "12", "narrative_keep_turns": "3"})
+
+    assert options == CompactionOptions(max_turns=12, keep_turns=3)
+    assert options.enabled
+
+
+def test_options_disabled_with_zero_turns():
+    assert not CompactionOptions(max_turns=0).enabled
+
+
+def test_count_chars_counts_both_sides_of_every_turn():
+    assert count_chars(TURNS) == sum(len(player) + len(narrator) for player, narrator in TURNS)
+
+
+def test_format_transcript_labels_each_side():
+    assert format_transcript(TURNS[:1]) == "Player: I wake up.\n\nNarrator: Neon rain."
+
+
+def test_summary_prompt_rolls_in_the_previous_summary():
+    prompt = get_summary_prompt(TURNS, "You checked into a motel.", 100)
+
+    assert "at most 100 words" in prompt
+    assert "You checked into a motel." in prompt
+    assert "Player: I take the deck." in prompt
+
+
+def test_summary_prompt_without_a_previous_summary():
+    assert "already summarized" not in get_summary_prompt(TURNS, "", 100)
+
+
+def test_seed_message_holds_summary_world_and_recent_turns():
+    seed = get_seed_message("You have the deck.", "Factions:\n- Lo-Teks", TURNS[1:])
+
+    assert "You have the deck." in seed
+    assert "- Lo-Teks" in seed
+    assert "Narrator: It hums." in seed
+    assert "I wake up." not in seed
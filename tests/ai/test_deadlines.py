@@ -0,0 +1,20 @@
+from sprawl_runner.ai.deadlines import RunDeadlineExceededError, RunDeadlines
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+
+
+class TestRunDeadlines:
+    def test_from_settings_uses_defaults_for_blank_settings(self):
+        assert RunDeadlines.from_settings(EMPTY_SETTINGS) == RunDeadlines()
+
+    def test_for_kind_returns_none_for_zero(self):
+        deadlines = RunDeadlines(narrative=0, tool=60.0)
+
+        assert deadlines.for_kind("narrative") is None
+        assert deadlines.for_kind("tool") == 60.0  # noqa: PLR2004
+
+
+def test_run_deadline_exceeded_error_is_a_timeout():
+    error = RunDeadlineExceededError("run_abc", "summary", 180.0)
+
+    assert isinstance(error, TimeoutError)
+    assert str(error) == "The summary run run_abc was cancelled after 180 seconds."
@@ -0,0 +1,97 @@
+import random
+from itertools import islice
+
+import pytest
+
+from sprawl_runner.ai.polling import PollingOptions, PollingStrategy
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+class TestPollingOptions:
+    def test_from_settings_uses_defaults_for_blank_settings(self):
+        options = PollingOptions.from_settings(EMPTY_SETTINGS.copy())
+
+        assert options == PollingOptions()
+
+    def test_from_settings_parses_values(self):
+        settings = EMPTY_SETTINGS.copy()
+        settings["poll_initial_interval"] = "0.1"
+        settings["poll_max_interval"] = "2"
+        settings["poll_multiplier"] = "1.5"
+        settings["poll_jitter"] = "0"
+        settings["poll_history_size"] = "5"
+
+        options = PollingOptions.from_settings(settings)
+
+        assert options == PollingOptions(
+            initial_interval=0.1, max_interval=2.0, multiplier=1.5, jitter=0.0, history_size=5
+        )
+
+
+class TestPollingStrategy:
+    @pytest.fixture
+    def strategy(self):
+        return PollingStrategy(PollingOptions(initial_interval=0.25, max_interval=1.0, jitter=0.0))
+
+    def test_delays_back_off_exponentially_up_to_max_interval(self, strategy):
+        delays = list(islice(strategy.delays("tool"), 6))
+
+        assert delays == [0.25, 0.25, 0.5, 1.0, 1.0, 1.0]
+
+    def test_first_delay_is_seeded_from_run_history(self, strategy):
+        for duration in (4.0, 5.0, 6.0):
+            strategy.record("narrative", duration)
+
+        delays = list(islice(strategy.delays("narrative"), 3))
+
+        assert delays == [pytest.approx(4.0), 0.25, 0.5]
+
+    def test_history_is_kept_per_run_kind(self, strategy):
+        strategy.record("narrative", 10.0)
+
+        assert strategy.first_delay("narrative") == pytest.approx(8.0)
+        assert strategy.first_delay("tool") == 0.25
+
+    def test_history_only_keeps_recent_runs(self):
+        strategy = PollingStrategy(PollingOptions(history_size=2))
+
+        for duration in (100.0, 1.0, 2.0):
+            strategy.record("tool", duration)
+
+        assert strategy.expected_duration("tool") == 1.5
+
+    def test_jitter_stays_within_bounds(self):
+        strategy = PollingStrategy(PollingOptions(initial_interval=1.0, jitter=0.5), rng=random.Random(7))
+
+        delays = list(islice(strategy.delays("tool"), 20))
+
+        assert all(0.5 <= delay <= 6.0 for delay in delays)
+        assert len(set(delays)) > 1
+
+    def test_metrics_report_polls_and_runs_per_kind(self, strategy):
+        list(islice(strategy.delays("tool"), 3))
+        strategy.record("tool", 2.0)
+
+        metrics = strategy.metrics()
+
+        assert metrics["tool"]["polls"] == 3
+        assert metrics["tool"]["runs"] == 1
+        assert metrics["tool"]["polls_per_run"] == 3
+        assert metrics["tool"]["total_wait"] == pytest.approx(1.0)
+        assert metrics["tool"]["expected_duration"] == 2.0
+        assert "narrative" not in metrics
+
+    def test_records_waits_and_expected_durations_in_the_registry(self):
+        registry = MetricsRegistry()
+        strategy = PollingStrategy(
+            PollingOptions(initial_interval=0.25, max_interval=1.0, jitter=0.0), metrics=registry
+        )
+
+        list(islice(strategy.delays("tool"), 3))
+        strategy.record("tool", 2.0)
+
+        waits = registry.histogram("openai_poll_wait_seconds", kind="tool")
+        assert (waits.count, waits.sum) == (3, pytest.approx(1.0))
+        assert registry.histogram("openai_poll_first_delay_seconds", kind="tool").sum == 0.25
+        assert registry.gauge("openai_run_expected_seconds", kind="tool") == 2.0
@@ -0,0 +1,168 @@
+import asyncio
+
+import httpx
+import pytest
+
+from sprawl_runner.ai.rate_limit import (
+    RateLimitedTransport,
+    RateLimiter,
+    RateLimitOptions,
+    estimate_tokens,
+    get_retry_after,
+    request_priority,
+)
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+class TestRateLimitOptions:
+    def test_from_settings_uses_defaults_for_blank_settings(self):
+        assert RateLimitOptions.from_settings(EMPTY_SETTINGS) == RateLimitOptions()
+
+
+class TestRateLimiter:
+    def test_acquire_does_not_wait_without_limits(self):
+        limiter = RateLimiter()
+
+        assert asyncio.run(limiter.acquire(10_000)) < 0.05  # noqa: PLR2004
+
+    def test_acquire_waits_once_the_bucket_is_spent(self, mocker):
+        mock_sleep = mocker.patch("sprawl_runner.ai.rate_limit.asyncio.sleep", mocker.AsyncMock())
+        mocker.patch.object(RateLimiter, "_try_acquire", side_effect=[0.0, 1.5, 0.0])
+        limiter = RateLimiter(RateLimitOptions(requests_per_minute=60))
+
+        async def acquire_twice():
+            await limiter.acquire()
+            await limiter.acquire()
+
+        asyncio.run(acquire_twice())
+
+        mock_sleep.assert_awaited_once_with(1.5)
+
+    def test_try_acquire_spends_requests_and_tokens(self):
+        limiter = RateLimiter(RateLimitOptions(requests_per_minute=2, tokens_per_minute=1000))
+
+        assert limiter._try_acquire(600, "interactive") == 0  # noqa: SLF001
+        assert limiter._try_acquire(600, "interactive") > 0  # noqa: SLF001
+        assert limiter._try_acquire(400, "interactive") == 0  # noqa: SLF001
+        assert limiter._try_acquire(0, "interactive") > 0  # noqa: SLF001
+
+    def test_background_requests_leave_a_reserve_for_interactive_ones(self):
+        limiter = RateLimiter(RateLimitOptions(requests_per_minute=10, interactive_reserve=0.2))
+
+        granted = [limiter._try_acquire(0, "background") == 0 for _ in range(10)]  # noqa: SLF001
+
+        assert granted.count(True) == 8  # noqa: PLR2004
+        assert limiter._try_acquire(0, "interactive") == 0  # noqa: SLF001
+
+    def test_background_requests_wait_while_interactive_ones_wait(self):
+        limiter = RateLimiter(RateLimitOptions(requests_per_minute=600))
+        limiter._interactive_waiting = 1  # noqa: SLF001
+
+        assert limiter._try_acquire(0, "background") > 0  # noqa: SLF001
+        assert limiter._try_acquire(0, "interactive") == 0  # noqa: SLF001
+
+    def test_pause_holds_every_request_back(self):
+        limiter = RateLimiter()
+
+        limiter.pause(2)
+
+        assert 1.9 < limiter._try_acquire(0, "interactive") <= 2  # noqa: PLR2004, SLF001
+
+    def test_acquire_uses_the_priority_of_the_context(self, mocker):
+        limiter = RateLimiter()
+        mock_try_acquire = mocker.patch.object(limiter, "_try_acquire", return_value=0.0)
+
+        async def acquire():
+            with request_priority("interactive"):
+                await limiter.acquire(5)
+
+        asyncio.run(acquire())
+
+        mock_try_acquire.assert_called_once_with(5, "interactive")
+
+
+class TestRetryAfter:
+    @pytest.mark.parametrize(
+        ("headers", "expected"),
+        [
+            ({"retry-after-ms": "1500"}, 1.5),
+            ({"retry-after": "3"}, 3.0),
+            ({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0.0),
+            ({}, None),
+        ],
+    )
+    def test_get_retry_after(self, headers, expected):
+        assert get_retry_after(httpx.Response(429, headers=headers)) == expected
+
+
+def test_estimate_tokens_charges_run_creation():
+    request = httpx.Request("POST", "https://api.openai.com/v1/threads/thread_abc/runs", content=b"x" * 400)
+    message = httpx.Request("POST", "https://api.openai.com/v1/threads/thread_abc/messages", content=b"x" * 400)
+    completion = httpx.Request("POST", "https://api.openai.com/v1/chat/completions", content=b"x" * 400)
+
+    assert estimate_tokens(request, 1000) == 1100  # noqa: PLR2004
+    assert estimate_tokens(completion, 1000) == 1100  # noqa: PLR2004
+    assert estimate_tokens(message, 1000) == 100  # noqa: PLR2004
+
+
+class TestRateLimitedTransport:
+    def send(self, transport: RateLimitedTransport, method: str = "POST") -> httpx.Response:
+        async def send_request() -> httpx.Response:
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await client.request(method, "https://api.openai.com/v1/threads/runs", json={})
+
+        return asyncio.run(send_request())
+
+    def test_retries_rate_limited_requests_after_retry_after(self, mocker):
+        mocker.patch("sprawl_runner.ai.rate_limit.asyncio.sleep", mocker.AsyncMock())
+        statuses = iter([429, 200])
+        limiter = RateLimiter()
+        mock_pause = mocker.spy(limiter, "pause")
+        metrics = MetricsRegistry()
+        inner = httpx.MockTransport(lambda request: httpx.Response(next(statuses), headers={"retry-after": "2"}))
+
+        response = self.send(RateLimitedTransport(inner, limiter, metrics))
+
+        assert response.status_code == 200  # noqa: PLR2004
+        mock_pause.assert_called_once_with(2.0)
+        assert metrics.counter("openai_retries_total", method="POST", endpoint="/threads/runs", reason="429") == 1
+
+    def test_retries_server_errors_with_backoff(self, mocker):
+        mock_sleep = mocker.patch("sprawl_runner.ai.rate_limit.asyncio.sleep", mocker.AsyncMock())
+        statuses = iter([503, 500, 200])
+        inner = httpx.MockTransport(lambda request: httpx.Response(next(statuses)))
+
+        response = self.send(RateLimitedTransport(inner, RateLimiter()), "GET")
+
+        assert response.status_code == 200  # noqa: PLR2004
+        first_delay, second_delay = (call.args[0] for call in mock_sleep.await_args_list)
+        assert 0.375 <= first_delay <= 0.5  # noqa: PLR2004
+        assert 0.75 <= second_delay <= 1.0  # noqa: PLR2004
+
+    @pytest.mark.parametrize("status", [409, 500, 503])
+    def test_does_not_retry_posts_the_api_may_have_acted_on(self, mocker, status):
+        mock_sleep = mocker.patch("sprawl_runner.ai.rate_limit.asyncio.sleep", mocker.AsyncMock())
+        inner = httpx.MockTransport(lambda request: httpx.Response(status, headers={"x-should-retry": "true"}))
+
+        response = self.send(RateLimitedTransport(inner, RateLimiter()))
+
+        assert response.status_code == status
+        mock_sleep.assert_not_awaited()
+
+    def test_gives_up_after_max_retries(self, mocker):
+        mocker.patch("sprawl_runner.ai.rate_limit.asyncio.sleep", mocker.AsyncMock())
+        inner = httpx.MockTransport(lambda request: httpx.Response(500))
+
+        response = self.send(RateLimitedTransport(inner, RateLimiter(RateLimitOptions(max_retries=2))), "GET")
+
+        assert response.status_code == 500  # noqa: PLR2004
+
+    def test_does_not_retry_when_told_not_to(self, mocker):
+        mock_sleep = mocker.patch("sprawl_runner.ai.rate_limit.asyncio.sleep", mocker.AsyncMock())
+        inner = httpx.MockTransport(lambda request: httpx.Response(500, headers={"x-should-retry": "false"}))
+
+        response = self.send(RateLimitedTransport(inner, RateLimiter()), "GET")
+
+        assert response.status_code == 500  # noqa: PLR2004
+        mock_sleep.assert_not_awaited()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+
+from sprawl_runner.ai.rate_limit import _request_priority
+from sprawl_runner.ai.scheduler import RunScheduler, SchedulerOptions, current_run_class, scheduled_as
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+class TestSchedulerOptions:
+    def test_from_settings_uses_defaults_for_blank_settings(self):
+        assert SchedulerOptions.from_settings(EMPTY_SETTINGS) == SchedulerOptions()
+
+
+def test_scheduled_as_sets_the_run_class_and_request_priority():
+    with scheduled_as("opening"):
+        assert current_run_class() == "opening"
+        assert _request_priority.get() == "interactive"
+
+    with scheduled_as("prefetch"):
+        assert _request_priority.get() == "background"
+    assert current_run_class() == "generation"
+
+
+class TestRunScheduler:
+    def run_requests(self, scheduler: RunScheduler, held: list[str], queued: list[str]) -> list[str]:
+        """Hold a slot for each of held, queue each of queued, then release the held ones; returns start order."""
+        started: list[str] = []
+
+        async def request(run_class, release):
+            async with scheduler.slot(run_class):
+                started.append(run_class)
+                await release.wait()
+
+        async def run():
+            release = asyncio.Event()
+            holders = [asyncio.create_task(request(run_class, release)) for run_class in held]
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(request(run_class, asyncio.Event())) for run_class in queued]
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(*holders)
+            await asyncio.sleep(0)
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+
+        asyncio.run(run())
+        return started
+
+    def test_waiting_requests_start_in_class_order(self):
+        scheduler = RunScheduler(SchedulerOptions(max_concurrency=1, interactive_reserve=0))
+
+        started = self.run_requests(scheduler, ["generation"], ["prefetch", "generation", "narrative"])
+
+        assert started == ["generation", "narrative"]
+
+    def test_background_requests_leave_the_reserve_to_the_player(self):
+        scheduler = RunScheduler(SchedulerOptions(max_concurrency=3, generation_concurrency=0))
+
+        started = self.run_requests(scheduler, [], ["generation", "generation", "generation", "narrative"])
+
+        assert started == ["generation", "generation", "narrative"]
+
+    def test_classes_are_capped(self):
+        scheduler = RunScheduler(SchedulerOptions(max_concurrency=0, prefetch_concurrency=2))
+
+        started = self.run_requests(scheduler, [], ["prefetch", "prefetch", "prefetch", "generation"])
+
+        assert started == ["prefetch", "prefetch", "generation"]
+
+    def test_requests_that_waited_long_move_up(self):
+        scheduler = RunScheduler(SchedulerOptions(max_concurrency=1, interactive_reserve=0, starvation_seconds=5))
+
+        async def run():
+            async with scheduler.slot("narrative"):
+                prefetch = asyncio.create_task(scheduler.slot("prefetch").__aenter__())
+                await asyncio.sleep(0)
+                # Waited three steps: as urgent as narrative, and queued first.
+                scheduler._waiters[0].enqueued_at -= 15  # noqa: SLF001
+                opening = asyncio.create_task(scheduler.slot("opening").__aenter__())
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            return prefetch.done(), opening.done()
+
+        assert asyncio.run(run()) == (True, False)
+
+    def test_cancelled_waiters_give_up_their_place(self):
+        scheduler = RunScheduler(SchedulerOptions(max_concurrency=1, interactive_reserve=0))
+
+        async def run():
+            async with scheduler.slot("generation"):
+                waiter = asyncio.create_task(scheduler.slot("prefetch").__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+                await asyncio.gather(waiter, return_exceptions=True)
+            return scheduler.waiting, scheduler.active
+
+        assert asyncio.run(run()) == (0, {})
+
+    def test_slot_records_the_wait(self):
+        metrics = MetricsRegistry()
+        scheduler = RunScheduler(metrics=metrics)
+
+        async def run():
+            with scheduled_as("narrative"):
+                async with scheduler.slot() as waited:
+                    return waited
+
+        assert asyncio.run(run()) < 0.05  # noqa: PLR2004
+        assert metrics.histogram("scheduler_wait_seconds", run_class="narrative").count == 1
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from sprawl_runner.ai.tool_dispatch import (
+    DispatchedCall,
+    ToolDispatcher,
+    ToolHandlerTraits,
+    get_tool_handler_traits,
+    tool_handler,
+)
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.telemetry.tracing import MemorySpanExporter, Tracer
+
+
+def _thread_name_handler(arguments):
+    return threading.current_thread().name
+
+
+def _pid_handler(arguments):
+    return str(os.getpid())
+
+
+class TestToolHandlerTraits:
+    def test_undeclared_handler_has_default_traits(self):
+        assert get_tool_handler_traits(_thread_name_handler) == ToolHandlerTraits()
+
+    def test_tool_handler_declares_traits(self):
+        @tool_handler(thread_safe=True)
+        def handler(arguments):
+            return "OK"
+
+        assert get_tool_handler_traits(handler) == ToolHandlerTraits(thread_safe=True, cpu_bound=False)
+
+    def test_traits_are_visible_through_bound_methods(self):
+        class Handlers:
+            @tool_handler(cpu_bound=True)
+            def handle(self, arguments):
+                return "OK"
+
+        assert get_tool_handler_traits(Handlers().handle) == ToolHandlerTraits(cpu_bound=True)
+
+
+class TestToolDispatcher:
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError, match="Unknown tool dispatch mode"):
+            ToolDispatcher("fibers")  # type: ignore
+
+    def test_from_settings(self):
+        settings = EMPTY_SETTINGS.copy()
+        settings["tool_dispatch"] = "process"
+        settings["tool_workers"] = "2"
+
+        dispatcher = ToolDispatcher.from_settings(settings)
+
+        assert dispatcher.mode == "process"
+        assert dispatcher._max_workers == 2  # noqa: SLF001
+
+    def test_from_settings_rejects_unknown_mode(self):
+        settings = EMPTY_SETTINGS.copy()
+        settings["tool_dispatch"] = "fibers"
+
+        with pytest.raises(ValueError, match="tool_dispatch"):
+            ToolDispatcher.from_settings(settings)
+
+    def test_dispatch_parses_arguments_and_keeps_order(self):
+        dispatcher = ToolDispatcher("thread")
+        calls = [
+            DispatchedCall(
+                lambda arguments: f"first:{arguments['n']}", ToolHandlerTraits(thread_safe=True), '{"n": 1}'
+            ),
+            DispatchedCall(lambda arguments: f"second:{arguments['n']}", ToolHandlerTraits(), '{"n": 2}'),
+        ]
+
+        try:
+            outputs = asyncio.run(dispatcher.dispatch(calls))
+        finally:
+            dispatcher.shutdown()
+
+        assert outputs == ["first:1", "second:2"]
+
+    def test_serial_mode_runs_every_handler_on_the_loop_thread(self):
+        dispatcher = ToolDispatcher("serial")
+        calls = [DispatchedCall(_thread_name_handler, ToolHandlerTraits(thread_safe=True, cpu_bound=True), "{}")]
+
+        outputs = asyncio.run(dispatcher.dispatch(calls))
+
+        assert outputs == [threading.current_thread().name]
+
+    def test_thread_mode_runs_thread_safe_handlers_concurrently(self):
+        dispatcher = ToolDispatcher("thread", max_workers=2)
+        barrier = threading.Barrier(2, timeout=5)
+
+        def handler(arguments):
+            # Both handlers have to be running at the same time to get past this.
+            barrier.wait()
+            return "OK"
+
+        traits = ToolHandlerTraits(thread_safe=True)
+
+        try:
+            outputs = asyncio.run(
+                dispatcher.dispatch([DispatchedCall(handler, traits, "{}"), DispatchedCall(handler, traits, "{}")])
+            )
+        finally:
+            dispatcher.shutdown()
+
+        assert outputs == ["OK", "OK"]
+
+    def test_thread_mode_keeps_unsafe_handlers_on_the_loop_thread(self):
+        dispatcher = ToolDispatcher("thread")
+
+        outputs = asyncio.run(dispatcher.dispatch([DispatchedCall(_thread_name_handler, ToolHandlerTraits(), "{}")]))
+
+        assert outputs == [threading.current_thread().name]
+
+    def test_process_mode_runs_cpu_bound_handlers_in_worker_processes(self):
+        dispatcher = ToolDispatcher("process", max_workers=1)
+
+        try:
+            outputs = asyncio.run(
+                dispatcher.dispatch([DispatchedCall(_pid_handler, ToolHandlerTraits(cpu_bound=True), "{}")])
+            )
+        finally:
+            dispatcher.shutdown()
+
+        assert outputs != [str(os.getpid())]
+
+    @pytest.mark.parametrize("mode", ["serial", "thread", "process"])
+    def test_dispatch_traces_each_handler_under_the_current_span(self, mode):
+        exporter = MemorySpanExporter()
+        tracer = Tracer(exporter)
+        dispatcher = ToolDispatcher(mode, max_workers=1)
+        calls = [
+            DispatchedCall(_pid_handler, ToolHandlerTraits(cpu_bound=True), "{}", "register_factions", "call_1"),
+            DispatchedCall(_thread_name_handler, ToolHandlerTraits(), "{}", "register_locations", "call_2"),
+        ]
+
+        async def dispatch():
+            with tracer.span("tools.dispatch") as parent:
+                await dispatcher.dispatch(calls, tracer)
+            return parent
+
+        try:
+            parent = asyncio.run(dispatch())
+        finally:
+            dispatcher.shutdown()
+
+        handler_spans = sorted(
+            (span for span in exporter.spans if span.name == "tool.handler"), key=lambda span: span.attributes["tool"]
+        )
+        assert [(span.attributes["tool"], span.attributes["tool_call_id"]) for span in handler_spans] == [
+            ("register_factions", "call_1"),
+            ("register_locations", "call_2"),
+        ]
+        assert all(span.parent_id == parent.span_id for span in handler_spans)
+
+    def test_shutdown_releases_pools(self):
+        dispatcher = ToolDispatcher("thread")
+        asyncio.run(
+            dispatcher.dispatch([DispatchedCall(_thread_name_handler, ToolHandlerTraits(thread_safe=True), "{}")])
+        )
+
+        dispatcher.shutdown()
+
+        assert dispatcher._thread_pool is None  # noqa: SLF001
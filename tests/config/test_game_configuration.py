@@ -176,6 +176,60 @@ class TestGameConfiguration:
             game_configuration._has_dirty_settings is False  # noqa: SLF001
         ), "Settings should not be marked as dirty."
 
+    def test_check_assistant_id_setting_stores_fingerprint_of_created_assistant(self, mocker, game_configuration):
+        game_configuration.assistant_creation_handler = mocker.MagicMock(return_value="generated_id")
+        game_configuration.assistant_fingerprint_handler = mocker.MagicMock(return_value="fingerprint")
+        game_configuration._settings["openai_assistant_id"] = ""  # noqa: SLF001
+        game_configuration._settings["openai_api_key"] = "valid_key"  # noqa: SLF001
+        game_configuration._settings["openai_model"] = "valid_model"  # noqa: SLF001
+
+        game_configuration._check_assistant_id_setting()  # noqa: SLF001
+
+        game_configuration.assistant_fingerprint_handler.assert_called_once_with("valid_model")
+        assert game_configuration._settings["openai_assistant_fingerprint"] == "fingerprint"  # noqa: SLF001
+
+    def test_check_assistant_id_setting_updates_assistant_when_fingerprint_differs(self, mocker, game_configuration):
+        mocked_creation_handler = mocker.MagicMock()
+        mocked_update_handler = mocker.MagicMock(return_value="valid_assistant_id")
+        game_configuration.assistant_creation_handler = mocked_creation_handler
+        game_configuration.assistant_update_handler = mocked_update_handler
+        game_configuration.assistant_fingerprint_handler = mocker.MagicMock(return_value="new_fingerprint")
+        game_configuration._settings["openai_assistant_id"] = "valid_assistant_id"  # noqa: SLF001
+        game_configuration._settings["openai_assistant_fingerprint"] = "old_fingerprint"  # noqa: SLF001
+        game_configuration._settings["openai_api_key"] = "valid_key"  # noqa: SLF001
+        game_configuration._settings["openai_model"] = "valid_model"  # noqa: SLF001
+
+        game_configuration._check_assistant_id_setting()  # noqa: SLF001
+
+        mocked_update_handler.assert_called_once_with("valid_key", "valid_model", "valid_assistant_id")
+        mocked_creation_handler.assert_not_called()
+        assert game_configuration._settings["openai_assistant_fingerprint"] == "new_fingerprint"  # noqa: SLF001
+        assert game_configuration._has_dirty_settings  # noqa: SLF001
+
+    def test_check_assistant_id_setting_makes_no_calls_when_fingerprint_matches(self, mocker, game_configuration):
+        mocked_update_handler = mocker.MagicMock()
+        game_configuration.assistant_update_handler = mocked_update_handler
+        game_configuration.assistant_fingerprint_handler = mocker.MagicMock(return_value="fingerprint")
+        game_configuration._settings["openai_assistant_id"] = "valid_assistant_id"  # noqa: SLF001
+        game_configuration._settings["openai_assistant_fingerprint"] = "fingerprint"  # noqa: SLF001
+        game_configuration._settings["openai_api_key"] = "valid_key"  # noqa: SLF001
+        game_configuration._settings["openai_model"] = "valid_model"  # noqa: SLF001
+
+        game_configuration._check_assistant_id_setting()  # noqa: SLF001
+
+        mocked_update_handler.assert_not_called()
+        assert game_configuration._has_dirty_settings is False  # noqa: SLF001
+
+    def test_check_assistant_id_setting_makes_no_assistant_for_chat_completions(self, mocker, game_configuration):
+        mocked_handler = mocker.MagicMock()
+        game_configuration.assistant_creation_handler = mocked_handler
+        game_configuration._settings = {**EMPTY_SETTINGS, "openai_backend": "chat"}  # noqa: SLF001
+
+        game_configuration._check_assistant_id_setting()  # noqa: SLF001
+
+        mocked_handler.assert_not_called()
+        assert game_configuration._has_dirty_settings is False  # noqa: SLF001
+
     def test_unimplemented_handler(self, game_configuration):
         with pytest.raises(NotImplementedError):
             game_configuration._unimplemented_handler("", "")  # noqa: SLF001
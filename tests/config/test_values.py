@@ -0,0 +1,53 @@
+import pytest
+
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.config.values import get_bool, get_float, get_int, get_str
+
+
+@pytest.fixture
+def settings():
+    return EMPTY_SETTINGS.copy()
+
+
+class TestValues:
+    def test_get_str_falls_back_to_default_when_blank(self, settings):
+        assert get_str(settings, "http_max_connections") == "20"
+
+    def test_get_str_returns_value_when_set(self, settings):
+        settings["http_max_connections"] = "7"
+
+        assert get_str(settings, "http_max_connections") == "7"
+
+    def test_get_int(self, settings):
+        settings["http_max_connections"] = "7"
+
+        assert get_int(settings, "http_max_connections") == 7
+
+    def test_get_int_raises_for_invalid_value(self, settings):
+        settings["http_max_connections"] = "many"
+
+        with pytest.raises(ValueError, match="http_max_connections"):
+            get_int(settings, "http_max_connections")
+
+    def test_get_float(self, settings):
+        settings["http_timeout"] = "2.5"
+
+        assert get_float(settings, "http_timeout") == 2.5
+
+    def test_get_float_raises_for_invalid_value(self, settings):
+        settings["http_timeout"] = "soon"
+
+        with pytest.raises(ValueError, match="http_timeout"):
+            get_float(settings, "http_timeout")
+
+    @pytest.mark.parametrize(("value", "expected"), [("yes", True), ("On", True), ("0", False), ("false", False)])
+    def test_get_bool(self, settings, value, expected):
+        settings["http2"] = value
+
+        assert get_bool(settings, "http2") is expected
+
+    def test_get_bool_raises_for_invalid_value(self, settings):
+        settings["http2"] = "maybe"
+
+        with pytest.raises(ValueError, match="http2"):
+            get_bool(settings, "http2")
@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import Mock
 
 import pytest
@@ -20,7 +21,21 @@ class TestBasicConsole:
         captured = capsys.readouterr()
         assert captured.out == f"{msg}\n"
 
+    def test_emit_partial_outputs_data_without_newline(self, capsys):
+        console = BasicConsole()
+        console.emit_partial("Te")
+        console.emit_partial("st")
+        captured = capsys.readouterr()
+        assert captured.out == "Test"
+
     def test_player_input(self, mock_input):
         console = BasicConsole()
         data = console.get_player_input()
         assert data == mock_input
+
+    def test_aget_player_input_reads_stdin_off_the_loop(self, mocker):
+        mock_input = mocker.patch("builtins.input", return_value="look around")
+        console = BasicConsole()
+
+        assert asyncio.run(console.aget_player_input("> ")) == "look around"
+        mock_input.assert_called_once_with("> ")
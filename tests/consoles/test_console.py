@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from sprawl_runner.consoles.console import Console
@@ -7,8 +9,14 @@ class FakeConsole(Console):
     def emit(self, data):
         super().emit(data)  # type: ignore
 
-    def get_player_input(self) -> str:
-        return super().get_player_input()  # type: ignore
+    def emit_partial(self, data):
+        super().emit_partial(data)  # type: ignore
+
+    def get_player_input(self, prompt: str = "") -> str:
+        return super().get_player_input(prompt)  # type: ignore
+
+    async def aget_player_input(self, prompt: str = "") -> str:
+        return await super().aget_player_input(prompt)  # type: ignore
 
 
 class TestConsole:
@@ -17,7 +25,17 @@ class TestConsole:
         with pytest.raises(NotImplementedError):
             console.emit("")
 
+    def test_emit_partial_raises(self):
+        console = FakeConsole()
+        with pytest.raises(NotImplementedError):
+            console.emit_partial("")
+
     def test_get_player_input_raises(self):
         console = FakeConsole()
         with pytest.raises(NotImplementedError):
             console.get_player_input()
+
+    def test_aget_player_input_raises(self):
+        console = FakeConsole()
+        with pytest.raises(NotImplementedError):
+            asyncio.run(console.aget_player_input())
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import struct
+
+import pytest
+
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.consoles.network_console import (
+    NetworkConsoleOptions,
+    TcpConsole,
+    encode_frame,
+    start_tcp_server,
+    start_websocket_server,
+    unmask,
+    websocket_accept,
+)
+
+
+async def connect(start_server, handler, options=None):
+    listener = await start_server(handler, "127.0.0.1", 0, options)
+    port = listener.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    return listener, reader, writer
+
+
+async def close(listener, writer):
+    writer.close()
+    listener.close()
+    await listener.wait_closed()
+
+
+def client_frame(opcode, payload, fin=True):
+    mask = os.urandom(4)
+    head = struct.pack("!BB", (0x80 if fin else 0) | opcode, 0x80 | len(payload))
+    return head + mask + unmask(payload, mask)
+
+
+async def read_frame(reader):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:  # noqa: PLR2004
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    return first & 0x0F, await reader.readexactly(length)
+
+
+WEBSOCKET_UPGRADE = (
+    b"GET /play HTTP/1.1\r\n"
+    b"Host: 127.0.0.1\r\n"
+    b"Upgrade: websocket\r\n"
+    b"Connection: Upgrade\r\n"
+    b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n"
+    b"Sec-WebSocket-Version: 13\r\n\r\n"
+)
+
+
+class TestNetworkConsoleOptions:
+    def test_from_settings_uses_defaults_for_blank_settings(self):
+        assert NetworkConsoleOptions.from_settings(EMPTY_SETTINGS) == NetworkConsoleOptions()
+
+    def test_high_water_is_a_fraction_of_the_limit(self):
+        assert NetworkConsoleOptions(write_buffer_limit=1600).high_water == 100  # noqa: PLR2004
+
+
+class TestTcpConsole:
+    def test_output_written_in_one_turn_of_the_loop_is_sent_as_one_write(self, mocker):
+        async def run():
+            reader, writer = mocker.MagicMock(), mocker.MagicMock()
+            writer.transport.get_write_buffer_size.return_value = 0
+            writer.is_closing.return_value = False
+            console = TcpConsole(reader, writer)
+            console.emit("Chiba City")
+            for delta in ("The sky ", "was the color"):
+                console.emit_partial(delta)
+            await asyncio.sleep(0)
+            return writer
+
+        writer = asyncio.run(run())
+
+        writer.write.assert_called_once_with(b"Chiba City\nThe sky was the color")
+
+    def test_a_connection_over_its_write_buffer_limit_is_dropped(self, mocker):
+        async def run():
+            reader, writer = mocker.MagicMock(), mocker.MagicMock()
+            writer.transport.get_write_buffer_size.return_value = 900
+            console = TcpConsole(reader, writer, NetworkConsoleOptions(write_buffer_limit=1000))
+            console.emit("x" * 200)
+            console.emit("dropped")
+            return console, writer
+
+        console, writer = asyncio.run(run())
+
+        assert console.closed
+        writer.transport.abort.assert_called_once_with()
+        writer.write.assert_not_called()
+
+    def test_reads_lines_and_shows_prompts(self):
+        async def handler(console):
+            line = await console.aget_player_input(">0> ")
+            console.emit(f"you said {line}")
+
+        async def run():
+            listener, reader, writer = await connect(start_tcp_server, handler)
+            prompt = await reader.readuntil(b"> ")
+            writer.write(b"look around\r\n")
+            reply = await reader.read()
+            await close(listener, writer)
+            return prompt, reply
+
+        prompt, reply = asyncio.run(run())
+
+        assert prompt == b">0> "
+        assert reply == b"you said look around\n"
+
+    def test_input_after_the_player_disconnects_raises(self):
+        errors = []
+
+        async def handler(console):
+            try:
+                await console.aget_player_input()
+            except ConnectionResetError as error:
+                errors.append(error)
+
+        async def run():
+            listener, _, writer = await connect(start_tcp_server, handler)
+            writer.close()
+            await writer.wait_closed()
+            while not errors:
+                await asyncio.sleep(0.01)
+            await close(listener, writer)
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+        assert "disconnected" in str(errors[0])
+
+    def test_get_player_input_raises(self, mocker):
+        async def run():
+            return TcpConsole(mocker.MagicMock(), mocker.MagicMock())
+
+        console = asyncio.run(run())
+
+        with pytest.raises(RuntimeError):
+            console.get_player_input()
+
+
+class TestWebSocketConsole:
+    def test_websocket_accept_matches_the_rfc_example(self):
+        assert websocket_accept("dGhlIHNhbXBsZSBub25jZQ==") == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+
+    @pytest.mark.parametrize("size", [5, 300, 70_000])
+    def test_encode_frame_sizes(self, size):
+        frame = encode_frame(0x1, b"x" * size)
+
+        assert frame[0] == 0x81  # noqa: PLR2004
+        assert frame.endswith(b"x" * size)
+        assert len(frame) == size + {5: 2, 300: 4, 70_000: 10}[size]
+
+    def test_unmask_reverses_masking(self):
+        assert unmask(unmask(b"jack in", b"\x01\x02\x03\x04"), b"\x01\x02\x03\x04") == b"jack in"
+
+    def test_plays_over_text_messages(self):
+        async def handler(console):
+            line = await console.aget_player_input(">0> ")
+            console.emit(f"you said {line}")
+
+        async def run():
+            listener, reader, writer = await connect(start_websocket_server, handler)
+            writer.write(WEBSOCKET_UPGRADE)
+            response = await reader.readuntil(b"\r\n\r\n")
+            prompt = await read_frame(reader)
+            writer.write(client_frame(0x9, b"ping"))
+            pong = await read_frame(reader)
+            writer.write(client_frame(0x1, b"look ", fin=False) + client_frame(0x0, b"around"))
+            reply = await read_frame(reader)
+            closing = await read_frame(reader)
+            await close(listener, writer)
+            return response, prompt, pong, reply, closing
+
+        response, prompt, pong, reply, closing = asyncio.run(asyncio.wait_for(run(), 5))
+
+        assert response.startswith(b"HTTP/1.1 101 Switching Protocols\r\n")
+        assert b"Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=\r\n" in response
+        assert prompt == (0x1, b">0> ")
+        assert pong == (0xA, b"ping")
+        assert reply == (0x1, b"you said look around\n")
+        assert closing == (0x8, struct.pack("!H", 1000))
+
+    def test_unmasked_frames_end_the_connection(self):
+        errors = []
+
+        async def handler(console):
+            try:
+                await console.aget_player_input()
+            except ConnectionResetError as error:
+                errors.append(error)
+
+        async def run():
+            listener, reader, writer = await connect(start_websocket_server, handler)
+            writer.write(WEBSOCKET_UPGRADE)
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(encode_frame(0x1, b"look around"))
+            await reader.read()
+            await close(listener, writer)
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+        assert errors
+
+    def test_refuses_requests_that_are_not_upgrades(self):
+        async def handler(console):
+            pytest.fail("Only upgraded connections reach the handler.")
+
+        async def run():
+            listener, reader, writer = await connect(start_websocket_server, handler)
+            writer.write(b"GET / HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n")
+            response = await reader.read()
+            await close(listener, writer)
+            return response
+
+        response = asyncio.run(asyncio.wait_for(run(), 5))
+
+        assert response.startswith(b"HTTP/1.1 400 Bad Request\r\n")
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from sprawl_runner.consoles.queue_console import QueueConsole
+
+
+class TestQueueConsole:
+    def test_emitted_output_is_read_in_order(self):
+        console = QueueConsole()
+
+        console.emit("In PlayScene")
+        console.emit_partial(">0> ")
+
+        assert console.read_output() == "In PlayScene\n>0> "
+        assert console.read_output() == ""
+
+    def test_aget_player_input_writes_the_prompt_and_waits_for_a_line(self):
+        console = QueueConsole()
+
+        async def read_input():
+            reading = asyncio.create_task(console.aget_player_input(">0> "))
+            await asyncio.sleep(0)
+            assert not reading.done()
+            console.feed("look around")
+            return await reading
+
+        assert asyncio.run(read_input()) == "look around"
+        assert console.read_output() == ">0> "
+
+    def test_get_player_input_raises(self):
+        with pytest.raises(RuntimeError, match="aget_player_input"):
+            QueueConsole().get_player_input()
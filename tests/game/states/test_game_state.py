@@ -40,6 +40,19 @@ class TestGameState:
 
         mocked_game.change_state.assert_called_once_with(new_state)
 
+    def test_transition_records_its_duration(self, mocker):
+        mocker.patch("tests.game.states.test_game_state.FakeGameState.action", return_value=None)
+        mocked_game = mocker.MagicMock()
+        game_state = FakeGameState()
+        game_state.game = mocked_game
+
+        game_state.transition()
+
+        name, seconds = mocked_game.metrics.observe.call_args.args
+        assert name == "game_state_transition_seconds"
+        assert seconds >= 0
+        assert mocked_game.metrics.observe.call_args.kwargs == {"state": "FakeGameState"}
+
     def test_transition_does_not_change_state_when_action_returns_none(self, mocker):
         mocker.patch(
             "tests.game.states.test_game_state.FakeGameState.action",
@@ -62,3 +75,13 @@ class TestGameState:
         game_state.emit(data)
 
         mocked_game.emit.assert_called_once_with(data)
+
+    def test_emit_partial_calls_game_emit_partial(self, mocker):
+        mocked_game = mocker.MagicMock()
+        game_state = FakeGameState()
+        game_state.game = mocked_game
+        data = "te"
+
+        game_state.emit_partial(data)
+
+        mocked_game.emit_partial.assert_called_once_with(data)
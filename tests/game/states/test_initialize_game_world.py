@@ -0,0 +1,343 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from sprawl_runner.ai.assistant_message_bus import RoundTrips
+from sprawl_runner.game.states.end_game import EndGame
+from sprawl_runner.game.states.initialize_game_world import InitializeGameWorld, WaitForGameWorldReady
+from sprawl_runner.game.states.play_scene import PlayScene
+from sprawl_runner.world.procedural import ProceduralWorldGenerator
+from sprawl_runner.world.sharding import ShardProgress, WorldShard, WorldSpec
+
+
+@pytest.fixture
+def mock_game(mocker):
+    mock_game = mocker.MagicMock()
+    mock_game.world_ready = Future()
+    mock_game.world_cache = None
+    mock_game.world_pool = None
+    mock_game.world_generation = "batched"
+    mock_game.world_spec = None
+    mock_game.world_source = "assistant"
+    mock_game.world_fallback_seconds = 0.0
+    mock_game.procedural_world = ProceduralWorldGenerator(seed=1)
+    mock_game.factions = [{"name": "Faction1", "description": "Desc1", "motivation": "Motivation1"}]
+    mock_game.locations = [{"name": "Location1", "type": "Employment", "description": "Desc1"}]
+    return mock_game
+
+
+class TestInitializeGameWorld:
+    def test_action_starts_generation_runs_and_waits_for_them(self, mocker, mock_game):
+        mock_world_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = state.action()
+
+        round_trips = mock_world_generator.call_args.args[2]
+        mock_world_generator.assert_called_once_with(mock_game.message_bus, "batched", round_trips)
+        assert type(new_state) is WaitForGameWorldReady
+        assert new_state._generation_runs == mock_world_generator.return_value.start_runs.return_value  # noqa: SLF001
+        assert new_state._round_trips is round_trips  # noqa: SLF001
+
+    def test_action_pops_a_pooled_world_and_refills_the_pool(self, mocker, mock_game):
+        mock_world_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        mock_game.world_pool = mocker.MagicMock()
+        mock_game.world_cache = mocker.MagicMock()
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = state.action()
+
+        mock_game.load_world.assert_called_once_with(mock_game.world_pool.pop.return_value)
+        mock_world_generator.assert_called_once_with(mock_game.message_bus, "batched", run_class="prefetch")
+        mock_game.world_pool.refill.assert_called_once_with(mock_world_generator.return_value)
+        mock_game.world_cache.sample.assert_not_called()
+        mock_game.message_bus.process_tool_message_async.assert_not_called()
+        assert new_state._world_cache is mock_game.world_cache  # noqa: SLF001
+
+    def test_action_refills_an_empty_pool_and_falls_back_to_generation(self, mocker, mock_game):
+        mock_world_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        mock_game.world_pool = mocker.MagicMock()
+        mock_game.world_pool.pop.return_value = None
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        state.action()
+
+        mock_game.world_pool.refill.assert_called_once()
+        mock_game.load_world.assert_not_called()
+        mock_world_generator.return_value.start_runs.assert_called_once_with()
+
+    def test_action_loads_a_cached_world_without_generating(self, mocker, mock_game):
+        mock_game.world_cache = mocker.MagicMock()
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = state.action()
+
+        mock_game.load_world.assert_called_once_with(mock_game.world_cache.sample.return_value)
+        mock_game.message_bus.process_tool_message_async.assert_not_called()
+        assert type(new_state) is WaitForGameWorldReady
+        assert new_state._generation_runs == []  # noqa: SLF001
+
+    def test_action_generates_and_caches_on_a_cache_miss(self, mocker, mock_game):
+        mock_world_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        mock_game.world_cache = mocker.MagicMock()
+        mock_game.world_cache.sample.return_value = None
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = state.action()
+
+        mock_world_generator.return_value.start_runs.assert_called_once_with()
+        assert new_state._world_cache is mock_game.world_cache  # noqa: SLF001
+
+    def test_action_generates_a_sharded_world_when_there_is_a_spec(self, mocker, mock_game):
+        mock_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.ShardedWorldGenerator")
+        generated = Future()
+        mock_generator.return_value.generate.return_value = generated
+        mock_game.world_spec = WorldSpec(districts=("Chiba",), faction_tiers=("gangs",), concurrency=1)
+        mock_game.world_pool = mocker.MagicMock()
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = state.action()
+        world = {"factions": [], "locations": []}
+        generated.set_result(world)
+
+        mock_game.world_pool.pop.assert_not_called()
+        mock_game.load_world.assert_called_once_with(world)
+        assert new_state._generation_runs[0].done()  # noqa: SLF001
+        assert new_state._timeout == 2 * InitializeGameWorld.SHARD_TIMEOUT  # noqa: SLF001
+
+    def test_action_makes_up_a_procedural_world_without_runs(self, mocker, mock_game):
+        mock_world_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        mock_game.world_source = "procedural"
+        mock_game.world_pool = mocker.MagicMock()
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = state.action()
+
+        mock_game.load_world.assert_called_once_with(ProceduralWorldGenerator(seed=1).generate())
+        mock_world_generator.assert_not_called()
+        mock_game.world_pool.pop.assert_not_called()
+        assert new_state._generation_runs == []  # noqa: SLF001
+        assert new_state._world_cache is None  # noqa: SLF001
+
+    def test_action_makes_up_a_procedural_world_the_size_of_the_spec(self, mocker, mock_game):
+        mock_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.ShardedWorldGenerator")
+        mock_game.world_source = "procedural"
+        mock_game.world_spec = WorldSpec(districts=("Chiba", "Ninsei"), faction_tiers=("gangs",))
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        state.action()
+
+        world = mock_game.load_world.call_args.args[0]
+        assert (len(world["factions"]), len(world["locations"])) == (4, 16)
+        mock_generator.assert_not_called()
+
+    def test_action_waits_for_runs_with_the_fallback_time(self, mocker, mock_game):
+        mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        mock_game.world_fallback_seconds = 5.0
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        assert state.action()._fallback_after == 5.0  # noqa: SLF001, PLR2004
+
+    def test_aaction_reads_the_pool_and_cache_off_the_event_loop(self, mocker, mock_game):
+        mock_world_generator = mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        threads = []
+        mock_game.world_pool = mocker.MagicMock()
+        mock_game.world_pool.pop.side_effect = lambda: threads.append(threading.current_thread())
+        mock_game.world_cache = mocker.MagicMock()
+        mock_game.world_cache.sample.side_effect = lambda: threads.append(threading.current_thread())
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = asyncio.run(state.aaction())
+
+        assert len(threads) == 2  # noqa: PLR2004
+        assert threading.main_thread() not in threads
+        mock_game.world_pool.refill.assert_called_once_with(mock_world_generator.return_value)
+        mock_game.load_world.assert_not_called()
+        assert new_state._generation_runs == mock_world_generator.return_value.start_runs.return_value  # noqa: SLF001
+
+    def test_aaction_loads_a_pooled_world(self, mocker, mock_game):
+        mocker.patch("sprawl_runner.game.states.initialize_game_world.WorldGenerator")
+        mock_game.world_pool = mocker.MagicMock()
+        mock_game.world_cache = mocker.MagicMock()
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = asyncio.run(state.aaction())
+
+        mock_game.load_world.assert_called_once_with(mock_game.world_pool.pop.return_value)
+        mock_game.world_cache.sample.assert_not_called()
+        assert new_state._world_cache is mock_game.world_cache  # noqa: SLF001
+
+    def test_aaction_makes_up_a_procedural_world_off_the_event_loop(self, mocker, mock_game):
+        mock_game.world_source = "procedural"
+        generate = mocker.spy(mock_game.procedural_world, "generate")
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        new_state = asyncio.run(state.aaction())
+
+        mock_game.load_world.assert_called_once_with(generate.spy_return)
+        assert new_state._generation_runs == []  # noqa: SLF001
+
+    def test_action_reports_shard_progress(self, mock_game):
+        state = InitializeGameWorld()
+        state.game = mock_game
+
+        state._report_shard_progress(ShardProgress(WorldShard("locations", "Chiba", 4), 2, 5, 3))  # noqa: SLF001
+
+        mock_game.emit.assert_called_once_with("... 2/5 locations for Chiba (+3)")
+
+
+class TestWaitForGameWorldReady:
+    def test_action_moves_to_play_scene_when_world_is_ready(self, mock_game):
+        mock_game.world_ready.set_result(None)
+        state = WaitForGameWorldReady([Future(), Future()])
+        state.game = mock_game
+
+        new_state = state.action()
+
+        assert type(new_state) is PlayScene
+
+    def test_action_caches_a_generated_world(self, mocker, mock_game):
+        mock_game.world_ready.set_result(None)
+        mock_world_cache = mocker.MagicMock()
+        state = WaitForGameWorldReady([], mock_world_cache)
+        state.game = mock_game
+
+        state.action()
+
+        mock_world_cache.store.assert_called_once_with(
+            {"factions": mock_game.factions, "locations": mock_game.locations}
+        )
+
+    def test_action_reports_round_trips_of_a_generated_world(self, mock_game):
+        mock_game.world_ready.set_result(None)
+        round_trips = RoundTrips()
+        round_trips.count = 5
+        state = WaitForGameWorldReady([], None, round_trips)
+        state.game = mock_game
+
+        state.action()
+
+        mock_game.emit.assert_any_call("World generated in 5 API round trips.")
+
+    def test_action_plays_on_when_caching_fails(self, mocker, mock_game):
+        mock_game.world_ready.set_result(None)
+        mock_world_cache = mocker.MagicMock()
+        mock_world_cache.store.side_effect = OSError("disk full")
+        state = WaitForGameWorldReady([], mock_world_cache)
+        state.game = mock_game
+
+        assert type(state.action()) is PlayScene
+
+    def test_action_does_not_wait_for_runs_once_world_is_ready(self, mocker, mock_game):
+        run = Future()
+        run.add_done_callback(lambda _: None)
+        mock_wait = mocker.patch("sprawl_runner.game.states.initialize_game_world.wait")
+
+        def register_world(*_args, **_kwargs):
+            mock_game.world_ready.set_result(None)
+            return {mock_game.world_ready}, {run}
+
+        mock_wait.side_effect = register_world
+        state = WaitForGameWorldReady([run])
+        state.game = mock_game
+
+        new_state = state.action()
+
+        assert type(new_state) is PlayScene
+        mock_wait.assert_called_once()
+        assert not run.done()
+
+    def test_action_ends_game_when_runs_finish_without_a_world(self, mocker, mock_game):
+        run = Future()
+        run.set_result(None)
+        mock_world_cache = mocker.MagicMock()
+        state = WaitForGameWorldReady([run], mock_world_cache)
+        state.game = mock_game
+
+        new_state = state.action()
+
+        assert type(new_state) is EndGame
+        mock_world_cache.store.assert_not_called()
+        mock_game.emit.assert_called_with("The Matrix failed to render the sprawl. Try again later.")
+
+    def test_aaction_moves_to_play_scene_once_the_world_is_ready(self, mock_game):
+        run = Future()
+        state = WaitForGameWorldReady([run])
+        state.game = mock_game
+
+        async def wait_for_world():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, mock_game.world_ready.set_result, None)
+            return await state.aaction()
+
+        assert type(asyncio.run(wait_for_world())) is PlayScene
+        assert not run.done()
+
+    def test_aaction_ends_game_when_runs_finish_without_a_world(self, mock_game):
+        run = Future()
+        run.set_result(None)
+        state = WaitForGameWorldReady([run])
+        state.game = mock_game
+
+        assert type(asyncio.run(state.aaction())) is EndGame
+
+    def test_aaction_ends_game_when_deadline_passes(self, mock_game):
+        state = WaitForGameWorldReady([Future()], timeout=0.01)
+        state.game = mock_game
+
+        assert type(asyncio.run(state.aaction())) is EndGame
+
+    def test_action_makes_up_the_world_when_the_runs_are_too_slow(self, mocker, mock_game):
+        run = Future()
+        mock_world_cache = mocker.MagicMock()
+        mock_game.factions = []
+        mock_game.locations = []
+        mock_game.load_world.side_effect = lambda _: mock_game.world_ready.set_result(None)
+        state = WaitForGameWorldReady([run], mock_world_cache, RoundTrips(), fallback_after=0.01)
+        state.game = mock_game
+
+        new_state = state.action()
+
+        assert type(new_state) is PlayScene
+        assert run.cancelled()
+        mock_game.load_world.assert_called_once_with(ProceduralWorldGenerator(seed=1).generate())
+        mock_game.metrics.increment.assert_called_once_with("world_fallbacks_total")
+        mock_world_cache.store.assert_not_called()
+        assert not any("round trips" in call.args[0] for call in mock_game.emit.call_args_list)
+
+    def test_aaction_only_makes_up_what_the_runs_did_not_register(self, mock_game):
+        run = Future()
+        run.set_result(None)
+        mock_game.locations = []
+        mock_game.load_world.side_effect = lambda _: mock_game.world_ready.set_result(None)
+        state = WaitForGameWorldReady([run], fallback_after=30.0)
+        state.game = mock_game
+
+        assert type(asyncio.run(state.aaction())) is PlayScene
+
+        world = mock_game.load_world.call_args.args[0]
+        assert world["factions"] == []
+        assert world["locations"] == ProceduralWorldGenerator(seed=1).generate()["locations"]
+
+    def test_action_ends_game_when_deadline_passes(self, mocker, mock_game):
+        mocker.patch.object(WaitForGameWorldReady, "WORLD_READY_TIMEOUT", 0.01)
+        state = WaitForGameWorldReady([Future()])
+        state.game = mock_game
+
+        new_state = state.action()
+
+        assert type(new_state) is EndGame
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from sprawl_runner.game.states.end_game import EndGame
+from sprawl_runner.game.states.play_scene import PlayScene
+
+
+class TestPlayScene:
+    @pytest.fixture
+    def mock_game(self, mocker):
+        mock_game = mocker.MagicMock()
+        mock_game.locations = [{"name": "Chatsubo", "type": "Employment", "description": "A bar."}]
+        return mock_game
+
+    @pytest.fixture
+    def state(self, mock_game):
+        state = PlayScene()
+        state.game = mock_game
+        return state
+
+    def test_action_emits_whole_opening_scene_when_not_streamed(self, mocker, mock_game, state):
+        mock_game.get_player_input.return_value = "q"
+        mock_game.start_opening_scene.return_value.wait.return_value = "narrative"
+
+        new_state = state.action()
+
+        assert type(new_state) is EndGame
+        mock_game.start_opening_scene.return_value.wait.assert_called_once_with(
+            state._emit_narrative_delta  # noqa: SLF001
+        )
+        mock_game.message_bus.process_narrative_message.assert_not_called()
+        mock_game.emit.assert_called_once_with("\n\n=> narrative\n\n")
+        mock_game.emit_partial.assert_not_called()
+
+    def test_action_cancels_outstanding_runs_on_quit(self, mocker, mock_game, state):
+        mock_game.get_player_input.return_value = "q"
+
+        state.action()
+
+        mock_game.message_bus.cancel_runs.assert_called_once_with()
+
+    def test_action_emits_partial_opening_scene_when_streamed(self, mocker, mock_game, state):
+        mock_game.get_player_input.return_value = "q"
+
+        def wait(on_delta):
+            on_delta("nar")
+            on_delta("rative")
+            return "narrative"
+
+        mock_game.start_opening_scene.return_value.wait.side_effect = wait
+
+        state.action()
+
+        mock_game.emit_partial.assert_has_calls([mocker.call("\n\n=> "), mocker.call("nar"), mocker.call("rative")])
+        mock_game.emit.assert_called_once_with("\n\n")
+
+    def test_action_narrates_player_input_until_quit(self, mocker, mock_game, state):
+        mock_game.get_player_input.side_effect = ["", "look around", "q"]
+        mock_game.message_bus.process_narrative_message.return_value = "narrative"
+
+        state.action()
+
+        mock_game.message_bus.process_narrative_message.assert_called_once_with(
+            "look around",
+            on_delta=state._emit_narrative_delta,  # noqa: SLF001
+        )
+        mock_game.get_player_input.assert_called_with(">1> ")
+
+    def test_aaction_narrates_without_blocking_until_quit(self, mocker, mock_game, state):
+        mock_game.aget_player_input = mocker.AsyncMock(side_effect=["", "look around", "q"])
+        mock_game.start_opening_scene.return_value.await_message = mocker.AsyncMock(return_value="opening")
+        mock_game.message_bus.aprocess_narrative_message = mocker.AsyncMock(return_value="narrative")
+        mock_game.message_bus.acancel_runs = mocker.AsyncMock()
+
+        new_state = asyncio.run(state.aaction())
+
+        assert type(new_state) is EndGame
+        mock_game.message_bus.aprocess_narrative_message.assert_awaited_once_with(
+            "look around",
+            on_delta=state._emit_narrative_delta,  # noqa: SLF001
+        )
+        mock_game.emit.assert_has_calls([mocker.call("\n\n=> opening\n\n"), mocker.call("\n\n=> narrative\n\n")])
+        mock_game.message_bus.acancel_runs.assert_awaited_once_with()
+        mock_game.message_bus.process_narrative_message.assert_not_called()
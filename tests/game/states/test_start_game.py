@@ -1,20 +1,35 @@
+import asyncio
+
 from sprawl_runner.game.states.end_game import EndGame
 from sprawl_runner.game.states.start_game import StartGame
 
 
 class TestStartGame:
     def test_action_returns_different_state_if_input_is_not_q(self, mocker):
-        mocker.patch("builtins.input", return_value="")
         state = StartGame()
+        state.game = mocker.MagicMock()
+        state.game.get_player_input.return_value = ""
 
         new_state = state.action()
 
         assert type(new_state) != type(state)
 
     def test_action_returns_end_game_state_if_input_is_q(self, mocker):
-        mocker.patch("builtins.input", return_value="q")
         state = StartGame()
+        state.game = mocker.MagicMock()
+        state.game.get_player_input.return_value = "q"
 
         new_state = state.action()
 
         assert type(new_state) is EndGame
+        state.game.get_player_input.assert_called_once_with("Hit Enter to start or q to exit: ")
+
+    def test_aaction_reads_input_from_the_console(self, mocker):
+        state = StartGame()
+        state.game = mocker.MagicMock()
+        state.game.aget_player_input = mocker.AsyncMock(return_value="q")
+
+        new_state = asyncio.run(state.aaction())
+
+        assert type(new_state) is EndGame
+        state.game.aget_player_input.assert_awaited_once_with("Hit Enter to start or q to exit: ")
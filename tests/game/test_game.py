@@ -1,10 +1,14 @@
+import asyncio
+
 import pytest
 
 from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus
 from sprawl_runner.ai.constants import TOOL_REGISTER_FACTIONS, TOOL_REGISTER_LOCATIONS
+from sprawl_runner.ai.tool_dispatch import get_tool_handler_traits
 from sprawl_runner.consoles.console import Console
 from sprawl_runner.game.game import Game
 from sprawl_runner.game.states.game_state import GameState
+from sprawl_runner.telemetry.tracing import MemorySpanExporter, Tracer
 
 
 class TestGame:
@@ -42,6 +46,28 @@ class TestGame:
 
         mock_console.emit.assert_called_once_with(data)
 
+    def test_emit_partial_sends_data_to_console(self, mock_console):
+        game = Game(mock_console)
+        data = "te"
+
+        game.emit_partial(data)
+
+        mock_console.emit_partial.assert_called_once_with(data)
+
+    def test_emit_thinking_sends_the_indicator_to_console(self, mock_console):
+        game = Game(mock_console)
+
+        game.emit_thinking()
+
+        mock_console.emit.assert_called_once_with("...[thinking]...")
+
+    def test_get_player_input_reads_from_console(self, mock_console):
+        game = Game(mock_console)
+        mock_console.get_player_input.return_value = "look around"
+
+        assert game.get_player_input(">0> ") == "look around"
+        mock_console.get_player_input.assert_called_once_with(">0> ")
+
     def test_get_tool_handlers_returns_correct_handlers(self, mock_console):
         game = Game(mock_console)
 
@@ -61,6 +87,12 @@ class TestGame:
         for tool_name, handler in tool_handlers:
             assert callable(handler), f"The handler for {tool_name} should be a callable method."
 
+    def test_tool_handlers_run_one_at_a_time(self, mock_console):
+        # They share the game's lists and flags, so none may run on a worker thread.
+        game = Game(mock_console)
+
+        assert not any(get_tool_handler_traits(handler).thread_safe for _, handler in game.get_tool_handlers())
+
     def test_message_bus_getter_raises_when_none(self, mock_console):
         game = Game(mock_console)
 
@@ -97,6 +129,53 @@ class TestGame:
 
         mock_state.transition.assert_called_once_with()
 
+    def test_play_traces_each_iteration(self, mocker, mock_console, mock_state):
+        type(mock_state).is_terminal_state = mocker.PropertyMock(side_effect=[False, True])
+        game = Game(mock_console)
+        game.tracer = Tracer(MemorySpanExporter())
+        game._state = mock_state  # noqa: SLF001
+
+        game.play()
+
+        (span,) = game.tracer.exporter.spans
+        assert span.name == "game.iteration"
+        assert span.attributes == {"state": type(mock_state).__name__}
+
+    def test_play_closes_message_bus_when_game_ends(self, mock_console, mock_state, mock_message_bus):
+        game = Game(mock_console)
+        game.message_bus = mock_message_bus
+        game._state = mock_state  # noqa: SLF001
+
+        game.play()
+
+        mock_message_bus.close.assert_called_once_with()
+
+    def test_aplay_transitions_until_terminal_and_closes_the_bus(self, mocker, mock_console, mock_message_bus):
+        mock_state = mocker.MagicMock()
+        type(mock_state).is_terminal_state = mocker.PropertyMock(side_effect=[False, True])
+        mock_state.atransition = mocker.AsyncMock()
+        mock_message_bus.aclose = mocker.AsyncMock()
+        game = Game(mock_console)
+        game.message_bus = mock_message_bus
+        game._state = mock_state  # noqa: SLF001
+
+        asyncio.run(game.aplay())
+
+        mock_state.atransition.assert_awaited_once_with()
+        mock_message_bus.aclose.assert_awaited_once_with()
+        mock_message_bus.close.assert_not_called()
+
+    def test_aplay_ends_only_this_game_when_stuck(self, mocker, mock_console):
+        mock_state = mocker.MagicMock(is_terminal_state=False)
+        mock_state.atransition = mocker.AsyncMock()
+        game = Game(mock_console)
+        game._state = mock_state  # noqa: SLF001
+
+        asyncio.run(game.aplay())
+
+        assert mock_state.atransition.await_count == Game.MAX_ITERS_WITHOUT_STATE_CHANGE + 1
+        mock_console.emit.assert_called_once_with("There was a glitch in the Matrix.")
+
     def test_play_raises_runtime_error_when_no_state_is_set(self, mock_console):
         game = Game(mock_console)
         assert game._state is None  # noqa: SLF001
@@ -167,6 +246,70 @@ class TestGame:
         assert result == expected_result, "register_locations should return 'OK' even with empty locations list"
         assert len(game.locations) == 0, "No locations should have been registered."
 
+    def test_world_ready_resolves_once_factions_and_locations_are_registered(self, mock_console):
+        game = Game(mock_console)
+
+        game.register_factions({"factions": []})
+        assert not game.world_ready.done()
+
+        game.register_locations({"locations": []})
+        assert game.world_ready.done()
+
+        game.register_locations({"locations": []})
+        assert game.world_ready.result() is None
+
+    def test_load_world_registers_a_whole_world(self, mock_console):
+        game = Game(mock_console)
+        faction = {"name": "Faction1", "description": "Desc1", "motivation": "Motivation1"}
+        location = {"name": "Location1", "type": "rest", "description": "Desc1"}
+
+        game.load_world({"factions": [faction], "locations": [location]})
+
+        assert game.factions == [faction]
+        assert game.locations == [location]
+        assert game.world_ready.done()
+
+    def test_get_world_state_lists_factions_and_locations(self, mock_console):
+        game = Game(mock_console)
+        game.load_world(
+            {
+                "factions": [{"name": "Lo-Teks", "description": "Low tech", "motivation": "Freedom"}],
+                "locations": [{"name": "The Chat", "type": "employment", "description": "A bar"}],
+            }
+        )
+
+        assert game.get_world_state() == "Factions:\n- Lo-Teks - Low tech\nLocations:\n- The Chat (employment) - A bar"
+
+    def test_register_locations_starts_the_opening_scene_once_there_is_employment(
+        self, mocker, mock_console, mock_message_bus
+    ):
+        mocker.patch("sprawl_runner.game.game.data.load_data", return_value="{locations}")
+        game = Game(mock_console)
+        game.message_bus = mock_message_bus
+
+        game.register_locations({"locations": [{"name": "Motel", "type": "rest", "description": "Cheap."}]})
+        mock_message_bus.start_narrative_message.assert_not_called()
+
+        game.register_locations({"locations": [{"name": "Chatsubo", "type": "employment", "description": "A bar."}]})
+        game.register_locations({"locations": [{"name": "Villa", "type": "Employment", "description": "Big."}]})
+
+        mock_message_bus.start_narrative_message.assert_called_once_with("- Chatsubo - A bar.\n", run_class="opening")
+        assert game.opening_scene is mock_message_bus.start_narrative_message.return_value
+
+    def test_start_opening_scene_lists_employment_locations(self, mocker, mock_console, mock_message_bus):
+        mocker.patch("sprawl_runner.game.game.data.load_data", return_value="{locations}")
+        game = Game(mock_console)
+        game.message_bus = mock_message_bus
+        game.locations = [
+            {"name": "Motel", "type": "rest", "description": "Cheap."},
+            {"name": "Chatsubo", "type": "Employment", "description": "A bar."},
+        ]
+
+        opening_scene = game.start_opening_scene()
+
+        assert opening_scene is game.start_opening_scene()
+        mock_message_bus.start_narrative_message.assert_called_once_with("- Chatsubo - A bar.\n", run_class="opening")
+
     def test_validate_does_not_raise_when_game_instance_is_valid(self, mock_console, mock_message_bus):
         game = Game(mock_console)
         game.message_bus = mock_message_bus
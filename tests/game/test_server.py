@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from sprawl_runner.consoles.network_console import start_tcp_server
+from sprawl_runner.game.game import Game
+from sprawl_runner.game.server import GameServer
+from sprawl_runner.game.states.start_game import StartGame
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+class FakeMessageBus:
+    def __init__(self):
+        self.closed = 0
+
+    async def aclose(self):
+        self.closed += 1
+
+
+@pytest.fixture
+def game_factory():
+    def create_game(console):
+        game = Game(console)
+        game.message_bus = FakeMessageBus()
+        game.change_state(StartGame())
+        return game
+
+    return create_game
+
+
+class TestGameServer:
+    def test_sessions_play_concurrently_on_one_loop(self, game_factory):
+        server = GameServer(game_factory)
+
+        async def serve():
+            sessions = [server.open_session() for _ in range(300)]
+            await asyncio.sleep(0)
+            waiting = len(server)
+            for session in sessions:
+                session.console.feed("q")
+            await asyncio.gather(*(session.task for session in sessions))
+            return sessions, waiting
+
+        sessions, waiting = asyncio.run(serve())
+
+        assert waiting == 300  # noqa: PLR2004
+        assert len(server) == 0
+        assert sessions[0].console.read_output() == "Hit Enter to start or q to exit: "
+        assert sessions[0].game.message_bus.closed == 1
+        assert server._metrics.counter("sessions_closed_total", outcome="ended") == 300  # noqa: PLR2004, SLF001
+
+    def test_open_session_refuses_players_once_full(self, game_factory):
+        server = GameServer(game_factory, max_sessions=1)
+
+        async def serve():
+            server.open_session()
+            with pytest.raises(RuntimeError, match="full"):
+                server.open_session()
+            await server.aclose()
+
+        asyncio.run(serve())
+
+        assert len(server) == 0
+
+    def test_a_failing_game_ends_only_its_own_session(self, mocker, game_factory):
+        server = GameServer(game_factory)
+
+        async def serve():
+            broken, healthy = server.open_session(), server.open_session()
+            broken.game._state.aaction = mocker.AsyncMock(side_effect=RuntimeError("boom"))  # noqa: SLF001
+            broken.console.feed("")
+            await asyncio.wait_for(broken.task, 1)
+            running = not healthy.task.done()
+            await server.aclose()
+            return broken, running
+
+        broken, running = asyncio.run(serve())
+
+        assert running
+        assert "boom" in broken.console.read_output()
+
+    def test_stats_report_each_session_without_what_they_share(self, game_factory):
+        shared = ["x" * 100_000]
+        server = GameServer(game_factory, shared=[shared])
+
+        async def serve():
+            session = server.open_session()
+            session.game.factions.append(shared)
+            await asyncio.sleep(0)
+            stats = server.stats()
+            await server.aclose()
+            return session, stats
+
+        session, (stats,) = asyncio.run(serve())
+
+        assert stats.session_id == session.session_id
+        assert stats.state == "StartGame"
+        assert 0 < stats.memory_bytes < 100_000  # noqa: PLR2004
+
+    def test_stats_are_exported_as_gauges(self, game_factory):
+        metrics = MetricsRegistry()
+        server = GameServer(game_factory, metrics=metrics)
+
+        async def serve():
+            session = server.open_session()
+            await asyncio.sleep(0)
+            exported = metrics.to_prometheus()
+            await server.aclose()
+            return session, exported
+
+        session, exported = asyncio.run(serve())
+
+        labels = f'{{session_id="{session.session_id}",state="StartGame"}}'
+        assert "server_sessions 1" in exported.splitlines()
+        assert f"server_session_memory_bytes{labels}" in exported
+        assert f"server_session_age_seconds{labels}" in exported
+        metrics.snapshot()
+        assert metrics.gauge("server_sessions") == 0
+        assert metrics.gauge("server_session_memory_bytes", session_id=session.session_id, state="StartGame") is None
+
+    def test_serve_plays_a_session_over_a_connection(self, game_factory):
+        server = GameServer(game_factory)
+
+        async def serve():
+            listener = await start_tcp_server(server.serve, "127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            prompt = await reader.readuntil(b": ")
+            writer.write(b"q\r\n")
+            await writer.drain()
+            rest = await reader.read()
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+            return prompt, rest
+
+        prompt, rest = asyncio.run(serve())
+
+        assert prompt == b"Hit Enter to start or q to exit: "
+        assert rest == b""
+        assert len(server) == 0
+        assert server._metrics.counter("sessions_closed_total", outcome="ended") == 1  # noqa: SLF001
+
+    def test_serve_closes_the_session_when_the_player_goes_away(self, game_factory):
+        server = GameServer(game_factory)
+
+        async def serve():
+            listener = await start_tcp_server(server.serve, "127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await reader.readuntil(b": ")
+            opened = len(server)
+            writer.close()
+            await writer.wait_closed()
+            while len(server):
+                await asyncio.sleep(0.01)
+            listener.close()
+            await listener.wait_closed()
+            return opened
+
+        assert asyncio.run(asyncio.wait_for(serve(), 5)) == 1
+        assert server._metrics.counter("sessions_closed_total", outcome="disconnected") == 1  # noqa: SLF001
@@ -0,0 +1,59 @@
+import random
+
+from sprawl_runner.standin.script import StandInScript, ToolCallRule, sample_arguments
+
+
+class TestToolCallRule:
+    def test_match_count_reads_the_count_from_the_content(self):
+        rule = ToolCallRule(r"register (\d+) factions", "register_factions")
+
+        assert rule.match_count("Please generate and register 3 factions.") == 3
+
+    def test_match_count_uses_the_default_count_without_a_group(self):
+        rule = ToolCallRule(r"factions", "register_factions", count=2)
+
+        assert rule.match_count("Make some factions") == 2
+
+    def test_match_count_returns_none_without_a_match(self):
+        rule = ToolCallRule(r"register (\d+) factions", "register_factions")
+
+        assert rule.match_count("Describe the bar") is None
+
+
+class TestStandInScript:
+    def test_from_dict_builds_rules(self):
+        script = StandInScript.from_dict(
+            {"in_progress_seconds": 1.5, "rules": [{"pattern": "go", "tool_name": "register_factions"}]}
+        )
+
+        assert script.in_progress_seconds == 1.5  # noqa: PLR2004
+        assert script.rules == (ToolCallRule("go", "register_factions"),)
+
+    def test_tool_calls_follow_the_bundled_schemas(self):
+        script = StandInScript()
+
+        tool_calls = script.tool_calls_for("Please generate and register 4 locations, only 2 should be Rest.")
+
+        assert [name for name, _ in tool_calls] == ["register_locations"]
+        locations = tool_calls[0][1]["locations"]
+        assert len(locations) == 4  # noqa: PLR2004
+        assert {location["type"] for location in locations} == {"rest", "employment"}
+        assert all(set(location) == {"name", "type", "description"} for location in locations)
+
+    def test_tool_calls_are_reproducible(self):
+        content = "Please generate and register 4 factions."
+
+        assert StandInScript().tool_calls_for(content) == StandInScript().tool_calls_for(content)
+        assert StandInScript(seed=1).tool_calls_for(content) != StandInScript().tool_calls_for(content)
+
+    def test_narrative_messages_need_no_tool_calls(self):
+        assert StandInScript().tool_calls_for("I walk into the bar.") == []
+
+
+def test_sample_arguments_cycles_enum_values():
+    schema = {
+        "type": "object",
+        "properties": {"items": {"type": "array", "items": {"type": "string", "enum": ["a", "b"]}}},
+    }
+
+    assert sample_arguments(schema, 3, random.Random(0)) == {"items": ["a", "b", "a"]}
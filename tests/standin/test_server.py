@@ -0,0 +1,162 @@
+import asyncio
+
+import openai
+import pytest
+
+from sprawl_runner.ai.assistant import create_assistant
+from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus
+from sprawl_runner.ai.client_manager import ClientOptions, OpenAIClientManager
+from sprawl_runner.ai.compaction import CompactionOptions
+from sprawl_runner.ai.polling import PollingOptions, PollingStrategy
+from sprawl_runner.standin.script import StandInScript
+from sprawl_runner.standin.server import AssistantsStandIn
+
+FAST_SCRIPT = StandInScript(queued_seconds=0.01, in_progress_seconds=0.02, after_tool_outputs_seconds=0.01)
+
+
+@pytest.fixture
+def stand_in():
+    with AssistantsStandIn(FAST_SCRIPT) as stand_in:
+        yield stand_in
+
+
+@pytest.fixture
+def client_manager(stand_in):
+    client_manager = OpenAIClientManager("test-key", ClientOptions(base_url=stand_in.base_url))
+    yield client_manager
+    client_manager.close()
+
+
+@pytest.fixture
+def message_bus(client_manager):
+    assistant_id = create_assistant("test", "test-key", "test-model", "test", [], client_manager.sync_client)
+    polling = PollingStrategy(PollingOptions(initial_interval=0.01, max_interval=0.05))
+    message_bus = AssistantMessageBus("test-key", assistant_id, client_manager, polling=polling)
+    yield message_bus
+    message_bus.close()
+
+
+class TestAssistantsStandIn:
+    def test_assistants_can_be_created_and_updated(self, client_manager):
+        client = client_manager.sync_client
+
+        assistant = client.beta.assistants.create(name="test", model="test-model", instructions="old")
+        client.beta.assistants.update(assistant.id, instructions="new")
+
+        assert client.beta.assistants.retrieve(assistant.id).instructions == "new"
+
+    def test_runs_move_through_their_statuses(self, client_manager):
+        client = client_manager.sync_client
+        thread = client.beta.threads.create(messages=[{"role": "user", "content": "Hello"}])
+
+        run = client.beta.threads.runs.create(thread_id=thread.id, assistant_id="asst")
+        assert run.status == "queued"
+
+        run = client.beta.threads.runs.poll(run.id, thread_id=thread.id, poll_interval_ms=10)
+        assert run.status == "completed"
+        assert run.usage.total_tokens > 0
+
+        messages = client.beta.threads.messages.list(thread_id=thread.id, order="desc", limit=1)
+        assert messages.data[0].role == "assistant"
+        assert messages.data[0].content[0].text.value == FAST_SCRIPT.narrative
+        assert messages.has_more
+
+    def test_tool_runs_require_action_until_outputs_are_submitted(self, client_manager):
+        client = client_manager.sync_client
+        thread = client.beta.threads.create(messages=[{"role": "user", "content": "Please register 2 factions."}])
+
+        run = client.beta.threads.runs.create_and_poll(thread_id=thread.id, assistant_id="asst", poll_interval_ms=10)
+        assert run.status == "requires_action"
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        assert [tool_call.function.name for tool_call in tool_calls] == ["register_factions"]
+
+        run = client.beta.threads.runs.submit_tool_outputs_and_poll(
+            run_id=run.id,
+            thread_id=thread.id,
+            tool_outputs=[{"tool_call_id": tool_calls[0].id, "output": "OK"}],
+            poll_interval_ms=10,
+        )
+        assert run.status == "completed"
+
+    def test_tool_outputs_are_rejected_when_not_required(self, client_manager):
+        client = client_manager.sync_client
+        thread = client.beta.threads.create()
+        run = client.beta.threads.runs.create(thread_id=thread.id, assistant_id="asst")
+
+        with pytest.raises(openai.BadRequestError):
+            client.beta.threads.runs.submit_tool_outputs(run_id=run.id, thread_id=thread.id, tool_outputs=[])
+
+    def test_runs_can_be_cancelled(self, client_manager):
+        client = client_manager.sync_client
+        thread = client.beta.threads.create(messages=[{"role": "user", "content": "Please register 2 factions."}])
+        run = client.beta.threads.runs.create_and_poll(thread_id=thread.id, assistant_id="asst", poll_interval_ms=10)
+
+        run = client.beta.threads.runs.cancel(run_id=run.id, thread_id=thread.id)
+
+        assert run.status == "cancelled"
+
+    def test_unknown_objects_are_not_found(self, client_manager):
+        with pytest.raises(openai.NotFoundError):
+            client_manager.sync_client.beta.threads.runs.retrieve("run_missing", thread_id="thread_missing")
+
+    def test_request_counts_are_kept_per_endpoint(self, stand_in, client_manager):
+        client_manager.sync_client.beta.threads.create()
+        client_manager.sync_client.beta.threads.create()
+
+        assert stand_in.request_counts == {"threads.create": 2}
+
+
+class TestMessageBusAgainstStandIn:
+    def test_tool_message_is_resolved_with_registered_handler(self, message_bus):
+        registered = []
+
+        def register_locations(arguments):
+            registered.extend(arguments["locations"])
+            return "OK"
+
+        message_bus.register_tool_handler("register_locations", register_locations)
+
+        run = message_bus.process_tool_message_async("Please generate and register 4 locations.").result(timeout=10)
+
+        assert run.status == "completed"
+        assert len(registered) == 4  # noqa: PLR2004
+
+    def test_narrative_message_is_polled_to_completion(self, message_bus):
+        assert message_bus.process_narrative_message("I walk into the bar.") == FAST_SCRIPT.narrative
+
+    def test_narrative_is_compacted_into_a_fresh_thread(self, client_manager, message_bus):
+        message_bus._compaction = CompactionOptions(max_turns=3, keep_turns=1)  # noqa: SLF001
+        message_bus.set_narrative_context(lambda: "Factions:\n- Lo-Teks")
+
+        for player_input in ("I wake up.", "I take the deck.", "I leave the room.", "I hail a cab."):
+            assert message_bus.process_narrative_message(player_input) == FAST_SCRIPT.narrative
+
+        (event,) = message_bus.compaction_events
+        assert event.turns_before == 3  # noqa: PLR2004
+        assert event.turns_after == 1
+        assert event.new_thread_id == message_bus._narrative_thread.id  # noqa: SLF001
+        seed, player_message, _ = client_manager.sync_client.beta.threads.messages.list(
+            event.new_thread_id, order="asc"
+        ).data
+        assert "Lo-Teks" in seed.content[0].text.value
+        assert "I leave the room." in seed.content[0].text.value
+        assert player_message.content[0].text.value == "I hail a cab."
+
+    def test_narrative_message_can_be_streamed(self, client_manager, message_bus):
+        message_bus._stream_narrative = True  # noqa: SLF001
+        deltas = []
+
+        message = message_bus.process_narrative_message("I walk into the bar.", on_delta=deltas.append)
+
+        assert message == FAST_SCRIPT.narrative
+        assert "".join(deltas) == FAST_SCRIPT.narrative
+        assert len(deltas) > 1
+
+
+def test_async_client_can_use_stand_in(client_manager):
+    async def create_thread():
+        thread = await client_manager.client.beta.threads.create()
+        await client_manager.aclose()
+        return thread
+
+    assert asyncio.run(create_thread()).id.startswith("thread_")
@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+
+from sprawl_runner.telemetry.http_hooks import RETRY_COUNT_HEADER, get_endpoint, http_event_hooks
+from sprawl_runner.telemetry.metrics import MetricsRegistry
+
+
+def respond(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={})
+
+
+def test_get_endpoint_replaces_object_ids():
+    url = httpx.URL("https://api.openai.com/v1/threads/thread_abc123/runs/run_standin000002")
+
+    assert get_endpoint(url) == "/threads/{id}/runs/{id}"
+
+
+def test_sync_hooks_time_and_count_requests():
+    metrics = MetricsRegistry()
+    client = httpx.Client(transport=httpx.MockTransport(respond), event_hooks=http_event_hooks(metrics, is_async=False))
+
+    client.get("https://api.openai.com/v1/threads/thread_abc/runs/run_abc")
+    client.get("https://api.openai.com/v1/threads/thread_abc/runs/run_abc", headers={RETRY_COUNT_HEADER: "1"})
+
+    labels = {"method": "GET", "endpoint": "/threads/{id}/runs/{id}"}
+    assert metrics.histogram("openai_request_seconds", **labels).count == 2  # noqa: PLR2004
+    assert metrics.counter("openai_requests_total", status=200, **labels) == 2  # noqa: PLR2004
+    assert metrics.counter("openai_retries_total", **labels) == 1
+
+
+def test_async_hooks_time_and_count_requests():
+    metrics = MetricsRegistry()
+
+    async def send() -> None:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(respond), event_hooks=http_event_hooks(metrics, is_async=True)
+        ) as client:
+            await client.post("https://api.openai.com/v1/threads/runs", json={})
+
+    asyncio.run(send())
+
+    assert metrics.histogram("openai_request_seconds", method="POST", endpoint="/threads/runs").count == 1
@@ -0,0 +1,28 @@
+import sys
+
+from sprawl_runner.telemetry.memory import get_deep_size
+
+
+class Holder:
+    def __init__(self, items):
+        self.items = items
+
+
+def test_get_deep_size_counts_everything_reachable():
+    items = ["x" * 1000]
+
+    assert get_deep_size(Holder(items)) > sys.getsizeof(items[0])
+
+
+def test_get_deep_size_leaves_out_excluded_objects():
+    shared = ["x" * 10_000]
+    holder = Holder(shared)
+
+    assert get_deep_size(holder, exclude=[shared]) < 10_000  # noqa: PLR2004
+    assert get_deep_size(holder) > 10_000  # noqa: PLR2004
+
+
+def test_get_deep_size_counts_shared_parts_once():
+    part = "x" * 10_000
+
+    assert get_deep_size([part, part]) < 20_000  # noqa: PLR2004
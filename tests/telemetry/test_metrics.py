@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from sprawl_runner.telemetry.metrics import COUNT_BUCKETS, TOKEN_BUCKETS, Histogram, MetricsRegistry, default_buckets
+
+
+class TestHistogram:
+    def test_observe_counts_values_into_buckets(self):
+        histogram = Histogram((1.0, 5.0))
+
+        for value in (0.5, 1.0, 3.0, 10.0):
+            histogram.observe(value)
+
+        assert histogram.counts == [2, 1, 1]
+        assert (histogram.count, histogram.sum, histogram.min, histogram.max) == (4, 14.5, 0.5, 10.0)
+        assert histogram.cumulative_counts() == [("1.0", 2), ("5.0", 3), ("+Inf", 4)]
+
+
+class TestMetricsRegistry:
+    def test_default_buckets_follow_the_unit_in_the_name(self):
+        assert default_buckets("openai_run_tokens") == TOKEN_BUCKETS
+        assert default_buckets("openai_run_polls") == COUNT_BUCKETS
+
+    def test_observe_keeps_one_series_per_label_set(self):
+        metrics = MetricsRegistry()
+
+        metrics.observe("openai_run_seconds", 1.0, kind="tool")
+        metrics.observe("openai_run_seconds", 2.0, kind="tool")
+        metrics.observe("openai_run_seconds", 4.0, kind="narrative")
+
+        assert metrics.histogram("openai_run_seconds", kind="tool").sum == 3.0  # noqa: PLR2004
+        assert metrics.histogram("openai_run_seconds", kind="narrative").count == 1
+        assert metrics.histogram("openai_run_seconds", kind="summary") is None
+
+    def test_increment_adds_to_a_counter(self):
+        metrics = MetricsRegistry()
+
+        metrics.increment("openai_tokens_total", 100, type="prompt")
+        metrics.increment("openai_tokens_total", 20, type="prompt")
+
+        assert metrics.counter("openai_tokens_total", type="prompt") == 120  # noqa: PLR2004
+        assert metrics.counter("openai_tokens_total", type="completion") == 0
+
+    def test_set_buckets_overrides_the_defaults(self):
+        metrics = MetricsRegistry()
+        metrics.set_buckets("openai_run_polls", (10,))
+
+        metrics.observe("openai_run_polls", 3)
+
+        assert metrics.histogram("openai_run_polls").buckets == (10,)
+
+    def test_to_prometheus_writes_buckets_sums_and_counters(self):
+        metrics = MetricsRegistry()
+        metrics.set_buckets("openai_run_polls", (1, 4))
+        metrics.observe("openai_run_polls", 2, kind="tool")
+        metrics.increment("openai_requests_total", endpoint="/threads/{id}/runs", status=200)
+
+        assert metrics.to_prometheus().splitlines() == [
+            "# TYPE openai_run_polls histogram",
+            'openai_run_polls_bucket{kind="tool",le="1"} 0',
+            'openai_run_polls_bucket{kind="tool",le="4"} 1',
+            'openai_run_polls_bucket{kind="tool",le="+Inf"} 1',
+            'openai_run_polls_sum{kind="tool"} 2.0',
+            'openai_run_polls_count{kind="tool"} 1',
+            "# TYPE openai_requests_total counter",
+            'openai_requests_total{endpoint="/threads/{id}/runs",status="200"} 1',
+        ]
+
+    def test_collectors_set_gauges_before_each_snapshot(self):
+        metrics = MetricsRegistry()
+        sessions = ["a", "b"]
+        metrics.add_collector(
+            lambda: metrics.set_gauges("sessions", [({"session_id": session}, 1) for session in sessions])
+        )
+
+        assert metrics.to_prometheus().splitlines() == [
+            "# TYPE sessions gauge",
+            'sessions{session_id="a"} 1',
+            'sessions{session_id="b"} 1',
+        ]
+        sessions.remove("a")
+        assert [series["labels"] for series in metrics.snapshot()] == [{"session_id": "b"}]
+
+    def test_to_json_lines_writes_one_line_per_series(self):
+        metrics = MetricsRegistry()
+        metrics.observe("game_state_transition_seconds", 0.2, state="PlayScene")
+        metrics.increment("openai_runs_total", kind="tool", status="completed")
+
+        lines = [json.loads(line) for line in metrics.to_json_lines().splitlines()]
+
+        assert [(line["name"], line["type"]) for line in lines] == [
+            ("game_state_transition_seconds", "histogram"),
+            ("openai_runs_total", "counter"),
+        ]
+        assert lines[0]["labels"] == {"state": "PlayScene"}
+        assert lines[0]["max"] == pytest.approx(0.2)
+
+    @pytest.mark.parametrize(("file_name", "first_char"), [("metrics.prom", "#"), ("metrics.jsonl", "{")])
+    def test_export_picks_the_format_from_the_suffix(self, tmp_path, file_name, first_char):
+        metrics = MetricsRegistry()
+        metrics.increment("openai_runs_total", kind="tool", status="completed")
+
+        path = metrics.export(tmp_path / file_name)
+
+        assert path.read_text()[0] == first_char
+        assert list(tmp_path.iterdir()) == [path]
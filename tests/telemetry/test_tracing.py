@@ -0,0 +1,99 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from sprawl_runner.telemetry.tracing import FileSpanExporter, MemorySpanExporter, Tracer
+
+
+@pytest.fixture
+def exporter() -> MemorySpanExporter:
+    return MemorySpanExporter()
+
+
+@pytest.fixture
+def tracer(exporter) -> Tracer:
+    return Tracer(exporter)
+
+
+class TestTracer:
+    def test_span_nests_spans_started_inside_it(self, tracer, exporter):
+        with tracer.span("game.iteration", state="PlayScene") as parent, tracer.span("runs.retrieve") as child:
+            assert tracer.current_span() is child
+
+        assert tracer.current_span() is None
+        assert [span.name for span in exporter.spans] == ["runs.retrieve", "game.iteration"]
+        assert child.parent_id == parent.span_id
+        assert child.trace_id == parent.trace_id
+        assert parent.parent_id is None
+        assert parent.attributes == {"state": "PlayScene"}
+        assert parent.duration >= child.duration >= 0
+
+    def test_span_records_errors(self, tracer, exporter):
+        with pytest.raises(RuntimeError), tracer.span("runs.create"):
+            raise RuntimeError("rate limited")
+
+        assert exporter.spans[0].error == "RuntimeError: rate limited"
+
+    def test_end_span_exports_a_span_once(self, tracer, exporter):
+        span = tracer.start_span("tool.run")
+
+        tracer.end_span(span)
+        tracer.end_span(span)
+
+        assert exporter.spans == [span]
+
+    def test_spans_in_tasks_nest_under_the_span_they_were_started_from(self, tracer, exporter):
+        async def poll() -> None:
+            with tracer.span("runs.retrieve"):
+                await asyncio.sleep(0)
+
+        async def turn() -> None:
+            with tracer.span("scene.turn"):
+                await asyncio.gather(poll(), poll())
+
+        asyncio.run(turn())
+
+        turn_span = exporter.spans[-1]
+        assert [span.parent_id for span in exporter.spans[:2]] == [turn_span.span_id, turn_span.span_id]
+
+    def test_bind_carries_the_current_span_to_another_loop(self, tracer, exporter):
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        loop_thread.start()
+
+        async def narrate() -> None:
+            with tracer.span("narrative.message"):
+                pass
+
+        with tracer.span("scene.turn") as turn_span:
+            asyncio.run_coroutine_threadsafe(tracer.bind(narrate()), loop).result()
+
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
+        assert exporter.spans[0].parent_id == turn_span.span_id
+
+    def test_spans_without_an_exporter_go_nowhere(self):
+        tracer = Tracer()
+
+        with tracer.span("console.input") as span:
+            pass
+
+        assert span.duration is not None
+
+
+class TestFileSpanExporter:
+    def test_export_appends_a_json_line_per_span(self, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        tracer = Tracer(FileSpanExporter(path))
+
+        with tracer.span("scene.turn", turn=1), tracer.span("runs.retrieve", run_id="run_abc"):
+            pass
+        tracer.close()
+
+        spans = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [span["name"] for span in spans] == ["runs.retrieve", "scene.turn"]
+        assert spans[0]["attributes"] == {"run_id": "run_abc"}
+        assert spans[0]["parent_id"] == spans[1]["span_id"]
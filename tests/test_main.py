@@ -1,6 +1,17 @@
+import httpx
 import pytest
+from openai import NotFoundError
 
-from sprawl_runner.main import main
+from sprawl_runner.ai.assistant_message_bus import show_json
+from sprawl_runner.main import (
+    assistant_fingerprint_handler,
+    create_assistant_handler,
+    create_game_server,
+    create_message_backend,
+    main,
+    update_assistant_handler,
+)
+from sprawl_runner.world.procedural import Grammar
 
 
 def test_main_happy_path(mocker):
@@ -12,20 +23,94 @@ def test_main_happy_path(mocker):
     mocked_message_bus = mocker.patch("sprawl_runner.main.AssistantMessageBus")
     mocked_message_bus_instance = mocked_message_bus.return_value
     mocked_start_game = mocker.patch("sprawl_runner.main.StartGame")
+    mocked_client_options = mocker.patch("sprawl_runner.main.ClientOptions")
+    mocked_client_manager = mocker.patch("sprawl_runner.main.OpenAIClientManager")
+    mocked_get_bool = mocker.patch("sprawl_runner.main.get_bool")
+    mocked_polling_options = mocker.patch("sprawl_runner.main.PollingOptions")
+    mocked_polling_strategy = mocker.patch("sprawl_runner.main.PollingStrategy")
+    mocked_tool_dispatcher = mocker.patch("sprawl_runner.main.ToolDispatcher")
+    mocked_cassette = mocker.patch("sprawl_runner.main.Cassette")
+    mocked_world_cache = mocker.patch("sprawl_runner.main.WorldCache")
+    mocked_world_pool = mocker.patch("sprawl_runner.main.WorldPool")
+    mocked_get_world_generation_mode = mocker.patch("sprawl_runner.main.get_world_generation_mode")
+    mocked_world_spec = mocker.patch("sprawl_runner.main.WorldSpec")
+    mocked_get_world_source = mocker.patch("sprawl_runner.main.get_world_source")
+    mocked_procedural_world_generator = mocker.patch("sprawl_runner.main.ProceduralWorldGenerator")
+    mocked_get_float = mocker.patch("sprawl_runner.main.get_float")
+    mocked_compaction_options = mocker.patch("sprawl_runner.main.CompactionOptions")
+    mocked_metrics_registry = mocker.patch("sprawl_runner.main.MetricsRegistry")
+    mocked_export_metrics_on_signal = mocker.patch("sprawl_runner.main.export_metrics_on_signal")
+    mocker.patch("sprawl_runner.main.get_str", return_value="metrics.prom")
+    mocked_tracer = mocker.patch("sprawl_runner.main.Tracer")
+    mocked_rate_limiter = mocker.patch("sprawl_runner.main.RateLimiter")
+    mocked_rate_limit_options = mocker.patch("sprawl_runner.main.RateLimitOptions")
+    mocked_file_span_exporter = mocker.patch("sprawl_runner.main.FileSpanExporter")
+    mocked_run_deadlines = mocker.patch("sprawl_runner.main.RunDeadlines")
+    mocked_run_scheduler = mocker.patch("sprawl_runner.main.RunScheduler")
+    mocked_scheduler_options = mocker.patch("sprawl_runner.main.SchedulerOptions")
+    mocker.patch("sprawl_runner.main.get_message_backend_name", return_value="assistants")
 
-    main()
+    main([])
 
     mocked_basic_console.assert_called_once_with()
     mocked_conf.load_settings.assert_called_once_with()
     mocked_conf.validate.assert_called_once_with()
+    assert mocked_conf.assistant_fingerprint_handler is assistant_fingerprint_handler
+    assert mocked_conf.assistant_update_handler.func is update_assistant_handler
     mocked_game.assert_called_once_with(mocked_console_instance)
+    assert mocked_game_instance.world_cache == mocked_world_cache.from_settings.return_value
+    assert mocked_game_instance.world_pool == mocked_world_pool.from_settings.return_value
+    assert mocked_game_instance.world_generation == mocked_get_world_generation_mode.return_value
+    assert mocked_game_instance.world_spec == mocked_world_spec.from_settings.return_value
+    assert mocked_game_instance.world_source == mocked_get_world_source.return_value
+    assert mocked_game_instance.procedural_world == mocked_procedural_world_generator.from_settings.return_value
+    assert mocked_game_instance.world_fallback_seconds == mocked_get_float.return_value
     mocked_game_instance.get_tool_handlers.assert_called_once_with()
-    mocked_message_bus.assert_called_once()
+    mocked_client_options.from_settings.assert_called_once_with(mocked_conf.settings)
+    mocked_client_manager.assert_called_once_with(
+        mocked_conf.settings["openai_api_key"],
+        mocked_client_options.from_settings.return_value,
+        mocked_cassette.from_settings.return_value,
+        mocked_metrics_registry.return_value,
+        mocked_rate_limiter.return_value,
+    )
+    mocked_rate_limiter.assert_called_once_with(mocked_rate_limit_options.from_settings.return_value)
+    mocked_message_bus.assert_called_once_with(
+        mocked_conf.settings["openai_api_key"],
+        mocked_conf.settings["openai_assistant_id"],
+        mocked_client_manager.return_value,
+        stream_narrative=mocked_get_bool.return_value,
+        polling=mocked_polling_strategy.return_value,
+        tool_dispatcher=mocked_tool_dispatcher.from_settings.return_value,
+        trace_sink=show_json,
+        compaction=mocked_compaction_options.from_settings.return_value,
+        metrics=mocked_client_manager.return_value.metrics,
+        tracer=mocked_tracer.return_value,
+        deadlines=mocked_run_deadlines.from_settings.return_value,
+        scheduler=mocked_run_scheduler.return_value,
+        loop=None,
+        backend=None,
+    )
+    mocked_run_scheduler.assert_called_once_with(
+        mocked_scheduler_options.from_settings.return_value, mocked_client_manager.return_value.metrics
+    )
+    mocked_polling_strategy.assert_called_once_with(
+        mocked_polling_options.from_settings.return_value, metrics=mocked_client_manager.return_value.metrics
+    )
     mocked_message_bus_instance.register_tool_handlers.assert_called_once_with(
         mocked_game_instance.get_tool_handlers.return_value
     )
+    mocked_message_bus_instance.set_narrative_context.assert_called_once_with(mocked_game_instance.get_world_state)
+    mocked_message_bus_instance.set_thinking_indicator.assert_called_once_with(mocked_game_instance.emit_thinking)
+    mocked_message_bus_instance.prepare_narrative_thread.assert_called_once_with()
     mocked_game_instance.change_state.assert_called_once_with(mocked_start_game.return_value)
     mocked_game_instance.play.assert_called_once_with()
+    assert mocked_game_instance.metrics == mocked_message_bus_instance.metrics
+    mocked_export_metrics_on_signal.assert_called_once_with(mocked_metrics_registry.return_value, "metrics.prom")
+    mocked_metrics_registry.return_value.export.assert_called_once_with("metrics.prom")
+    mocked_tracer.assert_called_once_with(mocked_file_span_exporter.return_value)
+    assert mocked_game_instance.tracer == mocked_message_bus_instance.tracer
+    mocked_tracer.return_value.close.assert_called_once_with()
 
 
 def test_main_exits_when_config_fails_to_load(mocker):
@@ -39,7 +124,7 @@ def test_main_exits_when_config_fails_to_load(mocker):
     mocked_conf_validate = mocker.patch("sprawl_runner.main.config.validate")
 
     with pytest.raises(SystemExit):
-        main()
+        main([])
 
     mocked_basic_console.assert_called_once_with()
     mocked_conf_load_settings.assert_called_once_with()
@@ -47,3 +132,164 @@ def test_main_exits_when_config_fails_to_load(mocker):
     mocked_game.assert_not_called()
     mocked_conf_validate.assert_not_called()
     mocked_message_bus.assert_not_called()
+
+
+def test_main_pregen_fills_the_world_pool(mocker):
+    mocked_basic_console = mocker.patch("sprawl_runner.main.BasicConsole")
+    mocked_console_instance = mocked_basic_console.return_value
+    mocker.patch("sprawl_runner.main.config")
+    mocker.patch("sprawl_runner.main.ClientOptions")
+    mocker.patch("sprawl_runner.main.OpenAIClientManager")
+    mocker.patch("sprawl_runner.main.Cassette")
+    mocker.patch("sprawl_runner.main.get_str", return_value="")
+    mocker.patch("sprawl_runner.main.RateLimitOptions")
+    mocked_game = mocker.patch("sprawl_runner.main.Game")
+    mocked_create_message_bus = mocker.patch("sprawl_runner.main.create_message_bus")
+    mocked_world_generator = mocker.patch("sprawl_runner.main.WorldGenerator")
+    mocked_world_pool = mocker.patch("sprawl_runner.main.WorldPool")
+    mocker.patch("sprawl_runner.main.get_world_generation_mode", return_value="split")
+    mocked_pool_instance = mocked_world_pool.from_settings.return_value
+    succeeded = mocker.MagicMock()
+    succeeded.exception.return_value = None
+    failed = mocker.MagicMock()
+    failed.exception.return_value = RuntimeError("no tool calls")
+    mocked_pool_instance.fill.return_value = iter([succeeded, failed])
+    mocked_pool_instance.__len__.return_value = 1
+
+    main(["pregen", "--count", "2", "--concurrency", "3"])
+
+    mocked_game.assert_not_called()
+    round_trips = mocked_world_generator.call_args.args[2]
+    mocked_world_generator.assert_called_once_with(mocked_create_message_bus.return_value, "split", round_trips)
+    mocked_pool_instance.fill.assert_called_once_with(mocked_world_generator.return_value, 2, 3)
+    mocked_create_message_bus.return_value.close.assert_called_once_with()
+    mocked_console_instance.emit.assert_any_call("World generation failed: no tool calls")
+    mocked_console_instance.emit.assert_any_call("Generated 1 of 2 worlds in 0 API round trips")
+    assert mocked_console_instance.emit.call_args.args[0].startswith("1 worlds ready")
+
+
+def test_main_serve_listens_on_the_configured_ports_unless_overridden(mocker):
+    mocked_basic_console = mocker.patch("sprawl_runner.main.BasicConsole")
+    mocker.patch("sprawl_runner.main.config")
+    mocker.patch("sprawl_runner.main.ClientOptions")
+    mocked_client_manager = mocker.patch("sprawl_runner.main.OpenAIClientManager")
+    mocker.patch("sprawl_runner.main.Cassette")
+    mocker.patch(
+        "sprawl_runner.main.get_str", side_effect=lambda settings, key: "0.0.0.0" if key == "server_host" else ""
+    )
+    mocker.patch("sprawl_runner.main.get_int", return_value=4001)
+    mocker.patch("sprawl_runner.main.RateLimitOptions")
+    mocked_tracer = mocker.patch("sprawl_runner.main.Tracer")
+    mocked_serve = mocker.patch("sprawl_runner.main.serve")
+
+    main(["serve", "--tcp-port", "0"])
+
+    mocked_serve.assert_called_once_with(
+        mocked_basic_console.return_value,
+        mocked_client_manager.return_value,
+        "0.0.0.0",  # noqa: S104
+        0,
+        4001,
+        mocked_tracer.return_value,
+    )
+
+
+def test_create_game_server_hosts_session_buses_on_the_loop_with_shared_parts(mocker):
+    mocker.patch("sprawl_runner.main.config")
+    mocked_message_bus = mocker.patch("sprawl_runner.main.AssistantMessageBus")
+    mocked_game = mocker.patch("sprawl_runner.main.Game")
+    mocker.patch("sprawl_runner.main.StartGame")
+    mocker.patch("sprawl_runner.main.WorldCache")
+    mocker.patch("sprawl_runner.main.WorldPool")
+    mocker.patch("sprawl_runner.main.WorldSpec")
+    mocker.patch("sprawl_runner.main.get_world_generation_mode")
+    mocker.patch("sprawl_runner.main.get_world_source", return_value="assistant")
+    mocker.patch("sprawl_runner.main.ProceduralWorldGenerator")
+    mocker.patch("sprawl_runner.main.get_bool", return_value=False)
+    mocker.patch("sprawl_runner.main.PollingOptions")
+    mocker.patch("sprawl_runner.main.CompactionOptions")
+    mocker.patch("sprawl_runner.main.RunDeadlines")
+    mocker.patch("sprawl_runner.main.SchedulerOptions")
+    mocker.patch("sprawl_runner.main.get_message_backend_name", return_value="assistants")
+    mocked_run_scheduler = mocker.patch("sprawl_runner.main.RunScheduler")
+    mocked_tool_dispatcher = mocker.patch("sprawl_runner.main.ToolDispatcher")
+    mock_client_manager = mocker.MagicMock()
+    mock_loop = mocker.MagicMock()
+
+    server = create_game_server(mock_client_manager, mock_loop)
+    first_game = server._game_factory(mocker.MagicMock())  # noqa: SLF001
+    server._game_factory(mocker.MagicMock())  # noqa: SLF001
+
+    assert first_game is mocked_game.return_value
+    assert mocked_message_bus.call_count == 2  # noqa: PLR2004
+    for call in mocked_message_bus.call_args_list:
+        assert call.kwargs["loop"] is mock_loop
+        assert call.kwargs["scheduler"] is mocked_run_scheduler.return_value
+        assert call.kwargs["tool_dispatcher"] is mocked_tool_dispatcher.from_settings.return_value
+    mocked_run_scheduler.assert_called_once()
+    mocked_game.return_value.play.assert_not_called()
+    assert Grammar.load() in server._shared  # noqa: SLF001
+
+
+def test_create_message_backend_uses_chat_completions_when_configured(mocker):
+    mocked_conf = mocker.patch("sprawl_runner.main.config")
+    mocked_data = mocker.patch("sprawl_runner.main.data")
+    mocked_run_deadlines = mocker.patch("sprawl_runner.main.RunDeadlines")
+    mocked_chat_backend = mocker.patch("sprawl_runner.main.ChatCompletionsBackend")
+    mocked_get_backend_name = mocker.patch("sprawl_runner.main.get_message_backend_name", return_value="chat")
+
+    backend = create_message_backend()
+
+    assert backend is mocked_chat_backend.return_value
+    mocked_chat_backend.assert_called_once_with(
+        mocked_conf.settings["openai_model"],
+        mocked_data.load_data.return_value,
+        mocked_data.load_all_tool_metadata.return_value,
+        mocked_run_deadlines.from_settings.return_value,
+    )
+    mocked_get_backend_name.return_value = "assistants"
+    assert create_message_backend() is None
+
+
+def test_create_assistant_handler_reuses_client_manager_client(mocker):
+    mocked_create_assistant = mocker.patch("sprawl_runner.main.create_assistant")
+    mocker.patch("sprawl_runner.main.data")
+    mock_client_manager = mocker.MagicMock()
+
+    assistant_id = create_assistant_handler("test-key", "test-model", client_manager=mock_client_manager)
+
+    assert assistant_id == mocked_create_assistant.return_value
+    assert mocked_create_assistant.call_args.args[-1] == mock_client_manager.sync_client
+
+
+def test_update_assistant_handler_updates_the_assistant_in_place(mocker):
+    mocked_update_assistant = mocker.patch("sprawl_runner.main.update_assistant")
+    mocked_create_assistant = mocker.patch("sprawl_runner.main.create_assistant")
+    mocker.patch("sprawl_runner.main.data")
+    mock_client_manager = mocker.MagicMock()
+
+    assistant_id = update_assistant_handler("test-key", "test-model", "asst_1", client_manager=mock_client_manager)
+
+    assert assistant_id == mocked_update_assistant.return_value
+    assert mocked_update_assistant.call_args.args[0] == "asst_1"
+    assert mocked_update_assistant.call_args.args[-1] == mock_client_manager.sync_client
+    mocked_create_assistant.assert_not_called()
+
+
+def test_update_assistant_handler_creates_an_assistant_when_it_was_deleted(mocker):
+    response = httpx.Response(404, request=httpx.Request("POST", "https://api.openai.com/v1/assistants/asst_1"))
+    mocker.patch(
+        "sprawl_runner.main.update_assistant",
+        side_effect=NotFoundError("No assistant found", response=response, body=None),
+    )
+    mocked_create_assistant = mocker.patch("sprawl_runner.main.create_assistant")
+    mocker.patch("sprawl_runner.main.data")
+
+    assistant_id = update_assistant_handler("test-key", "test-model", "asst_1")
+
+    assert assistant_id == mocked_create_assistant.return_value
+
+
+def test_assistant_fingerprint_handler_is_stable():
+    assert assistant_fingerprint_handler("test-model") == assistant_fingerprint_handler("test-model")
+    assert assistant_fingerprint_handler("test-model") != assistant_fingerprint_handler("other-model")
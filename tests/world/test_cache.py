@@ -0,0 +1,110 @@
+import json
+import os
+import random
+import time
+
+import pytest
+
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.world.cache import World, WorldCache, world_generation_key
+
+
+def make_world(name):
+    return World(
+        factions=[{"name": name, "description": "Desc", "motivation": "Motivation"}],
+        locations=[{"name": f"{name} Bar", "type": "rest", "description": "Desc"}],
+    )
+
+
+def age(path, seconds):
+    modified = time.time() - seconds
+    os.utime(path, (modified, modified))
+
+
+class TestWorldGenerationKey:
+    def test_key_depends_on_the_model(self):
+        assert world_generation_key("model-a") == world_generation_key("model-a")
+        assert world_generation_key("model-a") != world_generation_key("model-b")
+
+    def test_key_depends_on_instructions_and_tool_schemas(self, mocker):
+        key = world_generation_key("model")
+        mocker.patch("sprawl_runner.world.cache.data.load_tool_metadata", return_value="{}")
+
+        assert world_generation_key("model") != key
+
+
+class TestWorldCache:
+    def test_sample_misses_until_sample_size_worlds_are_cached(self, tmp_path):
+        cache = WorldCache(tmp_path, "key", sample_size=2)
+
+        cache.store(make_world("One"))
+        assert cache.sample() is None
+
+        cache.store(make_world("Two"))
+        assert cache.sample() in (make_world("One"), make_world("Two"))
+
+    def test_sample_picks_from_cached_worlds(self, tmp_path):
+        cache = WorldCache(tmp_path, "key", sample_size=3, rng=random.Random(1))
+        for name in ("One", "Two", "Three"):
+            cache.store(make_world(name))
+
+        sampled = {cache.sample()["factions"][0]["name"] for _ in range(30)}
+
+        assert sampled == {"One", "Two", "Three"}
+
+    def test_worlds_are_kept_per_key(self, tmp_path):
+        WorldCache(tmp_path, "other", sample_size=1).store(make_world("Other"))
+
+        assert WorldCache(tmp_path, "key", sample_size=1).sample() is None
+
+    def test_old_worlds_are_evicted(self, tmp_path):
+        cache = WorldCache(tmp_path, "key", sample_size=1, max_age_seconds=60)
+        age(cache.store(make_world("Old")), 120)
+
+        assert cache.worlds() == []
+        assert not list(cache.key_directory.iterdir())
+
+    def test_oldest_worlds_are_evicted_over_max_worlds(self, tmp_path):
+        cache = WorldCache(tmp_path, "key", max_worlds=2)
+        age(cache.store(make_world("Oldest")), 30)
+        age(cache.store(make_world("Older")), 20)
+        WorldCache(tmp_path, "other", max_worlds=2).store(make_world("New"))
+
+        assert cache.worlds() == [make_world("Older")]
+
+    def test_damaged_worlds_are_dropped(self, tmp_path):
+        cache = WorldCache(tmp_path, "key", sample_size=1)
+        path = cache.store(make_world("One"))
+        path.write_text("{")
+
+        assert cache.sample() is None
+        assert not path.exists()
+
+    def test_store_writes_json(self, tmp_path):
+        path = WorldCache(tmp_path, "key").store(make_world("One"))
+
+        assert json.loads(path.read_text()) == make_world("One")
+
+
+class TestWorldCacheFromSettings:
+    def test_uses_defaults(self, mocker):
+        mocker.patch("sprawl_runner.world.cache.world_generation_key", return_value="key")
+
+        cache = WorldCache.from_settings(EMPTY_SETTINGS.copy())
+
+        assert cache.key == "key"
+        assert cache.key_directory.parent.name == ".sprawl-runner-worlds"
+
+    def test_can_be_turned_off(self):
+        settings = EMPTY_SETTINGS.copy()
+        settings["world_cache"] = "no"
+
+        assert WorldCache.from_settings(settings) is None
+
+    @pytest.mark.parametrize("key", ["world_cache_sample_size", "world_cache_max_worlds"])
+    def test_rejects_bad_numbers(self, key):
+        settings = EMPTY_SETTINGS.copy()
+        settings[key] = "lots"
+
+        with pytest.raises(ValueError, match=key):
+            WorldCache.from_settings(settings)
@@ -0,0 +1,133 @@
+from concurrent.futures import CancelledError, Future
+
+import pytest
+
+from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus, RoundTrips
+from sprawl_runner.ai.client_manager import ClientOptions, OpenAIClientManager
+from sprawl_runner.ai.polling import PollingOptions, PollingStrategy
+from sprawl_runner.standin.script import StandInScript
+from sprawl_runner.standin.server import AssistantsStandIn
+from sprawl_runner.world.generator import WorldGenerator, get_world_generation_mode
+
+WORLD = {"factions": [{"name": "F"}], "locations": [{"name": "L"}]}
+
+
+@pytest.fixture
+def mock_message_bus(mocker):
+    mock_message_bus = mocker.MagicMock()
+    mock_message_bus.runs = []
+
+    def process_tool_message_async(content, tool_handlers, round_trips, run_class):
+        for handler in (tool_handlers or {}).values():
+            handler(WORLD)
+        run = Future()
+        mock_message_bus.runs.append(run)
+        return run
+
+    mock_message_bus.process_tool_message_async.side_effect = process_tool_message_async
+    return mock_message_bus
+
+
+class TestWorldGenerator:
+    def test_start_runs_asks_for_factions_and_locations_in_one_run_when_batched(self, mocker, mock_message_bus):
+        mocker.patch(
+            "sprawl_runner.world.generator.data.load_data",
+            side_effect=["faction instructions", "location instructions"],
+        )
+        round_trips = RoundTrips()
+
+        runs = WorldGenerator(mock_message_bus, "batched", round_trips).start_runs()
+
+        assert runs == mock_message_bus.runs
+        mock_message_bus.process_tool_message_async.assert_called_once_with(
+            "faction instructions\n\nlocation instructions", None, round_trips, "generation"
+        )
+
+    def test_start_runs_starts_a_run_per_entity_kind_when_split(self, mocker, mock_message_bus):
+        mocker.patch(
+            "sprawl_runner.world.generator.data.load_data",
+            side_effect=["faction instructions", "location instructions"],
+        )
+
+        WorldGenerator(mock_message_bus, "split", run_class="prefetch").start_runs()
+
+        mock_message_bus.process_tool_message_async.assert_has_calls(
+            [
+                mocker.call("faction instructions", None, None, "prefetch"),
+                mocker.call("location instructions", None, None, "prefetch"),
+            ]
+        )
+
+    def test_generate_resolves_with_the_world_once_the_run_finishes(self, mock_message_bus):
+        generated = WorldGenerator(mock_message_bus).generate()
+
+        assert len(mock_message_bus.runs) == 1
+        mock_message_bus.runs[0].set_result(None)
+
+        assert generated.result() == WORLD
+        mock_message_bus.register_tool_handler.assert_not_called()
+
+    def test_generate_resolves_with_the_world_once_both_split_runs_finish(self, mock_message_bus):
+        generated = WorldGenerator(mock_message_bus, "split").generate()
+
+        mock_message_bus.runs[0].set_result(None)
+        assert not generated.done()
+        mock_message_bus.runs[1].set_result(None)
+
+        assert generated.result() == {
+            "factions": WORLD["factions"] * 2,
+            "locations": WORLD["locations"] * 2,
+        }
+
+    def test_generate_fails_when_a_run_registers_nothing(self, mocker):
+        runs = [Future(), Future()]
+        mock_message_bus = mocker.MagicMock()
+        mock_message_bus.process_tool_message_async.side_effect = runs
+
+        generated = WorldGenerator(mock_message_bus, "split").generate()
+        for run in runs:
+            run.set_result(None)
+
+        with pytest.raises(RuntimeError, match="without registering"):
+            generated.result()
+
+    def test_generate_fails_when_a_run_fails(self, mock_message_bus):
+        generated = WorldGenerator(mock_message_bus, "split").generate()
+
+        mock_message_bus.runs[0].set_result(None)
+        mock_message_bus.runs[1].set_exception(ConnectionError("offline"))
+
+        with pytest.raises(ConnectionError, match="offline"):
+            generated.result()
+
+    def test_generate_fails_when_a_run_is_cancelled(self, mock_message_bus):
+        generated = WorldGenerator(mock_message_bus, "split").generate()
+
+        mock_message_bus.runs[0].set_result(None)
+        mock_message_bus.runs[1].cancel()
+
+        with pytest.raises(CancelledError):
+            generated.result()
+
+    def test_get_world_generation_mode_rejects_unknown_modes(self):
+        with pytest.raises(ValueError, match="world_generation"):
+            get_world_generation_mode({"world_generation": "sideways"})
+
+    @pytest.mark.parametrize(("mode", "expected_round_trips"), [("batched", 1), ("split", 2)])
+    def test_generate_against_stand_in(self, mode, expected_round_trips):
+        script = StandInScript(queued_seconds=0.01, in_progress_seconds=0.02, after_tool_outputs_seconds=0.01)
+
+        with AssistantsStandIn(script) as stand_in:
+            client_manager = OpenAIClientManager("test-key", ClientOptions(base_url=stand_in.base_url))
+            polling = PollingStrategy(PollingOptions(initial_interval=0.01, max_interval=0.05))
+            message_bus = AssistantMessageBus("test-key", "asst", client_manager, polling=polling)
+
+            round_trips = RoundTrips()
+            world = WorldGenerator(message_bus, mode, round_trips).generate().result(timeout=10)
+            message_bus.close()
+            request_counts = stand_in.request_counts
+
+        assert len(world["factions"]) == 4 and len(world["locations"]) == 4  # noqa: PLR2004
+        assert request_counts["threads.create_and_run"] == expected_round_trips
+        assert request_counts["threads.runs.submit_tool_outputs"] == expected_round_trips
+        assert round_trips.count == sum(request_counts.values())
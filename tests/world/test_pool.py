@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import Future
+
+import pytest
+
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.world.generator import WorldGenerator
+from sprawl_runner.world.pool import WorldPool
+
+
+def make_world(name):
+    return {"factions": [{"name": name}], "locations": [{"name": f"{name} Bar"}]}
+
+
+def generated_world(name):
+    generated = Future()
+    generated.set_result(make_world(name))
+    return generated
+
+
+@pytest.fixture
+def world_pool(tmp_path):
+    return WorldPool(tmp_path, "key", size=2)
+
+
+class TestWorldPool:
+    def test_pop_returns_worlds_oldest_first_and_removes_them(self, world_pool):
+        world_pool.add(make_world("One"))
+        world_pool.add(make_world("Two"))
+
+        assert world_pool.pop() == make_world("One")
+        assert len(world_pool) == 1
+        assert world_pool.pop() == make_world("Two")
+        assert world_pool.pop() is None
+
+    def test_pop_skips_worlds_claimed_by_someone_else(self, mocker, world_pool):
+        first = world_pool.add(make_world("One"))
+        world_pool.add(make_world("Two"))
+        rename = os.rename
+
+        def claimed_elsewhere(source, destination):
+            if source == first:
+                raise FileNotFoundError(source)
+            return rename(source, destination)
+
+        mocker.patch("sprawl_runner.world.pool.os.rename", side_effect=claimed_elsewhere)
+
+        assert world_pool.pop() == make_world("Two")
+
+    def test_refill_generates_the_missing_worlds(self, mocker, world_pool):
+        world_pool.add(make_world("One"))
+        mock_generator = mocker.MagicMock()
+        mock_generator.generate.side_effect = [generated_world("Two")]
+
+        refills = world_pool.refill(mock_generator)
+
+        assert len(refills) == 1
+        assert len(world_pool) == 2  # noqa: PLR2004
+
+    def test_refill_counts_generations_in_flight(self, mocker, world_pool):
+        mock_generator = mocker.MagicMock()
+        mock_generator.generate.side_effect = lambda: Future()
+
+        assert len(world_pool.refill(mock_generator)) == 2  # noqa: PLR2004
+        assert world_pool.refill(mock_generator) == []
+
+    def test_failed_refills_leave_the_pool_short(self, mocker, world_pool):
+        failed = Future()
+        mock_generator = mocker.MagicMock()
+        mock_generator.generate.side_effect = [failed, Future(), Future()]
+        world_pool.refill(mock_generator)
+
+        failed.set_exception(RuntimeError("no tool calls"))
+
+        assert len(world_pool) == 0
+        assert len(world_pool.refill(mock_generator)) == 1
+
+    def test_cancelled_refills_leave_the_pool_short(self, mocker, world_pool):
+        run = Future()
+        mock_message_bus = mocker.MagicMock()
+        mock_message_bus.process_tool_message_async.side_effect = [run, Future(), Future()]
+        world_pool.refill(WorldGenerator(mock_message_bus, run_class="prefetch"))
+
+        # As the bus's cancel_runs() does to runs it reaps.
+        run.cancel()
+
+        assert len(world_pool) == 0
+        assert len(world_pool.refill(WorldGenerator(mock_message_bus, run_class="prefetch"))) == 1
+
+    def test_fill_generates_count_worlds_with_bounded_concurrency(self, mocker, world_pool):
+        in_flight = []
+        mock_generator = mocker.MagicMock()
+
+        def generate():
+            in_flight.append(len(in_flight))
+            return generated_world(f"World {len(in_flight)}")
+
+        mock_generator.generate.side_effect = generate
+
+        finished = list(world_pool.fill(mock_generator, 5, concurrency=2))
+
+        assert len(finished) == 5  # noqa: PLR2004
+        assert len(world_pool) == 5  # noqa: PLR2004
+
+    def test_from_settings_shares_the_cache_directory(self, mocker):
+        mocker.patch("sprawl_runner.world.pool.world_generation_key", return_value="key")
+
+        world_pool = WorldPool.from_settings(EMPTY_SETTINGS.copy())
+
+        assert world_pool.size == 0
+        assert world_pool.directory.parts[-3:] == (".sprawl-runner-worlds", "pool", "key")
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from sprawl_runner.config.constants import EMPTY_SETTINGS
+from sprawl_runner.world.procedural import Grammar, ProceduralWorldGenerator, _number_repeats, get_world_source
+from sprawl_runner.world.sharding import WorldSpec
+
+
+class TestGetWorldSource:
+    def test_defaults_to_the_assistant(self):
+        assert get_world_source(EMPTY_SETTINGS) == "assistant"
+
+    def test_raises_for_unknown_sources(self):
+        with pytest.raises(ValueError, match="world_source"):
+            get_world_source({**EMPTY_SETTINGS, "world_source": "oracle"})
+
+
+class TestGrammar:
+    def test_expands_symbols_into_their_texts(self):
+        grammar = Grammar({"name": ["The {color} {thing}", "{thing}"], "color": ["Black"], "thing": ["Ice"]})
+
+        texts = grammar.expand("name", 50, random.Random(1))
+
+        assert set(texts) == {"The Black Ice", "Ice"}
+
+    def test_bound_symbols_follow_their_rows(self):
+        grammar = Grammar({"sentence": ["{place} is {mood}.", "In {place}."], "place": ["Nowhere"], "mood": ["wet"]})
+        places = [f"District {row}" for row in range(20)]
+
+        texts = grammar.expand("sentence", 20, random.Random(2), {"place": places})
+
+        assert all(f"District {row} " in text or f"District {row}." in text for row, text in enumerate(texts))
+
+    def test_keeps_literal_braces(self):
+        grammar = Grammar({"name": ["{{{thing}}}"], "thing": ["Ice"]})
+
+        assert grammar.expand("name", 1, random.Random(3)) == ["{Ice}"]
+
+    def test_raises_for_unknown_symbols(self):
+        with pytest.raises(ValueError, match="colour"):
+            Grammar({"name": ["The {colour} Ice"]})
+
+    def test_loads_the_shipped_grammar(self):
+        assert Grammar.load() is Grammar.load()
+
+
+class TestNumberRepeats:
+    def test_numbers_every_repeat_after_the_first(self):
+        assert _number_repeats(["Zion", "Finn", "Zion", "Zion"]) == ["Zion", "Finn", "Zion 2", "Zion 3"]
+
+    def test_does_not_number_into_a_name_that_is_taken(self):
+        names = _number_repeats(["Zion", "Zion 2", "Zion"])
+
+        assert len(set(names)) == 3  # noqa: PLR2004
+
+
+class TestProceduralWorldGenerator:
+    def test_generates_the_usual_small_world(self):
+        world = ProceduralWorldGenerator(seed=1).generate()
+
+        assert len(world["factions"]) == 4  # noqa: PLR2004
+        assert all(
+            faction["name"] and faction["description"] and faction["motivation"] for faction in world["factions"]
+        )
+        assert [location["type"] for location in world["locations"]] == ["rest", "rest", "employment", "employment"]
+
+    def test_the_same_seed_makes_the_same_worlds(self):
+        first, second = ProceduralWorldGenerator(seed="chiba"), ProceduralWorldGenerator(seed="chiba")
+
+        assert [first.generate(), first.generate()] == [second.generate(), second.generate()]
+        assert ProceduralWorldGenerator(seed="ninsei").generate() != second.generate()
+
+    def test_from_settings_uses_the_seed(self):
+        settings = {**EMPTY_SETTINGS, "world_seed": "42"}
+
+        assert ProceduralWorldGenerator.from_settings(settings).generate() == ProceduralWorldGenerator("42").generate()
+
+    def test_generates_large_worlds_with_unique_names(self):
+        world = ProceduralWorldGenerator(seed=2).generate(factions=50_000, locations=50_000, rest_locations=10_000)
+
+        for kind in ("factions", "locations"):
+            assert len({entity["name"] for entity in world[kind]}) == 50_000  # noqa: PLR2004
+        assert sum(location["type"] == "rest" for location in world["locations"]) == 10_000  # noqa: PLR2004
+
+    def test_generate_spec_sets_locations_in_their_districts(self):
+        spec = WorldSpec(
+            districts=("Ninsei", "Freeside"),
+            faction_tiers=("street", "zaibatsu"),
+            locations_per_district=30,
+            rest_locations_per_district=10,
+            factions_per_tier=5,
+        )
+
+        world = ProceduralWorldGenerator(seed=3).generate_spec(spec)
+
+        assert len(world["factions"]) == 10  # noqa: PLR2004
+        assert len(world["locations"]) == 60  # noqa: PLR2004
+        assert sum(location["type"] == "rest" for location in world["locations"]) == 20  # noqa: PLR2004
+        districts_named = {
+            district
+            for location in world["locations"]
+            for district in spec.districts
+            if district in location["description"]
+        }
+        assert districts_named == {"Ninsei", "Freeside"}
+        assert not any("Chiba City" in location["description"] for location in world["locations"])
@@ -0,0 +1,162 @@
+from concurrent.futures import Future
+
+import pytest
+
+from sprawl_runner.ai.assistant_message_bus import AssistantMessageBus
+from sprawl_runner.ai.client_manager import ClientOptions, OpenAIClientManager
+from sprawl_runner.ai.polling import PollingOptions, PollingStrategy
+from sprawl_runner.standin.script import StandInScript
+from sprawl_runner.standin.server import AssistantsStandIn
+from sprawl_runner.world.sharding import ShardedWorldGenerator, WorldShard, WorldSpec
+
+SPEC = WorldSpec(districts=("Chiba", "Ninsei"), faction_tiers=("gangs",), locations_per_district=4, factions_per_tier=2)
+
+
+@pytest.fixture
+def mock_message_bus(mocker):
+    mock_message_bus = mocker.MagicMock()
+    mock_message_bus.runs = []
+
+    def process_tool_message_async(content, tool_handlers, round_trips):
+        run = Future()
+        mock_message_bus.runs.append((content, tool_handlers, run))
+        return run
+
+    mock_message_bus.process_tool_message_async.side_effect = process_tool_message_async
+    return mock_message_bus
+
+
+def finish_run(mock_message_bus, index, names):
+    _, tool_handlers, run = mock_message_bus.runs[index]
+    for tool_name, handler in tool_handlers.items():
+        kind = tool_name.removeprefix("register_")
+        handler({kind: [{"name": name} for name in names]})
+    run.set_result(None)
+
+
+class TestWorldSpec:
+    def test_shards_split_districts_and_tiers_into_even_pieces(self):
+        spec = WorldSpec(
+            districts=("Chiba",),
+            faction_tiers=("gangs",),
+            locations_per_district=25,
+            rest_locations_per_district=5,
+            factions_per_tier=10,
+            max_per_shard=10,
+        )
+
+        assert spec.shards() == [
+            WorldShard("factions", "gangs", 10),
+            WorldShard("locations", "Chiba", 8, 1, part=1, parts=3),
+            WorldShard("locations", "Chiba", 8, 2, part=2, parts=3),
+            WorldShard("locations", "Chiba", 9, 2, part=3, parts=3),
+        ]
+
+    def test_from_dict_requires_districts_and_faction_tiers(self):
+        with pytest.raises(ValueError, match="at least one district"):
+            WorldSpec.from_dict({"districts": ["Chiba"]})
+
+    def test_from_settings_returns_none_without_a_spec_file(self):
+        assert WorldSpec.from_settings({"world_spec": ""}) is None
+
+    def test_from_settings_reads_the_spec_file(self, tmp_path):
+        spec_path = tmp_path / "spec.json"
+        spec_path.write_text('{"districts": ["Chiba"], "faction_tiers": ["gangs"], "concurrency": 2}')
+
+        spec = WorldSpec.from_settings({"world_spec": str(spec_path)})
+
+        assert spec == WorldSpec(districts=("Chiba",), faction_tiers=("gangs",), concurrency=2)
+
+
+class TestWorldShard:
+    def test_prompt_names_the_group_count_and_taken_names(self):
+        prompt = WorldShard("locations", "Chiba", 8, 2, part=2, parts=3).prompt(["The Chat", "Cheap Hotel"])
+
+        assert "Chiba (part 2 of 3)" in prompt
+        assert "register 8 locations, only 2 should be Rest" in prompt
+        assert "The Chat, Cheap Hotel" in prompt
+
+
+class TestShardedWorldGenerator:
+    def test_generate_runs_at_most_concurrency_shards_at_a_time(self, mock_message_bus):
+        spec = WorldSpec(districts=("Chiba", "Ninsei", "Night City"), faction_tiers=("gangs",), concurrency=2)
+
+        generated = ShardedWorldGenerator(mock_message_bus, spec).generate()
+
+        assert len(mock_message_bus.runs) == 2  # noqa: PLR2004
+        finish_run(mock_message_bus, 0, ["Lo-Teks"])
+        assert len(mock_message_bus.runs) == 3  # noqa: PLR2004
+        assert not generated.done()
+
+    def test_generate_merges_shards_and_drops_duplicate_names(self, mock_message_bus):
+        generated = ShardedWorldGenerator(mock_message_bus, SPEC).generate()
+
+        finish_run(mock_message_bus, 0, ["Lo-Teks", "Panther Moderns"])
+        finish_run(mock_message_bus, 1, ["The Chat", "Cheap Hotel"])
+        finish_run(mock_message_bus, 2, ["the chat", "Sarariman"])
+
+        assert generated.result() == {
+            "factions": [{"name": "Lo-Teks"}, {"name": "Panther Moderns"}],
+            "locations": [{"name": "The Chat"}, {"name": "Cheap Hotel"}, {"name": "Sarariman"}],
+        }
+
+    def test_generate_tells_later_shards_which_names_are_taken(self, mock_message_bus):
+        spec = WorldSpec(districts=("Chiba", "Ninsei"), faction_tiers=("gangs",), concurrency=2)
+        ShardedWorldGenerator(mock_message_bus, spec).generate()
+
+        finish_run(mock_message_bus, 1, ["The Chat"])
+
+        assert "The Chat" in mock_message_bus.runs[2][0]
+
+    def test_generate_reports_progress_as_each_shard_finishes(self, mocker, mock_message_bus):
+        on_progress = mocker.MagicMock()
+        ShardedWorldGenerator(mock_message_bus, SPEC).generate(on_progress)
+
+        finish_run(mock_message_bus, 1, ["The Chat", "The Chat"])
+
+        progress = on_progress.call_args.args[0]
+        assert progress.shard == WorldShard("locations", "Chiba", 4, 2)
+        assert (progress.finished, progress.total, progress.added, progress.error) == (1, 3, 1, None)
+
+    def test_generate_fails_once_running_shards_finish_after_an_error(self, mock_message_bus):
+        spec = WorldSpec(districts=("Chiba", "Ninsei"), faction_tiers=("gangs",), concurrency=2)
+        generated = ShardedWorldGenerator(mock_message_bus, spec).generate()
+
+        mock_message_bus.runs[0][2].set_exception(ConnectionError("offline"))
+        assert not generated.done()
+        finish_run(mock_message_bus, 1, ["The Chat"])
+
+        with pytest.raises(ConnectionError, match="offline"):
+            generated.result()
+        assert len(mock_message_bus.runs) == 2  # noqa: PLR2004
+
+    def test_generate_fails_when_a_shard_registers_nothing(self, mock_message_bus):
+        spec = WorldSpec(districts=("Chiba",), faction_tiers=("gangs",))
+        generated = ShardedWorldGenerator(mock_message_bus, spec).generate()
+
+        mock_message_bus.runs[0][2].set_result(None)
+        finish_run(mock_message_bus, 1, ["The Chat"])
+
+        with pytest.raises(RuntimeError, match="without registering factions for gangs"):
+            generated.result()
+
+    def test_generate_against_stand_in(self):
+        script = StandInScript(queued_seconds=0.01, in_progress_seconds=0.02, after_tool_outputs_seconds=0.01)
+        spec = WorldSpec(
+            districts=("Chiba", "Ninsei", "Night City"),
+            faction_tiers=("gangs", "zaibatsus"),
+            locations_per_district=12,
+            factions_per_tier=6,
+            max_per_shard=5,
+        )
+
+        with AssistantsStandIn(script) as stand_in:
+            client_manager = OpenAIClientManager("test-key", ClientOptions(base_url=stand_in.base_url))
+            polling = PollingStrategy(PollingOptions(initial_interval=0.01, max_interval=0.05))
+            message_bus = AssistantMessageBus("test-key", "asst", client_manager, polling=polling)
+
+            world = ShardedWorldGenerator(message_bus, spec).generate().result(timeout=20)
+            message_bus.close()
+
+        assert len(world["factions"]) == 12  # noqa: PLR2004
+        assert len(world["locations"]) == 36  # noqa: PLR2004